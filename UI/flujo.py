@@ -26,14 +26,13 @@ from functools import partial
 from datetime import datetime
 import tempfile
 import os
-import json
 import subprocess
 from copy import deepcopy
 from xml.dom import minidom
 
 from PyQt5 import QtCore, QtGui, QtSvg, QtWidgets
 
-from lib import unidades
+from lib import projectFile, unidades
 from lib.project import Project
 from lib.thread import WaitforClick
 from lib.config import Preferences
@@ -63,7 +62,7 @@ class SelectStreamProject(QtWidgets.QDialog):
             "pychemqt", "Select pychemqt project file")
         patrones = []
         patrones.append(QtWidgets.QApplication.translate(
-            "pychemqt", "pychemqt project file") + " (*.pcq)")
+            "pychemqt", "pychemqt project file") + " (*.pcq *.pcz)")
         patron = ";;".join(patrones)
         self.filename = PathConfig(label + ":", msg=msg, patron=patron)
         self.filename.valueChanged.connect(self.changeproject)
@@ -91,8 +90,7 @@ class SelectStreamProject(QtWidgets.QDialog):
         self.status.setText(st)
         QtWidgets.QApplication.processEvents()
         try:
-            with open(path, "r") as file:
-                self.project = json.load(file)
+            self.project = projectFile.load(path)
         except Exception as e:
             print(e)
             self.status.setText(QtGui.QApplication.translate(
@@ -32,8 +32,9 @@ from UI import newComponent, flujo, wizard, plots, viewComponents
 import plots as charts
 from UI.widgets import createAction, ClickableLabel, TreeEquipment, FlowLayout
 from lib.config import (conf_dir, QTSETTING_FILE, setMainWindowConfig,
-                        IMAGE_PATH)
+                        IMAGE_PATH, reloadPreferences)
 from lib.project import Project
+from lib import projectFile
 from lib.EoS import K, H
 from equipment import *  # noqa
 from tools import (UI_confComponents, UI_Preferences, UI_confTransport,
@@ -1149,36 +1150,40 @@ class UI_pychemqt(QtWidgets.QMainWindow):
         if not self.filename[indice]:
             self.fileSaveAs()
         else:
-            with open(self.filename[indice], "w") as file:
-                data = {}
-                self.getScene(indice).project.writeToJSON(data)
-
-                PFD = {}
-                win = self.centralwidget.currentWidget().subWindowList()[0]
-                PFD["x"] = win.pos().x()
-                PFD["y"] = win.pos().y()
-                PFD["height"] = win.size().height()
-                PFD["width"] = win.size().width()
-                self.currentScene.writeToJSON(PFD)
-                data["PFD"] = PFD
-
-                other = {}
-                ventanas = self.centralwidget.currentWidget().subWindowList()
-                for ind, win in enumerate(ventanas[1:]):
-                    ventana = {}
-                    ventana["class"] = window.widget().__class__
-                    ventana["x"] = win.pos().x()
-                    ventana["y"] = win.pos().y()
-                    ventana["height"] = win.size().height()
-                    vetnana["width"] = win.size().width()
-
-                    widget = {}
-                    win.widget().writeToJSON(widget)
-                    ventana["window"] = widget
-                    other["ind"] = ventana
-                data["other"] = other
-
-                json.dump(data, file, indent=4)
+            data = {}
+            self.getScene(indice).project.writeToJSON(data)
+
+            PFD = {}
+            win = self.centralwidget.currentWidget().subWindowList()[0]
+            PFD["x"] = win.pos().x()
+            PFD["y"] = win.pos().y()
+            PFD["height"] = win.size().height()
+            PFD["width"] = win.size().width()
+            self.currentScene.writeToJSON(PFD)
+            data["PFD"] = PFD
+
+            other = {}
+            ventanas = self.centralwidget.currentWidget().subWindowList()
+            for ind, win in enumerate(ventanas[1:]):
+                ventana = {}
+                ventana["class"] = window.widget().__class__
+                ventana["x"] = win.pos().x()
+                ventana["y"] = win.pos().y()
+                ventana["height"] = win.size().height()
+                vetnana["width"] = win.size().width()
+
+                widget = {}
+                win.widget().writeToJSON(widget)
+                ventana["window"] = widget
+                other["ind"] = ventana
+            data["other"] = other
+
+            # The compact binary format is selected by the file extension
+            if self.filename[indice].split(".")[-1] == "pcz":
+                projectFile.dump(data, self.filename[indice])
+            else:
+                with open(self.filename[indice], "w") as file:
+                    json.dump(data, file, indent=4)
 
             self.dirty[self.idTab] = False
             self.updateStatus(
@@ -1194,11 +1199,15 @@ class UI_pychemqt(QtWidgets.QMainWindow):
         fname = QtWidgets.QFileDialog.getSaveFileName(
             self,
             QtWidgets.QApplication.translate("pychemqt", "Save project"),
-            dir, "pychemqt project file (*.pcq)")
-        if fname:
+            dir, "pychemqt project file (*.pcq);;"
+            "pychemqt compact project file (*.pcz)")
+        if fname[0]:
             name = fname[0]
-            if name.split(".")[-1] != "pcq":
-                name += ".pcq"
+            if name.split(".")[-1] not in ("pcq", "pcz"):
+                if "pcz" in fname[1]:
+                    name += ".pcz"
+                else:
+                    name += ".pcq"
             self.addRecentFile(name)
             self.filename[indice] = name
             self.fileSave(indice)
@@ -1220,7 +1229,7 @@ class UI_pychemqt(QtWidgets.QMainWindow):
                 self,
                 QtWidgets.QApplication.translate("pychemqt", "Open project"),
                 dir, QtWidgets.QApplication.translate(
-                    "pychemqt", "pychemqt project file") + " (*.pcq)")[0]
+                    "pychemqt", "pychemqt project file") + " (*.pcq *.pcz)")[0]
         if fname:
             try:
                 self.loadFile(fname)
@@ -1249,8 +1258,8 @@ class UI_pychemqt(QtWidgets.QMainWindow):
             self.filename.append(fname)
             self.addRecentFile(fname)
 
-            with open(fname, "r") as file:
-                data = json.load(file)
+            # The compact format read the objects of project on demand
+            data = projectFile.load(fname)
 
             project = Project()
             project.readFromJSON(data)
@@ -1403,6 +1412,7 @@ class UI_pychemqt(QtWidgets.QMainWindow):
         if dialog.exec_():
             preferences = dialog.value()
             preferences.write(open(conf_dir+"pychemqtrc", "w"))
+            reloadPreferences()
             self.Preferences = ConfigParser()
             self.Preferences.read(conf_dir+"pychemqtrc")
             self.updateStatus(QtWidgets.QApplication.translate(
@@ -23,17 +23,22 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 # - Flash
 # - Tower
 # - ColumnFUG
+# - ColumnMESH
 ###############################################################################
 
 
 import os
 
+from numpy import dot, isfinite, zeros
+from numpy.linalg import LinAlgError
 from scipy import log, exp, pi, log10, linspace
 from scipy.optimize import fsolve
 from PyQt5.QtWidgets import QApplication
 
 from lib import unidades
 from lib.corriente import Corriente
+from lib.mesh import EoSKValues, IdealEnthalpy, naphtaliSandholm, wangHenke
+from lib.streamState import StreamState
 from lib.plot import Plot
 from equipment.parents import equipment
 from equipment.heatExchanger import Heat_Exchanger
@@ -714,16 +719,15 @@ class ColumnFUG(Tower):
                 d.append(caudal_i*0.5)
                 b.append(caudal_i*0.5)
 
-        while True:
+        # The trial products are evaluated as light stream states, the full
+        # streams are only created for the output
+        feed=self.entrada.state(P=self.Pd)
+        for it in range(100):
             bo=b
             do=d
 
-            xt=[Q/sum(d) for Q in d]
-            xb=[Q/sum(b) for Q in b]
-            Qt=sum([di*comp.M for di, comp in zip(d, self.entrada.componente)])
-            Qb=sum([bi*comp.M for bi, comp in zip(b, self.entrada.componente)])
-            destilado=Corriente(T=self.entrada.T, P=self.Pd, caudalMasico=Qt, fraccionMolar=xt)
-            residuo=Corriente(T=self.entrada.T, P=self.Pd, caudalMasico=Qb, fraccionMolar=xb)
+            destilado=feed.clone(caudalunitariomolar=d)
+            residuo=feed.clone(caudalunitariomolar=b)
             #TODO: Add algorithm to calculate Pd and condenser type fig 12.4 pag 230
 
             #Fenske equation for Nmin
@@ -744,9 +748,11 @@ class ColumnFUG(Tower):
 
             res=sum([abs(inicial-final) for inicial, final in zip(bo, b)]) + sum([abs(inicial-final) for inicial, final in zip(do, d)])
             if res<1e-10:
-                self.Nmin=Nmin-self.kwargs["condenser"]+1
                 break
-
+        else:
+            self.status=3
+            self.msg=QApplication.translate("pychemqt", "Fenske distribution not converged")
+        self.Nmin=Nmin-self.kwargs["condenser"]+1
 
         #Calculo de la razón de reflujo mínima, ecuación de Underwood
         alfa=self.entrada.eos.Ki[self.kwargs["LK"]]/self.entrada.eos.Ki[self.kwargs["HK"]]
@@ -778,18 +784,18 @@ class ColumnFUG(Tower):
             Tout=destilado.eos._Bubble_T()
         Tin=destilado.eos._Dew_T()
 
-        SalidaDestilado=destilado.clone(T=Tout)
+        SalidaDestilado=self.entrada.clone(T=Tout, P=self.Pd, caudalUnitarioMolar=list(destilado.caudalunitariomolar))
 
 #FIXME: o el ejemplo está mal planteado o este valor es ilógico
         ToutReboiler=residuo.eos._Bubble_T()
         ToutReboiler2=residuo.eos._Dew_T()
         print((ToutReboiler, ToutReboiler2, Tin, Tout))
-        SalidaResiduo=residuo.clone(T=ToutReboiler)
+        SalidaResiduo=self.entrada.clone(T=ToutReboiler, P=self.Pd, caudalUnitarioMolar=list(residuo.caudalunitariomolar))
         self.salida=[SalidaDestilado, SalidaResiduo]
 
-        inCondenser=destilado.clone(T=Tin, P=self.entrada.P, split=self.RCalculada+1)
-        outCondenser=destilado.clone(T=Tout, P=self.entrada.P, split=self.RCalculada+1)
-        self.DutyCondenser=unidades.Power(outCondenser.h-inCondenser.h)
+        inCondenser=destilado.clone(T=Tin, P=self.entrada.P)
+        outCondenser=destilado.clone(T=Tout, P=self.entrada.P)
+        self.DutyCondenser=unidades.Power((outCondenser.h-inCondenser.h)*destilado.caudalmasico*(self.RCalculada+1))
         self.DutyReboiler=unidades.Power(SalidaDestilado.h+SalidaResiduo.h-self.DutyCondenser-self.entrada.h)
 
         self.DestiladoT=SalidaDestilado.T
@@ -864,6 +870,340 @@ class ColumnFUG(Tower):
 
 
 
+class ColumnMESH(Tower):
+    """Rigorous distillation column, solved with the equilibrium stage model
+    by the simultaneous correction method of Naphtali-Sandholm
+
+    Parameters:
+        entrada: Corriente instance to define the input stream to equipment
+        N: Number of stages, including condenser and reboiler
+        feed: Feed stage, counted from top with the condenser as stage 1
+        condenser: Condenser type
+            0   -   Total
+            1   -   Partial
+        R: Reflux ratio
+        D: Distillate molar flow
+        Pd: Top pressure of column, default the pressure of input stream
+        DeltaP: Pressure drop in column
+
+    The phase equilibrium use the equation of state configured for the input
+    stream, and the enthalpy of phases are calculated as ideal mixtures. The
+    initial profile of column is estimated with the shortcut method, the
+    Fenske distribution of components between products and constant molar
+    overflow, refined with the bubble point method of Wang-Henke.
+
+    Cost parameters as in ColumnFUG
+
+    The equipment has no edition dialog yet, so it isn't registered in the
+    equipment list of flowsheet and it's only available as library class
+
+    >>> from numpy import allclose
+    >>> from lib.corriente import Corriente
+    >>> blend = Corriente(T=300, P=1e6, caudalMolar=1, ids=[4, 5, 6],
+    ...                   fraccionMolar=[0.3, 0.4, 0.3], K="Peng-Robinson",
+    ...                   H="Peng-Robinson")
+    >>> column = ColumnMESH(entrada=blend, N=10, feed=5, R=2, D=0.3)
+    >>> column.status, column.msg, int(column.iterations)
+    (1, '', 4)
+    >>> destilado, residuo = column.salida
+    >>> salida = [d+b for d, b in zip(destilado.caudalunitariomolar,
+    ...                                residuo.caudalunitariomolar)]
+    >>> allclose(salida, blend.caudalunitariomolar)
+    True
+    >>> print(" ".join("%0.4f" % x for x in destilado.fraccion))
+    0.7801 0.1713 0.0486
+    >>> print(" ".join("%0.4f" % x for x in residuo.fraccion))
+    0.0942 0.4980 0.4077
+
+    Column with 40 stages and 10 components
+    >>> ids = [2, 3, 4, 5, 6, 7, 8, 9, 10, 11]
+    >>> z = [0.05, 0.1, 0.15, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1, 0.1]
+    >>> feed = Corriente(T=350, P=1013250, caudalMolar=1, ids=ids,
+    ...                  fraccionMolar=z, K="Peng-Robinson", H="Peng-Robinson")
+    >>> column = ColumnMESH(entrada=feed, N=40, feed=20, R=2, D=0.4)
+    >>> column.status, int(column.iterations)
+    (1, 4)
+    >>> destilado, residuo = column.salida
+    >>> salida = [d+b for d, b in zip(destilado.caudalunitariomolar,
+    ...                                residuo.caudalunitariomolar)]
+    >>> allclose(salida, feed.caudalunitariomolar)
+    True
+    >>> "%0.2f %0.2f" % (destilado.T, residuo.T)
+    '217.09 393.33'
+
+    The solver failures are reported in the status, as a vapor feed without
+    enough reflux to have vapor flow below the feed stage
+    >>> blend(T=340, P=101325)
+    >>> column = ColumnMESH(entrada=blend, N=10, feed=5, R=2, D=0.3)
+    >>> column.status, column.msg
+    (3, 'not converged')
+    """
+    title = QApplication.translate("pychemqt", "Column (Rigorous method)")
+    help = ""
+    kwargs = {"entrada": None,
+              "N": 0,
+              "feed": 0,
+              "condenser": 0,
+              "R": 0.0,
+              "D": 0.0,
+              "Pd": 0.0,
+              "DeltaP": 0.0,
+
+              "f_install": 3,
+              "Base_index": 0.0,
+              "Current_index": 0.0,
+              "proceso": 0,
+              "tipo": 0,
+              "tipo_pisos": 0,
+              "material_columna": 0,
+              "material_pisos": 0,
+              "C_unitario": 0.0,
+              "Di": 0.0,
+              "h": 0.0,
+              "W": 0.0,
+              "Wb": 0.0}
+    kwargsInput = ("entrada", )
+    kwargsValue = ("N", "feed", "R", "D", "Pd", "DeltaP")
+    kwargsList = ("condenser", )
+    calculateValue = ("DutyCondenser", "DutyReboiler", "iterations")
+    indiceCostos = 3
+
+    TEXT_CONDENSER = [QApplication.translate("pychemqt", "Total"),
+                      QApplication.translate("pychemqt", "Partial")]
+
+    @property
+    def isCalculable(self):
+        Tower.isCalculable(self)
+
+        if not self.kwargs["entrada"]:
+            self.msg = QApplication.translate("pychemqt", "undefined input")
+            self.status = 0
+            return
+        if self.kwargs["N"] < 3:
+            self.msg = QApplication.translate(
+                "pychemqt", "undefined stage number")
+            self.status = 0
+            return
+        if not 1 < self.kwargs["feed"] < self.kwargs["N"]:
+            self.msg = QApplication.translate(
+                "pychemqt", "feed stage must be between condenser and reboiler")
+            self.status = 0
+            return
+        if not self.kwargs["R"]:
+            self.msg = QApplication.translate(
+                "pychemqt", "undefined reflux ratio condition")
+            self.status = 0
+            return
+        if not 0 < self.kwargs["D"] < self.kwargs["entrada"].caudalmolar:
+            self.msg = QApplication.translate(
+                "pychemqt", "distillate flow must be lower than input flow")
+            self.status = 0
+            return
+
+        self.msg = ""
+        self.status = 1
+        return True
+
+    def calculo(self):
+        self.entrada = self.kwargs["entrada"]
+        N = int(self.kwargs["N"])
+        feed = int(self.kwargs["feed"])-1
+        total = self.kwargs["condenser"] == 0
+        R = self.kwargs["R"]
+        D = self.kwargs["D"]
+        self.RCalculada = unidades.Dimensionless(R)
+        self.NTray = unidades.Dimensionless(N-2)
+        self.N_feed = unidades.Dimensionless(feed+1)
+        if self.kwargs["Pd"]:
+            self.Pd = unidades.Pressure(self.kwargs["Pd"])
+        else:
+            self.Pd = self.entrada.P
+        self.DeltaP = unidades.Pressure(self.kwargs["DeltaP"])
+        P = self.Pd+linspace(0, self.DeltaP, N)
+
+        # Input stream with the phase equilibrium of column
+        K = self.entrada._eosModels()[0]
+        entrada = StreamState(self.entrada.T, self.entrada.P, self.entrada.ids,
+                              self.entrada.caudalunitariomolar, K=K)
+        B = entrada.caudalmolar-D
+        kvalues = EoSKValues(K, entrada.mezcla)
+        enthalpy = IdealEnthalpy(entrada.componente)
+
+        f = zeros((N, len(entrada.ids)))
+        f[feed] = entrada.caudalunitariomolar
+        HF = zeros(N)
+        Tf = [entrada.T]
+        HF[feed] = entrada.caudalmolar*(
+            (1-entrada.x)*dot(entrada.xi, enthalpy.liquid(Tf)[0]) +
+            entrada.x*dot(entrada.yi, enthalpy.vapor(Tf)[0]))
+
+        try:
+            l, v, T = self._profile(
+                entrada, f, P, R, D, feed, total, kvalues)
+            l, v, T, Q, info = naphtaliSandholm(
+                f, HF, P, kvalues, enthalpy, l, v, T, R, B, total)
+        except (ValueError, ArithmeticError, LinAlgError):
+            info = None
+        if info is None or not (isfinite(l).all() and isfinite(T).all()):
+            self.msg = QApplication.translate(
+                "pychemqt", "column profile can't be solved")
+            self.status = 0
+            self.salida = []
+            return
+
+        self.iterations = unidades.Dimensionless(info["iterations"])
+        if not info["converged"]:
+            self.msg = QApplication.translate("pychemqt", "not converged")
+            self.status = 3
+
+        if total:
+            destilado = l[0]/R
+        else:
+            destilado = v[0]
+        SalidaDestilado = self.entrada.clone(
+            T=T[0], P=P[0], caudalUnitarioMolar=list(destilado))
+        SalidaResiduo = self.entrada.clone(
+            T=T[-1], P=P[-1], caudalUnitarioMolar=list(l[-1]))
+        self.salida = [SalidaDestilado, SalidaResiduo]
+
+        self.DutyCondenser = unidades.Power(Q[0])
+        self.DutyReboiler = unidades.Power(Q[1])
+        self.Tstage = [unidades.Temperature(t) for t in T]
+        self.Pstage = [unidades.Pressure(p) for p in P]
+        self.Lstage = [unidades.MolarFlow(L) for L in l.sum(axis=1)]
+        self.Vstage = [unidades.MolarFlow(V) for V in v.sum(axis=1)]
+        self.xstage = l/l.sum(axis=1)[:, None]
+
+        self.DestiladoT = SalidaDestilado.T
+        self.DestiladoP = SalidaDestilado.P
+        self.DestiladoMassFlow = SalidaDestilado.caudalmasico
+        self.DestiladoMolarComposition = SalidaDestilado.fraccion
+        self.ResiduoT = SalidaResiduo.T
+        self.ResiduoP = SalidaResiduo.P
+        self.ResiduoMassFlow = SalidaResiduo.caudalmasico
+        self.ResiduoMolarComposition = SalidaResiduo.fraccion
+
+    def _profile(self, entrada, f, P, R, D, feed, total, kvalues):
+        """Initial estimation of column profile with the shortcut method,
+        the products composition with the Fenske equation for the half of
+        stages, the temperatures interpolated between the saturation points
+        of products and the flows with constant molar overflow, then the
+        composition and temperatures are refined with the bubble point
+        method with ideal equilibrium ratios"""
+        N = len(P)
+        z = entrada.caudalunitariomolar
+        lnK = log(entrada.Ki)*N/2.
+
+        # Fenske distribution, di/bi = θ·Ki^Nm, with θ solved by bisection
+        # for the distillate flow
+        lo = -lnK.max()-50
+        hi = -lnK.min()+50
+        for i in range(100):
+            u = (lo+hi)/2
+            d = z/(1+exp(-u-lnK))
+            if d.sum() > D:
+                hi = u
+            else:
+                lo = u
+        b = z-d
+
+        top = entrada.clone(T=entrada.T, P=P[0], caudalunitariomolar=d)
+        bottom = entrada.clone(T=entrada.T, P=P[-1], caudalunitariomolar=b)
+        try:
+            if total:
+                Ttop = top._Bubble_T()
+            else:
+                Ttop = top._Dew_T()
+            Tbottom = bottom._Bubble_T()
+        except (ValueError, ArithmeticError):
+            Ttop = Tbottom = entrada.T
+        T = linspace(Ttop, Tbottom, N)
+
+        # Constant molar overflow
+        q = 1-entrada.x
+        F = entrada.caudalmolar
+        L = zeros(N)
+        V = zeros(N)
+        L[:feed] = R*D
+        L[feed:] = R*D+q*F
+        L[-1] = F-D
+        V[1:feed+1] = (R+1)*D
+        V[feed+1:] = max((R+1)*D-(1-q)*F, 0.1*D)
+        if not total:
+            V[0] = D
+        return wangHenke(f, P, kvalues.lnKwilson, L, V, T, R, total)
+
+    def propTxt(self):
+        txt = "#---------------"
+        txt += QApplication.translate("pychemqt", "Calculate properties")
+        txt += "-----------------#" + os.linesep
+        txt += self.propertiesToText(range(3))
+        txt += QApplication.translate(
+            "pychemqt", "Top Output Molar Composition") + os.linesep
+        for cmp, xi in zip(self.salida[0].componente, self.salida[0].fraccion):
+            txt += "    %-21s\t %0.4f" % (cmp.nombre, xi) + os.linesep
+
+        txt += os.linesep
+        txt += self.propertiesToText(range(4, 7))
+        txt += QApplication.translate(
+            "pychemqt", "Bottom Output Molar Composition") + os.linesep
+        for cmp, xi in zip(self.salida[1].componente, self.salida[1].fraccion):
+            txt += "    %-21s\t %0.4f" % (cmp.nombre, xi) + os.linesep
+
+        txt += os.linesep
+        txt += self.propertiesToText(range(8, 15))
+
+        txt += os.linesep + "#" + QApplication.translate(
+            "pychemqt", "Column profile") + os.linesep
+        txt += "%5s %16s %20s %20s" % ("N", "T", "L", "V") + os.linesep
+        for i, (T, L, V) in enumerate(
+                zip(self.Tstage, self.Lstage, self.Vstage)):
+            txt += "%5i %16s %20s %20s" % (i+1, T.str, L.str, V.str)
+            txt += os.linesep
+        return txt
+
+    @classmethod
+    def propertiesEquipment(cls):
+        l = [(QApplication.translate("pychemqt", "Top Output Temperature"),
+              "DestiladoT", unidades.Temperature),
+             (QApplication.translate("pychemqt", "Top Output Pressure"),
+              "DestiladoP", unidades.Pressure),
+             (QApplication.translate("pychemqt", "Top Output Mass Flow"),
+              "DestiladoMassFlow", unidades.MassFlow),
+             (QApplication.translate(
+                 "pychemqt", "Top Output Molar Composition"),
+              "DestiladoMolarComposition", unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Bottom Output Temperature"),
+              "ResiduoT", unidades.Temperature),
+             (QApplication.translate("pychemqt", "Bottom Output Pressure"),
+              "ResiduoP", unidades.Pressure),
+             (QApplication.translate("pychemqt", "Bottom Output Mass Flow"),
+              "ResiduoMassFlow", unidades.MassFlow),
+             (QApplication.translate(
+                 "pychemqt", "Bottom Output Molar Composition"),
+              "ResiduoMolarComposition", unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Condenser type"),
+              ("TEXT_CONDENSER", "condenser"), str),
+             (QApplication.translate("pychemqt", "Reflux Ratio"),
+              "RCalculada", unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Stage Number"),
+              "NTray", unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Feed Stage"),
+              "N_feed", unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Condenser Duty"),
+              "DutyCondenser", unidades.Power),
+             (QApplication.translate("pychemqt", "Reboiler Duty"),
+              "DutyReboiler", unidades.Power),
+             (QApplication.translate("pychemqt", "Iterations"),
+              "iterations", unidades.Dimensionless)]
+        return l
+
+    def propertiesListTitle(self, index):
+        """Define los titulos para los popup de listas"""
+        l = [comp.nombre for comp in self.kwargs["entrada"].componente]
+        return l
+
+
 def batch():
     # Plugging-in contant values
     D = 10
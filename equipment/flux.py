@@ -29,7 +29,6 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 import os
 
 from PyQt5.QtWidgets import QApplication
-from scipy.optimize import fsolve
 
 from lib.corriente import Corriente
 from lib import unidades
@@ -208,7 +207,7 @@ class Divider(equipment):
     def readStatefromJSON(self, state):
         """Load instance parameter from saved file"""
         self.criterio = state["criterio"]
-        self.split = (unidades.Dimensionless(x) for x in state["split"])
+        self.split = [unidades.Dimensionless(x) for x in state["split"]]
         self.deltaP = unidades.DeltaP(state["deltaP"])
         self.inputMolarFlow = unidades.MolarFlow(state["inputMolarFlow"])
         self.inputMassFlow = unidades.MassFlow(state["inputMassFlow"])
@@ -238,12 +237,32 @@ class Mixer(equipment):
         Pout: Output pressure
 
     >>> agua=Corriente(T=300, P=101325, caudalMasico=1, ids=[62],
-                       fraccionMasica=[1.])
+    ...                fraccionMasica=[1.])
     >>> agua2=Corriente(T=350, P=101325, caudalMasico=5, ids=[62],
-                        fraccionMasica=[1.])
+    ...                 fraccionMasica=[1.])
     >>> mezclador=Mixer(entrada=[agua, agua2], criterio=0)
-    >>> print(mezclador.salida[0].T)
-    341.6818851215901
+    >>> print("%0.2f" % mezclador.salida[0].T)
+    341.68
+
+    The output stream is defined with its enthalpy, with the components and
+    thermodynamic options of input streams
+
+    >>> liq = Corriente(T=130, P=4655160, caudalMasico=1, ids=[208],
+    ...                 fraccionMolar=[1.], MEoS=True)
+    >>> gas = Corriente(T=250, P=4655160, caudalMasico=1, ids=[208],
+    ...                 fraccionMolar=[1.], MEoS=True)
+    >>> mezclador = Mixer(entrada=[liq, gas], criterio=0)
+    >>> salida = mezclador.salida[0]
+    >>> print("%s %0.2f %0.1f" % (salida._thermo, salida.T, salida.x))
+    meos 148.06 1.0
+    >>> print("%0.6g %0.6g" % (salida.h, liq.h+gas.h))
+    17133.2 17133.2
+
+    If the output stream can't be solved the mixer report its status
+
+    >>> mezclador = Mixer(entrada=[liq, gas], criterio=2, Pout=1e10)
+    >>> print("%i %s %s" % (mezclador.status, mezclador.msg, mezclador.salida))
+    5 Solution don´t converge []
     """
     title = QApplication.translate("pychemqt", "Mixer")
     help = ""
@@ -330,29 +349,34 @@ class Mixer(equipment):
                 Pout = sum(lst, 0.0) / len(lst)
         self.Pout = unidades.Pressure(Pout)
 
-        # Heat balance for calculate output temperature
+        # Heat balance for calculate output temperature, the output stream
+        # is defined directly with its enthalpy
         h_in = 0
-        To = 0
         massUnitFlow = [0]*len(self.entrada[0].fraccion)
         for entrada in self.entrada:
             if entrada.status:
                 h_in += entrada.h
-                To += entrada.T*entrada.caudalmasico
                 for i, caudal in enumerate(entrada.caudalunitariomasico):
                     massUnitFlow[i] += caudal
-        To /= sum(massUnitFlow)
 
-        def f(T):
-            output = Corriente(T=T, P=self.Pout,
-                               caudalUnitarioMasico=massUnitFlow)
-            return output.h-h_in
-        T = fsolve(f, To)[0]
+        # The output stream use the thermodynamic options of inputs
+        thermo = {}
+        for key in ("K", "alfa", "mix", "H", "Cp_ideal", "MEoS", "iapws",
+                    "GERG", "freesteam", "coolProp", "refprop"):
+            thermo[key] = self.entrada[0].kwargs[key]
 
         # TODO: Add solid mixer capability
         if self.entrada[0].solido:
             pass
 
-        salida = Corriente(T=T, P=self.Pout, caudalUnitarioMasico=massUnitFlow)
+        salida = Corriente(P=self.Pout, h=h_in/sum(massUnitFlow),
+                           caudalUnitarioMasico=massUnitFlow,
+                           ids=self.entrada[0].ids, **thermo)
+        if salida.status not in (1, 3):
+            self.msg = salida.msg
+            self.status = salida.status
+            self.salida = []
+            return
         self.salida = [salida]
 
         # Calculate other properties
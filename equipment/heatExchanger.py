@@ -32,7 +32,7 @@ import os
 from PyQt5.QtWidgets import QApplication
 from scipy import sqrt, exp, log, pi, arccos, sin, cos, tanh
 from scipy.constants import g
-from scipy.optimize import fsolve
+from numpy import errstate, where
 
 from lib import unidades
 from lib.adimensional import Re, Pr, Gr, Gz
@@ -146,18 +146,15 @@ class Heat_Exchanger(equipment):
             self.salida = [entrada.clone(T=Tout, P=entrada.P-self.deltaP)]
             self.HeatCalc = unidades.Power(self.salida[0].h-entrada.h)
         else:
-            if self.modo == 2:
-                self.HeatCalc = unidades.Power(0)
-            else:
+            if self.modo == 3:
                 self.HeatCalc = unidades.Power(A*U*(Text-entrada.T))
 
-            def f():
-                output = entrada.clone(T=T, P=entrada.P-self.deltaP)
-                return output.h-entrada.h-self.HeatCalc
-            T = fsolve(f, entrada.T)[0]
-            if T > max(Text, entrada.T) or T < min(Text, entrada.T):
-                T = self.Text
-            self.salida = [entrada.clone(T=T, P=entrada.P-self.deltaP)]
+            h = (entrada.h+self.HeatCalc)/entrada.caudalmasico
+            output = entrada.clone(h=h, P=entrada.P-self.deltaP)
+            if self.modo == 3 and (output.T > max(Text, entrada.T) or
+                                   output.T < min(Text, entrada.T)):
+                output = entrada.clone(T=Text, P=entrada.P-self.deltaP)
+            self.salida = [output]
 
         self.Tin = entrada.T
         self.ToutCalc = self.salida[0].T
@@ -346,10 +343,8 @@ class Fired_Heater(equipment):
 
         if self.Hmax and Heat > self.Hmax:
             self.Heat = unidades.Power(self.Hmax)
-            To = (entrada.T+self.Tout)/2
-            T = fsolve(lambda T: entrada.clone(
-                T=T, P=entrada.P-self.deltaP).h-Ho-self.Hmax, To)[0]
-            self.salida = [entrada.clone(T=T, P=entrada.P-self.deltaP)]
+            h = (Ho+self.Hmax)/entrada.caudalmasico
+            self.salida = [entrada.clone(h=h, P=entrada.P-self.deltaP)]
         else:
             self.Heat = Heat
             self.salida = [salida]
@@ -543,7 +538,8 @@ class Hairpin(equipment):
             2 - Vertical, internal up
         metodo:
             0 - Mean temperature
-            1 - Split the pipe in segments
+            1 - Incremental, split the duty in zones
+        nZone: Number of zones for incremental method
         tubesideLaminar: Method to calculate the global heat transfer
             coefficient in laminar flow for tubeside
             0 - Eubank-Proctor
@@ -600,6 +596,21 @@ class Hairpin(equipment):
     27783.3 1277.55
     >>> print("%6g %6g" % (Cambiador.hTube.kWm2K, Cambiador.hAnnulli.kWm2K))
     1555.53 52.8267
+
+    The incremental method split the duty in zones with local properties,
+    the result is almost independent of the number of zones
+
+    >>> kw = {"modo": 1, "DiTube": 0.0525, "DeTube": 0.0603, "LTube": 2.5,
+    ...       "DeeTube": 0.0779, "kTube": 54, "rTube": 0.0459994e-3,
+    ...       "annulliFouling": 0.000352, "tubeFouling": 0.000176}
+    >>> Cambiador = Hairpin(entradaTubo=caliente, entradaExterior=fria,
+    ...                     metodo=1, nZone=10, **kw)
+    >>> print("%0.1f %0.2f" % (Cambiador.Q, Cambiador.outAnnulli.T))
+    1594.2 295.89
+    >>> Cambiador = Hairpin(entradaTubo=caliente, entradaExterior=fria,
+    ...                     metodo=1, nZone=200, **kw)
+    >>> print("%0.1f %0.2f" % (Cambiador.Q, Cambiador.outAnnulli.T))
+    1594.2 295.89
     """
     title = QApplication.translate("pychemqt", "Hairpin Heat Exchanger")
     help = ""
@@ -613,6 +624,7 @@ class Hairpin(equipment):
         "tubesideLaminar": 0,
         "tubesideTurbulent": 0,
         "metodo": 0,
+        "nZone": 20,
         "phase": 0,
 
         "DeeTube": 0.0,
@@ -847,15 +859,77 @@ class Hairpin(equipment):
                 QTube = -self.Q
                 QAnnulli = self.Q
 
-            def f(T):
-                return inTube.clone(T=T).h-inTube.h+QTube
-            T = fsolve(f, inTube.T)[0]
-            self.outTube = inTube.clone(T=T)
+            self.outTube = inTube.clone(
+                h=(inTube.h-QTube)/inTube.caudalmasico)
+            self.outAnnulli = inAnnulli.clone(
+                h=(inAnnulli.h-QAnnulli)/inAnnulli.caudalmasico)
+
+        # Incremental method
+        elif self.kwargs["metodo"] == 1:
+            self.ratingZones(inTube, inAnnulli)
+
+    def ratingZones(self, inTube, inAnnulli):
+        """Incremental rating, the duty is split in zones with the local
+        properties and film coefficients of each one"""
+        self.A = unidades.Area(self.L*pi*self.De)
+        tubeHot = inTube.T > inAnnulli.T
+        if tubeHot:
+            hot, cold = inTube, inAnnulli
+        else:
+            hot, cold = inAnnulli, inTube
 
-            def f(T):
-                return inAnnulli.clone(T=T).h-inAnnulli.h+QAnnulli
-            T = fsolve(f, inAnnulli.T)[0]
-            self.outAnnulli = inAnnulli.clone(T=T)
+        def coefficients(hot, cold):
+            if tubeHot:
+                tube, annulli = hot, cold
+            else:
+                tube, annulli = cold, hot
+            hi, vi, rhoi, rei = self._hTubeZones(tube, annulli)
+            ho, vo, rhoo, reo = self._hAnnulliZones(annulli)
+            ni, no = self.rendimientoAletas(hi, ho)
+            return (hi, vi, rhoi, rei), (ho, vo, rhoo, reo), ni, no
+
+        def globalU(hot, cold):
+            tube, annulli, ni, no = coefficients(hot, cold)
+            return self._U(tube[0], ni, annulli[0], no)
+
+        Q, hot, cold, U, dA = zoneRating(
+            PropertyTable(hot, cold.T), PropertyTable(cold, hot.T), globalU,
+            self.A, self.CODE_FLUJO[self.kwargs["flujo"]],
+            self.kwargs["nZone"])
+        self.Q = unidades.Power(Q)
+
+        # Mean values of zones, weighted with its area
+        def mean(value):
+            if self.A == 0 or Q == 0:
+                return value[0]
+            return ((value[:-1]+value[1:])/2*dA).sum()/self.A
+
+        tube, annulli, ni, no = coefficients(hot, cold)
+        Uc = self._U(tube[0], ni, annulli[0], no, fouling=False)
+        self.hTube = unidades.HeatTransfCoef(mean(tube[0]))
+        self.VTube = unidades.Speed(mean(tube[1]))
+        self.rhoTube = unidades.Density(mean(tube[2]))
+        self.ReTube = unidades.Dimensionless(mean(tube[3]))
+        self.hAnnulli = unidades.HeatTransfCoef(mean(annulli[0]))
+        self.VAnnulli = unidades.Speed(mean(annulli[1]))
+        self.rhoAnnulli = unidades.Density(mean(annulli[2]))
+        self.ReAnnulli = unidades.Dimensionless(mean(annulli[3]))
+        self.U = unidades.HeatTransfCoef(mean(U))
+        Uc = mean(Uc)
+        self.CF = unidades.Dimensionless(self.U/Uc)
+        self.OS = unidades.Dimensionless(Uc*(self.fi+self.fo))
+
+        if tubeHot:
+            QTube = self.Q
+            QAnnulli = -self.Q
+        else:
+            QTube = -self.Q
+            QAnnulli = self.Q
+        self.outTube = inTube.clone(h=(inTube.h-QTube)/inTube.caudalmasico)
+        self.outAnnulli = inAnnulli.clone(
+            h=(inAnnulli.h-QAnnulli)/inAnnulli.caudalmasico)
+        self.phaseTube = self.ThermalPhase(inTube, self.outTube)
+        self.phaseAnnulli = self.ThermalPhase(inAnnulli, self.outAnnulli)
 
     def design(self):
         """Design a pipe to meet the specified heat transfer requeriments"""
@@ -893,10 +967,8 @@ class Hairpin(equipment):
                 Qi = abs(self.outTube.h-inTube.h)
                 self.Q = unidades.Power(Qi)
 
-                def f(T):
-                    return inAnnulli.clone(T=T).h-inAnnulli.h-Qi
-                T = fsolve(f, inAnnulli.T)[0]
-                self.outAnnulli = inAnnulli.clone(T=T)
+                self.outAnnulli = inAnnulli.clone(
+                    h=(inAnnulli.h+Qi)/inAnnulli.caudalmasico)
 
             elif self.statusOut == 3:
                 if self.kwargs["annulliTout"]:
@@ -909,10 +981,8 @@ class Hairpin(equipment):
                 Qo = abs(self.outAnnulli.h-inAnnulli.h)
                 self.Q = unidades.Power(Qo)
 
-                def f(T):
-                    return inTube.clone(T=T).h-inTube.h-Qi
-                T = fsolve(f, inTube.T)[0]
-                self.outTube = inTube.clone(T=T)
+                self.outTube = inTube.clone(
+                    h=(inTube.h+Qo)/inTube.caudalmasico)
 
             self.phaseTube = self.ThermalPhase(inTube, self.outTube)
             self.phaseAnnulli = self.ThermalPhase(inAnnulli, self.outAnnulli)
@@ -940,13 +1010,20 @@ class Hairpin(equipment):
         self.A = unidades.Area(self.Q/self.U/DTm)
         self.L = unidades.Length(self.A/2/pi)
 
-    def Ug(self, hi, ni, ho, no):
-        """Calculate global heat transfer coefficient"""
+    def _U(self, hi, ni, ho, no, fouling=True):
+        """Global heat transfer coefficient referred to external area, with
+        or without the fouling resistances"""
         Ui = self.De/self.Di/hi/ni
-        Ufi = self.De*self.fi/self.Di/ni
         k = self.De*log(self.De/self.Di)/2/self.k
-        U = 1/(Ui+Ufi+k+self.fo/no+1/ho/no)
-        Uc = 1/(Ui+k+1/ho/no)
+        if fouling:
+            Ufi = self.De*self.fi/self.Di/ni
+            return 1/(Ui+Ufi+k+self.fo/no+1/ho/no)
+        return 1/(Ui+k+1/ho/no)
+
+    def Ug(self, hi, ni, ho, no):
+        """Calculate global heat transfer coefficient"""
+        U = self._U(hi, ni, ho, no)
+        Uc = self._U(hi, ni, ho, no, fouling=False)
         self.hTube = unidades.HeatTransfCoef(hi)
         self.hAnnulli = unidades.HeatTransfCoef(ho)
         self.U = unidades.HeatTransfCoef(U)
@@ -1099,6 +1176,86 @@ class Hairpin(equipment):
 
         return unidades.HeatTransfCoef(Nu*k/self.Di)
 
+    @staticmethod
+    def _phaseZones(fluid):
+        """Properties of the phase used in the single phase correlations
+        for the nodes of zones, the vapor properties only in the vapor zones,
+        the liquid properties in the liquid and two phases zones"""
+        gas = fluid.x >= 1
+        rho = where(gas, fluid.Gas.rho, fluid.Liquido.rho)
+        mu = where(gas, fluid.Gas.mu, fluid.Liquido.mu)
+        k = where(gas, fluid.Gas.k, fluid.Liquido.k)
+        cp = where(gas, fluid.Gas.cp, fluid.Liquido.cp)
+        return rho, mu, k, cp
+
+    def _hTubeZones(self, fluid, other):
+        """Convection heat transfer coefficient in tubeside for the nodes of
+        zones, fluid and other are the ZoneState of tube and annulli streams,
+        return the arrays of coefficient, speed, density and Reynolds"""
+        with errstate(all="ignore"):
+            rho, mu, k, cp = self._phaseZones(fluid)
+            v = fluid.caudalmasico/rho*4/pi/self.Di**2
+            re = rho*v*self.Di/mu
+            pr = cp*mu/k
+
+            # Without wall temperature the natural convection term is
+            # neglected, as in the mean temperature method
+            L = self.L
+            gz = fluid.caudalmasico*cp/k/L
+            gr = 0
+            if self.kwargs["tubesideLaminar"] == 0:
+                Nu_lam = h_tubeside_laminar_Eubank_Proctor(
+                    Pr=pr, Gz=gz, Gr=gr, D=self.Di, L=L)
+            elif self.kwargs["tubesideLaminar"] == 1:
+                Nu_lam = h_tubeside_laminar_VDI(Re=re, Pr=pr, D=self.Di, L=L)
+            elif self.kwargs["tubesideLaminar"] == 2:
+                Nu_lam = h_tubeside_laminar_Hausen(Gz=gz)
+            elif self.kwargs["tubesideLaminar"] == 3:
+                Nu_lam = h_tubeside_laminar_Sieder_Tate(Gz=gz, Gr=gr)
+
+            if self.kwargs["tubesideTurbulent"] == 0:
+                Nu_tur = h_tubeside_turbulent_Sieder_Tate(Re=re, Pr=pr)
+            elif self.kwargs["tubesideTurbulent"] == 1:
+                Nu_tur = h_tubeside_turbulent_Colburn(Re=re, Pr=pr)
+            elif self.kwargs["tubesideTurbulent"] == 2:
+                Nu_tur = where(
+                    other.T > fluid.T,
+                    h_tubeside_turbulent_Dittus_Boelter(re, pr, True),
+                    h_tubeside_turbulent_Dittus_Boelter(re, pr, False))
+            elif self.kwargs["tubesideTurbulent"] == 3:
+                Nu_tur = h_tubeside_turbulent_ESDU(Re=re, Pr=pr)
+            else:
+                # The VDI correlation is for tube banks, for the single tube
+                # of hairpin use Gnielinski
+                Nu_tur = h_tubeside_turbulent_Gnielinski(
+                    Re=re, Pr=pr, D=self.Di, L=L)
+            Nu = where(re < 2300, Nu_lam, Nu_tur)
+            h = Nu*k/self.Di
+
+            # Condensation zones with Shah correlation
+            condensation = (0 < fluid.x) & (fluid.x < 1) & (other.T < fluid.T)
+            if condensation.any():
+                Nu = h_tube_Condensation_Shah(fluid, self.Di)
+                h = where(condensation, Nu*fluid.Liquido.k/self.Di, h)
+        return h, v, rho, re
+
+    def _hAnnulliZones(self, fluid):
+        """Convection heat transfer coefficient in annulliside for the nodes
+        of zones, return the arrays of coefficient, speed, density and
+        Reynolds"""
+        a = self.Dee/self.De
+        dh = self.Dee-self.De
+        with errstate(all="ignore"):
+            rho, mu, k, cp = self._phaseZones(fluid)
+            v = fluid.caudalmasico/rho*4/pi/(self.Dee**2-self.De**2)
+            re = rho*v*dh/mu
+            pr = cp*mu/k
+
+            Nu = where(re <= 2300, h_anulli_Laminar(re, pr, a), where(
+                re >= 1e4, h_anulli_Turbulent(re, pr, a),
+                h_anulli_Transition(re, pr, a)))
+        return Nu*k/self.Di, v, rho, re
+
     def coste(self):
         self.material = self.kwargs["material"]
         CI = self.kwargs["Current_index"]
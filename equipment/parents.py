@@ -126,12 +126,11 @@ class equipment(Entity):
         """All equipment are callables, so we can instance or add/change
         input value with flexibility"""
         Entity.__call__(self, **kwargs)
-        input = False
-        for key in kwargs:
-            if key in self.kwargsInput:
-                input = True
-                break
-        if self.isCalculable and (self._oldkwargs != self.kwargs or input):
+
+        # The calculation is skipped if the inputs, kwargs and state of input
+        # streams, are the same of the last calculation
+        fingerprint = self.fingerprint()
+        if self.isCalculable and fingerprint != self._fingerprint:
             logging.info('Calculate EQUIPMENT: %s' % self.__class__.__name__)
             kw_new = {}
             for key, value in list(kwargs.items()):
@@ -142,6 +141,7 @@ class equipment(Entity):
             self.calculo()
             if self.statusCoste:
                 self.coste()
+            self._fingerprint = fingerprint
 
     @property
     def isCalculable(self):
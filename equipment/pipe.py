@@ -26,13 +26,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 import os
 
 from PyQt5.QtWidgets import QApplication
+from scipy import arcsin
 from scipy.constants import g, pi
 
 from lib import unidades
-from lib.friction import f_friccion
+from lib.friction import (f_friccion, dP_Lockhart_Martinelli,
+                          dP_Beggs_Brill)
 from lib.adimensional import Re
 from equipment.parents import equipment
-from equipment.heatExchanger import Heat_Exchanger
 
 
 class Pipe(equipment):
@@ -45,7 +46,7 @@ class Pipe(equipment):
             1   -   Water flow (Hazen-Williams equation)
             2   -   Steam flow (Fritzsche equation)
             3   -   Isothermic gas flow
-            4   -   Multiphase flow (Método Baker)
+            4   -   Multiphase flow (Lockhart-Martinelli)
             5   -   Multiphase flow (Método de Beggs and Brill)
         thermal: Thermal mode:
             0   -   Adiabatic
@@ -82,6 +83,13 @@ class Pipe(equipment):
         U: Global heat transfer coeficient for pipe wall
         Q: Heat transfered by pipe wall
 
+    The pipe is calculated marching along its length in segments, with the
+    properties of stream updated in each segment. The length of segments is
+    adapted to the pressure gradient, a short liquid line is solved in a
+    single segment and a compressible or flashing line use more segments.
+    In the segments with two phases the single phase methods use the
+    homogeneous model, the fittings loss is distributed along the pipe.
+
     Coste:
         Only available for steal pipes, Ref Darby pag 217
 
@@ -92,6 +100,30 @@ class Pipe(equipment):
     >>> pipe=Pipe(entrada=agua, metodo=0, l=5, material=material)
     >>> print("%0.4f %6g %6g %6g" % (pipe.Di, pipe.V, pipe.Re, pipe.DeltaP))
     0.1524 0.0626815 9427.99 1.83620
+
+    Isothermal flow of air in a long line, calculated in several segments,
+    compared with the integrated equation for ideal gas
+
+    >>> from math import log
+    >>> from scipy.constants import R
+    >>> aire=Corriente(T=300, P=1e6, caudalMasico=0.5, ids=[475], \
+                       fraccionMolar=[1.])
+    >>> material=["Steel", "Sch. 40", 0.046, '2"', 52.5, 3.91, 60.3, 5.44, \
+                  0.216, 18.9]
+    >>> pipe=Pipe(entrada=aire, metodo=3, l=500, material=material)
+    >>> G = aire.caudalmasico/pipe.seccion
+    >>> P1, P2 = aire.P, pipe.Pout
+    >>> dP = G**2*R*1000*aire.T/aire.M*(pipe.f*pipe.L/pipe.Di+2*log(P1/P2))
+    >>> print("%0.2f %s" % ((P1**2-P2**2)/dP, pipe.nSegment > 1))
+    1.00 True
+
+    With double flow the line is choked when the pressure reach the
+    isothermal sonic limit, G·(RT/M)^0.5
+
+    >>> aire(caudalMasico=1.)
+    >>> pipe(entrada=aire)
+    >>> print(pipe.status, "%0.2f" % pipe.Pout.bar)
+    3 1.41
     """
     title = QApplication.translate("pychemqt", "Pipe")
     help = ""
@@ -116,7 +148,8 @@ class Pipe(equipment):
     kwargsValue = ("l", "h", "C")
     kwargsList = ("metodo", "thermal")
     calculateValue = ("DeltaP", "DeltaP_f", "DeltaP_ac", "DeltaP_h",
-                      "DeltaP_v", "DeltaP_100ft", "V", "f", "Re", "Tout")
+                      "DeltaP_v", "DeltaP_100ft", "V", "f", "Re", "Tout",
+                      "Xout")
     calculateCostos = ("C_adq", "C_inst")
     indiceCostos = 5
     salida = [None]
@@ -126,7 +159,8 @@ class Pipe(equipment):
         QApplication.translate("pychemqt", "Water (Hazen-Williams)"),
         QApplication.translate("pychemqt", "Steam (Fritzsche)"),
         QApplication.translate("pychemqt", "Isotermic gas flow"),
-        QApplication.translate("pychemqt", "Two Phase flow (Baker method)"),
+        QApplication.translate("pychemqt",
+                               "Two Phase flow (Lockhart-Martinelli)"),
         QApplication.translate("pychemqt",
                                "Two Phase flow (Beggs and Brill method)"))
     TEXT_THERMAL = (
@@ -134,6 +168,17 @@ class Pipe(equipment):
         QApplication.translate("pychemqt", "Heat flux"),
         QApplication.translate("pychemqt", "Heat transfer"))
 
+    # Segments control, tolerance of local error in pressure, as fraction
+    # of pressure, and in temperature for segments with heat transfer, K.
+    # The pressure change in a segment is limited to keep the predicted
+    # pressure positive, and the flow is considered choked when the
+    # acceleration take over this fraction of the pressure change
+    MAX_DP = 0.5
+    TOLERANCE = 5e-3
+    TOLERANCE_T = 0.5
+    CHOKE = 0.9
+    MAX_SEGMENTS = 200
+
     @property
     def isCalculable(self):
         materialCoste = ['Stainless Steel (ANSI)', 'Steel Galvanised (ANSI)',
@@ -184,14 +229,15 @@ class Pipe(equipment):
         return True
 
     def calculo(self):
+        entrada = self.kwargs["entrada"]
         self.L = unidades.Length(self.kwargs["l"])
 
-        if self.kwargs["entrada"].x == 0:
-            self.rho = self.kwargs["entrada"].Liquido.rho
-            self.mu = self.kwargs["entrada"].Liquido.mu
+        if entrada.x == 0:
+            self.rho = entrada.Liquido.rho
+            self.mu = entrada.Liquido.mu
         else:
-            self.rho = self.kwargs["entrada"].Gas.rho
-            self.mu = self.kwargs["entrada"].Gas.mu
+            self.rho = entrada.Gas.rho
+            self.mu = entrada.Gas.mu
 
         self.material = self.kwargs["material"][0] + " " + \
             self.kwargs["material"][1]
@@ -203,62 +249,192 @@ class Pipe(equipment):
         self.eD = unidades.Dimensionless(self.rugosidad/self.Di)
         self.seccion = unidades.Area(pi/4*self.Di**2)
         self.A = unidades.Area(pi*self.De*self.L)
-        self.V = unidades.Speed(self.kwargs["entrada"].Q/self.seccion)
+        self.V = unidades.Speed(entrada.Q/self.seccion)
         self.Re = Re(self.Di, self.V, self.rho, self.mu)
+        self.f = f_friccion(self.Re, self.eD)
         K = 0
         for accesorio in self.kwargs["accesorios"]:
             K += accesorio[2]*accesorio[3]
         self.K = unidades.Dimensionless(K)
-        self.DeltaP_h = unidades.Pressure(g*self.kwargs["h"]*self.rho)
-        self.DeltaP_ac = unidades.Pressure(self.K*self.V**2/2*self.rho)
 
-        self.f = f_friccion(self.Re, self.eD)
-        self.DeltaP_f = self.__DeltaP_friccion()
-        # TODO:
-        self.DeltaP_v = unidades.Pressure(0)
+        # Inclination of pipe from the head increase
+        self.tita = arcsin(max(min(self.kwargs["h"]/self.L, 1), -1))
 
-        self.DeltaP = unidades.Pressure(self.DeltaP_h + self.DeltaP_ac +
-                                        self.DeltaP_f + self.DeltaP_v)
-        self.DeltaP_100ft = self.DeltaP*100/self.L.ft
-        self.Pout = unidades.Pressure(self.kwargs["entrada"].P-self.DeltaP)
+        self._segments(entrada)
 
-        if self.kwargs["thermal"] == 0:
-            self.Tout = self.kwargs["entrada"].T
-            self.Heat = unidades.Power(0)
-        else:
-            ch = Heat_Exchanger()
-            ch(entrada=self.kwargs["entrada"], modo=self.kwargs["thermal"],
-               Heat=self.kwargs["Q"], deltaP=self.DeltaP, A=self.A,
-               U=self.kwargs["U"], Text=self.kwargs["Text"])
-            self.Tout = ch.salida[0].T
-            self.Heat = ch.Heat
-
-        self.salida = [self.kwargs["entrada"].clone(T=self.Tout, P=self.Pout)]
-        self.Pin = self.kwargs["entrada"].P
+        self.DeltaP = unidades.DeltaP(self.DeltaP_h + self.DeltaP_ac +
+                                      self.DeltaP_f + self.DeltaP_v)
+        self.DeltaP_100ft = self.DeltaP*100/self.L.ft
+        self.Pin = entrada.P
         self.Pout = self.salida[0].P
+        self.Tout = self.salida[0].T
+        self.Xout = self.salida[0].x
+        self.Heat = unidades.Power(self.salida[0].h-entrada.h)
+
+    def _state(self, entrada, P, h):
+        """Calculate the stream at a point of pipe, with the pressure and
+        enthalpy or the input temperature for the isothermic gas flow"""
+        if self.kwargs["metodo"] == 3:
+            return entrada.clone(T=entrada.T, P=P)
+        return entrada.clone(P=P, h=h/entrada.caudalmasico)
+
+    def _heat(self, state, dl, T=None):
+        """Heat transfered in a segment of pipe, with the stream at its
+        beginning and the temperature at its end when it's known"""
+        if self.kwargs["thermal"] == 1:
+            return self.kwargs["Q"]*dl/self.L
+        elif self.kwargs["thermal"] == 2:
+            if T is None:
+                T = state.T
+            Tm = (state.T+T)/2
+            return self.kwargs["U"]*pi*self.De*dl*(self.kwargs["T_ext"]-Tm)
+        return 0
+
+    def _segments(self, entrada):
+        """Calculate the pipe marching along its length, each segment is
+        solved with a predictor-corrector step with the pressure gradient at
+        both ends, the stream is calculated only once in each segment at the
+        predicted output conditions. The length of segment is adapted with
+        the difference between predictor and corrector and limited to a
+        maximum pressure change"""
+        G = entrada.caudalmasico/self.seccion
+        P = entrada.P
+        h = entrada.h
+        state = entrada
+        gradient = self._gradient(state)
+
+        DeltaP_f = DeltaP_h = DeltaP_ac = DeltaP_v = 0
+        l = 0
+        dl = self.L
+        self.nSegment = 0
+        while self.L-l > 1e-9*self.L:
+            if self.nSegment >= self.MAX_SEGMENTS:
+                self.status = 3
+                self.msg = QApplication.translate(
+                    "pychemqt", "Maximum number of segments reached, "
+                    "calculation stopped at %0.2f%% of length") % (
+                    l/self.L*100)
+                break
+
+            dl = min(dl, self.L-l)
+            dP = gradient[0]+gradient[1]+gradient[2]
+            if dP:
+                dl = min(dl, self.MAX_DP*P/abs(dP))
+
+            # Predictor, the stream at the end of segment
+            new = self._state(entrada, P-dP*dl, h+self._heat(state, dl))
+            gradient1 = self._gradient(new)
+
+            # Corrector, with the mean gradient of segment
+            dPf = (gradient[0]+gradient1[0])/2*dl
+            dPh = (gradient[1]+gradient1[1])/2*dl
+            dPac = (gradient[2]+gradient1[2])/2*dl
+            dPv = G**2*(1/gradient1[3]-1/gradient[3])
+            P1 = P-dPf-dPh-dPac-dPv
+
+            # Ratio of local error to tolerance, with the difference between
+            # the predicted and corrected pressure and heat transfer
+            error = abs(P1-new.P)/self.TOLERANCE/P
+            if self.kwargs["thermal"] == 2:
+                q0 = self._heat(state, dl)
+                q1 = self._heat(state, dl, new.T)
+                if q0:
+                    DT = abs((q1-q0)/q0*(new.T-state.T))
+                    error = max(error, DT/self.TOLERANCE_T)
+            if error > 1 or P1 <= 0:
+                if dl < 1e-6*self.L:
+                    # The segment collapse, the flow is choked or the pressure
+                    # drop is greater than the input pressure
+                    self.status = 3
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Pipe can't transport the flow, "
+                        "calculation stopped at %0.2f%% of length") % (
+                        l/self.L*100)
+                    break
+                if P1 <= 0:
+                    dl *= 0.2
+                else:
+                    dl *= max(0.9/error**0.5, 0.2)
+                continue
+
+            h += self._heat(state, dl, new.T)
+            l += dl
+            DeltaP_f += dPf
+            DeltaP_h += dPh
+            DeltaP_ac += dPac
+            DeltaP_v += dPv
+            state = new
+            gradient = gradient1
+            self.nSegment += 1
+
+            # In compressible flow the pressure gradient diverge near the
+            # sonic velocity, the calculation is stopped there instead of
+            # refine the segments indefinitely
+            if P1 < P and dPv > self.CHOKE*(P-P1):
+                P = P1
+                if self.L-l > 1e-9*self.L:
+                    self.status = 3
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Choked flow, calculation stopped at "
+                        "%0.2f%% of length") % (l/self.L*100)
+                break
+            P = P1
+            if error:
+                dl *= min(0.9/error**0.5, 2)
+            else:
+                dl *= 2
+
+        self.DeltaP_f = unidades.DeltaP(DeltaP_f)
+        self.DeltaP_h = unidades.DeltaP(DeltaP_h)
+        self.DeltaP_ac = unidades.DeltaP(DeltaP_ac)
+        self.DeltaP_v = unidades.DeltaP(DeltaP_v)
+        self.salida = [self._state(entrada, P, h)]
+
+    def _gradient(self, state):
+        """Pressure gradient at a point of pipe, Pa/m, return a tuple with
+        the friction, elevation and fittings terms, and the density of
+        homogeneous mixture used in the acceleration term"""
+        metodo = self.kwargs["metodo"]
+        m = state.caudalmasico
+        G = m/self.seccion
+        x = state.x
+        if 0 < x < 1:
+            rhol, mul = state.Liquido.rho, state.Liquido.mu
+            rhog, mug = state.Gas.rho, state.Gas.mu
+            rho = 1/(x/rhog+(1-x)/rhol)
+            mu = 1/(x/mug+(1-x)/mul)
+        elif x == 0:
+            rho, mu = state.Liquido.rho, state.Liquido.mu
+        else:
+            rho, mu = state.Gas.rho, state.Gas.mu
+        V = G/rho
 
-    def __DeltaP_friccion(self):
-        """Método para el calculo de la perdida de presión"""
-        if self.kwargs["metodo"] == 0:
-            dp = unidades.DeltaP(self.L*self.V**2/self.Di*self.f*self.rho/2)
-        elif self.kwargs["metodo"] == 1:
-            p = (self.kwargs["entrada"].Q.galUSmin*self.L.ft**0.54/0.442 /
-                 self.Di.inch**2.63/self.kwargs["C"])**(1./0.54)
-            dp = unidades.DeltaP(p, "psi")
-        elif self.kwargs["metodo"] == 2:
-            q = self.kwargs["entrada"].caudalmasico.lbh
-            p = 2.1082*self.L.ft*q**1.85/self.rho.lbft3/1e7/self.Di.inch**4.97
-            dp = unidades.Pressure(p, "psi")
-        elif self.kwargs["metodo"] == 3:
-            pass
-
-        elif self.kwargs["metodo"] == 4:
-            pass
-
-        elif self.kwargs["metodo"] == 5:
-            pass
+        dPh = rho*g*self.kwargs["h"]/self.L
+        dPac = self.K/self.L*rho*V**2/2
 
-        return dp
+        if metodo == 1:
+            Q = unidades.VolFlow(m/rho)
+            p = (Q.galUSmin*unidades.Length(1).ft**0.54/0.442 /
+                 self.Di.inch**2.63/self.kwargs["C"])**(1./0.54)
+            dPf = unidades.DeltaP(p, "psi")
+        elif metodo == 2:
+            q = unidades.MassFlow(m).lbh
+            rho_ = unidades.Density(rho)
+            p = 2.1082*unidades.Length(1).ft*q**1.85/rho_.lbft3/1e7 / \
+                self.Di.inch**4.97
+            dPf = unidades.DeltaP(p, "psi")
+        elif metodo == 4 and 0 < x < 1:
+            dPf = dP_Lockhart_Martinelli(
+                G, x, self.Di, self.eD, rhol, rhog, mul, mug)
+        elif metodo == 5 and 0 < x < 1:
+            dPf, dPh, HL, regime = dP_Beggs_Brill(
+                G, x, self.Di, self.eD, rhol, rhog, mul, mug,
+                state.Liquido.sigma, self.tita)
+        else:
+            # Darcy equation, for two phases with homogeneous model
+            f = f_friccion(rho*V*self.Di/mu, self.eD)
+            dPf = f*rho*V**2/2/self.Di
+        return dPf, dPh, dPac, rho
 
     def coste(self):
         """
@@ -374,6 +550,8 @@ class Pipe(equipment):
         state["DeltaP_100ft"] = self.DeltaP_100ft
         state["Pout"] = self.Pout
         state["Tout"] = self.Tout
+        state["Xout"] = self.Xout
+        state["nSegment"] = self.nSegment
         state["Heat"] = self.Heat
         state["Pin"] = self.Pin
         state["Pout"] = self.Pout
@@ -407,6 +585,10 @@ class Pipe(equipment):
         self.DeltaP = unidades.DeltaP(state["DeltaP"])
         self.DeltaP_100ft = unidades.Dimensionless(state["DeltaP_100ft"])
         self.Tout = unidades.Temperature(state["Tout"])
+        # Values not available in files saved before the calculation by
+        # segments
+        self.Xout = unidades.Dimensionless(state.get("Xout", 0))
+        self.nSegment = state.get("nSegment", 1)
         self.Heat = unidades.Power(state["Heat"])
         self.Pin = unidades.Pressure(state["Pin"])
         self.Pout = unidades.Pressure(state["Pout"])
@@ -438,13 +620,14 @@ class Pipe(equipment):
 
         if self.kwargs["thermal"]:
             txt += self.propertiesToText(range(24, 26))
+        txt += self.propertiesToText(range(26, 28))
 
         if self.statusCoste:
             txt += os.linesep+"#---------------"
             txt += QApplication.translate(
                 "pychemqt", "Preliminary Cost Estimation")
             txt += "-----------------#" + os.linesep
-            txt += self.propertiesToText(range(26, 31))
+            txt += self.propertiesToText(range(28, 33))
 
         return txt
 
@@ -501,6 +684,10 @@ class Pipe(equipment):
               unidades.Temperature),
              (QApplication.translate("pychemqt", "Heat Transfer"), "Heat",
               unidades.Power),
+             (QApplication.translate("pychemqt", "Output Quality"), "Xout",
+              unidades.Dimensionless),
+             (QApplication.translate("pychemqt", "Segments"), "nSegment",
+              int),
              (QApplication.translate("pychemqt", "Base index"),
               "Base_index", float),
              (QApplication.translate("pychemqt", "Current index"),
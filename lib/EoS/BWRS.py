@@ -26,6 +26,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 from scipy import exp, log, sqrt
 from scipy import r_
 from scipy.optimize import fsolve
+from numpy import array, errstate, where
 
 from lib import unidades
 from lib.eos import EoS
@@ -42,7 +43,9 @@ class BWRS(EoS):
     def __init__(self, T, P, mezcla):
         self.T = unidades.Temperature(T)
         self.P = unidades.Pressure(P, "atm")
+        self.mezcla = mezcla
         self.componente = mezcla.componente
+        self.fraccion = mezcla.fraccion
         self.zi = mezcla.fraccion
         self.kij = mezcla.Kij(bwrs)
 
@@ -120,7 +123,7 @@ class BWRS(EoS):
         Vm = lambda V: self.P.atm-R_atml*self.T/V - (Bo*R_atml*self.T-Ao-Co/self.T**2+Do/self.T**3-Eo/self.T**4)/V**2 - (b*R_atml*self.T-a-d/self.T)/V**3 - alfa*(a+d/self.T)/V**6 - c/self.T**2/V**3*(1+gamma/V**2)*exp(-gamma/V**2)
 
         # Usamos SRK para estimar los volumenes de ambas fases usados como valores iniciales en la iteeración
-        srk=cubic.SRK(T, P, mezcla)
+        srk=cubic.SRK._new(T, P, mezcla)
         Z_srk=srk.Z
         Vgo=Z_srk[0]*R_atml*T/P
         Vlo=Z_srk[1]*R_atml*T/P
@@ -156,6 +159,14 @@ class BWRS(EoS):
             tita.append(exp(lo/R_atml/self.T))
         return tita
 
+    def _lnphi(self, xi, phase):
+        """The _fug method return the fugacity of components, divided by the
+        partial pressure to get the fugacity coefficients"""
+        xi = array(xi, dtype=float)
+        with errstate(divide="ignore", invalid="ignore"):
+            lnphi = log(self._fug(self.Z[phase], xi))-log(xi*self.P.atm)
+        return where(xi > 0, lnphi, 0)
+
     def _lib(self, cmp):
         """Library for parameter calculation in Benedict-Webb-Rubin-Starling"""
         a1, b1 = 0.443690, 0.115449
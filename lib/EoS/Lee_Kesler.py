@@ -23,11 +23,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Virial equation of state implementation
 ###############################################################################
 
-from scipy import zeros, log, exp
+from scipy import zeros, log, exp, r_
 from scipy.constants import R
+from scipy.optimize import fsolve
 
+from lib import unidades
 from lib.eos import EoS
-from lib.physics import R_atml
+from lib.EoS.cubic import SRK
+from lib.physics import R_atml, factor_acentrico_octano
 
 class Lee_Kesler(EoS):
     """Ecuación de estado de Lee-Kesler"""
@@ -115,7 +118,13 @@ class Lee_Kesler(EoS):
         Hh=-Tr*(zhl-1-(b2[1]+2*b3[1]/Tr+3*b4[1]/Tr**2)/Tr/vrhl-(c2[1]-3*c3[1]/Tr**2)/Tr/2/vrhl**2+d2[1]/5/Tr/vrhl**5+3*E)
         Hl=H0+mezcla.f_acent/factor_acentrico_octano*(Hh-H0)
         self.H_exc=r_[Hv, Hl]
-        self.x, self.xi, self.yi, self.Ki=srk._Flash()
+        self.srk = srk
+        self.x, self.xi, self.yi, self.Ki = srk.x, srk.xi, srk.yi, srk.Ki
+        self.flashStatistics = getattr(srk, "flashStatistics", None)
+
+    def _state(self, T, P):
+        """The phase equilibrium is calculated with SRK"""
+        return self.srk._state(T, P)
 
 
 _all = [Lee_Kesler]
@@ -19,10 +19,15 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 
 
 ###############################################################################
-# Virial equation of state implementation
+# Cubic equation of state implementation
+#   -CubicModel: Cached parameters of an equation for a set of components
 ###############################################################################
 
-from scipy import roots, r_, log, exp, sqrt
+from collections import OrderedDict
+from copy import copy
+from math import acos, copysign, cos, pi
+
+from numpy import array, dot, exp, log, ones, outer, r_, sqrt, where
 
 from PyQt5.QtWidgets import QApplication
 
@@ -37,9 +42,118 @@ alfa = (QApplication.translate("pychemqt", "Original"),
         "Doridon")
 
 
+# Critical properties of components, indexed by the ids of mixture
+_components = {}
+
+# Models of equations, indexed by the equation, the ids of mixture, the
+# source of binary interaction parameters and the options of the library
+_models = OrderedDict()
+
+# Size of caches, number of models and temperatures memoized by model
+MODELS = 32
+TEMPERATURES = 128
+
+
+def _properties(mezcla):
+    """Return arrays with the critical temperature, critical pressure, in
+    atm, and acentric factor of mixture components, calculated only once
+    for each set of components"""
+    key = tuple(mezcla.ids)
+    if key not in _components:
+        cmps = mezcla.componente
+        _components[key] = (
+            array([cmp.Tc for cmp in cmps], dtype=float),
+            array([cmp.Pc.atm for cmp in cmps], dtype=float),
+            array([cmp.f_acent for cmp in cmps], dtype=float))
+    return _components[key]
+
+
+def _alphaMathias():
+    """Return the configured alpha function, 1 for Boston-Mathias
+    extrapolation for supercritical components"""
+    return config.getMainWindowConfig().getint("Thermo", "Alfa")
+
+
+def _alphaSoave(Tr, m, mathias):
+    """Soave alpha function, with the optional Boston-Mathias extrapolation
+    for supercritical components"""
+    alfa = (1+m*(1-Tr**0.5))**2
+    if mathias == 1:
+        d = 1.+m/2.
+        c = 1.-1./d
+        alfa = where(Tr > 1, exp(c*(1-Tr**d))**2, alfa)
+    return alfa
+
+
+def _cubicRoots(a, b, c):
+    """Real roots of the cubic equation Z³+aZ²+bZ+c=0 by the trigonometric
+    or Cardano solution"""
+    q = (a*a-3*b)/9
+    r = (2*a**3-9*a*b+27*c)/54
+    if r*r < q**3:
+        t = acos(r/q**1.5)
+        m = -2*q**0.5
+        return [m*cos(t/3)-a/3, m*cos((t+2*pi)/3)-a/3, m*cos((t-2*pi)/3)-a/3]
+    A = -copysign((abs(r)+(r*r-q**3)**0.5)**(1./3), r)
+    if A:
+        B = q/A
+    else:
+        B = 0
+    return [A+B-a/3]
+
+
+class CubicModel(object):
+    """Parameters of a cubic equation of state for a set of components,
+    created once for each equation, components, binary interaction
+    parameters source and alpha function option. The binary interaction
+    parameters are calculated in the creation, the temperature dependent
+    parameters of components and the aij matrix are memoized in a LRU cache
+    with the last TEMPERATURES values
+
+        parameters: function returning the arrays with the parameters of
+        components at a temperature, the first must be the ai array
+        kij: binary interaction parameters matrix
+    """
+    def __init__(self, parameters, kij):
+        self.parameters = parameters
+        self.kij = array(kij, dtype=float)
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, T):
+        T = float(T)
+        try:
+            value = self._cache[T]
+        except KeyError:
+            self.misses += 1
+            parameters = self.parameters(T)
+            sa = parameters[0].astype(complex)**0.5
+            value = (parameters, outer(sa, sa)*(1-self.kij))
+            self._cache[T] = value
+            if len(self._cache) > TEMPERATURES:
+                self._cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self._cache.move_to_end(T)
+        return value
+
+    def __call__(self, T):
+        """Return the arrays with the parameters of components at T"""
+        return self._get(T)[0]
+
+    def aij(self, T):
+        """Return the matrix of the a parameter of pairs of components at T,
+        (ai·aj)^0.5·(1-kij)"""
+        return self._get(T)[1]
+
+
 class Cubic(EoS):
     """Clase que modela de manera generalizada las ecuaciones de estado cúbicas
-    ref. Prausnick  Propiedades de gases y liquidos, pag 203"""
+    ref. Prausnick  Propiedades de gases y liquidos, pag 203
+
+    The child classes define the components parameters as arrays, the
+    mixture parameters and derivatives are calculated in matrix form"""
     def __init__(self, T, P, mezcla):
         self.T=unidades.Temperature(T)
         self.P=unidades.Pressure(P, "atm")
@@ -53,25 +167,127 @@ class Cubic(EoS):
         delta=self.delta*self.P.atm/R_atml/self.T
         epsilon=self.epsilon*(self.P.atm/R_atml/self.T)**2
         eta=self.eta*self.P.atm/R_atml/self.T
-        Z=roots([1, delta-self.B-1, self.Tita+epsilon-delta*(self.B+1), -epsilon*(self.B+1)-self.Tita*eta])
-        self.Z=r_[Z[0].real, Z[2].real]
+        Z=_cubicRoots(delta-self.B-1, self.Tita+epsilon-delta*(self.B+1), -epsilon*(self.B+1)-self.Tita*eta)
+        self.Z=r_[max(Z), min(Z)]
 
         self.V=self.Z*R_atml*self.T/self.P.atm  #mol/l
         self.x, self.xi, self.yi, self.Ki=self._Flash()
-        self.H_exc=-(self.tita+self.dTitadT)/R_atml/self.T/(self.delta**2-4*self.epsilon)**0.5*log((2*self.V+self.delta-(self.delta**2-4*self.epsilon)**0.5)/(2*self.V+self.delta+(self.delta**2-4*self.epsilon)**0.5))+1-self.Z
+        root = (self.delta**2-4*self.epsilon)**0.5
+        self.H_exc=-(self.tita+self.dTitadT)/R_atml/self.T/root*log((2*self.V+self.delta-root)/(2*self.V+self.delta+root))+1-self.Z
+
+    def _mixture(self, T, mezcla, ai, bi, aci=None, mi=None):
+        """Define the mixture parameters with the configured mixing rule and
+        the temperature derivative of tita
+            ai, bi: arrays with the parameters of components
+            aci, mi: arrays with the a parameter at critical point and the
+            slope of alpha function, None for temperature independent a"""
+        a, b = mezcla.Mixing_Rule([ai, bi], self.kij)
+        self.ai = ai
+        self.bi = bi
+        self.aij = self.model.aij(T)
+        self.b = b
+        self.tita = a
+
+        if aci is None:
+            self.dTitadT = 0
+        else:
+            Tc = _properties(mezcla)[0]
+            x = array(mezcla.fraccion, dtype=float)
+            xa = x*aci**0.5
+            self.dTitadT = -dot(xa, dot(1-self.kij, xa*mi*(T/Tc)**0.5))
+
+    def _model(self, mezcla, kij, lib, *args, byComponent=False):
+        """Return the model of the equation for the components of mixture,
+        created only in the first use
+            kij: source of binary interaction parameters
+            lib: library of parameters, called as lib(mezcla, T, *args), or
+            lib(compuesto, T, *args) for a single component with byComponent
+            args: options of library, like the alpha function"""
+        key = (self.__class__, tuple(mezcla.ids), kij, args)
+        model = _models.get(key)
+        if model is None:
+            if byComponent:
+                def parameters(T):
+                    return self._byComponent(lib, mezcla, T, *args)
+            else:
+                def parameters(T):
+                    return lib(mezcla, T, *args)
+            model = CubicModel(parameters, mezcla.Kij(kij))
+            _models[key] = model
+            if len(_models) > MODELS:
+                _models.popitem(last=False)
+        else:
+            _models.move_to_end(key)
+        self.model = model
+        self.kij = model.kij
+        return model
+
+    @staticmethod
+    def _byComponent(lib, mezcla, *args):
+        """Evaluate the parameters library of a single component for all
+        components of mixture, return an array for each parameter"""
+        return array([lib(cmp, *args) for cmp in mezcla.componente],
+                     dtype=float).T
 
     def _fug(self, Z, xi):
-        Ai=[]
-        for i in range(len(self.componente)):
-            suma=0
-            for j in range(len(self.componente)):
-                suma+=self.fraccion[j]*self.ai[j]**0.5*(1-self.kij[i][j])
-            Ai.append(1/self.tita*2*self.ai[i]**0.5*suma)
-        tita=[]
-        for i in range(len(self.componente)):
-            tita.append(exp(self.bi[i]/self.b*(Z-1)-log(Z-self.B)-self.Tita/self.B/sqrt(self.u**2-4*self.w)*(Ai[i]-self.bi[i]/self.b)*log((Z+self.B/2*(self.u+sqrt(self.u**2-4*self.w)))/(Z+self.B/2*(self.u-sqrt(self.u**2-4*self.w))))).real)
+        x = array(self.fraccion, dtype=float)
+        sa = self.ai.astype(complex)**0.5
+        Ai = 2*sa*dot(1-self.kij, x*sa)/self.tita
+        root = sqrt(self.u**2-4*self.w)
+        bb = self.bi/self.b
+        tita = exp(bb*(Z-1)-log(Z-self.B)-self.Tita/self.B/root*(Ai-bb)*log((Z+self.B/2*(self.u+root))/(Z+self.B/2*(self.u-root)))).real
         return tita
 
+    def _state(self, T, P):
+        """At the same temperature the parameters of components are reused,
+        only the pressure dependent parameters are updated"""
+        if T != self.T:
+            return self._new(T, P, self.mezcla)
+        eq = copy(self)
+        eq.P = unidades.Pressure(P, "atm")
+        eq.B = eq.b*P/R_atml/eq.T
+        eq.Tita = eq.tita*P/(R_atml*eq.T)**2
+        return eq
+
+    def _lnphi(self, xi, phase):
+        """Fugacity coefficients of a phase with composition xi, the mixture
+        parameters are calculated with the van der Waals mixing rule from
+        the parameters of components"""
+        x = array(xi, dtype=float)
+        PRT = self.P.atm/R_atml/self.T
+        Ai = 2*dot(self.aij, x)
+        a = dot(x, Ai).real/2
+        b = dot(x, self.bi)
+        r = b/self.b*PRT
+        A = a*PRT**2/self.P.atm
+        B = b*PRT
+        delta = self.delta*r
+        epsilon = self.epsilon*r**2
+        eta = self.eta*r
+
+        roots = _cubicRoots(delta-B-1, A+epsilon-delta*(B+1),
+                            -epsilon*(B+1)-A*eta)
+        Z = [z for z in roots if z > B]
+        if not Z:
+            # No physical root, as with nan input, the largest root is used
+            # and the invalid result is detected by the callers
+            Z = [max(roots)]
+        if phase:
+            Z = min(Z)
+        else:
+            Z = max(Z)
+
+        # The attractive term is written without divide by a, so it's
+        # defined too for null a, as with components without parameters
+        bb = self.bi/b
+        root = sqrt(self.u**2-4*self.w)
+        if root:
+            term = PRT**2/self.P.atm/B/root*log(
+                (Z+B/2*(self.u+root))/(Z+B/2*(self.u-root)))
+        else:
+            term = PRT**2/self.P.atm/(Z+B*self.u/2)
+        return (bb*(Z-1)-log(Z-B)-term*(Ai-a*bb)).real
+
 
 class _2ParameterCubic(Cubic):
     pass
@@ -82,34 +298,25 @@ class van_Waals(Cubic):
     __title__="van der Waals (1890)"
     __status__="vdW"
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        for componente in mezcla.componente:
-            a, b=self.__lib(componente)
-            ai.append(a)
-            bi.append(b)
-        self.kij=mezcla.Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
+        model = self._model(mezcla, None, self.__lib)
+        ai, bi = model(T)
+        self._mixture(T, mezcla, ai, bi)
+
         self.delta=0
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         #TODO: Find relation between u,w y tita,delta, epsilon...
         self.u=0
         self.w=0
 
-        self.dTitadT=0
         super(van_Waals, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto):
-        a=0.421875*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.125*R_atml*compuesto.Tc/compuesto.Pc.atm
+    def __lib(self, mezcla, T):
+        Tc, Pc, w = _properties(mezcla)
+        a=0.421875*R_atml**2*Tc**2/Pc
+        b=0.125*R_atml*Tc/Pc
         return  a, b
 
 
@@ -119,35 +326,25 @@ class RK(Cubic):
     __title__="Redlich-Kwong (1949)"
     __status__="RK"
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        for componente in mezcla.componente:
-            a, b=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-        self.kij=mezcla.Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, None, self.__lib)
+        ai, bi = model(T)
+        self._mixture(T, mezcla, ai, bi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         #TODO: Find relation between u,w y tita,delta, epsilon...
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
         super(RK, self).__init__(T, P, mezcla)
 
-    def __lib(self, compuesto, T):
-        a=0.42747*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        alfa=compuesto.tr(T)**-0.5
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
+    def __lib(self, mezcla, T):
+        Tc, Pc, w = _properties(mezcla)
+        a=0.42747*R_atml**2*Tc**2/Pc
+        alfa=(T/Tc)**-0.5
+        b=0.08664*R_atml*Tc/Pc
         return  a*alfa, b
 
 
@@ -158,35 +355,26 @@ class Wilson(Cubic):
     __status__="Wilson"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        for componente in mezcla.componente:
-            a, b=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-        self.kij=mezcla.Kij(None)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, None, self.__lib)
+        ai, bi = model(T)
+        self._mixture(T, mezcla, ai, bi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
         super(Wilson, self).__init__(T, P, mezcla)
 
-    def __lib(self, compuesto, T):
+    def __lib(self, mezcla, T):
         """Librería de cálculo de la ecuación de estado de Wilson"""
-        a=0.42747*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        alfa=1+(1.57+1.62*compuesto.f_acent/(compuesto.tr(T)-1))*compuesto.tr(T)
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
+        Tc, Pc, w = _properties(mezcla)
+        Tr = T/Tc
+        a=0.42747*R_atml**2*Tc**2/Pc
+        alfa=1+(1.57+1.62*w/(Tr-1))*Tr
+        b=0.08664*R_atml*Tc/Pc
         return  a*alfa, b
 
 
@@ -197,31 +385,19 @@ class Fuller(Cubic):
     __status__="Fuller"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        ci=[]
-        for componente in mezcla.componente:
-            a, b, c=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            ci.append(ac)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi, ci], self.kij)
-        tdadt=0
-
-        self.ai=ai
-        self.bi=bi
+        model = self._model(mezcla, SRK, self.__lib, byComponent=True)
+        ai, bi, ci = model(T)
         self.ci=ci
-        self.b=b
-        self.tita=a
-        self.delta=b
+        self._mixture(T, mezcla, ai, bi)
+        c=dot(array(mezcla.fraccion, dtype=float), ci)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=c
         self.w=0
 
-        self.dTitadT=tdadt
         super(Fuller, self).__init__(T, P, mezcla)
 
 
@@ -247,53 +423,28 @@ class SRK(Cubic):
     __status__="SRK"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, _alphaMathias())
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
         super(SRK, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, mezcla, T, mathias):
         """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
-        Tr=T/compuesto.Tc
-        ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.48+1.574*compuesto.f_acent-0.176*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        ac=0.42748*R_atml**2*Tc**2/Pc
+        b=0.08664*R_atml*Tc/Pc
+        m=0.48+1.574*w-0.176*w**2
+        alfa=_alphaSoave(Tr, m, mathias)
         return ac*alfa, b, ac, m
 
 
@@ -304,53 +455,28 @@ class SRK_API(Cubic):
     __status__="SRK-API"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, _alphaMathias())
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
         super(SRK_API, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, mezcla, T, mathias):
         """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
-        Tr=T/compuesto.Tc
-        ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.48505+1.55171*compuesto.f_acent-0.15613*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        ac=0.42748*R_atml**2*Tc**2/Pc
+        b=0.08664*R_atml*Tc/Pc
+        m=0.48505+1.55171*w-0.15613*w**2
+        alfa=_alphaSoave(Tr, m, mathias)
         return ac*alfa, b, ac, m
 
 
@@ -361,47 +487,29 @@ class MSRK(Cubic):
     __status__="MSRK"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
         super(MSRK, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
-        ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
-        if compuesto.MSRK[0]==0 and compuesto.MSRK[1]==0:
-            m=0.48+1.574*compuesto.f_acent-0.176*compuesto.f_acent**2
-            alf=alfa=(1+m*(1-compuesto.tr(T)**0.5))**2
-        else:
-            m=0.48+1.574*compuesto.f_acent-0.176*compuesto.f_acent**2
-            alf=1.+(1-compuesto.tr(T))*(compuesto.MSRK[0]+compuesto.MSRK[1]/compuesto.tr(T))
+    def __lib(self, mezcla, T):
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        M1, M2=array([cmp.MSRK for cmp in mezcla.componente], dtype=float).T
+        ac=0.42748*R_atml**2*Tc**2/Pc
+        b=0.08664*R_atml*Tc/Pc
+        m=0.48+1.574*w-0.176*w**2
+        alf=where((M1 == 0) & (M2 == 0), (1+m*(1-Tr**0.5))**2,
+                  1.+(1-Tr)*(M1+M2/Tr))
         return ac*alf, b, ac, m
 
 
@@ -412,46 +520,27 @@ class SRK_Graboski(Cubic):
     __status__="SRK-GD"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        for componente in mezcla.componente:
-            a, b=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mix_van_der_Waals([ai, bi], self.kij)
-        tdadt=0
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, _alphaMathias(), byComponent=True)
+        ai, bi = model(T)
+        self._mixture(T, mezcla, ai, bi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
-        super(SRK_Thorwart, self).__init__(T, P, mezcla)
+        super(SRK_Graboski, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, compuesto, T, Alpha_Mathias):
         Tr=T/compuesto.Tc
         a=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
         b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
         if not compuesto.SRKGraboski[1]:
             m=0.48505+1.55171*compuesto.f_acent-0.15613*compuesto.f_acent**2
-
-            Config=config.getMainWindowConfig()
-            Alpha_Mathias=Config.getint("Thermo","Alfa")
-            if Alpha_Mathias==1 and Tr>1:
-                d=1.+m/2.
-                c=1.-1./d
-                alfa=exp(c*(1-Tr**d))**2
-            else:
-                alfa=(1+m*(1-Tr**0.5))**2
+            alfa=_alphaSoave(Tr, m, Alpha_Mathias)
         elif not compuesto.SRKGraboski[0]:
             S1=0.48508+1.55171*compuesto.f_acent-0.15613*compuesto.f_acent**2
             S2=compuesto.SRKGraboski[1]
@@ -466,47 +555,27 @@ class SRK_Mathias(Cubic):
     __status__="SRK-Math"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, _alphaMathias(), byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
+        super(SRK_Mathias, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, compuesto, T, Alpha_Mathias):
         """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
         Tr=T/compuesto.Tc
         ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
         b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
         m=0.48508+1.55191*compuesto.f_acent-0.15613*compuesto.f_acent**2
 
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
         if Alpha_Mathias==1 and Tr>1:
             d=1.+m/2.+0.3*compuesto.Mathias
             c=1.-1./d
@@ -523,36 +592,18 @@ class SRK_Adachi(Cubic):
     __status__="SRK-Adachi"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
+        super(SRK_Adachi, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -572,47 +623,27 @@ class SRK_Androulakis(Cubic):
     __status__="SRK-And"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(SRK)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=b
+        model = self._model(mezcla, SRK, self.__lib, _alphaMathias(), byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=self.b
         self.epsilon=0
-        self.eta=b
+        self.eta=self.b
 
         self.u=1
         self.w=0
 
-        self.dTitadT=tdadt
-        super(SRK, self).__init__(T, P, mezcla)
+        super(SRK_Androulakis, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, compuesto, T, Alpha_Mathias):
         """Librería de cálculo de la ecuación de estado de Soave-Redlich-Kwong,"""
         Tr=T/compuesto.Tc
         ac=0.42748*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
         b=0.08664*R_atml*compuesto.Tc/compuesto.Pc.atm
         m=0.48508+1.55191*compuesto.f_acent-0.15613*compuesto.f_acent**2
 
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
         if Alpha_Mathias==1 and Tr>1:
             alfa=exp(compuesto.Androulakis[0]*(1-Tr**(2./3)))
         else:
@@ -627,52 +658,27 @@ class PR(Cubic):
     __status__="PR"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, _alphaMathias())
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
-        Tr=T/compuesto.Tc
-        a=0.457235*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.077796*R_atml*compuesto.Tc/compuesto.Pc.atm
-        m=0.37464+1.54226*compuesto.f_acent-0.26992*compuesto.f_acent**2
-
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
-        if Alpha_Mathias==1 and Tr>1:
-            d=1.+m/2.
-            c=1.-1./d
-            alfa=exp(c*(1-Tr**d))**2
-        else:
-            alfa=(1+m*(1-Tr**0.5))**2
+    def __lib(self, mezcla, T, mathias):
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        a=0.457235*R_atml**2*Tc**2/Pc
+        b=0.077796*R_atml*Tc/Pc
+        m=0.37464+1.54226*w-0.26992*w**2
+        alfa=_alphaSoave(Tr, m, mathias)
         return a*alfa, b, a, m
 
 
@@ -687,36 +693,18 @@ class PRSV(Cubic):
                "doi":  "10.1002/cjce.5450640224"},
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, k=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(k)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
-        super(PR_SV, self).__init__(T, P, mezcla)
+        super(PRSV, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -756,36 +744,18 @@ class PRSV2(Cubic):
                "doi":  "10.1002/cjce.5450640516"},
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, k=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(k)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
-        super(PR_SV, self).__init__(T, P, mezcla)
+        super(PRSV2, self).__init__(T, P, mezcla)
 
 
     def __lib(self, compuesto, T):
@@ -804,7 +774,7 @@ class PRSV2(Cubic):
         else:
             # Use PRSV V1
             k2 = 0
-            K3 = 0
+            k3 = 0
             if Tr>=0.7:
                 k1=0
             elif 1<compuesto.C<=18:
@@ -828,44 +798,27 @@ class PR_Gasem(Cubic):
     __status__="PR-Gas"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR_Gasem, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
-        Tr=T/compuesto.Tc
-        m=0.134+0.508*compuesto.f_acent-0.0467*compuesto.f_acent**2
+    def __lib(self, mezcla, T):
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        m=0.134+0.508*w-0.0467*w**2
         alfa=exp((2.+0.836*Tr)*(1-Tr**m))
-        a=0.457235*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.077796*R_atml*compuesto.Tc/compuesto.Pc.atm
+        a=0.457235*R_atml**2*Tc**2/Pc
+        b=0.077796*R_atml*Tc/Pc
         return a*alfa, b, a, m
 
 
@@ -876,41 +829,27 @@ class PR_Melhem(Cubic):
     __status__="PR-Mel"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        for componente in mezcla.componente:
-            a, b, ac=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib)
+        ai, bi, aci = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, ones(len(ai)))
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR_Melhem, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
-        Tr=T/compuesto.Tc
-        alfa=exp(compuesto.Melhem[0]*(1-Tr)+compuesto.Melhem[1]*(1-Tr**0.5)**2)
-        a=0.457235*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
-        b=0.077796*R_atml*compuesto.Tc/compuesto.Pc.atm
+    def __lib(self, mezcla, T):
+        Tc, Pc, w = _properties(mezcla)
+        Tr=T/Tc
+        M1, M2=array([cmp.Melhem for cmp in mezcla.componente], dtype=float).T
+        alfa=exp(M1*(1-Tr)+M2*(1-Tr**0.5)**2)
+        a=0.457235*R_atml**2*Tc**2/Pc
+        b=0.077796*R_atml*Tc/Pc
         return a*alfa, b, a
 
 
@@ -921,33 +860,17 @@ class PR_Almeida(Cubic):
     __status__="PR-Alm"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        for componente in mezcla.componente:
-            a, b, ac=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, byComponent=True)
+        ai, bi, aci = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, ones(len(ai)))
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR_Almeida, self).__init__(T, P, mezcla)
 
 
@@ -966,45 +889,25 @@ class PR_Mathias_Copeman(Cubic):
     __status__="PR-MC"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, _alphaMathias(), byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR_Mathias_Copeman, self).__init__(T, P, mezcla)
 
 
-    def __lib(self, compuesto, T):
+    def __lib(self, compuesto, T, Alpha_Mathias):
         Tr=T/compuesto.Tc
         a=0.457235*R_atml**2*compuesto.Tc**2/compuesto.Pc.atm
         b=0.077796*R_atml*compuesto.Tc/compuesto.Pc.atm
 
-        Config=config.getMainWindowConfig()
-        Alpha_Mathias=Config.getint("Thermo","Alfa")
         if Alpha_Mathias==1 and Tr>1:
             alfa=(1+compuesto.MathiasCopeman[0]*(1-Tr**0.5))**2
         else:
@@ -1019,35 +922,17 @@ class PR_Yu_Lu(Cubic):
     __status__="PR-YL"
 
     def __init__(self, T, P, mezcla):
-        ai=[]
-        bi=[]
-        aci=[]
-        mi=[]
-        for componente in mezcla.componente:
-            a, b, ac, m=self.__lib(componente, T)
-            ai.append(a)
-            bi.append(b)
-            aci.append(ac)
-            mi.append(m)
-        self.kij=mezcla.Kij(PR)
-        a, b=mezcla.Mixing_Rule([ai, bi], self.kij)
-        tdadt=0
-        for i in range(len(mezcla.componente)):
-            for j in range(len(mezcla.componente)):
-                tdadt-=mezcla.fraccion[i]*mezcla.fraccion[j]*mi[j]*(aci[i]*aci[j]*mezcla.componente[j].tr(T))**0.5*(1-self.kij[i][j])
-
-        self.ai=ai
-        self.bi=bi
-        self.b=b
-        self.tita=a
-        self.delta=2*b
-        self.epsilon=-b**2
-        self.eta=b
+        model = self._model(mezcla, PR, self.__lib, byComponent=True)
+        ai, bi, aci, mi = model(T)
+        self._mixture(T, mezcla, ai, bi, aci, mi)
+
+        self.delta=2*self.b
+        self.epsilon=-self.b**2
+        self.eta=self.b
 
         self.u=2
         self.w=-1
 
-        self.dTitadT=tdadt
         super(PR_Yu_Lu, self).__init__(T, P, mezcla)
 
 
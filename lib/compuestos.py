@@ -19,12 +19,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 
 
 
+from functools import lru_cache
 from string import ascii_lowercase, digits
 import tempfile
 import time
 import os
 
 from scipy import exp, cosh, sinh, log, log10, roots, absolute, sqrt
+from numpy import minimum
 from scipy.optimize import fsolve
 from scipy.constants import R, Avogadro
 from PyQt5.QtWidgets import QApplication
@@ -42,7 +44,6 @@ class Componente(object):
         if not indice:
             return
         self.indice=indice
-        self.Config=config.getMainWindowConfig()
         componente=sql.getElement(indice)
         self.formula=componente[1]
         self.nombre=componente[2]
@@ -218,6 +219,11 @@ class Componente(object):
         if self.C and self.H:
             self.HC=self.H/self.C
 
+    @property
+    def Config(self):
+        """Configuration of current project, define the correlations used"""
+        return config.getMainWindowConfig()
+
     def tr(self,T):
        return T/self.Tc
     def pr(self,P):
@@ -407,7 +413,10 @@ class Componente(object):
         elif ecuacion == 6:
             return parametros[1]/(parametros[2]**(1+((1-T/parametros[3])**parametros[4])))
         elif ecuacion == 7:
-            return parametros[1]*(1-self.tr(T))**(parametros[2]+parametros[3]*self.tr(T)+parametros[4]*self.tr(T)**2+parametros[5]*self.tr(T)**3)
+            # The upper limit of databank can be a bit over the critical
+            # temperature, where the heat of vaporization is null
+            tr = minimum(self.tr(T), 1)
+            return parametros[1]*(1-tr)**(parametros[2]+parametros[3]*tr+parametros[4]*tr**2+parametros[5]*tr**3)
         elif ecuacion == 8:
             return parametros[1]+parametros[2]*(parametros[3]/T/sinh(parametros[3]/T))**2+parametros[4]*(parametros[5]/T/cosh(parametros[5]/T))**2
         elif ecuacion == 9:
@@ -709,7 +718,13 @@ class Componente(object):
 #        if self.tr(T)<1:
 #            k=1.188e-3*self.tr(T)*cp.BtulbF/l
 #        else:
-        k=2.67e-4*(14.52*self.tr(T)-5.14)**(2.0/3)*cp.BtulbF*self.M/l
+        if 14.52*self.tr(T) > 5.14:
+            k=2.67e-4*(14.52*self.tr(T)-5.14)**(2.0/3)*cp.BtulbF*self.M/l
+        else:
+            # The general equation isn't defined at very low reduced
+            # temperature, as heavy components in traces in a cold vapor,
+            # there the equation for Tr<1 is used
+            k=1.188e-3*self.tr(T)*cp.BtulbF*self.M/l
         return unidades.ThermalConductivity(k, "BtuhftF")
 
     def ThCond_Gas_Crooks(self, T, P):
@@ -1271,6 +1286,28 @@ class Componente(object):
         return P/z/R_atml/T
 
 
+@lru_cache(maxsize=256)
+def _componente(db, indice):
+    """Componente instances saved by database and index"""
+    return Componente(indice)
+
+
+_revision = sql.revision
+
+
+def getComponente(indice):
+    """Return the Componente of indice from a registry, so each component is
+    only built once. The instance is shared by all the code so it mustn't be
+    changed, use Componente for a private copy. The registry is cleared when
+    the custom database is changed"""
+    global _revision
+    if _revision != sql.revision:
+        _componente.cache_clear()
+        _revision = sql.revision
+    indice = int(indice)
+    return _componente(sql.databaseName(indice), indice)
+
+
 class newComponente(object):
     """Clase general que define la creaccion de nuevos componentes"""
     def export2Component(self):
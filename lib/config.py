@@ -24,12 +24,14 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 #   - getMainWindowConfig: Return config of current project
 #   - setMainWindowConfig: Update currentconfig variable
 #   - Entity: General class for model object
+#   - freeze: Hashable representation of a kwarg value
 #   - Fluid: dict class wiih custom properties
 #
 #   Variables:
 #   - conf_dir: User configuration path
 #   - QTSETTING_FILE: Path of qt application configuration
 #   - Preferences: ConfigParser instance with pychemqt preferences
+#   - reloadPreferences: Update Preferences when the file is changed
 #   - currentConfig: ConfirParser instance with the current pychemqt open
 #   project or the last open project
 ###############################################################################
@@ -54,7 +56,7 @@ from PyQt5 import QtWidgets
 # os.environ["PyQt5.Qsci"] = "True"
 
 
-from lib.sql import databank
+from lib.sql import getElements
 
 
 conf_dir = os.path.expanduser('~') + os.sep + ".pychemqt" + os.sep
@@ -63,7 +65,6 @@ IMAGE_PATH = os.path.join(os.environ["pychemqt"], "images") + os.sep
 
 Preferences = ConfigParser()
 Preferences.read(conf_dir + "pychemqtrc")
-# FIXME: This instance is not updated when preferences are changed
 
 global currentConfig
 currentConfig = ConfigParser()
@@ -89,19 +90,26 @@ def getComponents(solidos=False, config=None, name=True):
             indices = eval(indices)
 
     if name:
-        nombres = []
-        M = []
-        for componente in indices:
-            databank.execute("select nombre, peso_molecular from compuestos \
-where id == %s" % str(componente))
-            texto = databank.fetchone()
-            nombres.append(texto[0])
-            M.append(texto[1])
+        data = getElements(indices, ("nombre", "peso_molecular"))
+        nombres = data["nombre"].tolist()
+        M = data["peso_molecular"].tolist()
         return indices, nombres, M
     else:
         return indices
 
 
+def reloadPreferences():
+    """Read again the preferences file, it must be called each time the file
+    is saved to update the values in use"""
+    for section in Preferences.sections():
+        Preferences.remove_section(section)
+    Preferences.read(conf_dir + "pychemqtrc")
+
+    # Clear the numeric formats saved
+    from lib import unidades
+    unidades.clearFormatCache()
+
+
 def getMainWindowConfig():
     """Return config of current project"""
     return currentConfig
@@ -127,12 +135,55 @@ def setMainWindowConfig(config=None):
                     break
 
 
+# Sections of project configuration with options that change the calculated
+# properties, so they must be included in the fingerprint of entities
+CALCULATION_SECTIONS = ("Thermo", "Transport", "Components")
+
+
+def configFingerprint(config=None):
+    """Return a hashable representation of the options of project
+    configuration used in calculation, thermodynamic and transport methods
+    and components"""
+    if config is None:
+        config = getMainWindowConfig()
+    values = []
+    for section in CALCULATION_SECTIONS:
+        if config.has_section(section):
+            values.append((section, tuple(sorted(config.items(section)))))
+    return tuple(values)
+
+
+def freeze(value):
+    """Return a hashable representation of value, used to fingerprint the
+    inputs of entities. The entities are replaced by its fingerprint so a
+    input stream changed in place is detected too"""
+    if isinstance(value, Entity):
+        return value.fingerprint()
+    elif isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    elif isinstance(value, dict):
+        return tuple((k, freeze(v)) for k, v in sorted(value.items()))
+    elif isinstance(value, float):
+        # nan hash depend of the object, so it's replaced by a constant
+        if value != value:
+            return "nan"
+        return float(value)
+    elif hasattr(value, "tolist"):
+        return freeze(value.tolist())
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
 class Entity(object):
     """
     General class for model object, with basic functionality:
         -clear object
         -definition of boolean characteristic of object
         -input used for definition
+        -fingerprint of inputs to skip unchanged calculations
         -note properties with description
         -save/load from file
         -properties for report, tooltip
@@ -142,6 +193,7 @@ class Entity(object):
         -equipment
     """
     _bool = False
+    _fingerprint = None
     kwargs_forbidden = ["entrada"]
     notas = ""
     notasPlain = ""
@@ -184,6 +236,15 @@ class Entity(object):
         here can be implemented kwarg incompatibiity input and more"""
         self.kwargs.update(kwargs)
 
+    def fingerprint(self):
+        """Return a hash of the effective inputs of entity, the kwargs with
+        the input entities replaced by its own fingerprint and the
+        calculation options of project configuration. The notes are excluded
+        as they don't change the calculation"""
+        kwargs = tuple((key, freeze(value)) for key, value in
+                       sorted(self.kwargs.items()) if key != "notas")
+        return hash((kwargs, configFingerprint()))
+
     def clear(self):
         """Clear entity and stay as new instance"""
         self.kwargs = self.__class__.kwargs
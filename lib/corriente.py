@@ -28,6 +28,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 import logging
 import os
 
+from numpy import inf, isfinite
 from PyQt5.QtWidgets import QApplication
 
 from lib.physics import R_atml, R
@@ -37,6 +38,7 @@ from lib import meos, thermo
 from lib.solids import Solid
 from lib.mezcla import Mezcla, _mix_from_molarflow_and_molarfraction
 from lib.psycrometry import PsychroState
+from lib.streamState import StreamState
 from lib.thermo import ThermoWater, ThermoAdvanced, Fluid_MEOS
 
 
@@ -46,6 +48,8 @@ class Corriente(config.Entity):
         -T: temperature, Kelvin
         -P: Pressure, Pa
         -x: quality
+        -h: specific enthalpy, J/kg
+        -s: specific entropy, J/kgK
 
         -caudalMasico: mass flow in kg/s (solid component excluded)
         -caudalMolar: molar flow in kmol/s (solid component excluded)
@@ -87,10 +91,34 @@ class Corriente(config.Entity):
         -freesteam: Use freesteam external library for water
         -coolProp: Use coolProp external library if is available
         -refprop: Use refProp external library if is available
+
+    The stream can be defined with pressure and enthalpy or entropy, the
+    state is solved by the thermodynamic backend
+
+    >>> from lib.mEoS import F2
+    >>> ref = F2(T=140.08, P=4655160)
+    >>> st = Corriente(P=4655160, h=ref.h, caudalMasico=1, ids=[208],
+    ...                fraccionMolar=[1], MEoS=True)
+    >>> print("%s %i %0.2f" % (st._thermo, st.status, st.T))
+    meos 1 140.08
+    >>> st = Corriente(P=4655160, s=ref.s, caudalMasico=1, ids=[208],
+    ...                fraccionMolar=[1], MEoS=True)
+    >>> print("%s %i %0.2f" % (st._thermo, st.status, st.T))
+    meos 1 140.08
+
+    If the backend can't solve the state its status and message are reported
+    by the stream
+
+    >>> st = Corriente(P=4655160, h=5e6, caudalMasico=1, ids=[208],
+    ...                fraccionMolar=[1], MEoS=True)
+    >>> print("%i %s" % (st.status, st.msg))
+    5 Solution don´t converge
     """
     kwargs = {"T": 0.0,
               "P": 0.0,
               "x": None,
+              "h": None,
+              "s": None,
 
               "caudalMasico": 0.0,
               "caudalVolumetrico": 0.0,
@@ -233,6 +261,20 @@ class Corriente(config.Entity):
         elif kwargs.get("P", 0.0) and self.kwargs["T"] and self.kwargs["x"]:
             self.kwargs["x"] = None
 
+        # The enthalpy or entropy specification replace the temperature or
+        # quality, and viceversa
+        if kwargs.get("h", None) is not None:
+            self.kwargs["T"] = 0.0
+            self.kwargs["x"] = None
+            self.kwargs["s"] = None
+        elif kwargs.get("s", None) is not None:
+            self.kwargs["T"] = 0.0
+            self.kwargs["x"] = None
+            self.kwargs["h"] = None
+        elif kwargs.get("T", 0.0) or kwargs.get("x", None) is not None:
+            self.kwargs["h"] = None
+            self.kwargs["s"] = None
+
         self.kwargs.update(kwargs)
 
         for key, value in list(self.kwargs.items()):
@@ -246,7 +288,15 @@ class Corriente(config.Entity):
             if self.__class__.kwargs[key] != value:
                 kw_new[key] = value
         logging.debug('kwarg; %s' % kw_new)
-        if self.calculable:
+
+        # Skip the calculation if the stream is already solved with the same
+        # inputs
+        fingerprint = self.fingerprint()
+        calculable = self.calculable
+        if calculable and fingerprint == self._fingerprint:
+            logging.debug('Unchanged stream, calculation skipped')
+
+        elif calculable:
             statusmsg = (
                 QApplication.translate("pychemqt", "Underspecified"),
                 QApplication.translate("pychemqt", "Solved"),
@@ -259,8 +309,9 @@ class Corriente(config.Entity):
             QApplication.processEvents()
 
             self.status = 1
-            self.calculo()
             self.msg = ""
+            self.calculo()
+            self._fingerprint = fingerprint
 
         elif self.tipoFlujo:
             if self.kwargs["mezcla"]:
@@ -286,6 +337,10 @@ class Corriente(config.Entity):
             self.tipoTermodinamica = "Tx"
         elif self.kwargs["P"] and self.kwargs["x"]:
             self.tipoTermodinamica = "Px"
+        elif self.kwargs["P"] and self.kwargs["h"] is not None:
+            self.tipoTermodinamica = "Ph"
+        elif self.kwargs["P"] and self.kwargs["s"] is not None:
+            self.tipoTermodinamica = "Ps"
 
         # Mix definition
         self.tipoFlujo = 0
@@ -350,6 +405,8 @@ class Corriente(config.Entity):
         T = unidades.Temperature(self.kwargs.get("T", None))
         P = unidades.Pressure(self.kwargs.get("P", None))
         x = self.kwargs.get("x", None)
+        h = self.kwargs.get("h", None)
+        s = self.kwargs.get("s", None)
 
         self._method()
         setData = True
@@ -361,38 +418,46 @@ class Corriente(config.Entity):
         elif self._thermo == "refprop":
             if not self.kwargs["ids"]:
                 self.kwargs["ids"] = self.ids
-            compuesto = refProp.RefProp(**self.kwargs)
+            kwargs = self.kwargs.copy()
+            kwargs["H"] = h if h is not None else 0.0
+            kwargs["S"] = s if s is not None else 0.0
+            compuesto = refProp.RefProp(**kwargs)
         elif self._thermo == "gerg":
             ids = []
             for id in self.ids:
                 ids.append(gerg.id_GERG.index(id))
-            kwargs = self.kwargs
-            kwargs["mezcla"] = self.mezcla
+            # GERG use pressure in MPa and specific properties in kJ/kg
+            kwargs = {"T": T, "P": P.MPa, "x": x, "mezcla": self.mezcla}
+            if h is not None:
+                kwargs["h"] = h/1000.
+            if s is not None:
+                kwargs["s"] = s/1000.
             compuesto = gerg.GERG(componente=ids, fraccion=self.fraccion, **kwargs)
         elif self._thermo == "coolprop":
             if not self.kwargs["ids"]:
                 self.kwargs["ids"] = self.ids
-            compuesto = coolProp.CoolProp(**self.kwargs)
+            kwargs = self.kwargs.copy()
+            kwargs["H"] = h
+            kwargs["S"] = s
+            compuesto = coolProp.CoolProp(**kwargs)
         elif self._thermo == "meos":
             if self.tipoTermodinamica == "TP":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](T=T, P=P)
+                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](
+                    T=T, P=P, lazy=True)
             elif self.tipoTermodinamica == "Tx":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](T=T, x=x)
+                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](
+                    T=T, x=x, lazy=True)
             elif self.tipoTermodinamica == "Px":
-                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](P=P, x=x)
+                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](
+                    P=P, x=x, lazy=True)
+            elif self.tipoTermodinamica == "Ph":
+                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](
+                    P=P, h=h, lazy=True)
+            elif self.tipoTermodinamica == "Ps":
+                compuesto = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])](
+                    P=P, s=s, lazy=True)
         elif self._thermo == "eos":
-            if self.kwargs["K"]:
-                index = K_name.index(self.kwargs["K"])
-                K = EoS.K[index]
-                print(K)
-            else:
-                K = EoS.K[Config.getint("Thermo","K")]
-            if self.kwargs["H"]:
-                index = H_name.index(self.kwargs["H"])
-                H = EoS.H[index]
-                print(H)
-            else:
-                H = EoS.H[Config.getint("Thermo","H")]
+            K, H = self._eosModels()
 
             setData = False
             self.M = unidades.Dimensionless(self.mezcla.M)
@@ -400,73 +465,28 @@ class Corriente(config.Entity):
             self.Pc = self.mezcla.Pc
             self.SG = unidades.Dimensionless(self.mezcla.SG)
 
-            if self.tipoTermodinamica == "TP":
-                self.T = unidades.Temperature(T)
-                self.P = unidades.Pressure(P)
-                eos = K(self.T, self.P.atm, self.mezcla)
-                self.eos = eos
-                self.x = unidades.Dimensionless(eos.x)
-            else:
-                self.x = unidades.Dimensionless(x)
-
-#            self.mezcla.recallZeros(eos.xi)
-#            self.mezcla.recallZeros(eos.yi)
-#            self.mezcla.recallZeros(eos.Ki, 1.)
-
-            if 0. < self.x < 1.:
-                self.Liquido = Mezcla(tipo=5, fraccionMolar=eos.xi, caudalMolar=self.caudalmolar*(1-self.x))
-                self.Gas = Mezcla(tipo=5, fraccionMolar=eos.yi, caudalMolar=self.caudalmolar*self.x)
-            elif self.x <= 0:
-                self.Liquido = self.mezcla
-                self.Gas = Mezcla()
-            else:
-                self.Liquido = Mezcla()
-                self.Gas = self.mezcla
-            self.Gas.Z = unidades.Dimensionless(float(eos.Z[0]))
-            self.Liquido.Z = unidades.Dimensionless(float(eos.Z[1]))
-
-            if H == K:
-                eosH = eos
-            else:
-                eosH = H(self.T, self.P.atm, self.mezcla)
-            self.H_exc = eosH.H_exc
-
-            self.Liquido.Q = unidades.VolFlow(0)
-            self.Gas.Q = unidades.VolFlow(0)
-            self.Liquido.h = unidades.Power(0)
-            self.Gas.h = unidades.Power(0)
-            if self.x < 1:
-                # There is liquid phase
-                Hl = (self.Liquido.Entalpia_ideal(self.T).Jg-self.Liquido.Hv_DIPPR(self.T).Jg)*self.Liquido.caudalmasico.gh
-                self.Liquido.h = unidades.Power(Hl-R*self.T/self.M*self.H_exc[1]*(1-self.x)*self.Liquido.caudalmasico.gh, "Jh")
-                self.Liquido.cp = self.Liquido.Cp_Liquido(T)
-                self.Liquido.rho = self.Liquido.RhoL_Tait_Costald(T, self.P.atm)
-                self.Liquido.mu = self.Liquido.Mu_Liquido(T, self.P.atm)
-                self.Liquido.k = self.Liquido.ThCond_Liquido(T, self.P.atm)
-                self.Liquido.sigma = self.Liquido.Tension(T)
-                self.Liquido.Q = unidades.VolFlow(self.Liquido.caudalmasico/self.Liquido.rho)
-                self.Liquido.Prandt = self.Liquido.cp*self.Liquido.mu/self.Liquido.k
-            if self.x > 0:
-                # There is gas phase
-                Hg = self.Gas.Entalpia_ideal(self.T).Jg*self.Gas.caudalmasico.gh
-                self.Gas.h = unidades.Power(Hg-R*self.T/self.M*self.H_exc[0]*self.x*self.Gas.caudalmasico.gh, "Jh")
-                self.Gas.cp = self.Gas.Cp_Gas(T, self.P.atm)
-                self.Gas.rho = unidades.Density(self.P.atm/self.Gas.Z/R_atml/self.T*self.M, "gl")
-                self.Gas.rhoSd = unidades.Density(1./self.Gas.Z/R_atml/298.15*self.M, "gl")
-                self.Gas.mu = self.Gas.Mu_Gas(T, self.P.atm)
-                self.Gas.k = self.Gas.ThCond_Gas(T, self.P.atm)
-                self.Gas.Q = unidades.VolFlow(self.Gas.caudalmasico/self.Gas.rho)
-                self.Gas.Prandt = self.Gas.cp*self.Gas.mu/self.Gas.k
-
-            self.Q = unidades.VolFlow(self.Liquido.Q+self.Gas.Q)
-            self.h = unidades.Power(self.Liquido.h+self.Gas.h)
-            self.Molaridad = [caudal/self.Q.m3h for caudal in self.caudalunitariomolar]
-
-            # TODO:
-            self.cp_cv = 0.5
-            self.cp_cv_ideal = 0.5
-            self.s = 0
-            self.rho = 0
+            if self.tipoTermodinamica == "Ps":
+                self.status = 0
+                self.msg = QApplication.translate(
+                    "pychemqt",
+                    "Entropy specification not supported with cubic EoS")
+                return
+            elif self.tipoTermodinamica == "Ph":
+                T = self._eosTemperature(P, h, K, H)
+                if T is None:
+                    self.status = 0
+                    self.msg = QApplication.translate(
+                        "pychemqt", "Temperature not found for the enthalpy "
+                        "specification with the cubic EoS")
+                    return
+            self._eos(T, P, K, H)
+
+        if setData and compuesto.status not in (1, 3):
+            # The backend can't solve the state, its status is reported by
+            # the stream
+            self.status = compuesto.status
+            self.msg = compuesto.msg
+            return
 
         if setData:
             # Asignación de valores comun
@@ -571,6 +591,157 @@ class Corriente(config.Entity):
             self.kwargs["caudalVolumetrico"] = Q
             self.kwargs["caudalMolar"] = None
 
+    def _eos(self, T, P, K, H):
+        """Calculate the stream state with cubic equation of state
+        T: temperature, K
+        P: pressure, Pa
+        K: equation of state for phase equilibrium
+        H: equation of state for enthalpy"""
+        self._eosEnthalpy(T, P, K, H)
+
+        self.Liquido.Q = unidades.VolFlow(0)
+        self.Gas.Q = unidades.VolFlow(0)
+        if self.x < 1:
+            # There is liquid phase
+            self.Liquido.rho = self.Liquido.RhoL_Tait_Costald(T, self.P.atm)
+            self.Liquido.mu = self.Liquido.Mu_Liquido(T, self.P.atm)
+            self.Liquido.k = self.Liquido.ThCond_Liquido(T, self.P.atm)
+            self.Liquido.sigma = self.Liquido.Tension(T)
+            self.Liquido.Q = unidades.VolFlow(self.Liquido.caudalmasico/self.Liquido.rho)
+            self.Liquido.Prandt = self.Liquido.cp*self.Liquido.mu/self.Liquido.k
+        if self.x > 0:
+            # There is gas phase
+            self.Gas.rho = unidades.Density(self.P.atm/self.Gas.Z/R_atml/self.T*self.M, "gl")
+            self.Gas.rhoSd = unidades.Density(1./self.Gas.Z/R_atml/298.15*self.M, "gl")
+            self.Gas.mu = self.Gas.Mu_Gas(T, self.P.atm)
+            self.Gas.k = self.Gas.ThCond_Gas(T, self.P.atm)
+            self.Gas.Q = unidades.VolFlow(self.Gas.caudalmasico/self.Gas.rho)
+            self.Gas.Prandt = self.Gas.cp*self.Gas.mu/self.Gas.k
+
+        self.Q = unidades.VolFlow(self.Liquido.Q+self.Gas.Q)
+        self.Molaridad = [caudal/self.Q.m3h for caudal in self.caudalunitariomolar]
+
+        # TODO:
+        self.cp_cv = 0.5
+        self.cp_cv_ideal = 0.5
+        self.s = 0
+        self.rho = 0
+
+    def _eosEnthalpy(self, T, P, K, H):
+        """Calculate the phase equilibrium and the enthalpy and heat capacity
+        of phases with cubic equation of state, without the transport
+        properties"""
+        state = StreamState(T, P, self.ids, self.caudalunitariomolar, K=K,
+                            H=H, mezcla=self.mezcla)
+        self.T = unidades.Temperature(T)
+        self.P = unidades.Pressure(P)
+        self.eos = state.eos
+        self.x = unidades.Dimensionless(state.x)
+
+#        self.mezcla.recallZeros(eos.xi)
+#        self.mezcla.recallZeros(eos.yi)
+#        self.mezcla.recallZeros(eos.Ki, 1.)
+
+        self.Liquido = state.Liquido
+        self.Gas = state.Gas
+        self.H_exc = state.H_exc
+        self.h = unidades.Power(self.Liquido.h+self.Gas.h)
+
+    def _eosTemperature(self, P, h, K, H):
+        """Calculate the temperature of stream with the specific enthalpy h,
+        J/kg, at pressure P with cubic equation of state. The stream is
+        solved by Newton method with the heat capacity of phases as
+        derivative, the bracket of root catch the latent heat in phase
+        change
+
+        Return None if the enthalpy isn't defined by the equation, as the
+        van der Waals enthalpy departure, or the solution isn't found"""
+        state = StreamState(298.15, P, self.ids, self.caudalunitariomolar,
+                            K=K, H=H, mezcla=self.mezcla)
+        if not isfinite(h) or not isfinite(state.h):
+            return None
+
+        def f(T, mask):
+            trial = state.clone(T=T[0])
+            return trial.h-h, trial.cp
+
+        T, niter = meos._bracketedNewton(f, [298.15], 0, inf, xtol=1e-10)
+        T = T[0]
+        if not isfinite(T) or not isfinite(state.clone(T=T).h):
+            return None
+        return T
+
+    def _fluid(self):
+        """Return the function to create the thermodynamic backend instance
+        of a StreamState for the backends others than cubic equations of
+        state"""
+        if self._thermo == "freesteam":
+            def fluid(state):
+                return freeSteam.Freesteam(T=state.T, P=state.P)
+        elif self._thermo == "iapws":
+            def fluid(state):
+                return iapws.IAPWS97(T=state.T, P=state.P)
+        elif self._thermo == "refprop":
+            def fluid(state):
+                return refProp.RefProp(T=state.T, P=state.P, ids=state.ids,
+                                       fraccionMolar=list(state.fraccion))
+        elif self._thermo == "coolprop":
+            def fluid(state):
+                return coolProp.CoolProp(T=state.T, P=state.P, ids=state.ids,
+                                         fraccionMolar=list(state.fraccion))
+        elif self._thermo == "gerg":
+            ids = [gerg.id_GERG.index(id) for id in self.ids]
+
+            def fluid(state):
+                return gerg.GERG(componente=ids, fraccion=state.fraccion,
+                                 T=state.T, P=state.P/1e6,
+                                 mezcla=state.mezcla)
+        else:
+            MEoS = mEoS.__all__[mEoS.id_mEoS.index(self.ids[0])]
+
+            def fluid(state):
+                return MEoS(T=state.T, P=state.P, lazy=True)
+        return fluid
+
+    def _eosModels(self):
+        """Return the equations of state configured for phase equilibrium
+        and enthalpy"""
+        Config = config.getMainWindowConfig()
+        if self.kwargs["K"]:
+            index = EoS.K_name.index(self.kwargs["K"])
+            K = EoS.K[index]
+        else:
+            K = EoS.K[Config.getint("Thermo","K")]
+        if self.kwargs["H"]:
+            index = EoS.H_name.index(self.kwargs["H"])
+            H = EoS.H[index]
+        else:
+            H = EoS.H[Config.getint("Thermo","H")]
+        return K, H
+
+    def state(self, T=None, P=None, caudalUnitarioMolar=None):
+        """Return a StreamState with the composition and thermodynamic
+        method of stream, for trial evaluations at other conditions
+            T: temperature, default the stream temperature, K
+            P: pressure, default the stream pressure, Pa
+            caudalUnitarioMolar: molar flows of components, kmol/s, default
+                the stream flows"""
+        if T is None:
+            T = self.T
+        if P is None:
+            P = self.P
+        if caudalUnitarioMolar is None:
+            caudalUnitarioMolar = self.caudalunitariomolar
+            mezcla = self.mezcla
+        else:
+            mezcla = None
+        if self._thermo == "eos":
+            K, H = self._eosModels()
+            return StreamState(T, P, self.ids, caudalUnitarioMolar, K=K, H=H,
+                               mezcla=mezcla)
+        return StreamState(T, P, self.ids, caudalUnitarioMolar,
+                           fluid=self._fluid(), mezcla=mezcla)
+
     def _method(self):
         """Find the thermodynamic method to use"""
         Config = config.getMainWindowConfig()
@@ -628,7 +799,7 @@ class Corriente(config.Entity):
             _gerg = self.kwargs["GERG"]
         else:
             _gerg = Config.getboolean("Thermo", "GERG")
-            GERG = _gerg and GERG_available
+        GERG = _gerg and GERG_available
 
         # Final selection
         if IAPWS and FREESTEAM:
@@ -677,6 +848,14 @@ class Corriente(config.Entity):
                 kwargs["caudalMolar"] = split*self.kwargs["caudalMolar"]
         if "x" in kwargs:
             del old_kwargs["T"]
+        if "T" in kwargs or "x" in kwargs:
+            old_kwargs["h"] = None
+            old_kwargs["s"] = None
+        if "h" in kwargs or "s" in kwargs:
+            old_kwargs["T"] = 0.0
+            old_kwargs["x"] = None
+            old_kwargs["h"] = None
+            old_kwargs["s"] = None
         if "mezcla" in kwargs:
             old_kwargs.update(kwargs["mezcla"].kwargs)
             del kwargs["mezcla"]
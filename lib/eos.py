@@ -23,6 +23,9 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Library to add EoS common functionality
 ###############################################################################
 
+import logging
+
+from numpy import array, dot
 from scipy import exp, log, log10, tan, sinh, tanh, arctan, sqrt
 from scipy import roots, r_
 from scipy.constants import pi, Avogadro, R
@@ -30,6 +33,7 @@ from scipy.optimize import fsolve
 
 from . import unidades
 from . import config
+from .flash import flash, saturation
 from .physics import R_atml, factor_acentrico_octano
 
 #from EoS import *
@@ -102,6 +106,14 @@ def volume_Correction_Peneloux(compuesto):
 
 
 class EoS(object):
+    """Base class of equations of state, the child classes define the lnphi
+    function used for the phase equilibrium calculation, the default
+    implementation use the _fug method"""
+
+    # Calculate the phase equilibrium in the instance creation, disabled in
+    # the intermediate states of saturation calculations
+    _equilibrium = True
+
     def __init__(self, T, P, mezcla, **kwargs):
         self.T = unidades.Temperature(T)
         self.P = unidades.Pressure(P, "atm")
@@ -110,95 +122,111 @@ class EoS(object):
         self.fraccion = mezcla.fraccion
         self.kwargs = kwargs
 
+    @classmethod
+    def _new(cls, T, P, mezcla):
+        """Create an instance without the phase equilibrium calculation"""
+        eq = cls.__new__(cls)
+        eq._equilibrium = False
+        eq.__init__(T, P, mezcla)
+        return eq
+
+    def _state(self, T, P):
+        """Return the equation of state at other conditions, used in the
+        saturation calculations, the child classes can reuse the parameters
+        of components"""
+        return self._new(T, P, self.mezcla)
+
+    def _lnphi(self, xi, phase):
+        """Logarithm of fugacity coefficients of components in a phase with
+        composition xi, 0 for vapor and 1 for liquid"""
+        return log(self._fug(self.Z[phase], xi))
+
+    def _Kwilson(self, T, P):
+        """Estimación inicial de K mediante correlación de Wilson"""
+        Tc = array([cmp.Tc for cmp in self.componente], dtype=float)
+        Pc = array([cmp.Pc.atm for cmp in self.componente], dtype=float)
+        w = array([cmp.f_acent for cmp in self.componente], dtype=float)
+        return Pc/P*exp(5.37*(1.+w)*(1.-Tc/T))
+
     def _Flash(self):
-        """Cálculo de los coeficientes de reparto entre fases, Ref Naji - Conventional and rapid flash claculations"""
-        #Estimación inicial de K mediante correlación wilson Eq 19
-        Ki=[]
-        for i in self.componente:
-            Ki.append(i.Pc/self.P*exp(5.37*(1.+i.f_acent)*(1.-i.Tc/self.T)))
-
-        Rachford=lambda x: sum([zi*(ki-1.)/(1.-x+x*ki) for zi, ki in zip(self.fraccion, Ki)])
-
-        if Rachford(0)>0 and Rachford(1)>0: #x>1, por tanto solo fase vapor
-            xi=self.fraccion
-            yi=self.fraccion
-            x=1.
-        elif Rachford(0)<0 and Rachford(1)<0: #x<0, por tanto solo fase líquida
-            xi=self.fraccion
-            yi=self.fraccion
-            x=0.
-        else:
-            x=0.5
-            while True:
-                xo=x
-                solucion=fsolve(Rachford, x, full_output=True)
-                if solucion[2]!=1:
-                    print(solucion)
-                    break
+        """Cálculo de los coeficientes de reparto entre fases, Ref Michelsen
+        The isothermal flash problem, the convergence statistics are saved
+        in flashStatistics"""
+        K = self._Kwilson(self.T, self.P.atm)
+        if not self._equilibrium:
+            return 0., self.fraccion, self.fraccion, list(K)
+
+        x, xi, yi, Ki, self.flashStatistics = flash(
+            self.fraccion, self._lnphi, K)
+        if not self.flashStatistics["converged"]:
+            logging.warning("%s flash not converged at T=%g K, P=%g atm" % (
+                self.__class__.__name__, self.T, self.P.atm))
+        return x, list(xi), list(yi), list(Ki)
+
+    def _saturation(self, bubble, variable):
+        """Saturation point calculation
+            bubble: boolean to calculate the bubble point, else dew point
+            variable: T or P, the variable to calculate
+        The iteration begin at the saturation point with the equilibrium
+        ratios of Wilson correlation, the convergence statistics are saved in
+        saturationStatistics"""
+        z = array(self.fraccion, dtype=float)
+        T = float(self.T)
+        P = self.P.atm
+        if variable == "T":
+            w = array([cmp.f_acent for cmp in self.componente], dtype=float)
+            Tc = array([cmp.Tc for cmp in self.componente], dtype=float)
+            dlnK = -5.37*(1.+w)*Tc
+
+            # Ideal solution with Wilson correlation, lnK linear in 1/T
+            s = 1/T
+            for i in range(20):
+                K = self._Kwilson(1/s, P)
+                if bubble:
+                    zK = z*K
+                    df = dot(zK, dlnK)/zK.sum()
                 else:
-                    x=solucion[0][0]
-
-                    xi=[]
-                    yi=[]
-                    for zi, ki in zip(self.fraccion, Ki):
-                        xi.append(float(zi/(1-x+x*ki)))
-                        yi.append(float(zi*ki/(1-x+x*ki)))
-
-                    tital=self._fug(self.Z[1], xi)
-                    titav=self._fug(self.Z[0], yi)
-                    fiv=[z*t*self.P for z, t in zip(yi, titav)]
-                    fil=[z*t*self.P for z, t in zip(xi, tital)]
-                    #criterio de convergencia Eq 21
-                    if sum([abs(l/v-1) for l, v in zip(fil, fiv)])< 1e-14 and abs(x-xo) < 1e-10:
-                        break
-                    else:
-                        Ki=[l/v for l, v in zip(tital, titav)]
-
-        if x < 0:
-            x = 0
-        elif x > 1:
-            x = 1
-
-        return x, xi, yi, Ki
+                    zK = z/K
+                    df = -dot(zK, dlnK)/zK.sum()
+                ds = -log(zK.sum())/df
+                s += max(min(ds, 0.2*s), -0.2*s)
+                if abs(ds) < 1e-8*s:
+                    break
 
+            s, w, Ki, info = saturation(
+                z, lambda s: self._state(1/s, P)._lnphi, s,
+                self._Kwilson(1/s, P), dlnK, bubble, maxStep=0.1*s, bound=1/T)
+            value = unidades.Temperature(1/s)
+        else:
+            # Ideal solution with Wilson correlation, K inverse to P
+            K = self._Kwilson(T, P)
+            if bubble:
+                P *= dot(z, K)
+            else:
+                P /= dot(z, 1/K)
+            s, w, Ki, info = saturation(
+                z, lambda s: self._state(T, exp(s))._lnphi, log(P),
+                self._Kwilson(T, P), -1., bubble, maxStep=1.,
+                bound=log(self.P.atm))
+            value = unidades.Pressure(exp(s), "atm")
+
+        self.saturationStatistics = info
+        if not info["converged"]:
+            logging.warning("%s saturation point not converged" %
+                            self.__class__.__name__)
+        return value
 
     def _Bubble_T(self):
-        def f(T):
-            eq=self.__class__(T, self.P.atm, self.mezcla)
-            return sum([k*x for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        T=fsolve(f, self.T)
-        return unidades.Temperature(T)
+        return self._saturation(True, "T")
 
     def _Bubble_P(self):
-        def f(P):
-            eq=self.__class__(self.T, P, self.mezcla)
-            return sum([k*x for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        P=fsolve(f, self.P.atm)
-        return unidades.Pressure(P, "atm")
+        return self._saturation(True, "P")
 
     def _Dew_T(self):
-        def f(T):
-            eq=self.__class__(T, self.P.atm, self.mezcla)
-            return 1./sum([x/k for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        T=fsolve(f, self.T)
-        return unidades.Temperature(T)
+        return self._saturation(False, "T")
 
     def _Dew_P(self):
-        def f(P):
-            eq=self.__class__(self.T, P, self.mezcla)
-            return sum([x/k for k, x in zip(eq.Ki, self.fraccion)])-1.
-
-        P=fsolve(f, self.P.atm)
-        return unidades.Pressure(P, "atm")
-
-
-
-
-
-
+        return self._saturation(False, "P")
 
 
 def PT_lib(compuesto, T):
@@ -0,0 +1,401 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2016, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Phase equilibrium engine shared by the equations of state
+#   -rachfordRice: Vapor fraction of a feed with known equilibrium ratios
+#   -stability: Michelsen tangent plane stability analysis
+#   -flash: Isothermal flash by accelerated successive substitution
+#   -saturation: Bubble and dew point calculation
+#
+# The equation of state is defined by a function lnphi(x, phase) returning
+# the logarithm of fugacity coefficients of components in a phase with
+# composition x, with phase 0 for vapor and 1 for liquid as in EoS.Z
+###############################################################################
+
+
+from numpy import (asarray, clip, dot, errstate, exp, isfinite, log, ones,
+                   where, zeros)
+from numpy.linalg import LinAlgError, solve
+
+
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-10
+
+# Successive substitution are accelerated each ACCELERATION iterations
+ACCELERATION = 5
+
+# Successive substitution with an estimated dominant eigenvalue over
+# SLOW_CONVERGENCE or with sum(z·lnK²) below NEAR_CRITICAL are switched to
+# Newton method
+SLOW_CONVERGENCE = 0.9
+NEAR_CRITICAL = 1e-2
+
+# Solutions with sum(z·lnK²) below TRIVIAL are considered the trivial
+# solution K=1, in stability analysis and saturation calculations the
+# incipient phases are compared with the feed with the TRIVIAL_TRIAL value
+TRIVIAL = 1e-8
+TRIVIAL_TRIAL = 1e-4
+
+# Trial phases with tangent plane distance below -UNSTABLE stop the
+# stability analysis
+UNSTABLE = 1e-3
+
+
+def rachfordRice(z, K, tol=1e-12):
+    """Solve the Rachford-Rice equation for the vapor fraction β:
+        Σ zi(Ki-1)/(1+β(Ki-1)) = 0
+
+    The function is monotone decreasing in β so the root is found with
+    Newton method safeguarded with bisection in the bracket of Leibovici and
+    Neoschil, J. Fluid Phase Equilibria 74 (1992) 303-308
+    Return the vapor fraction, bounded to [0, 1], and the liquid and vapor
+    compositions
+
+    >>> beta, x, y = rachfordRice([0.5, 0.5], [2., 0.5])
+    >>> "%0.4f %0.4f %0.4f" % (beta, x[0], y[0])
+    '0.5000 0.3333 0.6667'
+    """
+    z = asarray(z, dtype=float)
+    K = asarray(K, dtype=float)
+    Km1 = K-1
+
+    if dot(z, Km1) <= 0:
+        beta = 0.
+    elif dot(z, Km1/K) >= 0:
+        beta = 1.
+    else:
+        with errstate(divide="ignore", invalid="ignore"):
+            up = K > 1
+            down = K < 1
+            lo = max([0.]+list(((K*z-1)/Km1)[up]))
+            hi = min([1.]+list(((1-z)/-Km1)[down]))
+
+        beta = (lo+hi)/2
+        for i in range(MAX_ITERATIONS):
+            d = 1+beta*Km1
+            f = dot(z, Km1/d)
+            if f > 0:
+                lo = beta
+            else:
+                hi = beta
+            step = f/dot(z, (Km1/d)**2)
+            if abs(step) < tol:
+                beta += step
+                break
+            beta += step
+            if not lo < beta < hi:
+                beta = (lo+hi)/2
+
+    x = z/(1+beta*Km1)
+    return beta, x, K*x
+
+
+def _singlePhase(z, lnphi, K):
+    """Vapor fraction of a stable feed, 1 for vapor and 0 for liquid, using
+    the root with lower Gibbs free energy or the initial estimation of
+    equilibrium ratios if the equation has only a root"""
+    gv = dot(z, lnphi(z, 0))
+    gl = dot(z, lnphi(z, 1))
+    if abs(gv-gl) > TOLERANCE:
+        return float(gv < gl)
+    return float(dot(z, K) > 1)
+
+
+def stability(z, lnphi, K, tol=TOLERANCE, maxiter=MAX_ITERATIONS):
+    """Michelsen tangent plane stability analysis of the feed z
+        Michelsen, M. L. The isothermal flash problem. Part I. Stability.
+        Fluid Phase Equilibria 9 (1982) 1-19
+
+    Search the stationary points of the tangent plane distance by successive
+    substitution from a vapor-like trial phase W=z·K and a liquid-like trial
+    phase W=z/K
+    Return a tuple (stable, K, iterations) with K the equilibrium ratios
+    estimated from the trial phase with lower tangent plane distance, or the
+    input K if the feed is stable
+    """
+    z = asarray(z, dtype=float)
+    K = asarray(K, dtype=float)
+    present = z > 0
+    with errstate(divide="ignore"):
+        lnz = log(z)
+    zp = z[present]
+
+    phis = [lnphi(z, 0), lnphi(z, 1)]
+    d = lnz+min(phis, key=lambda phi: dot(z, phi))
+
+    iterations = 0
+    best = None
+    for phase, W in ((0, z*K), (1, z/K)):
+        with errstate(divide="ignore"):
+            lnW = log(W)
+        step = None
+        for i in range(1, maxiter+1):
+            iterations += 1
+            W = exp(lnW)
+
+            # The components not present in feed are kept out of trial phase
+            with errstate(invalid="ignore"):
+                delta = where(present, d-lnphi(W/W.sum(), phase)-lnW, 0.)
+            error = abs(delta[present]).max()
+            if step is not None and not i % ACCELERATION:
+                lam = dot(delta[present], delta[present]) / \
+                    dot(step[present], delta[present])
+                if 0 < lam < SLOW_CONVERGENCE:
+                    delta = delta/(1-lam)
+            step = delta
+            lnW = lnW+delta
+
+            # Stop with convergence, trivial solution or negative tangent
+            # plane distance, enough to initialize the flash
+            dlnW = lnW[present]-lnz[present]
+            if error < tol or not isfinite(error) or \
+                    dot(zp, dlnW**2) < TRIVIAL_TRIAL or \
+                    exp(lnW).sum() > 1+UNSTABLE:
+                break
+
+        if not isfinite(dlnW).all() or dot(zp, dlnW**2) < TRIVIAL_TRIAL:
+            continue
+        W = exp(lnW)
+        tm = 1-W.sum()
+        if tm < -tol and (best is None or tm < best[0]):
+            Ktrial = ones(len(z))
+            if phase == 0:
+                Ktrial[present] = W[present]/zp
+            else:
+                Ktrial[present] = zp/W[present]
+            best = (tm, Ktrial)
+
+    if best is None:
+        return True, K, iterations
+    return False, best[1], iterations
+
+
+def _residual(z, lnphi, lnK):
+    """Residual of the equilibrium condition for the equilibrium ratios,
+    lnKi - ln φiL + ln φiV, with the phases calculated by Rachford-Rice"""
+    beta, x, y = rachfordRice(z, exp(lnK))
+    return lnK+lnphi(y/y.sum(), 0)-lnphi(x/x.sum(), 1), beta, x, y
+
+
+def _newtonStep(z, lnphi, lnK, F, h=1e-7):
+    """Newton step for the residual F at lnK, with the jacobian calculated by
+    forward finite differences"""
+    n = len(lnK)
+    J = zeros((n, n))
+    for j in range(n):
+        lnKj = lnK.copy()
+        lnKj[j] += h
+        J[:, j] = (_residual(z, lnphi, lnKj)[0]-F)/h
+    return solve(J, -F)
+
+
+def flash(z, lnphi, K, tol=TOLERANCE, maxiter=MAX_ITERATIONS):
+    """Isothermal two phase flash of feed z, the equilibrium ratios K are
+    used as initial estimate, usually from Wilson correlation
+
+    The equilibrium ratios are calculated by successive substitution
+    accelerated with the dominant eigenvalue method, Michelsen, M. L.
+    The isothermal flash problem. Part II. Phase-split calculation. Fluid
+    Phase Equilibria 9 (1982) 21-40. With slow convergence, typical near
+    the critical point, the iteration change to Newton method.
+    The feeds with single phase from the initial estimation are checked with
+    stability analysis.
+
+    Return a tuple (beta, x, y, K, info) with the vapor fraction, the liquid
+    and vapor compositions, the equilibrium ratios and a dict with the
+    calculation statistics:
+        iterations: Total number of iterations
+        newton: Number of Newton iterations
+        accelerations: Number of accelerated iterations
+        stability: Number of iterations of stability analysis
+        converged: Boolean with the convergence state
+        error: Maximum residual of equilibrium condition
+    """
+    z = asarray(z, dtype=float)
+    K0 = K = asarray(K, dtype=float)
+    info = {"iterations": 0, "newton": 0, "accelerations": 0, "stability": 0,
+            "converged": False, "error": None}
+
+    beta, x, y = rachfordRice(z, K)
+    if not 0 < beta < 1:
+        stable, K, info["stability"] = stability(z, lnphi, K, tol, maxiter)
+        beta, x, y = rachfordRice(z, K)
+        if stable or not 0 < beta < 1:
+            info["converged"] = True
+            info["error"] = 0.
+            return _singlePhase(z, lnphi, K0), z, z, K, info
+
+    lnK = log(K)
+    F = lnK+lnphi(y/y.sum(), 0)-lnphi(x/x.sum(), 1)
+    step = None
+    newton = False
+    for i in range(maxiter):
+        info["iterations"] += 1
+        info["error"] = abs(F).max()
+        if info["error"] < tol:
+            info["converged"] = True
+            break
+
+        residual = None
+        if newton:
+            try:
+                delta = _newtonStep(z, lnphi, lnK, F)
+            except LinAlgError:
+                newton = False
+            else:
+                info["newton"] += 1
+                # Step halving to ensure the decrease of the residual
+                for j in range(10):
+                    residual = _residual(z, lnphi, lnK+delta)
+                    if abs(residual[0]).max() < info["error"]:
+                        break
+                    delta /= 2
+
+        if not newton:
+            delta = -F
+            if step is not None:
+                # Dominant eigenvalue of the successive substitution
+                lam = dot(delta, delta)/dot(step, delta)
+                if not info["iterations"] % ACCELERATION and 0 < lam < 1:
+                    delta = delta/(1-lam)
+                    info["accelerations"] += 1
+                newton = lam > SLOW_CONVERGENCE
+            if dot(z, lnK**2) < NEAR_CRITICAL:
+                newton = True
+        step = delta
+
+        lnK = lnK+delta
+        if residual is None:
+            residual = _residual(z, lnphi, lnK)
+        F, beta, x, y = residual
+        if dot(z, lnK**2) < TRIVIAL or not 0 < beta < 1:
+            # Converged to the trivial solution or to a single phase,
+            # the stability analysis decide the phase state
+            K = exp(lnK)
+            stable, K, it = stability(z, lnphi, K, tol, maxiter)
+            info["stability"] += it
+            beta, x, y = rachfordRice(z, K)
+            if stable or not 0 < beta < 1:
+                info["converged"] = True
+                info["error"] = 0.
+                return _singlePhase(z, lnphi, K0), z, z, K, info
+            lnK = log(K)
+            F, beta, x, y = _residual(z, lnphi, lnK)
+            step = None
+            newton = False
+
+    return beta, x/x.sum(), y/y.sum(), exp(lnK), info
+
+
+def saturation(z, lnphi, s, K, dlnK, bubble=True, maxStep=None, bound=None,
+               tol=TOLERANCE, maxiter=MAX_ITERATIONS):
+    """Bubble or dew point of feed z
+
+    The iteration variable s is the pressure or temperature in any
+    transformed scale, ln P or 1/T are near linear with lnK
+    lnphi: function of s returning the lnphi function of equation of state
+        at the state defined by s
+    s: Initial value of iteration variable
+    K: Initial equilibrium ratios
+    dlnK: Estimation of derivative of lnK with s, used in first iteration
+    bubble: boolean to calculate the bubble point, else the dew point
+    maxStep: Maximum change of s in a iteration
+    bound: Value of s used to go back when the first iteration converge to
+        the trivial solution, usually the variable at the current state
+
+    The incipient phase composition are updated by successive substitution
+    while the variable is solved by secant method for the equation
+        ln Σ zi·Ki = 0 for bubble point
+        ln Σ zi/Ki = 0 for dew point
+
+    Return a tuple (s, w, K, info) with the saturation value of variable, the
+    incipient phase composition, the equilibrium ratios and a dict with the
+    statistics of calculation:
+        iterations: Number of iterations
+        converged: Boolean with the convergence state
+        error: Residual of the saturation equation
+    """
+    z = asarray(z, dtype=float)
+    K = asarray(K, dtype=float)
+    dlnK = asarray(dlnK, dtype=float)*ones(len(z))
+    info = {"iterations": 0, "converged": False, "error": None}
+
+    if bubble:
+        w = z*K
+        slope = dot(w, dlnK)/w.sum()
+    else:
+        w = z/K
+        slope = -dot(w, dlnK)/w.sum()
+    w0 = w = w/w.sum()
+
+    previous = None
+    for i in range(maxiter):
+        info["iterations"] += 1
+        state = lnphi(s)
+
+        if bubble:
+            lnK = state(z, 1)-state(w, 0)
+            new = z*exp(lnK)
+        else:
+            lnK = state(w, 1)-state(z, 0)
+            new = z*exp(-lnK)
+        S = new.sum()
+        new /= S
+        change = abs(new-w).max()
+        w = new
+
+        f = log(S)
+        info["error"] = abs(f)
+        if abs(f) < tol and change < tol:
+            info["converged"] = True
+            break
+        if not isfinite(f):
+            break
+
+        if dot(z, lnK**2) < TRIVIAL_TRIAL:
+            # The incipient phase converge to the feed, the variable is
+            # beyond the critical point, go back to the last valid value
+            if previous is not None:
+                back = previous[0]
+            else:
+                back = bound
+            if back is None or abs(s-back) < tol:
+                break
+            s = (s+back)/2
+            w = w0
+            continue
+
+        if previous is not None and s != previous[0]:
+            secant = (f-previous[1])/(s-previous[0])
+            if secant and isfinite(secant):
+                slope = secant
+        previous = (s, f)
+        ds = -f/slope
+        if maxStep is not None:
+            ds = clip(ds, -maxStep, maxStep)
+        s = s+ds
+
+    return s, w, exp(lnK), info
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
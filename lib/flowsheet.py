@@ -0,0 +1,278 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2016, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Graph algorithms for sequential-modular flowsheet solution
+#   -reachable: Nodes reachable from a set of nodes
+#   -stronglyConnected: Strongly connected components in topological order
+#   -levels: Group of components in levels of independent components
+#   -tearEdges: Edges to remove to break the cycles of a component
+#   -topologicalOrder: Order of nodes of an acyclic graph
+#   -Wegstein: Wegstein acceleration for convergence of tear streams
+#
+# The graphs are defined as a dict with the node as key and a list of
+# successor nodes as value
+###############################################################################
+
+
+from numpy import asarray, clip, isfinite, maximum, where
+
+
+def reachable(graph, nodes):
+    """Return the set of nodes reachable from nodes, these included
+
+    >>> sorted(reachable({1: [2], 2: [3], 3: [], 4: [1]}, [2]))
+    [2, 3]
+    """
+    visited = set(nodes)
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        for succ in graph.get(node, []):
+            if succ not in visited:
+                visited.add(succ)
+                pending.append(succ)
+    return visited
+
+
+def stronglyConnected(graph, nodes=None):
+    """Return the strongly connected components of graph in topological
+    order, using the Tarjan algorithm without recursion
+    nodes: optional list of nodes to restrict the graph to its subgraph
+
+    >>> g = {1: [2], 2: [3], 3: [2, 4], 4: []}
+    >>> stronglyConnected(g)
+    [[1], [2, 3], [4]]
+    """
+    if nodes is None:
+        nodes = graph.keys()
+    nodes = list(nodes)
+    inside = set(nodes)
+
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    components = []
+    count = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(graph.get(root, [])))]
+        index[root] = lowlink[root] = count
+        count += 1
+        stack.append(root)
+        onstack.add(root)
+        while work:
+            node, successors = work[-1]
+            for succ in successors:
+                if succ not in inside:
+                    continue
+                if succ not in index:
+                    index[succ] = lowlink[succ] = count
+                    count += 1
+                    stack.append(succ)
+                    onstack.add(succ)
+                    work.append((succ, iter(graph.get(succ, []))))
+                    break
+                elif succ in onstack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        onstack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component, key=nodes.index))
+
+    # Tarjan find the components in reverse topological order
+    return components[::-1]
+
+
+def levels(graph, components):
+    """Group the strongly connected components, in topological order, in
+    levels, each component depend only of components in previous levels so
+    the components of a level can be calculated in any order or in parallel
+
+    >>> levels({1: [2, 3], 2: [4], 3: [4], 4: []}, [[1], [2], [3], [4]])
+    [[[1]], [[2], [3]], [[4]]]
+    """
+    owner = {}
+    for i, component in enumerate(components):
+        for node in component:
+            owner[node] = i
+
+    level = [0]*len(components)
+    for i, component in enumerate(components):
+        for node in component:
+            for succ in graph.get(node, []):
+                j = owner.get(succ, i)
+                if j != i:
+                    level[j] = max(level[j], level[i]+1)
+
+    groups = []
+    for component, n in zip(components, level):
+        while len(groups) <= n:
+            groups.append([])
+        groups[n].append(component)
+    return groups
+
+
+def tearEdges(graph, nodes, start=None):
+    """Return the edges to remove to break all the cycles of the subgraph
+    with nodes, as the back edges of a depth first search
+    start: optional node to begin the search, the streams entering in this
+    node are preferred as tear streams
+
+    >>> tearEdges({1: [2], 2: [3], 3: [1]}, [1, 2, 3])
+    [(3, 1)]
+    """
+    inside = set(nodes)
+    order = list(nodes)
+    if start is not None and start in inside:
+        order.remove(start)
+        order.insert(0, start)
+
+    state = {}
+    tear = []
+    for root in order:
+        if root in state:
+            continue
+        state[root] = 1
+        work = [(root, iter(graph.get(root, [])))]
+        while work:
+            node, successors = work[-1]
+            for succ in successors:
+                if succ not in inside:
+                    continue
+                if succ not in state:
+                    state[succ] = 1
+                    work.append((succ, iter(graph.get(succ, []))))
+                    break
+                elif state[succ] == 1:
+                    tear.append((node, succ))
+            else:
+                state[node] = 2
+                work.pop()
+    return tear
+
+
+def topologicalOrder(graph, nodes, removed=()):
+    """Return the nodes in topological order, the subgraph with nodes must be
+    acyclic once the edges in removed are deleted
+
+    >>> topologicalOrder({1: [2], 2: [3], 3: [1]}, [1, 2, 3], [(3, 1)])
+    [1, 2, 3]
+    """
+    inside = set(nodes)
+    removed = set(removed)
+    degree = dict.fromkeys(nodes, 0)
+    for node in nodes:
+        for succ in graph.get(node, []):
+            if succ in inside and (node, succ) not in removed:
+                degree[succ] += 1
+
+    pending = [node for node in nodes if not degree[node]]
+    order = []
+    while pending:
+        node = pending.pop(0)
+        order.append(node)
+        for succ in graph.get(node, []):
+            if succ in inside and (node, succ) not in removed:
+                degree[succ] -= 1
+                if not degree[succ]:
+                    pending.append(succ)
+
+    if len(order) != len(nodes):
+        raise ValueError("Graph with cycles")
+    return order
+
+
+class Wegstein(object):
+    """Wegstein acceleration method for the fixed point problem x=g(x), used
+    to converge the tear streams of recycle loops. The first iteration is a
+    direct substitution, in the next each variable use the secant slope of
+    its last two iterations:
+        s = (g(xk)-g(xk-1))/(xk-xk-1)
+        q = s/(s-1)
+        xk+1 = q·xk + (1-q)·g(xk)
+
+    The acceleration factor q is bounded to qmin ≤ q ≤ qmax, the default
+    values are the usual [-5, 0], q=0 is the direct substitution
+
+    >>> accel = Wegstein()
+    >>> x = 0.
+    >>> for i in range(6):
+    ...     x = accel(x, 0.5*x+1)
+    >>> "%0.6f" % x
+    '2.000000'
+    """
+
+    def __init__(self, qmin=-5., qmax=0.):
+        self.qmin = qmin
+        self.qmax = qmax
+        self.x = None
+        self.gx = None
+        self.iterations = 0
+
+    def __call__(self, x, gx):
+        """Return the next value for the iteration variables x, with gx the
+        value calculated in the last iteration"""
+        x = asarray(x, dtype=float)
+        gx = asarray(gx, dtype=float)
+        if self.x is None or self.x.shape != x.shape:
+            new = gx
+        else:
+            dx = x-self.x
+            dg = gx-self.gx
+            with_slope = dx != 0
+            s = where(with_slope, dg/where(with_slope, dx, 1), 0)
+            q = s/where(s != 1, s-1, 1)
+            q = clip(where(isfinite(q) & (s != 1), q, self.qmin),
+                     self.qmin, self.qmax)
+            new = q*x+(1-q)*gx
+        self.x = x
+        self.gx = gx
+        self.iterations += 1
+        return new
+
+    @staticmethod
+    def error(x, gx, scale=None):
+        """Maximum relative difference between x and g(x)
+        scale: optional reference value of each variable, default use the
+        greater magnitude of x and g(x)"""
+        x = asarray(x, dtype=float)
+        gx = asarray(gx, dtype=float)
+        if scale is None:
+            scale = maximum(abs(x), abs(gx))
+        scale = maximum(scale, 1e-12)
+        return (abs(gx-x)/scale).max()
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
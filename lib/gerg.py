@@ -26,19 +26,27 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 #   n-pentane, i-pentane, hexane, heptane, octane, hydrogen, oxygen, carbon
 #   monoxide, water, helium, argón
 #   hydrogen sulfide, nonane, decane from 2008 update
+#
+#   -GERG: Mixture state calculation
+#   -GERGModel: Reducing functions and Helmholtz energy of a set of components
+#
+# The coefficients of pure components and binary departure functions are
+# packed in arrays at import, indexed by the position of the component in
+# GERG.componentes
 ###############################################################################
 
-# TODO: Not implemented gas-liquid equilibrium yet
-
+from collections import OrderedDict
+import logging
 import pickle
 import os
 
-from scipy import exp, log, zeros, r_
-from scipy.constants import R
-from scipy.optimize import fsolve
+from numpy import (arange, array, asarray, bincount, cosh, dot, errstate,
+                   exp, log, newaxis, ones, sinh, tanh, triu, where, zeros)
+from scipy import r_
+from scipy.optimize import brentq, fsolve
 
 from . import unidades
-from .physics import R_atml
+from .flash import flash, saturation
 from lib import mEoS
 from .thermo import Fluid
 
@@ -47,10 +55,83 @@ Pref = 101325.
 # so=0
 # ho=0
 
+# Molar gas constant used in the equation, J/mol·K, and in the ideal gas
+# part of pure components
+R = 8.314472
+R_ideal = 8.314510
+
+# Number of compositions with reducing functions saved in each model
+COMPOSITIONS = 8
+
+# Parameters of density solver, the liquid-like root is searched beginning
+# in a density DENSE times the reducing density of mixture
+# Temperature limits of the extended range of validity of GERG-2008
+TMIN = 60.
+TMAX = 700.
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-12
+DENSE = 3.
+
+# Reducing parameters of pure components, in the order of GERG.componentes,
+# Kunz & Wagner (2012), Table A3.5
+_Tc = array([190.564, 126.192, 304.1282, 305.322, 369.825, 425.125, 407.817,
+             469.7, 460.35, 507.82, 540.13, 569.32, 33.19, 154.595, 132.86,
+             647.096, 5.1953, 150.687, 373.1, 594.55, 617.7])
+_rhoc = array([10.139342719, 11.1839, 10.624978698, 6.870854540, 5.000043088,
+               3.920016792, 3.860142940, 3.215577588, 3.271, 2.705877875,
+               2.315324434, 2.056404127, 14.94, 13.63, 10.85, 17.873716090,
+               17.399, 13.407429659, 10.19, 1.81, 1.64])    # mol/dm³
+_M = array([16.04246, 28.0134, 44.0095, 30.06904, 44.09562, 58.1222, 58.1222,
+            72.14878, 72.14878, 86.17536, 100.20194, 114.22852, 2.01588,
+            31.9988, 28.0101, 18.01528, 4.002602, 39.948, 34.08088, 128.2551,
+            142.28168])     # g/mol
+
 
 class GERG(object):
     """Multiparameter equation of state GERG 2008
-    ref http://dx.doi.org/10.1021/je300655b"""
+    ref http://dx.doi.org/10.1021/je300655b
+
+    Pure methane at ambient conditions, the pressure is input in MPa
+
+    >>> ch4 = GERG(T=300, P=0.1, componente=[0], fraccion=[1.])
+    >>> "%0.4f" % ch4.rho
+    '0.6442'
+
+    Hydrocarbon mixture in the two phases region with the isothermal flash
+
+    >>> from lib import unidades
+    >>> T = unidades.Temperature(205, "F")
+    >>> P = unidades.Pressure(315, "psi")
+    >>> mix = GERG(T=T, P=P.MPa, componente=[0, 3, 4, 5, 7, 9],
+    ...            fraccion=[0.26, 0.09, 0.25, 0.17, 0.11, 0.12])
+    >>> print("%0.4f %0.2f %0.2f" % (mix.x, mix.Liquido.rho, mix.Gas.rho))
+    0.7799 507.74 34.24
+    >>> print(" ".join("%0.4f" % y for y in mix.xv))
+    0.3231 0.1057 0.2735 0.1574 0.0795 0.0608
+
+    The pressure with a caloric property is solved with the flash too
+
+    >>> st = GERG(P=P.MPa, h=mix.h.kJkg, componente=[0, 3, 4, 5, 7, 9],
+    ...           fraccion=[0.26, 0.09, 0.25, 0.17, 0.11, 0.12])
+    >>> print("%0.2f %0.4f" % (st.T, st.x))
+    369.26 0.7799
+
+    Bubble and dew points of the equimolar methane-propane mixture
+
+    >>> kw = {"componente": [0, 4], "fraccion": [0.5, 0.5]}
+    >>> st = GERG(T=250, P=3, **kw)
+    >>> print("%0.2f %0.2f" % (st._Bubble_T(), st._Dew_T()))
+    201.71 306.36
+    >>> print("%0.4f %0.4f" % (st._Bubble_P().MPa, st._Dew_P().MPa))
+    6.2812 0.4569
+    >>> st = GERG(P=3, h=st.h.kJkg, **kw)
+    >>> print("%i %0.2f %0.4f" % (st.status, st.T, st.x))
+    1 250.00 0.4018
+    >>> st = GERG(P=3, h=1e5, **kw)
+    >>> print("%i %s" % (st.status, st.msg))
+    0 Temperature not found for the h specification
+    """
     kwargs = {"componente": [],
               "fraccion": [],
               "T": 0.0,
@@ -247,7 +328,7 @@ class GERG(object):
            It need to specified state define two properties from this:
                 -T: temperature, K
                 -rho: density, kg/m3
-                -P: pressure, Pa
+                -P: pressure, MPa
                 -v: specific volume, m3/kg
                 -h: enthalpy, J/kg
                 -s: entropy, J/kgK
@@ -262,8 +343,8 @@ class GERG(object):
 
         if self.calculable:
             self.status = 1
-            self.calculo()
             self.msg = ""
+            self.calculo()
 
     @property
     def calculable(self):
@@ -291,203 +372,265 @@ class GERG(object):
         u = self.kwargs["u"]
         x = self.kwargs["x"]
 
-        self.comp = []
-        for i in self.kwargs["componente"]:
-            c = self.componentes[i](eq="GERG", **self.kwargs)
-            self.comp.append(c)
         self.id = self.kwargs["componente"]
         self.xi = self.kwargs["fraccion"]
-
-        # Critic properties for mixture,
-        # eq. 7.9, 7.10 pag.125, Tabla 7.10 pag 136
-        bt = self.Prop_c["beta_t"]
-        bv = self.Prop_c["beta_v"]
-        gt = self.Prop_c["gamma_t"]
-        gv = self.Prop_c["gamma_v"]
-        c_T = zeros((len(self.comp), len(self.comp)))
-        c_rho = zeros((len(self.comp), len(self.comp)))
-        for i, cmpi in enumerate(self.comp):
-            for j, cmpj in enumerate(self.comp):
-                c_T[i, j] = 2*bt[i][j]*gt[i][j]*(cmpi.Tc*cmpj.Tc)**0.5
-                c_rho[i, j] = 2*bv[i][j]*gv[i][j]/8. * \
-                    (1./cmpi.rhoc**(1./3)+1./cmpj.rhoc**(1./3))**3
-
-        f_T = zeros((len(self.comp), len(self.comp)))
-        f_rho = zeros((len(self.comp), len(self.comp)))
-        dFT_ik = zeros((len(self.comp), len(self.comp)))
-        dFT_ki = zeros((len(self.comp), len(self.comp)))
-        dFrho_ik = zeros((len(self.comp), len(self.comp)))
-        dFrho_ki = zeros((len(self.comp), len(self.comp)))
-        for i, x_i in enumerate(self.xi):
-            for j, x_j in enumerate(self.xi):
-                f_T[i, j] = x_i*x_j*(x_i+x_j)/(bt[i][j]**2*x_i+x_j)
-                f_rho[i, j] = x_i*x_j*(x_i+x_j)/(bv[i][j]**2*x_i+x_j)
-                dFT_ik[i, j] = x_j*(x_j+x_i)/(bt[i][j]**2*x_i+x_j) + \
-                    x_j*x_i/(bt[i][j]**2*x_i+x_j) * \
-                    (1-bt[i][j]**2*(x_j+x_i)/(bt[i][j]**2*x_i+x_j))
-                dFrho_ik[i, j] = x_j*(x_j+x_i)/(bv[i][j]**2*x_i+x_j) + \
-                    x_j*x_i/(bv[i][j]**2*x_i+x_j) * \
-                    (1-bv[i][j]**2*(x_j+x_i)/(bv[i][j]**2*x_i+x_j))
-                dFT_ki[j, i] = x_j*(x_j+x_i)/(bt[i][j]**2*x_j+x_i)+x_j*x_i / \
-                    (bt[i][j]**2*x_j+x_i)*(1-(x_j+x_i)/(bt[i][j]**2*x_j+x_i))
-                dFrho_ki[j, i] = x_j*(x_j+x_i)/(bv[i][j]**2*x_j+x_i)+x_j*x_i /\
-                    (bv[i][j]**2*x_j+x_i)*(1-(x_j+x_i)/(bv[i][j]**2*x_j+x_i))
-
-        sumai_v = sumaij_v = sumai_T = sumaij_T = m = 0
-        for i, componentei in enumerate(self.comp):
-            sumai_v += self.xi[i]**2/componentei.rhoc
-            sumai_T += self.xi[i]**2*componentei.Tc
-            m += self.xi[i]*componentei.M
-            for j, componentej in enumerate(self.comp):
-                if j > i:
-                    sumaij_v += c_rho[i, j]*f_rho[i, j]
-                    sumaij_T += c_T[i, j]*f_T[i, j]
-
-        self.rhoc = unidades.Density(1./(sumai_v+sumaij_v))
-        self.Tc = unidades.Temperature(sumai_T+sumaij_T)
-        self.M = m  # g/mol
+        self.comp = [self.componentes[i] for i in self.id]
+        self.model = GERGModel.get(self.id)
+        self._x = array(self.xi, dtype=float)
+        self._rho = {}
+
+        # Reducing functions for mixture, eq. 7.9, 7.10 pag.125, and its
+        # derivatives with the mole fractions
+        Tr, rhor, self.Tcxi, self.rhocxi = self.model.reducing(self._x)
+        self.M = self.model.molarMass(self._x)    # g/mol
+        self.rhoc = unidades.Density(rhor*self.M)
+        self.Tc = unidades.Temperature(Tr)
         self.R = unidades.SpecificHeat(R/self.M, "kJkgK")
 
-        Tcxi = rhocxi = []
-        for i, componentei in enumerate(self.comp):
-            sumav1 = sumat1 = 0
-            for k in range(i):
-                sumav1 += c_rho[k, i]*dFrho_ki[k, i]
-                sumat1 += c_T[k, i]*dFT_ki[k, i]
-            sumav2 = sumat2 = 0
-            for k in range(i+1, len(self.xi)):
-                sumav2 += c_rho[i, k]*dFrho_ik[i, k]
-                sumat2 += c_T[i, k]*dFT_ik[i, k]
-
-            Tcxi.append(2*self.xi[i]*componentei.Tc+sumat1+sumat2)
-            rhocxi.append(2*self.xi[i]/componentei.rhoc+sumav1+sumav2)
-        self.Tcxi = Tcxi
-        self.rhocxi = rhocxi
-
         if v and not rho:
             rho = 1./v
 
+        # The states with two properties of T, P and x are calculated with
+        # the phase equilibrium, the other inputs as single phase
         if T and x is not None:
-            pass
+            P, Q, xi, yi = self._quality(x, T=T)
+            rho = None
+        elif P and x is not None:
+            T, Q, xi, yi = self._quality(x, P=P*1e3)
+            P = P*1e3
+            rho = None
+        elif T and P:
+            P = P*1e3
+            Q, xi, yi, Ki = self.flash(T, P)
+            rho = None
+        elif P and (h, s, u) != (None, None, None):
+            # The pressure and a caloric property are solved as a sequence
+            # of isothermal flashes, so the two phases region is included
+            P = P*1e3
+            for key, value in (("h", h), ("s", s), ("u", u)):
+                if value is not None:
+                    break
+            T = self._solveP(P, key, value)
+            if T is None:
+                self.status = 0
+                self.msg = "Temperature not found for the %s specification" \
+                    % key
+                return
+            Q, xi, yi, Ki = self.flash(T, P)
+            rho = None
         else:
-            if T and P:
-                rhoo = 2.
-                rho = fsolve(lambda rho: self._solve(rho, T)["P"]-P*1e6, rhoo)
-            elif T and rho:
-                pass
+            if T and rho:
+                ier = 1
             elif T and h is not None:
-                rho = fsolve(lambda rho: self._solve(rho, T)["h"]-h, 200)
+                rho, info, ier, msg = fsolve(
+                    lambda rho: self._solve(rho, T)["h"]-h, 200,
+                    full_output=True)
             elif T and s is not None:
-                rho = fsolve(lambda rho: self._solve(rho, T)["s"]-s, 200)
+                rho, info, ier, msg = fsolve(
+                    lambda rho: self._solve(rho, T)["s"]-s, 200,
+                    full_output=True)
             elif T and u is not None:
-                rho = fsolve(lambda rho: self._solve(rho, T)["u"]-u, 200)
+                rho, info, ier, msg = fsolve(
+                    lambda rho: self._solve(rho, T)["u"]-u, 200,
+                    full_output=True)
             elif P and rho:
-                T = fsolve(lambda T: self._solve(rho, T)["P"]-P*1e6, 600)
-            elif P and h is not None:
-                rho, T = fsolve(lambda par: (
-                    self._solve(par[0], par[1])["P"]-P*1e6, self._solve(
-                        par[0], par[1])["h"]-h), [200, 600])
-            elif P and s is not None:
-                rho, T = fsolve(lambda par: (
-                    self._solve(par[0], par[1])["P"]-P*1e6, self._solve(
-                        par[0], par[1])["s"]-s), [200, 600])
-            elif P and u is not None:
-                rho, T = fsolve(lambda par: (
-                    self._solve(par[0], par[1])["P"]-P*1e6, self._solve(
-                        par[0], par[1])["u"]-u), [200, 600])
+                T, info, ier, msg = fsolve(
+                    lambda T: self._solve(rho, T)["P"]-P*1e6, 600,
+                    full_output=True)
             elif rho and h is not None:
-                T = fsolve(lambda T: self._solve(rho, T)["h"]-h, 600)
+                T, info, ier, msg = fsolve(
+                    lambda T: self._solve(rho, T)["h"]-h, 600,
+                    full_output=True)
             elif rho and s is not None:
-                T = fsolve(lambda T: self._solve(rho, T)["s"]-s, 600)
+                T, info, ier, msg = fsolve(
+                    lambda T: self._solve(rho, T)["s"]-s, 600,
+                    full_output=True)
             elif rho and u is not None:
-                T = fsolve(lambda T: self._solve(rho, T)["u"]-u, 600)
+                T, info, ier, msg = fsolve(
+                    lambda T: self._solve(rho, T)["u"]-u, 600,
+                    full_output=True)
             elif h is not None and s is not None:
-                rho, T = fsolve(lambda par: (
+                (rho, T), info, ier, msg = fsolve(lambda par: (
                     self._solve(par[0], par[1])["h"]-h, self._solve(
-                        par[0], par[1])["s"]-s), [200, 600])
+                        par[0], par[1])["s"]-s), [200, 600], full_output=True)
             elif h is not None and u is not None:
-                rho, T = fsolve(lambda par: (
+                (rho, T), info, ier, msg = fsolve(lambda par: (
                     self._solve(par[0], par[1])["h"]-h, self._solve(
-                        par[0], par[1])["u"]-u), [200, 600])
+                        par[0], par[1])["u"]-u), [200, 600], full_output=True)
             elif s is not None and u is not None:
-                rho, T = fsolve(lambda par: (
+                (rho, T), info, ier, msg = fsolve(lambda par: (
                     self._solve(par[0], par[1])["s"]-s, self._solve(
-                        par[0], par[1])["u"]-u), [200, 600])
+                        par[0], par[1])["u"]-u), [200, 600], full_output=True)
             else:
                 raise IOError
-
-        fio, fiot, fiott, fiod, fiodd, fiodt, fir, firt, firtt, fird, firdd,\
-            firdt, firdtt, nfioni, nfirni = self._eq(rho, T)
-
-        # Tabla 7.1 pag 127
-        tau = self.Tc/T
-        delta = rho/self.rhoc
+            if ier != 1:
+                self.status = 0
+                self.msg = "Solution don't converge"
+                return
+            T = float(r_[T][0])
+            rho = float(r_[rho][0])/self.M
+            P = self.model.pressure(self._x, T, rho)[0]
+            Q = float(rho < rhor)
+            xi = yi = self._x
 
         self.T = unidades.Temperature(T)
-        self.rho = unidades.Density(rho)
-        self.v = unidades.SpecificVolume(1./rho)
-        self.P = unidades.Pressure((1+delta*fird)*self.R.JkgK*T*rho)
-        self.Z = 1+delta*fird
-        self.s = unidades.SpecificHeat(self.R.kJkgK*(tau*(fiot+firt)-fio-fir))
-        self.u = unidades.Enthalpy(self.R*T*tau*(fiot+firt))
-        self.h = unidades.Enthalpy(self.R*T*(1+tau*(fiot+firt)+delta*fird))
-        self.cp = unidades.SpecificHeat(self.R*(
-            -tau**2*(fiott+firtt)+(1+delta*fird-delta*tau*firdt)**2 /
-            (1+2*delta*fird+delta**2*firdd)))
-        self.cv = unidades.SpecificHeat(-self.R*tau**2*(fiott+firtt))
-        self.g = unidades.Enthalpy(self.R*T*(1+fio+fir+delta*fird))
-        self.w = unidades.Speed((self.R*T*(
-            1+2*delta*fird+delta**2*firdd-(1+delta*fird-delta*tau*firdt)**2 /
-            tau**2/(fiott+firtt)))**0.5)
-
-        f, FI = self.fug(rho, T, nfirni)
-        Ki, xi, yi, Q = self.flash()
+        self.P = unidades.Pressure(P, "kPa")
         self.x = unidades.Dimensionless(Q)
-        self.xl = xi
-        self.xv = yi
+        self.xl = list(xi)
+        self.xv = list(yi)
         if self.kwargs["mezcla"]:
             self.Pc = self.kwargs["mezcla"].Pc
+
         self.Liquido = Fluid()
         self.Gas = Fluid()
+        if 0 < Q < 1:
+            self._fill(self.Liquido, xi, T, P, 1)
+            self._fill(self.Gas, yi, T, P, 0)
+
+            # Mixture properties from phases, with the vapor mass fraction
+            q = Q*self.Gas.M/self.M
+            self.v = unidades.SpecificVolume(q*self.Gas.v+(1-q)*self.Liquido.v)
+            self.rho = unidades.Density(1./self.v)
+            self.h = unidades.Enthalpy(q*self.Gas.h+(1-q)*self.Liquido.h)
+            self.s = unidades.SpecificHeat(q*self.Gas.s+(1-q)*self.Liquido.s)
+            self.u = unidades.Enthalpy(q*self.Gas.u+(1-q)*self.Liquido.u)
+            self.a = unidades.Enthalpy(q*self.Gas.a+(1-q)*self.Liquido.a)
+            self.g = unidades.Enthalpy(q*self.Gas.g+(1-q)*self.Liquido.g)
+            self.Z = unidades.Dimensionless(Q*self.Gas.Z+(1-Q)*self.Liquido.Z)
+        else:
+            fase = (self.Liquido, self.Gas)[int(Q)]
+            self._fill(fase, self._x, T, P, 1-int(Q), rho)
+            for key, value in fase.__dict__.items():
+                self.__setattr__(key, value)
+
+    def _fill(self, fase, xi, T, P, phase, rho=None):
+        """Calculate the properties of a phase with mole fractions xi at
+        temperature T and pressure P, kPa, phase is the root of density to
+        use, 0 for vapor and 1 for liquid, if rho, mol/dm³, isn't known"""
+        x = array(xi, dtype=float)
+        model = self.model
+        if rho is None:
+            rho = model.density(x, T, P, phase, self._rho.get(phase))
+        Tr, rhor = model.reducing(x)[:2]
+        tau = Tr/T
+        delta = rho/rhor
+        fio, fiot, fiott = model.phi0(x, tau, delta, Tr, rhor)[:3]
+        prop, nfirni = model.nphir(x, tau, delta)
+        fir, firt, firtt, fird, firdd, firdt, firdtt = prop
+        M = model.molarMass(x)
+        R_ = unidades.SpecificHeat(R/M, "kJkgK")
 
-    def fug(self, rho, T, nfirni=None):
-        if not nfirni:
-            tau = self.Tc/T
-            delta = rho/self.rhoc
-            fir, firt, firtt, fird, firdd, firdt, firdtt, nfirni = self._phir(tau, delta)
-        f = []
-        FI = []
-        for xi, dn in zip(self.xi, nfirni):
-            f.append(unidades.Pressure(xi*rho/self.M*R_atml*T*exp(dn), "atm"))
-            FI.append(dn-log(self.Z))
-        return f, FI
-
-#        firn=delta*fird*(1-1./self.rhoc*n*rhodn)+tau*firt/self.Tc*n*Tcdn
-#        nfirn=fir+n*dfirn
-#        f
-
-
-#        propiedades["alfap"]=(1-delta*tau*firdt/(1+delta*fird))/T
-#        propiedades["betap"]=rho*(1+(delta*fird+delta**2*firdd)/(1+delta*fird))
-#        propiedades["fugacity"]=exp(fir+delta*fird-log(1+delta*fird))
-#        propiedades["B"]=B
-#        propiedades["C"]=C
-#        propiedades["dpdrho"]=self.R*T*(1+2*delta*fird+delta**2*firdd)
-#        propiedades["dpdT"]=self.R*rho*(1+delta*fird+delta*tau*firdt)
-#
-#        self.a=unidades.Enthalpy(self.u-self.T*self.s)
-#        self.Z=self.P*self.v/self.T/self.R.kJkgK/1000
-#        self.alfap=propiedades["alfap"]     #inversa de la temperatura
-#        self.betap=unidades.Density(propiedades["betap"])
-#
-#        self.Tr=T/self.Tc
-#
-#        self.cp0=self._Cp0(self._constants["cp"])
-#        self.gamma=-self.v/self.P.kPa*self.derivative("P", "v", "s")
-#        self.fi=propiedades["fugacity"]
-#        self.f=unidades.Pressure(self.fi*self.P)
-#        self.virialB=propiedades["B"]
-#        self.virialC=propiedades["C"]
+        # Tabla 7.1 pag 127
+        fase._bool = True
+        fase.M = unidades.Dimensionless(M)
+        fase.rho = unidades.Density(rho*M)
+        fase.v = unidades.SpecificVolume(1./fase.rho)
+        fase.Z = unidades.Dimensionless(1+delta*fird)
+        fase.s = unidades.SpecificHeat(R_.kJkgK*(tau*(fiot+firt)-fio-fir))
+        fase.u = unidades.Enthalpy(R_*T*tau*(fiot+firt))
+        fase.h = unidades.Enthalpy(R_*T*(1+tau*(fiot+firt)+delta*fird))
+        fase.a = unidades.Enthalpy(fase.u-T*fase.s)
+        fase.g = unidades.Enthalpy(R_*T*(1+fio+fir+delta*fird))
+        fase.cp = unidades.SpecificHeat(R_*(
+            -tau**2*(fiott+firtt)+(1+delta*fird-delta*tau*firdt)**2 /
+            (1+2*delta*fird+delta**2*firdd)))
+        fase.cv = unidades.SpecificHeat(-R_*tau**2*(fiott+firtt))
+        fase.cp_cv = unidades.Dimensionless(fase.cp/fase.cv)
+        fase.w = unidades.Speed((R_*T*(
+            1+2*delta*fird+delta**2*firdd-(1+delta*fird-delta*tau*firdt)**2 /
+            tau**2/(fiott+firtt)))**0.5)
+
+        fi = exp(nfirni-log(fase.Z))
+        fase.fi = [unidades.Dimensionless(f) for f in fi]
+        fase.f = [unidades.Pressure(f, "kPa") for f in x*fi*P]
+        fase.fraccion = [unidades.Dimensionless(f) for f in x]
+        fase.fraccion_masica = [
+            unidades.Dimensionless(f) for f in x*model.Mi/M]
+
+    def _state(self, T, P, Q, xi, yi):
+        """Return the liquid and vapor phases, with the properties of
+        mixture, of the flash result Q, xi, yi at temperature T and pressure
+        P, kPa, a null phase is returned as None"""
+        if 0 < Q < 1:
+            liquido = Fluid()
+            gas = Fluid()
+            self._fill(liquido, xi, T, P, 1)
+            self._fill(gas, yi, T, P, 0)
+            return liquido, gas
+        fase = Fluid()
+        self._fill(fase, self._x, T, P, 1-int(Q))
+        if Q:
+            return None, fase
+        return fase, None
+
+    def _solveP(self, P, key, value):
+        """Temperature of mixture at pressure P, kPa, with the specific
+        property key, h, s or u, equal to value, in kJ/kg or kJ/kgK, the
+        property is calculated in each temperature with the isothermal flash
+        so the root is bracketed between a colder and a hotter state
+        Return the temperature or None if the state can't be found"""
+        K = [None]
+
+        def f(T):
+            Q, xi, yi, Ki = self.flash(T, P, K[0])
+            if 0 < Q < 1:
+                # Warm start the next flash with the converged ratios
+                K[0] = Ki
+            liquido, gas = self._state(T, P, Q, xi, yi)
+            if liquido is None:
+                prop = gas.__getattribute__(key)
+            elif gas is None:
+                prop = liquido.__getattribute__(key)
+            else:
+                q = Q*gas.M/self.M
+                prop = q*gas.__getattribute__(key) + \
+                    (1-q)*liquido.__getattribute__(key)
+            return prop/1e3-value
+
+        # The bracket is expanded from the reducing temperature of mixture
+        # to the validity limits of equation, the properties are increasing
+        # with temperature at fixed pressure
+        lo = hi = float(self.Tc)
+        try:
+            flo = fhi = f(lo)
+            while not flo <= 0 <= fhi:
+                if flo > 0:
+                    if lo <= TMIN:
+                        return None
+                    hi, fhi = lo, flo
+                    lo = max(0.8*lo, TMIN)
+                    flo = f(lo)
+                else:
+                    if hi >= TMAX:
+                        return None
+                    lo, flo = hi, fhi
+                    hi = min(1.25*hi, TMAX)
+                    fhi = f(hi)
+            if flo == 0:
+                return lo
+            if fhi == 0:
+                return hi
+            return brentq(f, lo, hi, xtol=1e-10*hi)
+        except (ValueError, ArithmeticError):
+            return None
+
+    def fug(self, rho, T, xi=None):
+        """Fugacity and logarithm of fugacity coefficient of components of
+        a phase with mole fractions xi, default the mixture composition, at
+        density rho, kg/m³, and temperature T"""
+        if xi is None:
+            x = self._x
+        else:
+            x = array(xi, dtype=float)
+        model = self.model
+        rho = rho/model.molarMass(x)
+        Tr, rhor = model.reducing(x)[:2]
+        prop, nfirni = model.nphir(x, Tr/T, rho/rhor)
+        Z = 1+rho/rhor*prop[3]
+        lnphi = nfirni-log(Z)
+        P = rho*R*T*Z
+        f = [unidades.Pressure(fi, "kPa") for fi in x*exp(lnphi)*P]
+        return f, list(lnphi)
 
     def _eq(self, rho, T):
         tau = self.Tc/T
@@ -501,7 +644,8 @@ class GERG(object):
         tau = self.Tc/T
         delta = rho/self.rhoc
         fio, fiot, fiott, fiod, fiodd, fiodt, nfioni = self._phi0(tau, delta)
-        fir, firt, firtt, fird, firdd, firdt, firdtt, nfirni = self._phir(tau, delta)
+        fir, firt, firtt, fird, firdd, firdt, firdtt = self.model.phir(
+            self._x, tau, delta)[0]
         propiedades = {}
         propiedades["P"] = (1+delta*fird)*self.R.JkgK*T*rho
         propiedades["s"] = self.R.kJkgK*(tau*(fiot+firt)-fio-fir)
@@ -511,194 +655,489 @@ class GERG(object):
 
     def _phi0(self, tau, delta):
         """Contribución ideal de la energía libre de Helmholtz eq. 7.5"""
-        fio = fiot = fiott = fiod = fiodd = fiodt = 0
-        nfioni = []   # ðnao/ðni
-        for i, componente in enumerate(self.comp):
-            deltai = delta*self.rhoc/componente.rhoc
-            taui = componente.Tc*tau/self.Tc
-            fio_, fiot_, fiott_, fiod_, fiodd_, fiodt_ = componente._phi0(
-                componente.GERG["cp"], taui, deltai)
-            fio += self.xi[i]*(fio_+log(self.xi[i]))
-            fiot += self.xi[i]*fiot_
-            fiott += self.xi[i]*fiott_
-            fiod += self.xi[i]*fiod_
-            fiodd += self.xi[i]*fiodd_
-            fiodt += self.xi[i]*fiodt_
-            nfioni.append(fio_+1+log(self.xi[i]))
-        return fio, fiot, fiott, fiod, fiodd, fiodt, nfioni
+        return self.model.phi0(self._x, tau, delta, self.Tc, self.rhoc/self.M)
 
     def _phir(self, tau, delta):
-        """Contribución residual de la energía libre de Helmholtz eq. 7.7"""
-        fir = firt = firtt = fird = firdd = firdt = firdtt = 0
-        firxi = []
-        firxixj = zeros((len(self.comp), len(self.comp)))
-        firdxi = []
-        firtxi = []
-
-        for i, componente in enumerate(self.comp):
-            deltai = delta*self.rhoc/componente.rhoc
-            taui = componente.Tc*tau/self.Tc
-            fir_, firt_, firtt_, fird_, firdd_, firdt_, firdtt_, B_, C_ = \
-                componente._phir(taui, deltai)
-            fir += self.xi[i]*fir_
-            firt += self.xi[i]*firt_
-            firtt += self.xi[i]*firtt_
-            fird += self.xi[i]*fird_
-            firdd += self.xi[i]*firdd_
-            firdt += self.xi[i]*firdt_
-
-            firxi.append(fir_)
-            firdxi.append(fird_)
-            firtxi.append(firt_)
-
-        # Contribución residual cruzada eq 7.8
-        for i, x_i in enumerate(self.xi):
-            for j, x_j in enumerate(self.xi):
-                if j > i:
-                    (fir_, firt_, firtt_, fird_, firdd_, firdt_, firdtt_, B_,
-                        C_) = self._phijr(i, j, tau, delta)
-                    fir += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*fir_
-                    firt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firt_
-                    firtt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firtt_
-                    fird += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*fird_
-                    firdd += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firdd_
-                    firdt += x_i*x_j*self.Fij[self.id[i]][self.id[j]]*firdt_
-
-                    firxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*fir_
-                    firxixj[i, j] = self.Fij[self.id[i]][self.id[j]]*fir_
-                    firdxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*fird_
-                    firtxi[i] += x_j*self.Fij[self.id[i]][self.id[j]]*firt_
-
-        suma = suma_rho = suma_T = 0
-        for i, x_i in enumerate(self.xi):
-            suma += x_i*firxi[i]
-            suma_rho += x_i*self.rhocxi[i]
-            suma_T += x_i*self.Tcxi[i]
-
-        n_rhocni = []
-        n_Tcni = []
-        for i, x_i in enumerate(self.xi):
-            n_rhocni.append(self.rhocxi[i]-suma_rho)
-            n_Tcni.append(self.Tcxi[i]-suma_T)
-
-        n_firni = []  # ðar/ðni
-        nfirni = []   # ðnar/ðni
-        for i, componente in enumerate(self.comp):
-            n_firni.append(delta*fird*(1-1./self.rhoc*n_rhocni[i]) +
-                           tau*firt/self.Tc*n_Tcni[i]+firxi[i]-suma)
-            nfirni.append(fir_+n_firni[i])
-        return fir, firt, firtt, fird, firdd, firdt, firdtt, nfirni
-
-    def _phijr(self, i, j, tau, delta):
-        txt = str(i)+"-"+str(j)
-        constants = self.fir_ij.get(txt, 0)
-        fir = fird = firdd = firt = firtt = firdt = firdtt = B = C = 0
-        if constants:
-            delta_0 = 1e-50
-            nr1 = constants["nr1"]
-            d1 = constants["d1"]
-            t1 = constants["t1"]
-            for i in range(len(constants.get("nr1", []))):
-                # Polinomial terms
-                fir += nr1[i]*delta**d1[i]*tau**t1[i]
-                fird += nr1[i]*d1[i]*delta**(d1[i]-1)*tau**t1[i]
-                firdd += nr1[i]*d1[i]*(d1[i]-1)*delta**(d1[i]-2)*tau**t1[i]
-                firt += nr1[i]*t1[i]*delta**d1[i]*tau**(t1[i]-1)
-                firtt += nr1[i]*t1[i]*(t1[i]-1)*delta**d1[i]*tau**(t1[i]-2)
-                firdt += nr1[i]*t1[i]*d1[i]*delta**(d1[i]-1)*tau**(t1[i]-1)
-                firdtt += nr1[i]*t1[i]*d1[i]*(t1[i]-1)*delta**(d1[i]-1)*tau**(t1[i]-2)
-                B += nr1[i]*d1[i]*delta_0**(d1[i]-1)*tau**t1[i]
-                C += nr1[i]*d1[i]*(d1[i]-1)*delta_0**(d1[i]-2)*tau**t1[i]
-
-            nr2 = constants["nr2"]
-            if nr2:
-                d2 = constants["d2"]
-                t2 = constants["t2"]
-                n2 = constants["n2"]
-                e2 = constants["e2"]
-                b2 = constants["b2"]
-                g2 = constants["g2"]
-                for i in range(len(constants.get("nr2", []))):
-                    # Gaussian terms
-                    fir += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2))
-                    fird += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    firdd += nr2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (-2*n2[i]*delta**d2[i]+4*n2[i]**2*delta**d2[i] *
-                         (delta-e2[i])**2-4*d2[i]*n2[i]*delta**2*(delta-e2[i])+d2[i]*2*delta)
-                    firt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (t2[i]/tau-2*b2[i]*(tau-g2[i]))
-                    firtt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        ((t2[i]/tau-2*b2[i]*(tau-g2[i]))**(2)-t2[i]/tau**2-2*b2[i])
-                    firdt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (t2[i]/tau-2*b2[i]*(tau-g2[i])) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    firdtt += nr2[i]*delta**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        ((t2[i]/tau-2*b2[i]*(tau-g2[i]))**(2)-t2[i]/tau**2-2*b2[i]) * \
-                        (d2[i]/delta-2*n2[i]*(delta-e2[i]))
-                    B += nr2[i]*delta_0**d2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta_0-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (d2[i]/delta_0-2*n2[i]*(delta_0-e2[i]))
-                    C += nr2[i]*tau**t2[i] * \
-                        exp(-n2[i]*(delta_0-e2[i])**2-b2[i]*(tau-g2[i])**(2)) * \
-                        (-2*n2[i]*delta_0**d2[i]+4*n2[i]**2*delta_0**d2[i]*(delta_0-e2[i])**2 -
-                         4*d2[i]*n2[i]*delta_0**2*(delta_0-e2[i])+d2[i]*2*delta_0)
-
-        return fir, firt, firtt, fird, firdd, firdt, firdtt, B, C
-
-    def flash(self):
-        """Cálculo de los coeficientes de reparto entre fases"""
-        #Estimación inicial de K mediante correlación wilson Eq 5.61 Pag 82
-        Ki = []
-        for componente in self.comp:
-            Ki.append(componente.Pc/self.P*exp(5.373*(1.+componente.f_acent)*(1.-componente.Tc/self.T)))
-
-        def f(Q):
-            sum = 0
-            for i, x in enumerate(self.xi):
-                sum += x*(Ki[i]-1.)/(1.+Q+Q*Ki[i])
-            return sum
-
-        if f(0) > 0 and f(1) > 0:
-            # x>1, vapor only
-            xi = self.xi
-            yi = self.xi
-            Q = 1
-        elif f(0) < 0 and f(1) < 0:
-            # x<0, liquid only
-            xi = self.xi
-            yi = self.xi
-            Q = 0
+        """Contribución residual de la energía libre de Helmholtz eq. 7.7
+        and n·(∂nαr/∂ni) from the composition derivatives, Tabla 7.5"""
+        prop, nfirni = self.model.nphir(self._x, tau, delta)
+        return prop+(list(nfirni), )
+
+    def _Kwilson(self, T, P):
+        """Estimación inicial de K mediante correlación de Wilson, P in kPa"""
+        Tc = array([cmp.Tc for cmp in self.comp], dtype=float)
+        Pc = array([cmp.Pc.kPa for cmp in self.comp], dtype=float)
+        w = array([cmp.f_acent for cmp in self.comp], dtype=float)
+        return Pc/P*exp(5.373*(1.+w)*(1.-Tc/T))
+
+    def _lnphi(self, T, P):
+        """Return the function lnphi(x, phase) used in the phase equilibrium
+        calculation at temperature T and pressure P, kPa, the density of
+        each phase is saved to begin the next evaluation of that phase"""
+        def lnphi(x, phase):
+            lnphi, self._rho[phase] = self.model.lnphi(
+                asarray(x, dtype=float), T, P, phase, self._rho.get(phase))
+            return lnphi
+        self._rho = {}
+        return lnphi
+
+    def flash(self, T, P, K=None):
+        """Isothermal flash of mixture at temperature T and pressure P, kPa,
+        the convergence statistics are saved in flashStatistics
+            K: Initial equilibrium ratios, default from Wilson correlation
+        Return the vapor mole fraction, the liquid and vapor compositions
+        and the equilibrium ratios"""
+        if K is None:
+            K = self._Kwilson(T, P)
+        Q, xi, yi, Ki, self.flashStatistics = flash(
+            self._x, self._lnphi(T, P), K)
+        if not self.flashStatistics["converged"]:
+            logging.warning("GERG flash not converged at T=%g K, P=%g kPa" % (
+                T, P))
+        return Q, xi, yi, Ki
+
+    def _saturation(self, bubble, T=None, P=None):
+        """Bubble or dew point of mixture at fixed temperature T or pressure
+        P, kPa, the iteration begin at the saturation point of ideal solution
+        with equilibrium ratios of Wilson correlation, the convergence
+        statistics are saved in saturationStatistics
+        Return the saturation pressure or temperature and the incipient phase
+        composition"""
+        z = self._x
+        Tc = array([cmp.Tc for cmp in self.comp], dtype=float)
+        w = array([cmp.f_acent for cmp in self.comp], dtype=float)
+        if T is None:
+            # lnK linear in 1/T for the Wilson correlation
+            dlnK = -5.373*(1.+w)*Tc
+            s = 1/dot(z, Tc)
+            for i in range(20):
+                K = self._Kwilson(1/s, P)
+                if bubble:
+                    zK = z*K
+                    df = dot(zK, dlnK)/zK.sum()
+                else:
+                    zK = z/K
+                    df = -dot(zK, dlnK)/zK.sum()
+                ds = -log(zK.sum())/df
+                s += max(min(ds, 0.2*s), -0.2*s)
+                if abs(ds) < 1e-8*s:
+                    break
+            s, yi, Ki, info = saturation(
+                z, lambda s: self._lnphi(1/s, P), s, self._Kwilson(1/s, P),
+                dlnK, bubble, maxStep=0.1*s, bound=s)
+            value = 1/s
+        else:
+            # K inverse to P for the Wilson correlation
+            K = self._Kwilson(T, 1.)
+            if bubble:
+                P = dot(z, K)
+            else:
+                P = 1/dot(z, 1/K)
+            s, yi, Ki, info = saturation(
+                z, lambda s: self._lnphi(T, exp(s)), log(P),
+                self._Kwilson(T, P), -1., bubble, maxStep=1., bound=log(P))
+            value = exp(s)
+
+        self.saturationStatistics = info
+        if not info["converged"]:
+            logging.warning("GERG saturation point not converged")
+        return value, yi
+
+    def _quality(self, x, T=None, P=None):
+        """Phase equilibrium with vapor mole fraction x at fixed temperature
+        T or pressure P, kPa, the bubble and dew points define the bracket of
+        the two phase region to solve the flash
+        Return the pressure or temperature, the vapor fraction and the
+        liquid and vapor compositions"""
+        z = self._x
+        if x == 0 or x == 1:
+            value, w = self._saturation(x == 0, T, P)
+            if x:
+                return value, 1., w, z
+            return value, 0., z, w
+
+        # The variable is T or ln P, near linear with the vapor fraction
+        bubble = self._saturation(True, T, P)[0]
+        dew = self._saturation(False, T, P)[0]
+        if T is not None:
+            bubble, dew = log(bubble), log(dew)
+        K = [None]
+
+        def f(value):
+            # The bracket limits are known, avoid the flash in that points
+            if value == bubble:
+                return -x
+            if value == dew:
+                return 1-x
+            if T is None:
+                args = (value, P)
+            else:
+                args = (T, exp(value))
+            Q, xi, yi, Ki = self.flash(*args, K=K[0])
+            if 0 < Q < 1:
+                # Warm start the next iteration with the converged ratios
+                K[0] = Ki
+            else:
+                # Single phase near the limits of the bracket
+                Q = float(abs(value-dew) < abs(value-bubble))
+            return Q-x
+
+        value = brentq(f, bubble, dew)
+        if T is not None:
+            value = exp(value)
+        if T is None:
+            Q, xi, yi, Ki = self.flash(value, P, K[0])
         else:
-            # two phases
-            Qo = 0.5
-            while True:
-                Q = Qo
-                Qo = fsolve(Vr, Q)
-                xi = []
-                yi = []
-                for i, fraccion in enumerate(self.xi):
-                    xi.append(fraccion/(1+Qo*(Ki[i]-1)))
-                    yi.append(fraccion*Ki[i]/(1+Qo*(Ki[i]-1)))
-
-                fi, Fi = self.fug(self.rho, self.T)
-                fiv = r_[yi]*r_[self.titaiv]*self.P
-                fil = r_[xi]*r_[self.titail]*self.P
-                # criterio de convergencia Eq 21
-                if sum((fil/fiv-1)**2) < 1e-15 and (Q-Qo)**2 < 1e-15:
+            Q, xi, yi, Ki = self.flash(T, value, K[0])
+        return value, Q, xi, yi
+
+    def _Bubble_T(self):
+        return unidades.Temperature(self._saturation(True, P=self.P.kPa)[0])
+
+    def _Bubble_P(self):
+        return unidades.Pressure(self._saturation(True, T=self.T)[0], "kPa")
+
+    def _Dew_T(self):
+        return unidades.Temperature(self._saturation(False, P=self.P.kPa)[0])
+
+    def _Dew_P(self):
+        return unidades.Pressure(self._saturation(False, T=self.T)[0], "kPa")
+
+
+def _pack(rows):
+    """Pack lists of coefficients with different length in a 2D array, the
+    shorter lists are completed with null terms"""
+    size = max([len(row) for row in rows]+[1])
+    packed = zeros((len(rows), size))
+    for i, row in enumerate(rows):
+        packed[i, :len(row)] = row
+    return packed
+
+
+def _pureCoefficients(componentes):
+    """Coefficients of residual Helmholtz energy of pure components,
+    n·δ^d·τ^t·exp(-δ^c), with c=0 for the polynomial terms"""
+    n, d, t, c = [], [], [], []
+    for cmp in componentes:
+        eq = cmp.GERG
+        n.append(eq["nr1"]+eq["nr2"])
+        d.append(eq["d1"]+eq["d2"])
+        t.append(eq["t1"]+eq["t2"])
+        c.append([0]*len(eq["nr1"])+eq["c2"])
+    return tuple(_pack(x) for x in (n, d, t, c))
+
+
+def _idealCoefficients(componentes):
+    """Coefficients of ideal gas Helmholtz energy of pure components, the
+    logarithmic and linear terms in τ and the sinh, cosh, sinh, cosh terms"""
+    log, lin, a, hyp = [], [], [], []
+    for cmp in componentes:
+        cp = cmp.GERG["cp"]
+        log.append(cp["ao_log"][1])
+        lin.append(cp["ao_pow"])
+        a.append(cp["ao_hyp"])
+        hyp.append(cp["ao_hyp"] and cp["hyp"])
+    a = _pack(a)
+    lin = _pack(lin)
+    # The unused terms are evaluated with a dummy value to avoid log(0)
+    hyp = where(a != 0, _pack(hyp), 1.)
+    return array(log), lin, a, hyp
+
+
+def _departureCoefficients(fir_ij):
+    """Coefficients of the binary departure functions,
+    n·δ^d·τ^t·exp(-η·(δ-ε)²-β·(δ-γ)) with null η and β in polynomial terms,
+    return the coefficients and a matrix with the index of the function of
+    each pair of components, -1 for pairs without departure function"""
+    index = -ones((len(GERG.componentes), len(GERG.componentes)), dtype=int)
+    n, d, t, eta, eps, beta, gam = [], [], [], [], [], [], []
+    for k, (pair, eq) in enumerate(sorted(fir_ij.items())):
+        i, j = [int(x) for x in pair.split("-")]
+        index[i, j] = index[j, i] = k
+        null = [0]*len(eq["nr1"])
+        n.append(eq["nr1"]+eq["nr2"])
+        d.append(eq["d1"]+eq.get("d2", []))
+        t.append(eq["t1"]+eq.get("t2", []))
+        eta.append(null+eq.get("n2", []))
+        eps.append(null+eq.get("e2", []))
+        beta.append(null+eq.get("b2", []))
+        gam.append(null+eq.get("g2", []))
+    return tuple(_pack(x) for x in (n, d, t, eta, eps, beta, gam)), index
+
+
+def _reducingCoefficients(Prop_c):
+    """Matrix of coefficients of the reducing functions for temperature and
+    specific volume, eq. 7.9, 7.10, defined only above the diagonal:
+        CT = 2·βT·γT·(Tci·Tcj)^0.5
+        Cv = 2·βv·γv·(vci^(1/3)+vcj^(1/3))³/8
+    and the matrix of βT², βv²"""
+    size = len(GERG.componentes)
+    upper = triu(ones((size, size), dtype=bool), 1)
+    par = {}
+    for key, value in Prop_c.items():
+        par[key] = zeros((size, size))
+        par[key][:len(value)] = value
+        par[key] = where(upper, par[key], 0)
+    vc = 1/_rhoc
+    CT = 2*par["beta_t"]*par["gamma_t"]*(_Tc[:, newaxis]*_Tc)**0.5
+    Cv = 2*par["beta_v"]*par["gamma_v"] * \
+        (vc[:, newaxis]**(1./3)+vc**(1./3))**3/8
+    bT2 = where(upper, par["beta_t"]**2, 1)
+    bv2 = where(upper, par["beta_v"]**2, 1)
+    return CT, Cv, bT2, bv2
+
+
+_pure = _pureCoefficients(GERG.componentes)
+_ideal = _idealCoefficients(GERG.componentes)
+_departure, _departureIndex = _departureCoefficients(GERG.fir_ij)
+_CT, _Cv, _bT2, _bv2 = _reducingCoefficients(GERG.Prop_c)
+_F = array(GERG.Fij, dtype=float)
+
+
+class GERGModel(object):
+    """Reducing functions and Helmholtz energy of a mixture of GERG
+    components, the coefficients of the mixture components are selected
+    once from the packed arrays and the model is reused in all the states
+    calculated with the same components
+
+        ids: list with the index of components in GERG.componentes
+    """
+    _models = {}
+
+    def __init__(self, ids):
+        i = array(ids, dtype=int)
+        ij = (i[:, newaxis], i)
+        self.ids = list(ids)
+        self.Tc = _Tc[i]
+        self.rhoc = _rhoc[i]
+        self.vc = 1/self.rhoc
+        self.Mi = _M[i]
+        self.CT = _CT[ij]
+        self.Cv = _Cv[ij]
+        self.bT2 = _bT2[ij]
+        self.bv2 = _bv2[ij]
+        self.pure = tuple(x[i] for x in _pure)
+        self.ideal = tuple(x[i] for x in _ideal)
+
+        # Pairs of components with binary departure function, only the
+        # pairs with not null Fij are evaluated
+        F = _F[ij]
+        index = _departureIndex[ij]
+        a, b = (triu((F != 0) & (index >= 0), 1)).nonzero()
+        self.pairs = a, b
+        self.Fij = F[a, b]
+        self.departure = tuple(x[index[a, b]] for x in _departure)
+        self._reducing = OrderedDict()
+
+    @classmethod
+    def get(cls, ids):
+        """Return the model for the components ids, created in the first
+        use"""
+        key = tuple(ids)
+        model = cls._models.get(key)
+        if model is None:
+            model = cls._models[key] = cls(ids)
+        return model
+
+    def molarMass(self, x):
+        """Molar mass of mixture, g/mol"""
+        return dot(x, self.Mi)
+
+    @staticmethod
+    def _reducingFunction(x, Yc, C, b2):
+        """Reducing function Y=Σxi²·Yci+ΣΣCij·xi·xj·(xi+xj)/(βij²·xi+xj) and its
+        derivatives ∂Y/∂xi, each pair of components has C defined only in
+        one of its two positions, the other is null"""
+        xi = x[:, newaxis]
+        S = xi+x
+        P = xi*x
+        D = b2*xi+x
+        with errstate(divide="ignore", invalid="ignore"):
+            f = where(D > 0, P*S/D, 0)
+            fi = where(D > 0, x*S/D+P/D*(1-b2*S/D), 0)
+            fj = where(D > 0, xi*S/D+P/D*(1-S/D), 0)
+        Y = dot(x*x, Yc)+(C*f).sum()
+        dY = 2*x*Yc+(C*fi).sum(axis=1)+(C*fj).sum(axis=0)
+        return Y, dY
+
+    def reducing(self, x):
+        """Reducing temperature and density, mol/dm³, of mixture with mole
+        fractions x, and the derivatives ∂Tr/∂xi and ∂(1/ρr)/∂xi
+        The values of the last compositions are saved, all the evaluations
+        of a phase in a density or flash iteration reuse them"""
+        key = x.tobytes()
+        value = self._reducing.get(key)
+        if value is None:
+            Tr, dTr = self._reducingFunction(x, self.Tc, self.CT, self.bT2)
+            vr, dvr = self._reducingFunction(x, self.vc, self.Cv, self.bv2)
+            value = self._reducing[key] = (Tr, 1/vr, dTr, dvr)
+            if len(self._reducing) > COMPOSITIONS:
+                self._reducing.popitem(last=False)
+        return value
+
+    def phi0(self, x, tau, delta, Tr, rhor):
+        """Ideal gas Helmholtz energy of mixture and its derivatives with the
+        reduced variables of mixture, eq. 7.5, the pure components are
+        evaluated at its own reduced temperature and density
+        Return fio, fiot, fiott, fiod, fiodd, fiodt and ∂(n·αo)/∂ni"""
+        nlog, lin, a, hyp = self.ideal
+        taui = self.Tc*tau/Tr
+        deltai = delta*rhor/self.rhoc
+        th = hyp*taui[:, newaxis]
+        a_ = a.copy()
+        a_[:, 1::2] *= -1
+
+        # Hyperbolic terms, sinh in even columns and cosh in odd columns
+        fh = a_*log(abs(where(arange(4) % 2, cosh(th), sinh(th))))
+        fht = a_*hyp*where(arange(4) % 2, tanh(th), 1/tanh(th))
+        fhtt = -a*hyp**2*where(arange(4) % 2, 1/cosh(th)**2, 1/sinh(th)**2)
+
+        k = R_ideal/R
+        fio_ = log(deltai)+k*(lin[:, 0]+lin[:, 1]*taui+nlog*log(taui) +
+                              fh.sum(axis=1))
+        fiot_ = k*(lin[:, 1]+nlog/taui+fht.sum(axis=1))
+        fiott_ = k*(-nlog/taui**2+fhtt.sum(axis=1))
+
+        with errstate(divide="ignore"):
+            logx = where(x > 0, log(x), 0)
+        fio = dot(x, fio_+logx)
+        fiot = dot(x, fiot_*self.Tc/Tr)
+        fiott = dot(x, fiott_*(self.Tc/Tr)**2)
+        nfioni = fio_+1+logx
+        return fio, fiot, fiott, 1/delta, -1/delta**2, 0, list(nfioni)
+
+    def _pureResidual(self, tau, delta):
+        """Residual Helmholtz energy of pure components and its derivatives,
+        array with rows fir, firt, firtt, fird, firdd, firdt, firdtt"""
+        n, d, t, c = self.pure
+        lnd = log(delta)
+        dc = where(c > 0, exp(c*lnd), 0)
+        f = n*exp(d*lnd+t*log(tau)-dc)
+        dx = d-c*dc
+        tt = t*(t-1)
+        return array([
+            f.sum(axis=1), (f*t).sum(axis=1)/tau, (f*tt).sum(axis=1)/tau**2,
+            (f*dx).sum(axis=1)/delta,
+            (f*(dx*(dx-1)-c*c*dc)).sum(axis=1)/delta**2,
+            (f*t*dx).sum(axis=1)/delta/tau,
+            (f*tt*dx).sum(axis=1)/delta/tau**2])
+
+    def _departureResidual(self, tau, delta):
+        """Binary departure functions of pairs of components and its
+        derivatives, same array layout as _pureResidual"""
+        n, d, t, eta, eps, beta, gam = self.departure
+        f = n*exp(d*log(delta)+t*log(tau)-eta*(delta-eps)**2 -
+                  beta*(delta-gam))
+        dx = d+delta*(-2*eta*(delta-eps)-beta)
+        tt = t*(t-1)
+        return array([
+            f.sum(axis=1), (f*t).sum(axis=1)/tau, (f*tt).sum(axis=1)/tau**2,
+            (f*dx).sum(axis=1)/delta,
+            (f*(dx*dx-d-2*eta*delta**2)).sum(axis=1)/delta**2,
+            (f*t*dx).sum(axis=1)/delta/tau,
+            (f*tt*dx).sum(axis=1)/delta/tau**2])
+
+    def phir(self, x, tau, delta):
+        """Residual Helmholtz energy of mixture, eq. 7.7
+        Return a tuple with fir, firt, firtt, fird, firdd, firdt, firdtt and
+        the array of composition derivatives ∂αr/∂xi"""
+        pure = self._pureResidual(tau, delta)
+        prop = pure.dot(x)
+        firxi = pure[0].copy()
+        if len(self.Fij):
+            a, b = self.pairs
+            dep = self._departureResidual(tau, delta)
+            prop += dep.dot(self.Fij*x[a]*x[b])
+            w = self.Fij*dep[0]
+            firxi += bincount(a, x[b]*w, len(x))+bincount(b, x[a]*w, len(x))
+        return tuple(prop), firxi
+
+    def nphir(self, x, tau, delta):
+        """Residual Helmholtz energy of mixture and its first composition
+        derivatives n·(∂nαr/∂ni) at constant T and V, eq. 7.27, with the
+        derivatives of reducing functions, eq. 7.30-7.31:
+            n(∂αr/∂ni) = δ·αr_δ·[1-1/ρr·n(∂ρr/∂ni)] +
+                         τ·αr_τ·1/Tr·n(∂Tr/∂ni) + αr_xi - Σxk·αr_xk
+        Return the tuple of phir and the array of derivatives"""
+        Tr, rhor, dTr, dvr = self.reducing(x)
+        prop, firxi = self.phir(x, tau, delta)
+        fir, firt, firtt, fird = prop[:4]
+        n_vr = dvr-dot(x, dvr)
+        n_Tr = dTr-dot(x, dTr)
+        nfirni = fir+delta*fird*(1+rhor*n_vr)+tau*firt/Tr*n_Tr + \
+            firxi-dot(x, firxi)
+        return prop, nfirni
+
+    def pressure(self, x, T, rho):
+        """Pressure, kPa, and its derivative with the density of mixture with
+        mole fractions x at temperature T and molar density rho, mol/dm³"""
+        Tr, rhor = self.reducing(x)[:2]
+        delta = rho/rhor
+        fir, firt, firtt, fird, firdd = self.phir(x, Tr/T, delta)[0][:5]
+        P = rho*R*T*(1+delta*fird)
+        dPdrho = R*T*(1+2*delta*fird+delta**2*firdd)
+        return P, dPdrho
+
+    def density(self, x, T, P, phase=0, rho=None, other=True):
+        """Molar density, mol/dm³, of mixture at temperature T and pressure
+        P, kPa, solved by Newton method safeguarded with bisection in the
+        mechanically stable region of the isotherm
+            phase: 0 to search the vapor-like root beginning in ideal gas
+                and 1 for the liquid-like root beginning in a dense state,
+                without that root return the other one
+            rho: optional initial value, usually the solution of a near
+                state
+            other: search the other root if the phase root doesn't exist"""
+        if rho is None:
+            if phase:
+                rho = DENSE*self.reducing(x)[1]
+            else:
+                rho = P/R/T
+
+        lo, hi = 0, None
+        for i in range(MAX_ITERATIONS):
+            p, dPdrho = self.pressure(x, T, rho)
+            if dPdrho <= 0:
+                # Unstable region, go back to the phase branch
+                if phase:
+                    lo = rho
+                else:
+                    hi = rho
+            elif p < P:
+                lo = rho
+            else:
+                hi = rho
+
+            new = None
+            if dPdrho > 0:
+                new = rho+(P-p)/dPdrho
+                if abs(new-rho) < TOLERANCE*rho:
+                    return new
+                if new <= lo or hi is not None and new >= hi:
+                    new = None
+            if new is None:
+                if hi is None:
+                    new = 2*rho
+                elif hi-lo < TOLERANCE*hi:
+                    # The bracket collapse in a spinodal point, the phase
+                    # has no root at this pressure
+                    if other:
+                        return self.density(x, T, P, 1-phase, other=False)
                     break
                 else:
-                    Ki = r_[self.titail]/r_[self.titaiv]
-        return Ki, xi, yi, Q
-
-
+                    new = (lo+hi)/2
+            rho = new
+        return rho
+
+    def lnphi(self, x, T, P, phase=0, rho=None):
+        """Logarithm of fugacity coefficients of components in a phase with
+        mole fractions x at temperature T and pressure P, kPa
+        Return the array of ln φi and the phase density, mol/dm³"""
+        rho = self.density(x, T, P, phase, rho)
+        Tr, rhor = self.reducing(x)[:2]
+        prop, nfirni = self.nphir(x, Tr/T, rho/rhor)
+        Z = 1+rho/rhor*prop[3]
+        return nfirni-log(Z), rho
 id_GERG = [i.id for i in GERG.componentes]
 
 
@@ -23,9 +23,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 ###############################################################################
 
 
-from math import sqrt, log, exp, tan, atan, acos, sin, pi
+from math import tan, atan, acos, sin, pi
 from cmath import log as log_c
 
+from numpy import (array, asarray, broadcast_arrays, clip, errstate, exp,
+                   full, log, maximum, nan, newaxis, sqrt, zeros)
 from scipy.optimize import fsolve
 from PyQt5.QtWidgets import QApplication
 
@@ -51,6 +53,58 @@ Pmin = 0.000611212677444
 Ps_623 = 16.5291642526
 
 
+def _series(n, x, I, y, J):
+    """Sum of n·x^I·y^J terms, the form of most of IAPWS-IF97 correlations.
+    x and y can be arrays, the sum is done in the terms axis added to them"""
+    x = asarray(x, dtype=float)[..., newaxis]
+    y = asarray(y, dtype=float)[..., newaxis]
+    return (asarray(n)*x**asarray(I)*y**asarray(J)).sum(axis=-1)
+
+
+def _select(masks, functions, *args):
+    """Evaluate piecewise defined correlations, each function is called only
+    with the elements of args where its mask is True, masks are checked in
+    order like a if-elif chain. Elements out of any mask are returned as nan"""
+    args = broadcast_arrays(*[asarray(arg, dtype=float) for arg in args])
+    result = full(args[0].shape, nan)
+    free = full(args[0].shape, True)
+    for mask, function in zip(masks, functions):
+        mask = mask & free
+        if mask.any():
+            result[mask] = function(*[arg[mask] for arg in args])
+        free &= ~mask
+    return result[()]
+
+
+def _derivatives(n, x, I, y, J):
+    """Sum of n·x^I·y^J terms and its derivatives, used in the fundamental
+    equations of regions, return f, fx, fxx, fy, fyy, fxy"""
+    x = asarray(x, dtype=float)
+    y = asarray(y, dtype=float)
+    n, I, J = asarray(n), asarray(I), asarray(J)
+    term = n*x[..., newaxis]**I*y[..., newaxis]**J
+    f = term.sum(axis=-1)
+    fx = (term*I).sum(axis=-1)/x
+    fxx = (term*I*(I-1)).sum(axis=-1)/x**2
+    fy = (term*J).sum(axis=-1)/y
+    fyy = (term*J*(J-1)).sum(axis=-1)/y**2
+    fxy = (term*I*J).sum(axis=-1)/x/y
+    return f, fx, fxx, fy, fyy, fxy
+
+
+def _assign(region, code, mask):
+    """Set the region code in the elements of mask without region yet"""
+    region[mask & (region == 0)] = code
+
+
+def _region(region):
+    """Return region codes from _Bound_* functions, as int or None for
+    scalar input"""
+    if region.ndim:
+        return region
+    return int(region) or None
+
+
 # Boundary Region1-Region2
 def _h13_s(s):
     """Define the boundary between Region 1 and 3, h=f(s)
@@ -66,9 +120,7 @@ def _h13_s(s):
     n = [0.913965547600543, -0.430944856041991e-4, 0.603235694765419e2,
          0.117518273082168e-17, 0.220000904781292, -0.690815545851641e2]
 
-    suma = 0
-    for i in range(6):
-        suma += n[i] * (sigma-0.884)**I[i] * (sigma-0.864)**J[i]
+    suma = _series(n, sigma-0.884, I, sigma-0.864, J)
     return 1700 * suma
 
 
@@ -117,9 +169,7 @@ def _t_hs(h, s):
          0.261907376402688e-5, -0.291626417025961e5, 0.140660774926165e-4,
          0.783237062349385e7]
 
-    suma = 0
-    for i in range(25):
-        suma += n[i]*(nu-0.727)**I[i]*(sigma-0.864)**J[i]
+    suma = _series(n, nu-0.727, I, sigma-0.864, J)
     return 900*suma
 
 
@@ -130,10 +180,7 @@ def _PSat_T(T):
     >>> "%.8f" % _PSat_T(500)
     '2.63889776'
     """
-    if T < 273.15:
-        T = 273.15
-    elif T > Tc:
-        T = Tc
+    T = clip(T, 273.15, Tc)
     n = [0, 0.11670521452767E+04, -0.72421316703206E+06, -0.17073846940092E+02,
          0.12020824702470E+05, -0.32325550322333E+07, 0.14915108613530E+02,
          -0.48232657361591E+04, 0.40511340542057E+06, -0.23855557567849E+00,
@@ -151,10 +198,7 @@ def _TSat_P(P):
     >>> "%.6f" % _TSat_P(10)
     '584.149488'
     """
-    if P < 611.212677/1e6:
-        P = 611.212677/1e6
-    elif P > 22.064:
-        P = 22.064
+    P = clip(P, 611.212677/1e6, 22.064)
     n = [0, 0.11670521452767E+04, -0.72421316703206E+06, -0.17073846940092E+02,
          0.12020824702470E+05, -0.32325550322333E+07, 0.14915108613530E+02,
          -0.48232657361591E+04, 0.40511340542057E+06, -0.23855557567849E+00,
@@ -177,10 +221,7 @@ def _PSat_h(h):
     """
     hmin_Ps3 = _Region1(623.15, _PSat_T(623.15))["h"]
     hmax_Ps3 = _Region2(623.15, _PSat_T(623.15))["h"]
-    if h < hmin_Ps3:
-        h = hmin_Ps3
-    if h > hmax_Ps3:
-        h = hmax_Ps3
+    h = clip(h, hmin_Ps3, hmax_Ps3)
     nu = h/2600
     I = [0, 1, 1, 1, 1, 5, 7, 8, 14, 20, 22, 24, 28, 36]
     J = [0, 1, 3, 4, 36, 3, 0, 24, 16, 16, 3, 18, 8, 24]
@@ -190,9 +231,7 @@ def _PSat_h(h):
          -0.333775713645296e23, 0.356499469636328e11, -0.148547544720641e27,
          0.330611514838798e19, 0.813641294467829e38]
 
-    suma = 0
-    for i in range(14):
-        suma += n[i]*(nu-1.02)**I[i]*(nu-0.608)**J[i]
+    suma = _series(n, nu-1.02, I, nu-0.608, J)
     return 22*suma
 
 
@@ -212,9 +251,7 @@ def _PSat_s(s):
          -0.955586736431328e35, 0.187269814676188e24, 0.119254746466473e12,
          0.110649277244882e37]
 
-    suma = 0
-    for i in range(10):
-        suma += n[i]*(sigma-1.03)**I[i]*(sigma-0.699)**J[i]
+    suma = _series(n, sigma-1.03, I, sigma-0.699, J)
     return 22*suma
 
 
@@ -241,9 +278,7 @@ def _h1_s(s):
          0.573953875852936e7, 0.173226193407919e3, -0.363968822121321e-1,
          0.834596332878346e-6, 0.503611916682674e1, 0.655444787064505e2]
 
-    suma = 0
-    for i in range(27):
-        suma += n[i]*(sigma-1.09)**I[i]*(sigma+0.366e-4)**J[i]
+    suma = _series(n, sigma-1.09, I, sigma+0.366e-4, J)
     return 1700*suma
 
 
@@ -266,9 +301,7 @@ def _h3a_s(s):
          -0.317714386511207e5, -0.945890406632871e5, -0.139273847088690e-5,
          0.631052532240980]
 
-    suma = 0
-    for i in range(19):
-        suma += n[i]*(sigma-1.09)**I[i]*(sigma+0.366e-4)**J[i]
+    suma = _series(n, sigma-1.09, I, sigma+0.366e-4, J)
     return 1700*suma
 
 
@@ -297,9 +330,7 @@ def _h2ab_s(s):
          0.297478906557467e35, -0.953588761745473e20, 0.166957699620939e25,
          -0.175407764869978e33, 0.347581490626396e35, -0.710971318427851e39]
 
-    suma = 0
-    for i in range(30):
-        suma += n[i]*(1/sigma1-0.513)**I[i]*(sigma2-0.524)**J[i]
+    suma = _series(n, 1/sigma1-0.513, I, sigma2-0.524, J)
     return 2800*exp(suma)
 
 
@@ -321,9 +352,7 @@ def _h2c3b_s(s):
          0.396611982166538e12, -0.414716268484468e41, 0.359080103867382e19,
          -0.116994334851995e41]
 
-    suma = 0
-    for i in range(16):
-        suma += n[i]*(sigma-1.02)**I[i]*(sigma-0.726)**J[i]
+    suma = _series(n, sigma-1.02, I, sigma-0.726, J)
     return 2800*suma**4
 
 
@@ -368,14 +397,8 @@ def _Region1(T, P):
          -0.93537087292458e-25]
     Tr = 1386/T
     Pr = P/16.53
-    g = gp = gpp = gt = gtt = gpt = 0
-    for i in range(34):
-        g += n[i]*(7.1-Pr)**I[i]*(Tr-1.222)**J[i]
-        gp -= n[i]*I[i]*(7.1-Pr)**(I[i]-1)*(Tr-1.222)**J[i]
-        gpp += n[i]*I[i]*(I[i]-1)*(7.1-Pr)**(I[i]-2)*(Tr-1.222)**J[i]
-        gt += n[i] * (7.1-Pr)**I[i] * J[i] * (Tr-1.222)**(J[i]-1)
-        gtt += n[i]*(7.1-Pr)**I[i]*J[i]*(J[i]-1)*(Tr-1.222)**(J[i]-2)
-        gpt -= n[i]*I[i]*(7.1-Pr)**(I[i]-1)*J[i]*(Tr-1.222)**(J[i]-1)
+    g, gp, gpp, gt, gtt, gpt = _derivatives(n, 7.1-Pr, I, Tr-1.222, J)
+    gp, gpt = -gp, -gpt
 
     propiedades = {}
     propiedades["T"] = T
@@ -413,9 +436,7 @@ def _Backward1_T_Ph(P, h):
 
     Pr = P/1
     nu = h/2500
-    T = 0
-    for i in range(20):
-        T += n[i]*Pr**I[i]*(nu+1)**J[i]
+    T = _series(n, Pr, I, nu+1, J)
     return T
 
 
@@ -439,9 +460,7 @@ def _Backward1_T_Ps(P, s):
 
     Pr = P/1
     sigma = s/1
-    T = 0
-    for i in range(20):
-        T += n[i]*Pr**I[i]*(sigma+2)**J[i]
+    T = _series(n, Pr, I, sigma+2, J)
     return T
 
 
@@ -467,9 +486,7 @@ def _Backward1_P_hs(h, s):
 
     nu = h/3400
     sigma = s/7.6
-    P = 0
-    for i in range(19):
-        P += n[i]*(nu+0.05)**I[i]*(sigma+0.05)**J[i]
+    P = _series(n, nu+0.05, I, sigma+0.05, J)
     return 100*P
 
 
@@ -522,14 +539,7 @@ def _Region2(T, P):
           -1.2768608934681e-15, 7.3087610595061e-29, 5.5414715350778001e-17,
           -9.4369707241209998e-07]
 
-    gr = grp = grpp = grt = grtt = grpt = 0
-    for i in range(43):
-        gr += nr[i]*Pr**Ir[i]*(Tr-0.5)**Jr[i]
-        grp += nr[i]*Ir[i]*Pr**(Ir[i]-1)*(Tr-0.5)**Jr[i]
-        grpp += nr[i]*Ir[i]*(Ir[i]-1)*Pr**(Ir[i]-2)*(Tr-0.5)**Jr[i]
-        grt += nr[i]*Pr**Ir[i]*Jr[i]*(Tr-0.5)**(Jr[i]-1)
-        grtt += nr[i]*Pr**Ir[i]*Jr[i]*(Jr[i]-1)*(Tr-0.5)**(Jr[i]-2)
-        grpt += nr[i]*Ir[i]*Pr**(Ir[i]-1)*Jr[i]*(Tr-0.5)**(Jr[i]-1)
+    gr, grp, grpp, grt, grtt, grpt = _derivatives(nr, Pr, Ir, Tr-0.5, Jr)
 
     propiedades = {}
     propiedades["T"] = T
@@ -628,9 +638,7 @@ def _Backward2a_T_Ph(P, h):
 
     Pr = P/1
     nu = h/2000
-    T = 0
-    for i in range(34):
-        T += n[i]*Pr**I[i]*(nu-2.1)**J[i]
+    T = _series(n, Pr, I, nu-2.1, J)
     return T
 
 
@@ -662,9 +670,7 @@ def _Backward2b_T_Ph(P, h):
 
     Pr = P/1
     nu = h/2000
-    T = 0
-    for i in range(38):
-        T += n[i]*(Pr-2)**I[i]*(nu-2.6)**J[i]
+    T = _series(n, Pr-2, I, nu-2.6, J)
     return T
 
 
@@ -690,26 +696,20 @@ def _Backward2c_T_Ph(P, h):
 
     Pr = P/1
     nu = h/2000
-    T = 0
-    for i in range(23):
-        T += n[i]*(Pr+25)**I[i]*(nu-1.8)**J[i]
+    T = _series(n, Pr+25, I, nu-1.8, J)
     return T
 
 
 def _Backward2_T_Ph(P, h):
     """Backward equation for region 2, T=f(P,h)"""
+    P, h = broadcast_arrays(asarray(P, dtype=float), asarray(h, dtype=float))
     Tsat = _TSat_P(P)
-    if P <= 4:
-        T = _Backward2a_T_Ph(P, h)
-    elif 4 < P <= 6.546699678:
-        T = _Backward2b_T_Ph(P, h)
-    else:
+    with errstate(invalid="ignore"):
         hf = _hbc_P(P)
-        if h >= hf:
-            T = _Backward2b_T_Ph(P, h)
-        else:
-            T = _Backward2c_T_Ph(P, h)
-    return max(Tsat, T)
+    T = _select(
+        [P <= 4, (P <= 6.546699678) | (h >= hf), P > 6.546699678],
+        [_Backward2a_T_Ph, _Backward2b_T_Ph, _Backward2c_T_Ph], P, h)
+    return maximum(Tsat, T)
 
 
 def _Backward2a_T_Ps(P, s):
@@ -746,9 +746,7 @@ def _Backward2a_T_Ps(P, s):
 
     Pr = P/1
     sigma = s/2
-    T = 0
-    for i in range(46):
-        T += n[i]*Pr**I[i]*(sigma-2)**J[i]
+    T = _series(n, Pr, I, sigma-2, J)
     return T
 
 
@@ -783,9 +781,7 @@ def _Backward2b_T_Ps(P, s):
 
     Pr = P/1
     sigma = s/0.7853
-    T = 0
-    for i in range(44):
-        T += n[i]*Pr**I[i]*(10-sigma)**J[i]
+    T = _series(n, Pr, I, 10-sigma, J)
     return T
 
 
@@ -814,23 +810,18 @@ def _Backward2c_T_Ps(P, s):
 
     Pr = P/1
     sigma = s/2.9251
-    T = 0
-    for i in range(30):
-        T += n[i]*Pr**I[i]*(2-sigma)**J[i]
+    T = _series(n, Pr, I, 2-sigma, J)
     return T
 
 
 def _Backward2_T_Ps(P, s):
     """Backward equation for region 2, T=f(P,s)"""
     sf = 5.85
+    P, s = broadcast_arrays(asarray(P, dtype=float), asarray(s, dtype=float))
     Tsat = _TSat_P(P)
-    if P <= 4:
-        T = _Backward2a_T_Ps(P, s)
-    elif s >= sf:
-        T = _Backward2b_T_Ps(P, s)
-    else:
-        T = _Backward2c_T_Ps(P, s)
-    return max(Tsat, T)
+    T = _select([P <= 4, s >= sf, s < sf],
+                [_Backward2a_T_Ps, _Backward2b_T_Ps, _Backward2c_T_Ps], P, s)
+    return maximum(Tsat, T)
 
 
 def _Backward2a_P_hs(h, s):
@@ -860,9 +851,7 @@ def _Backward2a_P_hs(h, s):
 
     nu = h/4200
     sigma = s/12
-    suma = 0
-    for i in range(29):
-        suma += n[i]*(nu-0.5)**I[i]*(sigma-1.2)**J[i]
+    suma = _series(n, nu-0.5, I, sigma-1.2, J)
     return 4*suma**4
 
 
@@ -894,9 +883,7 @@ def _Backward2b_P_hs(h, s):
 
     nu = h/4100
     sigma = s/7.9
-    suma = 0
-    for i in range(33):
-        suma += n[i]*(nu-0.6)**I[i]*(sigma-1.01)**J[i]
+    suma = _series(n, nu-0.6, I, sigma-1.01, J)
     return 100*suma**4
 
 
@@ -928,9 +915,7 @@ def _Backward2c_P_hs(h, s):
 
     nu = h/3500
     sigma = s/5.9
-    suma = 0
-    for i in range(31):
-        suma += n[i]*(nu-0.7)**I[i]*(sigma-1.1)**J[i]
+    suma = _series(n, nu-0.7, I, sigma-1.1, J)
     return 100*suma**4
 
 
@@ -996,17 +981,10 @@ def _Region3(rho, T):
 
     d = rho/rhoc
     Tr = Tc/T
-    g = n[0]*log(d)
-    gd = n[0]*d**-1
-    gdd = -n[0]*d**-2
-    gt = gtt = gdt = 0
-    for i in range(1, 40):
-        g += n[i]*d**I[i]*Tr**J[i]
-        gd += n[i]*I[i]*d**(I[i]-1)*Tr**J[i]
-        gdd += n[i]*I[i]*(I[i]-1)*d**(I[i]-2)*Tr**J[i]
-        gt += n[i] * d**I[i] * J[i] * Tr**(J[i]-1)
-        gtt += n[i]*d**I[i]*J[i]*(J[i]-1)*Tr**(J[i]-2)
-        gdt += n[i]*I[i]*d**(I[i]-1)*J[i]*Tr**(J[i]-1)
+    g, gd, gdd, gt, gtt, gdt = _derivatives(n[1:], d, I[1:], Tr, J[1:])
+    g = g+n[0]*log(d)
+    gd = gd+n[0]*d**-1
+    gdd = gdd-n[0]*d**-2
 
     propiedades = {}
     propiedades["T"] = T
@@ -1169,9 +1147,7 @@ def _Backward3a_v_Ph(P, h):
 
     Pr = P/100
     nu = h/2100
-    suma = 0
-    for i in range(32):
-        suma += n[i]*(Pr+0.128)**I[i]*(nu-0.727)**J[i]
+    suma = _series(n, Pr+0.128, I, nu-0.727, J)
     return 0.0028*suma
 
 
@@ -1200,19 +1176,15 @@ def _Backward3b_v_Ph(P, h):
 
     Pr = P/100
     nu = h/2800
-    suma = 0
-    for i in range(30):
-        suma += n[i]*(Pr+0.0661)**I[i]*(nu-0.72)**J[i]
+    suma = _series(n, Pr+0.0661, I, nu-0.72, J)
     return 0.0088*suma
 
 
 def _Backward3_v_Ph(P, h):
     """Backward equation for region 3, v=f(P,h)"""
     hf = _h_3ab(P)
-    if h <= hf:
-        return _Backward3a_v_Ph(P, h)
-    else:
-        return _Backward3b_v_Ph(P, h)
+    return _select([h <= hf, h > hf], [_Backward3a_v_Ph, _Backward3b_v_Ph],
+                   P, h)
 
 
 def _Backward3a_T_Ph(P, h):
@@ -1240,9 +1212,7 @@ def _Backward3a_T_Ph(P, h):
 
     Pr = P/100.
     nu = h/2300.
-    suma = 0
-    for i, j, n in zip(I, J, n):
-        suma += n*(Pr+0.240)**i*(nu-0.615)**j
+    suma = _series(n, Pr+0.240, I, nu-0.615, J)
     return 760*suma
 
 
@@ -1272,20 +1242,15 @@ def _Backward3b_T_Ph(P, h):
 
     Pr = P/100.
     nu = h/2800.
-    suma = 0
-    for i, j, n in zip(I, J, n):
-        suma += n*(Pr+0.298)**i*(nu-0.72)**j
+    suma = _series(n, Pr+0.298, I, nu-0.72, J)
     return 860*suma
 
 
 def _Backward3_T_Ph(P, h):
     """Backward equation for region 3, T=f(P,h)"""
     hf = _h_3ab(P)
-    if h <= hf:
-        T = _Backward3a_T_Ph(P, h)
-    else:
-        T = _Backward3b_T_Ph(P, h)
-    return T
+    return _select([h <= hf, h > hf], [_Backward3a_T_Ph, _Backward3b_T_Ph],
+                   P, h)
 
 
 def _Backward3a_v_Ps(P, s):
@@ -1313,9 +1278,7 @@ def _Backward3a_v_Ps(P, s):
 
     Pr = P/100
     sigma = s/4.4
-    suma = 0
-    for i in range(28):
-        suma += n[i]*(Pr+0.187)**I[i]*(sigma-0.755)**J[i]
+    suma = _series(n, Pr+0.187, I, sigma-0.755, J)
     return 0.0028*suma
 
 
@@ -1345,18 +1308,14 @@ def _Backward3b_v_Ps(P, s):
 
     Pr = P/100
     sigma = s/5.3
-    suma = 0
-    for i in range(31):
-        suma += n[i]*(Pr+0.298)**I[i]*(sigma-0.816)**J[i]
+    suma = _series(n, Pr+0.298, I, sigma-0.816, J)
     return 0.0088*suma
 
 
 def _Backward3_v_Ps(P, s):
     """Backward equation for region 3, v=f(P,s)"""
-    if s <= sc:
-        return _Backward3a_v_Ps(P, s)
-    else:
-        return _Backward3b_v_Ps(P, s)
+    return _select([s <= sc, s > sc], [_Backward3a_v_Ps, _Backward3b_v_Ps],
+                   P, s)
 
 
 def _Backward3a_T_Ps(P, s):
@@ -1385,9 +1344,7 @@ def _Backward3a_T_Ps(P, s):
 
     Pr = P/100
     sigma = s/4.4
-    suma = 0
-    for i in range(33):
-        suma += n[i]*(Pr+0.240)**I[i]*(sigma-0.703)**J[i]
+    suma = _series(n, Pr+0.240, I, sigma-0.703, J)
     return 760*suma
 
 
@@ -1416,20 +1373,15 @@ def _Backward3b_T_Ps(P, s):
 
     Pr = P/100
     sigma = s/5.3
-    suma = 0
-    for i in range(28):
-        suma += n[i]*(Pr+0.760)**I[i]*(sigma-0.818)**J[i]
+    suma = _series(n, Pr+0.760, I, sigma-0.818, J)
     return 860*suma
 
 
 def _Backward3_T_Ps(P, s):
     """Backward equation for region 3, T=f(P,s)"""
     sc = 4.41202148223476
-    if s <= sc:
-        T = _Backward3a_T_Ps(P, s)
-    else:
-        T = _Backward3b_T_Ps(P, s)
-    return T
+    return _select([s <= sc, s > sc], [_Backward3a_T_Ps, _Backward3b_T_Ps],
+                   P, s)
 
 
 def _Backward3a_P_hs(h, s):
@@ -1460,9 +1412,7 @@ def _Backward3a_P_hs(h, s):
 
     nu = h/2300
     sigma = s/4.4
-    suma = 0
-    for i in range(33):
-        suma += n[i]*(nu-1.01)**I[i]*(sigma-0.75)**J[i]
+    suma = _series(n, nu-1.01, I, sigma-0.75, J)
     return 99*suma
 
 
@@ -1495,9 +1445,7 @@ def _Backward3b_P_hs(h, s):
 
     nu = h/2800
     sigma = s/5.3
-    suma = 0
-    for i in range(35):
-        suma += n[i]*(nu-0.681)**I[i]*(sigma-0.792)**J[i]
+    suma = _series(n, nu-0.681, I, sigma-0.792, J)
     return 16.6/suma
 
 
@@ -2293,9 +2241,7 @@ def _Backward4_T_hs(h, s):
 
     nu = h/2800
     sigma = s/9.2
-    suma = 0
-    for i in range(36):
-        suma += n[i]*(nu-0.119)**I[i]*(sigma-1.07)**J[i]
+    suma = _series(n, nu-0.119, I, sigma-1.07, J)
     return 550*suma
 
 
@@ -2331,14 +2277,7 @@ def _Region5(T, P):
     Jr = [1, 2, 3, 3, 9, 7]
     nr = [0.15736404855259e-2, 0.90153761673944e-3, -0.50270077677648e-2,
           0.22440037409485e-5, -0.41163275453471e-5, 0.37919454822955e-7]
-    gr = grp = grpp = grt = grtt = grpt = 0
-    for i in range(6):
-        gr += nr[i]*Pr**Ir[i]*Tr**Jr[i]
-        grp += nr[i]*Ir[i]*Pr**(Ir[i]-1)*Tr**Jr[i]
-        grpp += nr[i]*Ir[i]*(Ir[i]-1)*Pr**(Ir[i]-2)*Tr**Jr[i]
-        grt += nr[i]*Pr**Ir[i]*Jr[i]*Tr**(Jr[i]-1)
-        grtt += nr[i]*Pr**Ir[i]*Jr[i]*(Jr[i]-1)*Tr**(Jr[i]-2)
-        grpt += nr[i]*Ir[i]*Pr**(Ir[i]-1)*Jr[i]*Tr**(Jr[i]-1)
+    gr, grp, grpp, grt, grtt, grpt = _derivatives(nr, Pr, Ir, Tr, Jr)
 
     propiedades = {}
     propiedades["T"] = T
@@ -2703,131 +2642,94 @@ def _Refractive(rho, T, l=0.5893):
     return ((2*A+1)/(1-A))**0.5
 
 
-# Region definitions
+# Region definitions, the input can be arrays, then it's returned a int array
+# with the region of each element, 0 for undefined region
 def _Bound_TP(T, P):
     """Region definition for input T and P"""
-    region = None
-    if 1073.15 < T <= 2273.15 and Pmin <= P <= 50:
-        region = 5
-    elif Pmin <= P <= Ps_623:
+    T, P = broadcast_arrays(asarray(T, dtype=float), asarray(P, dtype=float))
+    region = zeros(T.shape, dtype=int)
+    with errstate(invalid="ignore"):
         Tsat = _TSat_P(P)
-        if 273.15 <= T <= Tsat:
-            region = 1
-        elif Tsat < T <= 1073.15:
-            region = 2
-    elif Ps_623 < P <= 100:
         T_b23 = _t_P(P)
-        if 273.15 <= T <= 623.15:
-            region = 1
-        elif T_b23 <= T <= 1073.15:
-            region = 2
-        elif 623.15 < T < T_b23:
-            region = 3
-    return region
+
+    _assign(region, 5,
+            (1073.15 < T) & (T <= 2273.15) & (Pmin <= P) & (P <= 50))
+    low = (Pmin <= P) & (P <= Ps_623)
+    _assign(region, 1, low & (273.15 <= T) & (T <= Tsat))
+    _assign(region, 2, low & (Tsat < T) & (T <= 1073.15))
+    high = (Ps_623 < P) & (P <= 100)
+    _assign(region, 1, high & (273.15 <= T) & (T <= 623.15))
+    _assign(region, 2, high & (T_b23 <= T) & (T <= 1073.15))
+    _assign(region, 3, high & (623.15 < T) & (T < T_b23))
+    return _region(region)
 
 
 def _Bound_Ph(P, h):
     """Region definition for input P y h"""
-    region = None
-    if Pmin <= P <= Ps_623:
-        h14 = _Region1(_TSat_P(P), P)["h"]
-        h24 = _Region2(_TSat_P(P), P)["h"]
-        h25 = _Region2(1073.15, P)["h"]
-        hmin = _Region1(273.15, P)["h"]
-        hmax = _Region5(2273.15, P)["h"]
-        if hmin <= h <= h14:
-            region = 1
-        elif h14 < h < h24:
-            region = 4
-        elif h24 <= h <= h25:
-            region = 2
-        elif h25 < h <= hmax:
-            region = 5
-    elif Ps_623 < P < Pc:
-        hmin = _Region1(273.15, P)["h"]
-        h13 = _Region1(623.15, P)["h"]
-        h32 = _Region2(_t_P(P), P)["h"]
-        h25 = _Region2(1073.15, P)["h"]
-        hmax = _Region5(2273.15, P)["h"]
-        if hmin <= h <= h13:
-            region = 1
-        elif h13 < h < h32:
-            p34 = _PSat_h(h)
-            if P < p34:
-                region = 4
-            else:
-                region = 3
-        elif h32 <= h <= h25:
-            region = 2
-        elif h25 < h <= hmax:
-            region = 5
-    elif Pc <= P <= 100:
+    P, h = broadcast_arrays(asarray(P, dtype=float), asarray(h, dtype=float))
+    region = zeros(P.shape, dtype=int)
+    with errstate(all="ignore"):
+        Tsat = _TSat_P(P)
         hmin = _Region1(273.15, P)["h"]
+        h14 = _Region1(Tsat, P)["h"]
         h13 = _Region1(623.15, P)["h"]
+        h24 = _Region2(Tsat, P)["h"]
         h32 = _Region2(_t_P(P), P)["h"]
         h25 = _Region2(1073.15, P)["h"]
         hmax = _Region5(2273.15, P)["h"]
-        if hmin <= h <= h13:
-            region = 1
-        elif h13 < h < h32:
-            region = 3
-        elif h32 <= h <= h25:
-            region = 2
-        elif P <= 50 and h25 <= h <= hmax:
-            region = 5
-    return region
+        p34 = _PSat_h(h)
+
+    low = (Pmin <= P) & (P <= Ps_623)
+    _assign(region, 1, low & (hmin <= h) & (h <= h14))
+    _assign(region, 4, low & (h14 < h) & (h < h24))
+    _assign(region, 2, low & (h24 <= h) & (h <= h25))
+    _assign(region, 5, low & (h25 < h) & (h <= hmax))
+    middle = (Ps_623 < P) & (P < Pc)
+    _assign(region, 1, middle & (hmin <= h) & (h <= h13))
+    _assign(region, 4, middle & (h13 < h) & (h < h32) & (P < p34))
+    _assign(region, 3, middle & (h13 < h) & (h < h32))
+    _assign(region, 2, middle & (h32 <= h) & (h <= h25))
+    _assign(region, 5, middle & (h25 < h) & (h <= hmax))
+    high = (Pc <= P) & (P <= 100)
+    _assign(region, 1, high & (hmin <= h) & (h <= h13))
+    _assign(region, 3, high & (h13 < h) & (h < h32))
+    _assign(region, 2, high & (h32 <= h) & (h <= h25))
+    _assign(region, 5, high & (P <= 50) & (h25 <= h) & (h <= hmax))
+    return _region(region)
 
 
 def _Bound_Ps(P, s):
     """Region definition for input P and s"""
-    region = None
-    if Pmin <= P <= Ps_623:
-        smin = _Region1(273.15, P)["s"]
-        s14 = _Region1(_TSat_P(P), P)["s"]
-        s24 = _Region2(_TSat_P(P), P)["s"]
-        s25 = _Region2(1073.15, P)["s"]
-        smax = _Region5(2273.15, P)["s"]
-        if smin <= s <= s14:
-            region = 1
-        elif s14 < s < s24:
-            region = 4
-        elif s24 <= s <= s25:
-            region = 2
-        elif s25 < s <= smax:
-            region = 5
-    elif Ps_623 < P < Pc:
-        smin = _Region1(273.15, P)["s"]
-        s13 = _Region1(623.15, P)["s"]
-        s32 = _Region2(_t_P(P), P)["s"]
-        s25 = _Region2(1073.15, P)["s"]
-        smax = _Region5(2273.15, P)["s"]
-        if smin <= s <= s13:
-            region = 1
-        elif s13 < s < s32:
-            p34 = _PSat_s(s)
-            if P < p34:
-                region = 4
-            else:
-                region = 3
-        elif s32 <= s <= s25:
-            region = 2
-        elif s25 < s <= smax:
-            region = 5
-    elif Pc <= P <= 100:
+    P, s = broadcast_arrays(asarray(P, dtype=float), asarray(s, dtype=float))
+    region = zeros(P.shape, dtype=int)
+    with errstate(all="ignore"):
+        Tsat = _TSat_P(P)
         smin = _Region1(273.15, P)["s"]
+        s14 = _Region1(Tsat, P)["s"]
         s13 = _Region1(623.15, P)["s"]
+        s24 = _Region2(Tsat, P)["s"]
         s32 = _Region2(_t_P(P), P)["s"]
         s25 = _Region2(1073.15, P)["s"]
         smax = _Region5(2273.15, P)["s"]
-        if smin <= s <= s13:
-            region = 1
-        elif s13 < s < s32:
-            region = 3
-        elif s32 <= s <= s25:
-            region = 2
-        elif P <= 50 and s25 <= s <= smax:
-            region = 5
-    return region
+        p34 = _PSat_s(s)
+
+    low = (Pmin <= P) & (P <= Ps_623)
+    _assign(region, 1, low & (smin <= s) & (s <= s14))
+    _assign(region, 4, low & (s14 < s) & (s < s24))
+    _assign(region, 2, low & (s24 <= s) & (s <= s25))
+    _assign(region, 5, low & (s25 < s) & (s <= smax))
+    middle = (Ps_623 < P) & (P < Pc)
+    _assign(region, 1, middle & (smin <= s) & (s <= s13))
+    _assign(region, 4, middle & (s13 < s) & (s < s32) & (P < p34))
+    _assign(region, 3, middle & (s13 < s) & (s < s32))
+    _assign(region, 2, middle & (s32 <= s) & (s <= s25))
+    _assign(region, 5, middle & (s25 < s) & (s <= smax))
+    high = (Pc <= P) & (P <= 100)
+    _assign(region, 1, high & (smin <= s) & (s <= s13))
+    _assign(region, 3, high & (s13 < s) & (s < s32))
+    _assign(region, 2, high & (s32 <= s) & (s <= s25))
+    _assign(region, 5, high & (P <= 50) & (s25 <= s) & (s <= smax))
+    return _region(region)
 
 
 def _Bound_hs(h, s):
@@ -2960,6 +2862,204 @@ def prop0(T, P):
     return prop0
 
 
+# Array evaluation
+def _newton(function, x, niter=50, tol=1e-10):
+    """Solve function(x)=0 with Newton method for array of unknowns,
+    function must return the residual and its derivative"""
+    for i in range(niter):
+        f, df = function(x)
+        dx = f/df
+        x = x-dx
+        if (abs(dx) <= tol*abs(x)).all():
+            break
+    return x
+
+
+def _newton2(function, x, y, niter=50, tol=1e-10):
+    """Solve function(x, y)=(0, 0) with Newton method for arrays of unknowns,
+    the jacobian is calculated by finite differences"""
+    for i in range(niter):
+        f1, f2 = function(x, y)
+        hx, hy = x*1e-7, y*1e-7
+        f1x, f2x = function(x+hx, y)
+        f1y, f2y = function(x, y+hy)
+        a, c = (f1x-f1)/hx, (f2x-f2)/hx
+        b, d = (f1y-f1)/hy, (f2y-f2)/hy
+        det = a*d-b*c
+        dx = (d*f1-b*f2)/det
+        dy = (a*f2-c*f1)/det
+        x, y = x-dx, y-dy
+        if ((abs(dx) <= tol*abs(x)) & (abs(dy) <= tol*abs(y))).all():
+            break
+    return x, y
+
+
+def _solve_T(function, P, prop, value, To):
+    """Calculate the temperature with given pressure and enthalpy or entropy
+    for regions with P, T as independent variables"""
+    def residual(T):
+        st = function(T, P)
+        if prop == "h":
+            return st["h"]-value, st["cp"]
+        else:
+            return st["s"]-value, st["cp"]/T
+    return _newton(residual, To)
+
+
+def _solve_Region3(P, prop, value):
+    """Calculate the region 3 state with given pressure and enthalpy or
+    entropy"""
+    if prop == "h":
+        vo = _Backward3_v_Ph(P, value)
+        To = _Backward3_T_Ph(P, value)
+    else:
+        vo = _Backward3_v_Ps(P, value)
+        To = _Backward3_T_Ps(P, value)
+
+    def residual(rho, T):
+        st = _Region3(rho, T)
+        return st[prop]-value, st["P"]-P
+    rho, T = _newton2(residual, 1/vo, To)
+    return _Region3(rho, T)
+
+
+def _rho_Region3(T, P):
+    """Calculate the region 3 density with given temperature and pressure"""
+    vo = array([_Backward3_v_PT(p, t) for p, t in zip(P, T)])
+
+    def residual(rho):
+        st = _Region3(rho, T)
+        return st["P"]-P, 1/rho/st["kt"]
+    return _newton(residual, 1/vo)
+
+
+def prop_array(T=None, P=None, h=None, s=None, x=None):
+    """Calculate the states for arrays of input variables, the states can be
+    defined with the same pairs of variables than IAPWS97 class except the
+    h-s pair, with units of regions functions:
+        T   -   Temperature, K
+        P   -   Pressure, MPa
+        h   -   Specific enthalpy, kJ/kg
+        s   -   Specific entropy, kJ/kg·K
+        x   -   Quality
+
+    The regions and the backward equations are evaluated for all the states
+    of each region at once and the iterative refinements are done with array
+    Newton methods, so it's the faster way to calculate a lot of states
+
+    Return a dict with the properties of regions functions as arrays with the
+    shape of input: T, P, v, h, s, cp, cv, w, alfav, kt, x and region, the
+    states out of bounds have region 0 and nan properties
+
+    >>> st = prop_array(T=[300, 700, 1500], P=[3, 30, 0.5])
+    >>> st["region"]
+    array([1, 2, 5])
+    >>> "%.6f %.5f %.5f" % tuple(st["h"])
+    '115.331273 2631.49474 5219.76855'
+    >>> st = prop_array(P=[3, 30, 0.5], h=st["h"])
+    >>> "%.6f %.6f %.6f" % tuple(st["T"])
+    '300.000000 700.000000 1500.000000'
+    >>> st = prop_array(P=[3, 30, 0.5], s=[0.5, 5.5, 8])
+    >>> "%.6f %.6f %.6f" % tuple(st["T"])
+    '307.845394 729.720720 741.618732'
+    >>> st = prop_array(T=325+273.15, x=[0, 0.5, 1])
+    >>> "%0.4f %0.2f %0.2f %0.2f" % ((st["P"][0], )+tuple(st["h"]))
+    '12.0505 1493.37 2088.93 2684.48'
+    """
+    variables = [(name, asarray(value, dtype=float)) for name, value in zip(
+        "TPhsx", (T, P, h, s, x)) if value is not None]
+    pair = "".join(name for name, value in variables)
+    if len(pair) != 2 or pair == "hs":
+        raise NotImplementedError("Bad incoming variables")
+    var1, var2 = broadcast_arrays(*[value for name, value in variables])
+    shape = var1.shape
+    var1, var2 = var1.ravel(), var2.ravel()
+
+    keys = ("T", "P", "v", "h", "s", "cp", "cv", "w", "alfav", "kt", "x")
+    prop = {key: full(var1.shape, nan) for key in keys}
+    prop["region"] = zeros(var1.shape, dtype=int)
+
+    def fill(mask, st):
+        for key in keys:
+            if st[key] is not None:
+                prop[key][mask] = st[key]
+        prop["region"][mask] = st["region"]
+
+    with errstate(all="ignore"):
+        if pair == "TP":
+            T, P = var1, var2
+            region = _Bound_TP(T, P)
+            for code, function in ((1, _Region1), (2, _Region2),
+                                   (5, _Region5)):
+                mask = region == code
+                if mask.any():
+                    fill(mask, function(T[mask], P[mask]))
+            mask = region == 3
+            if mask.any():
+                rho = _rho_Region3(T[mask], P[mask])
+                fill(mask, _Region3(rho, T[mask]))
+
+        elif pair in ("Ph", "Ps"):
+            P, value = var1, var2
+            var = pair[1]
+            if var == "h":
+                region = _Bound_Ph(P, value)
+                backward = {1: _Backward1_T_Ph, 2: _Backward2_T_Ph}
+            else:
+                region = _Bound_Ps(P, value)
+                backward = {1: _Backward1_T_Ps, 2: _Backward2_T_Ps}
+
+            for code, function in ((1, _Region1), (2, _Region2)):
+                mask = region == code
+                if mask.any():
+                    p, v = P[mask], value[mask]
+                    T = _solve_T(function, p, var, v, backward[code](p, v))
+                    fill(mask, function(T, p))
+
+            mask = region == 5
+            if mask.any():
+                p, v = P[mask], value[mask]
+                T = _solve_T(_Region5, p, var, v, full(p.shape, 1500.))
+                fill(mask, _Region5(T, p))
+
+            Tsat = _TSat_P(P)
+            mask = (region == 3) | ((region == 4) & (Tsat > 623.15))
+            if mask.any():
+                fill(mask, _solve_Region3(P[mask], var, value[mask]))
+
+            mask = (region == 4) & (Tsat <= 623.15)
+            if mask.any():
+                p, v, T = P[mask], value[mask], Tsat[mask]
+                liquid = _Region1(T, p)[var]
+                vapor = _Region2(T, p)[var]
+                fill(mask, _Region4(p, (v-liquid)/(vapor-liquid)))
+
+        else:
+            if pair == "Tx":
+                T, x = var1, var2
+                P = _PSat_T(T)
+                two = (Tt <= T) & (T <= Tc) & (0 < x) & (x < 1)
+            else:
+                P, x = var1, var2
+                T = _TSat_P(P)
+                two = (Pt <= P) & (P <= Pc) & (0 < x) & (x < 1)
+            if two.any():
+                fill(two, _Region4(P[two], x[two]))
+            mask = ~two & (P > 16.529)
+            if mask.any():
+                rho = 1/array([_Backward3_v_PT(p, t)
+                               for p, t in zip(P[mask], T[mask])])
+                fill(mask, _Region3(rho, T[mask]))
+            for code, function, xi in ((1, _Region1, 0), (2, _Region2, 1)):
+                mask = ~two & (P <= 16.529) & (x == xi)
+                if mask.any():
+                    fill(mask, function(_TSat_P(P[mask]), P[mask]))
+
+    for key in prop:
+        prop[key] = prop[key].reshape(shape)
+    return prop
+
+
 class IAPWS97(ThermoWater):
     """Class to model a state for liquid water or steam with the IAPWS-IF97
 
@@ -3113,7 +3213,7 @@ class IAPWS97(ThermoWater):
             elif region == 3:
                 vo = _Backward3_v_PT(P, T)
                 funcion = lambda rho: _Region3(rho, self.kwargs["T"])["P"]-P
-                rho = fsolve(funcion, 1/vo)
+                rho = fsolve(funcion, 1/vo)[0]
                 propiedades = _Region3(rho, T)
             elif region == 5:
                 propiedades = _Region5(T, P)
@@ -3126,12 +3226,12 @@ class IAPWS97(ThermoWater):
             if region == 1:
                 To = _Backward1_T_Ph(P, h)
                 funcion = lambda T: _Region1(T, P)["h"]-h
-                T = fsolve(funcion, To)
+                T = fsolve(funcion, To)[0]
                 propiedades = _Region1(T, P)
             elif region == 2:
                 To = _Backward2_T_Ph(P, h)
                 funcion = lambda T: _Region2(T, P)["h"]-h
-                T = fsolve(funcion, To)
+                T = fsolve(funcion, To)[0]
                 propiedades = _Region2(T, P)
             elif region == 3:
                 vo = _Backward3_v_Ph(P, h)
@@ -3158,7 +3258,7 @@ class IAPWS97(ThermoWater):
                     propiedades = _Region3(rho, T)
             elif region == 5:
                 funcion = lambda T: _Region5(T, P)["h"]-h
-                T = fsolve(funcion, 1500)
+                T = fsolve(funcion, 1500)[0]
                 propiedades = _Region5(T, P)
             else:
                 raise NotImplementedError("Incoming out of bound")
@@ -3169,12 +3269,12 @@ class IAPWS97(ThermoWater):
             if region == 1:
                 To = _Backward1_T_Ps(P, s)
                 funcion = lambda T: _Region1(T, P)["s"]-s
-                T = fsolve(funcion, To)
+                T = fsolve(funcion, To)[0]
                 propiedades = _Region1(T, P)
             elif region == 2:
                 To = _Backward2_T_Ps(P, s)
                 funcion = lambda T: _Region2(T, P)["s"]-s
-                T = fsolve(funcion, To)
+                T = fsolve(funcion, To)[0]
                 propiedades = _Region2(T, P)
             elif region == 3:
                 vo = _Backward3_v_Ps(P, s)
@@ -3199,7 +3299,7 @@ class IAPWS97(ThermoWater):
                     propiedades = _Region3(rho, T)
             elif region == 5:
                 funcion = lambda T: _Region5(T, P)["s"]-s
-                T = fsolve(funcion, 1500)
+                T = fsolve(funcion, 1500)[0]
                 propiedades = _Region5(T, P)
             else:
                 raise NotImplementedError("Incoming out of bound")
@@ -3350,8 +3450,8 @@ class IAPWS97(ThermoWater):
         fase.u = unidades.Enthalpy(fase.h-self.P*fase.v)
         fase.a = unidades.Enthalpy(fase.u-self.T*fase.s)
         fase.g = unidades.Enthalpy(fase.h-self.T*fase.s)
-        fase.fi = unidades.Pressure([exp((fase.g-self.g0)/R/self.T)])
-        fase.f = unidades.Pressure([self.P*fase.fi])
+        fase.fi = [unidades.Dimensionless(exp((fase.g-self.g0)/R/self.T))]
+        fase.f = [unidades.Pressure(self.P*f) for f in fase.fi]
 
         fase.cv = unidades.SpecificHeat(estado["cv"], "kJkgK")
         fase.cp = unidades.SpecificHeat(estado["cp"], "kJkgK")
@@ -128,13 +128,11 @@ class CO(MEoS):
         "Tmin": Tt, "Tmax": 500., "Pmax": 100000.0, "rhomax": 33.84,
         "Pmin": 15.45, "rhomin": 30.33,
 
-        "nr1":  [0.92310041400851, -0.248858452058e1, 0.58095213783396,
-                 0.28859164394654e-1, 0.70256257276544e-1, 0.21687043269488e-3],
+        "nr1": [0.90554, -2.4515, 0.53149, 0.024173, 0.072156, 0.00018818],
         "d1": [1, 1, 1, 2, 3, 7],
-        "t1": [0.25, 0.125, 1.5, 1.375, 0.25, 0.875],
+        "t1": [0.25, 1.125, 1.5, 1.375, 0.25, 0.875],
 
-        "nr2": [0.13758331015182, -0.51501116343466e-1, -0.14865357483379,
-                -0.38857100886810e-1, -0.29100433948943e-1, 0.14155684466279e-1],
+        "nr2": [0.19405, -0.043268, -0.12778, -0.027896, -0.034154, 0.016329],
         "d2": [2, 5, 1, 4, 3, 4],
         "t2": [0.625, 1.75, 3.625, 3.625, 14.5, 12],
         "c2": [1, 1, 2, 2, 3, 3],
@@ -141,7 +141,7 @@ class H2O(MEoS):
            "pow": [0, 1],
            "ao_pow": [8.203520690, -11.996306443],
            "ao_exp": [], "titao": [],
-           "ao_hyp": [0.01059, -0.98763, 3.06904, 0],
+           "ao_hyp": [0.01059, 0.98763, 3.06904, 0],
            "hyp": [0.415386589, 1.763895929, 3.874803739, 0]}
 
     Fi3 = {"ao_log": [1, 3.00632],
@@ -118,7 +118,7 @@ class O2(MEoS):
         "nr2": [0.18558686391474, -0.38129368035760e-1, -0.15352245383006,
                 -0.26726814910919e-1, -0.25675298677127e-1, 0.95714302123668e-2],
         "d2": [2, 5, 1, 4, 3, 4],
-        "t2": [0.625, 1.75, 3.623, 3.625, 14.5, 12],
+        "t2": [0.625, 1.75, 3.625, 3.625, 14.5, 12],
         "c2": [1, 1, 2, 2, 3, 3],
         "gamma2": [1]*20,
 
@@ -108,13 +108,11 @@ class iC5(MEoS):
         "Tmin": Tt, "Tmax": 500.0, "Pmax": 1000000.0, "rhomax": 13.3,
         "Pmin": 0.83e-7, "rhomin": 10.925,
 
-        "nr1": [0.11017531966644e1, -0.30082368531980e1, 0.99411904271336,
-                -0.14008636562629, 0.11193995351286, 0.29548042541230e-3],
+        "nr1": [1.0963, -3.0402, 1.0317, -0.1541, 0.11535, 0.00029809],
         "d1": [1, 1, 1, 2, 3, 7],
         "t1": [0.25, 1.125, 1.5, 1.375, 0.25, 0.875],
 
-        "nr2": [0.36370108598133, -0.48236083488293e-1, -0.35100280270615,
-                -0.10185043812047, -0.35242601785454e-1, 0.19756797599888e-1],
+        "nr2": [0.39571, -0.045881, -0.35804, -0.10107, -0.035484, 0.018156],
         "d2": [2, 5, 1, 4, 3, 4],
         "t2": [0.625, 1.75, 3.625, 3.625, 14.5, 12.],
         "c2": [1, 1, 2, 2, 3, 3],
@@ -48,6 +48,13 @@ class nC5(MEoS):
            "ao_hyp": [8.95043, 21.836, 33.4032, 0],
            "hyp": [0.380391739, 1.789520971, 3.777411113, 0]}
 
+    Fi2 = {"ao_log": [1, 3.0],
+           "pow": [0, 1],
+           "ao_pow": [14.536611217, -89.919548319],
+           "ao_exp": [], "titao": [],
+           "ao_hyp": [8.95043, 21.836, 33.4032, 0],
+           "hyp": [0.380391739, 1.789520971, 3.777411113, 0]}
+
     CP1 = {"ao": 10.288132,
            "an": [-0.2695377e-1, 0.20951065e-3, -0.27910773e-6, 0.12266269e-9],
            "pow": [1, 2, 3, 4],
@@ -103,7 +110,7 @@ class nC5(MEoS):
                     "ref": "J. Chem. Eng. Data, 2012, 57 (11), pp 3032-3091",
                     "doi":  "10.1021/je300655b"},
         "R": 8.314472,
-        "cp": Fi1,
+        "cp": Fi2,
         "ref": "OTO",
 
         "Tmin": 143.47, "Tmax": 600.0, "Pmax": 100000.0, "rhomax": 10.57,
@@ -26,7 +26,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 #   o   Ecuación Peng-Robinson con translación de Peneloux
 #############################################################################
 
+import logging
 import os
+import pickle
+from hashlib import md5
+from functools import partial
 from itertools import product
 from PyQt5.QtWidgets import QApplication
 from scipy import exp, log, log10, sin, sinh, cosh, tanh, arctan, __version__
@@ -36,12 +40,184 @@ else:
     from scipy.constants import Boltzmann
 from scipy.constants import pi, Avogadro, R
 from scipy.optimize import fsolve
+from scipy.interpolate import splrep, splev
+from numpy import (array, asarray, broadcast_arrays, concatenate, errstate,
+                   interp, isfinite, linspace, maximum, moveaxis, newaxis,
+                   ones, stack, unique, where, zeros)
 
 from . import unidades, compuestos
 from .physics import R_atml
 from .thermo import Fluid_MEOS
 
 
+# Density used to evaluate the virial coefficients in the zero density limit
+_delta_0 = 1e-200
+
+# Exponent of tau and delta dividing the derivatives of residual Helmholtz
+# energy in order fir, firt, firtt, fird, firdd, firdt, firdtt
+_tauExp = array([0, 1, 2, 0, 0, 1, 2])
+_deltaExp = array([0, 0, 0, 1, 2, 1, 1])
+
+# Coefficients of residual Helmholtz equations packed in arrays, indexed by
+# the id of the equation dict
+_phirCache = {}
+
+# Interpolated saturation curves, indexed by the id of the equation dict
+# with the dict itself to check the entry, saved too in disk in this folder
+# to reuse it between sessions
+_saturationCache = {}
+_saturationDir = os.path.join(os.environ["pychemqt"], "dat", "mEoS_sat")
+
+# Version of the saved curves, increased when a change in the evaluation of
+# the equations invalidates the curves calculated previously
+_saturationVersion = 2
+
+
+def _phirCoefficients(constants):
+    """Pack the coefficients of the residual Helmholtz energy terms of an
+    equation of state in numpy arrays
+
+    The polynomial terms are handled as exponential terms with null gamma, so
+    both are evaluated together as a matrix product of the terms values with
+    the derivative factors, calculated here only once. The factors of tau
+    independent in virial coefficients are calculated here too
+    """
+
+    def pack(*keys, **defaults):
+        """Return the arrays of parameters, truncated to the shortest list"""
+        values = [constants.get(key, defaults.get(key, [])) for key in keys]
+        n = min(len(value) for value in values)
+        return [array(value[:n], dtype=float) for value in values]
+
+    terms = {}
+    with errstate(divide="ignore", invalid="ignore", over="ignore"):
+        n1, d1, t1 = pack("nr1", "d1", "t1")
+        n2, d2, g2, t2, c2 = pack("nr2", "d2", "gamma2", "t2", "c2")
+        n = concatenate((n1, n2))
+        if len(n):
+            d = concatenate((d1, d2))
+            t = concatenate((t1, t2))
+            g = concatenate((zeros(len(n1)), g2))
+            c = concatenate((zeros(len(n1)), c2))
+
+            # Derivative factors of terms, the columns are in the order
+            # fir, firt, firtt, fird, firdd, firdt, firdtt and the rows are
+            # the factors of f, f·x and f·x², with x=g·c·δ^c
+            null = zeros(len(n))
+            factors = concatenate((
+                array([null+1, t, t*(t-1), d, d*(d-1), t*d, t*(t-1)*d]),
+                array([null, null, null, null-1, -(2*d-1)-c, -t, -t*(t-1)]),
+                array([null, null, null, null, null+1, null, null])), axis=1)
+
+            dc = _delta_0**c
+            Bo = n*exp(-g*dc)*_delta_0**(d-1)*(d-g*c*dc)
+            Co = n*exp(-g*dc)*_delta_0**(d-2)*((d-g*c*dc)*(d-1-g*c*dc) -
+                                               g*c**2*dc)
+            Co = where(isfinite(Co), Co, 0)
+            terms["exp"] = (n, d, t, g, c, g*c, factors.T,
+                            array([Bo, Co]).T)
+
+        nr3 = constants.get("nr3", [])
+        n, d, t, a, e, b, g, ex1, ex2 = pack(
+            "nr3", "d3", "t3", "alfa3", "epsilon3", "beta3", "gamma3", "exp1",
+            "exp2", exp1=[2]*len(nr3), exp2=[2]*len(nr3))
+        if len(n):
+            de = _delta_0-e
+            Bo = n*_delta_0**d*exp(-a*de**ex1)*(d/_delta_0-2*a*de)
+            Co = n*exp(-a*de**ex1)*(
+                -2*a*_delta_0**d+4*a**2*_delta_0**d*de**ex1 -
+                4*d*a*_delta_0**2*de+d*2*_delta_0)
+            terms["gauss"] = (n, d, t, a, e, b, g, ex1, ex2,
+                              array([Bo, Co]).T)
+
+        n, a, b, A, B, C, D, bt = pack(
+            "nr4", "a4", "b4", "A", "B", "C", "D", "beta4")
+        if len(n):
+            # Exponents and factors of derivatives of distance function
+            terms["nonanalytic"] = (
+                n, A, B, C, D, b, 0.5/bt-1, a-1, 2*A/bt, 2*B*a,
+                2*A**2/bt**2, 4*A/bt*(0.5/bt-1), 4*B*a*(a-1))
+
+        if constants.get("Fi", None):
+            terms["Fi"] = constants["Fi"]
+
+        if "nr5" in constants:
+            n, d, t = pack("nr5", "d5", "t5")
+            d6 = _delta_0**6
+            Bo = (-2.4*exp(-0.4*d6)+12*exp(-2*d6))*n*_delta_0**(d+5) + \
+                (exp(0.4*d6)-exp(-2*d6))*n*d*_delta_0**(d-1)
+            Co = (5.76*exp(-0.4*d6)-144*exp(-2*d6))*n*_delta_0**(d+10) + \
+                (-2.4*exp(-0.4*d6)+12*exp(-2*d6))*n*(2*d+5)*_delta_0**(d+4) + \
+                (exp(0.4*d6)-exp(-2*d6))*n*d*(d-1)*_delta_0**(d-2)
+            terms["saul"] = (n, d, t, array([Bo, Co]).T)
+    return terms
+
+
+def _ancillary(coef, T, Tc, root):
+    """Evaluate an ancillary equation for saturation properties, valid for
+    scalar or array temperatures, return the reduced property"""
+    eq = coef["eq"]
+    Tita = 1-T/Tc
+    if eq in [2, 4, 6]:
+        Tita = Tita**root
+    suma = sum([n*Tita**x for n, x in zip(coef["ao"], coef["exp"])])
+    if eq in [1, 2]:
+        return suma+1
+    elif eq in [3, 4]:
+        return exp(suma)
+    else:
+        return exp(Tc/T*suma)
+
+
+def _bracketedNewton(func, x, lo, hi, xtol=1e-12, maxiter=100):
+    """Solve in a vectorized way a set of independent monotone increasing
+    equations with Newton method, safeguarded with a bracket of the root
+
+    func: function with the parameters (x, mask), x the values of unknown
+        for the unconverged points selected by the boolean array mask,
+        return the residual and its derivative for that points
+    x: array with the initial values
+    lo, hi: arrays with the lower and upper bounds of the root, the upper
+        bound can be inf if unknown
+
+    The Newton step is rejected and changed by a bisection, or a expansion
+    step if the upper bound is unknown, when it goes out of bracket, the
+    derivative is not positive or it isn't reducing the residual fast enough
+    compared with the previous step
+
+    Return the solution array and the iterations used in each point
+    """
+    x = array(x, dtype=float)
+    lo = array(broadcast_arrays(lo, x)[0], dtype=float)
+    hi = array(broadcast_arrays(hi, x)[0], dtype=float)
+    niter = zeros(x.shape, dtype=int)
+    step = hi-lo
+    active = isfinite(x)
+    with errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for i in range(maxiter):
+            if not active.any():
+                break
+            xa = x[active]
+            f, df = func(xa, active)
+            niter[active] += 1
+            la = where(f < 0, xa, lo[active])
+            ha = where(f > 0, xa, hi[active])
+            xn = xa-f/df
+            bad = ~((df > 0) & (xn > la) & (xn < ha) &
+                    (abs(2*f) <= abs(step[active]*df)))
+            if bad.any():
+                bisect = where(isfinite(ha), (la+ha)/2, 2*xa-lo[active])
+                xn = where(bad, bisect, xn)
+
+            done = (abs(xn-xa) <= xtol*abs(xa)) | (f == 0)
+            lo[active] = la
+            hi[active] = ha
+            step[active] = xn-xa
+            x[active] = xn
+            active[active] = ~done
+    return x, niter
+
+
 class MEoS(Fluid_MEOS):
     """General class for implement multiparameter equation of state
     Each child class must define parameters for do calculations:
@@ -101,6 +277,11 @@ class MEoS(Fluid_MEOS):
 
     _test = []
 
+    # Properties available in vectorized calculation
+    _batchProperties = ("T", "P", "rho", "v", "x", "h", "s", "u", "g", "a",
+                        "cp", "cv", "cp_cv", "w", "Z", "alfap", "betap",
+                        "dpdrho_T", "drhodT_P")
+
     kwargs = {"T": 0.0,
               "P": 0.0,
               "rho": None,
@@ -117,7 +298,8 @@ class MEoS(Fluid_MEOS):
               "refvalues": None,
               "rho0": 0,
               "T0": 0,
-              "recursion": True}
+              "recursion": True,
+              "lazy": False}
     status = 0
     msg = QApplication.translate("pychemqt", "Unknown Variables")
     __doi__ = {
@@ -168,6 +350,10 @@ class MEoS(Fluid_MEOS):
             [Tref, Pref, ho, so]
         rho0: Initial value for iteration over density
         T0: Initial value for iteration over temperature
+        recursion: Calculate the transport properties and dielectric constant
+        lazy: Calculate the phase properties only in its first use, by
+            groups: thermodynamic properties, derivatives, transport
+            properties and dielectric constant
 
     Calculated properties:
         P         -   Pressure, MPa
@@ -226,6 +412,7 @@ class MEoS(Fluid_MEOS):
         alfa      -   Thermal diffusivity, m²/s
         Pramdt    -   Prandtl number
         epsilon   -   Dielectric constant
+        niter     -   Iterations used by the solver of input pair
 
         v0        -   Ideal gas Specific volume, m³/kg
         rho0      -   Ideal gas Density, kg/m³
@@ -270,13 +457,17 @@ class MEoS(Fluid_MEOS):
             if self.status in (1, 3):
                 converge = True
                 for input in self._mode.split("-"):
-                    if abs(self.kwargs[input]-self.__getattribute__(input)._data) > 1e-9:
+                    value = self.kwargs[input]
+                    if abs(value-self.__getattribute__(input)._data) > \
+                            1e-9*max(1, abs(value)):
                         converge = False
                         break
                 if not converge:
                     self.status = 5
                     self.msg = QApplication.translate("pychemqt", "Solution don´t converge")
-                    print(("dont converge for %s by %g" %(input, self.kwargs[input]-self.__getattribute__(input)._data)))
+                    logging.warning("dont converge for %s by %g" % (
+                        input, self.kwargs[input] -
+                        self.__getattribute__(input)._data))
 
     def cleanOldValues(self, **kwargs):
         """Convert alternative rho input to correct rho value"""
@@ -340,45 +531,10 @@ class MEoS(Fluid_MEOS):
         h = self.kwargs["h"]
         u = self.kwargs["u"]
         x = self.kwargs["x"]
-        eq = self.kwargs["eq"]
         visco = self.kwargs["visco"]
         thermal = self.kwargs["thermal"]
-        ref = self.kwargs["ref"]
-        refvalues = self.kwargs["refvalues"]
 
-        self._ref(ref, refvalues)
-
-        if self.id:
-            self.componente = compuestos.Componente(self.id)
-
-        # Opcion de aceptar el nombre interno de la ecuacion
-        if isinstance(eq, str) and eq in self.__class__.__dict__:
-            eq = self.eq.index(self.__class__.__dict__[eq])
-
-        if eq == "PR":
-            self._eq = self._PengRobinson
-            self._constants = self.eq[0]
-        elif eq == "Generalised":
-            self._eq = self._Helmholtz
-            self._Generalised()
-        elif eq == "GERG":
-            try:
-                self._constants = self.GERG
-            except:
-                self._constants = self.eq[0]
-            if self._constants["__type__"] == "Helmholtz":
-                self._eq = self._Helmholtz
-            else:
-                self._eq = self._MBWR
-        elif self.eq[eq]["__type__"] == "Helmholtz":
-            self._eq = self._Helmholtz
-            self._constants = self.eq[eq]
-        elif self.eq[eq]["__type__"] == "MBWR":
-            self._eq = self._MBWR
-            self._constants = self.eq[eq]
-        elif self.eq[eq]["__type__"] == "ECS":
-            self._eq = self._ECS
-            self._constants = self.eq[eq]
+        eq = self._setEquation()
 
         if self._viscosity:
             self._viscosity = self._viscosity[visco]
@@ -387,9 +543,25 @@ class MEoS(Fluid_MEOS):
 
         propiedades = None
 
+        self.niter = 0
         if x is None:
-            # Method with iteration necessary to get x
-            if self._mode == "T-P":
+            # Method with iteration necessary to get x, the input pairs with
+            # dedicated solver use the general fsolve iteration as fallback
+            # if it fails
+            solved = False
+            if self._mode in ("T-P", "P-h", "P-s") and \
+                    self._eq == self._Helmholtz:
+                rho, T = self._solveState()
+                solved = rho is not None
+                if not solved:
+                    rho = self.kwargs["rho"]
+                    T = self.kwargs["T"]
+
+            if solved:
+                # State already solved by the dedicated solver
+                pass
+
+            elif self._mode == "T-P":
 
                 if self.kwargs["rho0"]:
                     rhoo = self.kwargs["rho0"]
@@ -601,8 +773,7 @@ class MEoS(Fluid_MEOS):
             T = float(T)
             propiedades = self._eq(rho, T)
             if T <= self.Tc:
-                rhol = self._Liquid_Density(T)
-                rhov = self._Vapor_Density(T)
+                Pv, rhol, rhov = map(float, self._saturationGuess(T))
                 if rhol > rho > rhov:
                     rhol, rhov, Ps = self._saturation(T)
                     x = (1/rho-1/rhol)/(1/rhov-1/rhol)
@@ -726,7 +897,8 @@ class MEoS(Fluid_MEOS):
             self.gM = unidades.MolarEnthalpy(self.g*self.M)
 
             self.Z = unidades.Dimensionless(x*self.Gas.Z+(1-x)*self.Liquido.Z)
-            self.f = unidades.Pressure(x*self.Gas.f+(1-x)*self.Liquido.f)
+            self.f = [unidades.Pressure(x*fv+(1-x)*fl)
+                      for fv, fl in zip(self.Gas.f, self.Liquido.f)]
             self.Z_rho = unidades.SpecificVolume(x*self.Gas.Z_rho+(1-x)*self.Liquido.Z_rho)
             self.IntP = unidades.Pressure(x*self.Gas.IntP+(1-x)*self.Liquido.IntP)
 
@@ -752,6 +924,425 @@ class MEoS(Fluid_MEOS):
         self.invT = unidades.InvTemperature(-1/self.T)
 
 
+    @classmethod
+    def batch(cls, props=("rho", "h", "s"), eq=0, ref=None, refvalues=None,
+              **kwargs):
+        """Vectorized calculation of states without building the state
+        objects, useful for big tables of properties
+
+        Input pairs supported, as arrays or scalars broadcastable between
+        them, with the same units as the kwargs of class:
+            T-P, T-rho, P-h, P-s
+        props: Names of properties to return, any of _batchProperties
+        eq, ref, refvalues: Same meaning than in the instance definition
+
+        Return a dict with the arrays of the requested properties in SI
+        units. The points out of the range of equation or without
+        convergence are returned as nan, in two phase region the properties
+        without meaning for the mixture (cp, w, ...) are nan too.
+        Only the Helmholtz equations are vectorized, the others equations are
+        calculated point by point
+
+        >>> from lib.mEoS import H2O
+        >>> st = H2O.batch(T=[300, 500], rho=[996.556, 0.435], \
+            props=("P", "cv", "w", "s"))
+        >>> print("%0.8g %0.9g %0.9g %0.9g" % (st["P"][0]/1e6, \
+            st["cv"][0]/1e3, st["w"][0], st["s"][0]/1e3))
+        0.099241835 4.13018112 1501.51914 0.393062643
+        >>> print("%0.9g %0.9g %0.9g %0.9g" % (st["P"][1]/1e6, \
+            st["cv"][1]/1e3, st["w"][1], st["s"][1]/1e3))
+        0.0999679423 1.50817541 548.314253 7.94488271
+
+        Liquid at supercritical pressure, compared with the states
+        calculated one by one
+
+        >>> h = [H2O(T=t, P=2.427e7).h for t in (300, 450, 600)]
+        >>> st = H2O.batch(P=2.427e7, h=h, props=("T", "rho"))
+        >>> for hi, T, rho in zip(h, st["T"], st["rho"]):
+        ...     ref = H2O(P=2.427e7, h=hi)
+        ...     print("%0.3f %0.3f %0.3f %0.3f" % (T, ref.T, rho, ref.rho))
+        300.000 300.000 1007.138 1007.138
+        450.000 450.000 904.826 904.826
+        600.000 600.000 686.387 686.387
+        """
+        unknown = [p for p in props if p not in cls._batchProperties]
+        if unknown:
+            raise ValueError("Unsupported property in batch: %s" %
+                             ", ".join(unknown))
+        inputs = [key for key in ("T", "P", "rho", "h", "s")
+                  if kwargs.get(key) is not None]
+        mode = "-".join(inputs)
+        if mode not in ("T-P", "T-rho", "P-h", "P-s"):
+            raise ValueError("Unsupported input pair in batch: %s" % mode)
+
+        values = broadcast_arrays(*[asarray(kwargs[key], dtype=float)
+                                    for key in inputs])
+        shape = values[0].shape
+        a, b = [array(value).ravel() for value in values]
+
+        fluid = cls(eq=eq, ref=ref, refvalues=refvalues)
+        fluid._setEquation()
+        if fluid._eq == fluid._Helmholtz:
+            with errstate(divide="ignore", invalid="ignore", over="ignore"):
+                result = fluid._batch(mode, a, b)
+        else:
+            result = fluid._batchPointwise(mode, a, b, props)
+        return {p: result[p].reshape(shape) for p in props}
+
+    def _batchPointwise(self, mode, a, b, props):
+        """Point by point calculation of batch, for equations without
+        vectorized implementation"""
+        input1, input2 = mode.split("-")
+        result = {p: zeros(len(a))+float("nan") for p in props}
+        for i, (x, y) in enumerate(zip(a, b)):
+            state = self.__class__(
+                eq=self.kwargs["eq"], ref=self.kwargs["ref"],
+                refvalues=self.kwargs["refvalues"], recursion=False,
+                **{input1: x, input2: y})
+            if state.status in (1, 3):
+                for p in props:
+                    result[p][i] = float(state.__getattribute__(p))
+        return result
+
+    def _solve(self, mode, a, b, T0=None, rho0=None):
+        """Vectorized calculation of temperature and density for arrays of
+        input pairs T-P, T-rho, P-h or P-s, only for Helmholtz equations
+
+        The density is solved with the analytic dp/drho derivative and the
+        temperature with the cp, both with Newton steps safeguarded with a
+        bracket of the root, so the normal case needs only a few equation
+        evaluations
+        T0, rho0: Optional arrays with initial values of temperature and
+            density, used to warm start the iteration from a near state, for
+            example the previous point of an isoline. They are discarded if
+            out of bracket of the phase region of input
+
+        Return a dict with the arrays:
+            T, rho: Temperature and density, mean density in two phases
+            P: Pressure, nan for the single phase points of T-rho mode
+            x: Quality
+            two: Boolean array, True for the two phases points
+            rhol, rhov: Saturated densities of two phases points
+            niter: Newton iterations of density and temperature solvers
+
+        Compressed liquid over the critical pressure and near it, without
+        roots in the two phases region of equation
+
+        >>> from lib.mEoS import H2O, R134a
+        >>> ref = H2O(T=400, P=3e7)
+        >>> st = H2O(P=3e7, h=ref.h)
+        >>> print("%0.3f %0.2f %i" % (st.T, st.rho, st.status))
+        400.000 952.05 1
+        >>> st = H2O(P=3e7, s=ref.s)
+        >>> print("%0.3f %0.2f %i" % (st.T, st.rho, st.status))
+        400.000 952.05 1
+        >>> st = R134a(P=3.8e6, h=R134a(T=200, P=3.8e6).h)
+        >>> print("%0.3f %0.2f %i" % (st.T, st.rho, st.status))
+        200.000 1528.08 1
+
+        Compressed liquid near the critical point of fluorine, with exponential
+        terms with γ≠1 in the equation
+
+        >>> from lib.mEoS import F2
+        >>> ref = F2(T=140.08, P=4655160)
+        >>> st = F2(P=4655160, h=ref.h)
+        >>> print("%0.3f %0.2f %i" % (st.T, st.rho, st.status))
+        140.080 914.10 1
+        >>> st = F2(P=4655160, s=ref.s)
+        >>> print("%0.3f %0.2f %i" % (st.T, st.rho, st.status))
+        140.080 914.10 1
+        """
+        n = len(a)
+        nan = float("nan")
+        Tc = float(self.Tc)
+        Tmin = self._constants["Tmin"]
+        Tmax = self._constants["Tmax"]
+
+        P = zeros(n)+nan
+        x = ones(n)
+        two = zeros(n, dtype=bool)
+        rhol = zeros(n)+nan
+        rhov = zeros(n)+nan
+        count = zeros(n, dtype=int)
+
+        if mode == "T-P":
+            T, P = a, b
+            if rho0 is None:
+                rho, count = self._rhoTP(T, P)
+            else:
+                guess = self._rhoGuess(T, P)
+                guess = where(rho0 > 0, rho0, guess)
+                rho, count = self._rhoTP(T, P, guess)
+            Pv = self._saturationGuess(T)[0]
+            x[(T < Tc) & (P > Pv)] = 0
+
+        elif mode == "T-rho":
+            T, rho = a, b
+            Pv, rl, rv = self._saturationGuess(T)
+            sub = T < Tc
+            x[sub & (rho >= rl)] = 0
+
+            # Check two phase region with the exact saturation densities
+            cand = sub & (rho < rl) & (rho > rv)
+            if cand.any():
+                l, v, Ps = self._Maxwell(T[cand], rl[cand], rv[cand])
+                r = rho[cand]
+                xc = (1/r-1/l)/(1/v-1/l)
+                x[cand] = where(xc <= 0, 0, 1)
+                mix = (xc > 0) & (xc < 1)
+                idx = cand.nonzero()[0][mix]
+                two[idx] = True
+                x[idx] = xc[mix]
+                rhol[idx] = l[mix]
+                rhov[idx] = v[mix]
+                P[idx] = Ps[mix]
+
+        else:
+            P, y = a, b
+            key = mode[-1]
+            T = zeros(n)+nan
+            rho = zeros(n)+nan
+            To = zeros(n)+nan
+            lo = zeros(n)+Tmin
+            hi = zeros(n)+Tmax
+            rholo = zeros(n)
+            rhohi = zeros(n)+float("inf")
+            rhos = zeros(n)+nan
+
+            # Phase definition with the saturation state at P
+            sub = (P < self.Pc).nonzero()[0]
+            if len(sub):
+                # Saturation state calculated only once for each pressure,
+                # tables with few isobars are the usual case
+                Pu, index = unique(P[sub], return_inverse=True)
+                Ts, l, v = [value[index] for value in self._saturationP(Pu)]
+                ok = isfinite(Ts) & isfinite(l) & isfinite(v)
+                sub, Ts, l, v = sub[ok], Ts[ok], l[ok], v[ok]
+                liquido = self._Helmholtz(l, Ts)
+                vapor = self._Helmholtz(v, Ts)
+                yl = liquido[key]*1000
+                yv = vapor[key]*1000
+                if key == "h":
+                    dyl = liquido["cp"]*1000
+                    dyv = vapor["cp"]*1000
+                else:
+                    dyl = liquido["cp"]*1000/Ts
+                    dyv = vapor["cp"]*1000/Ts
+                ys = y[sub]
+                liq = ys <= yl
+                vap = ys >= yv
+                mix = ~liq & ~vap
+
+                x[sub] = where(liq, 0, where(vap, 1, (ys-yl)/(yv-yl)))
+                T[sub] = Ts
+                To[sub] = where(liq, Ts+(ys-yl)/dyl, Ts+(ys-yv)/dyv)
+                hi[sub] = where(liq, Ts, Tmax)
+                lo[sub] = where(vap, Ts, Tmin)
+                rholo[sub] = where(liq, 0.99*l, 0)
+                rhohi[sub] = where(vap, v, float("inf"))
+                rhos[sub] = where(liq, l, v)
+                two[sub[mix]] = True
+                rhol[sub[mix]] = l[mix]
+                rhov[sub[mix]] = v[mix]
+
+            single = ~two
+            if T0 is not None:
+                To = where((T0 > lo) & (T0 < hi), T0, To)
+            To = where(isfinite(To), To, Tc)
+            To = where(To < lo, lo, where(To > hi, hi, To))
+
+            # Initial value of density from the saturated state, with ideal
+            # gas correction for vapor, or from the T-P initial value
+            Pi = P[single]
+            yi = y[single]
+            rhoi = self._rhoGuess(To[single], Pi)
+            rhosi = rhos[single]*where(x[single] == 0, 1, T[single]/To[single])
+            rhoi = where(isfinite(rhosi), rhosi, rhoi)
+            rholoi = rholo[single]
+            rhohii = rhohi[single]
+            if rho0 is not None:
+                r0 = rho0[single]
+                rhoi = where((r0 > rholoi) & (r0 < rhohii), r0, rhoi)
+            counti = zeros(len(Pi), dtype=int)
+
+            # Density of previous iteration and its isobaric derivative, to
+            # extrapolate the initial value of density at the new temperature
+            Tprev = To[single]
+            drhodT = zeros(len(Pi))
+
+            # The density of compressed liquid, and of the stable state
+            # below the critical temperature over the critical pressure, is
+            # bounded with the saturated liquid density at the temperature to
+            # reject the roots of the equation in the two phases region
+            liquid = (Pi >= self.Pc) | (x[single] == 0)
+
+            def lower(T, mask):
+                lo = rholoi[mask]
+                liq = liquid[mask] & (T < Tc)
+                if liq.any():
+                    rl = self._saturationGuess(T[liq])[1]
+                    lo = lo.copy()
+                    lo[liq] = where(isfinite(rl), maximum(0.99*rl, lo[liq]),
+                                    lo[liq])
+                return lo
+
+            def f(T, mask):
+                lo = lower(T, mask)
+                hi = rhohii[mask]
+                guess = rhoi[mask]+drhodT[mask]*(T-Tprev[mask])
+                guess = where((guess > lo) & (guess < hi), guess, rhoi[mask])
+                guess = where(guess > lo, guess, 1.02*lo)
+                r, niter = self._rhoTP(T, Pi[mask], guess, lo, hi)
+                rhoi[mask] = r
+                Tprev[mask] = T
+                counti[mask] += niter
+                prop = self._Helmholtz(r, T)
+                drhodT[mask] = prop["drhodt"]
+                if key == "h":
+                    return prop["h"]*1000-yi[mask], prop["cp"]*1000
+                else:
+                    return prop["s"]*1000-yi[mask], prop["cp"]*1000/T
+
+            T[single], niter = _bracketedNewton(
+                f, To[single], lo[single], hi[single])
+            mask = ones(len(Pi), dtype=bool)
+            rho[single], niterrho = self._rhoTP(
+                T[single], Pi, rhoi, lower(T[single], mask), rhohii)
+            count[single] = counti+niter+niterrho
+
+        return {"T": T, "rho": rho, "P": P, "x": x, "two": two,
+                "rhol": rhol, "rhov": rhov, "niter": count}
+
+    def _solveState(self):
+        """Calculate density and temperature of the state with the dedicated
+        solver of input pair, the rho0 and T0 kwargs are used to warm start
+        the iteration. The iterations used are saved in niter attribute
+        Return the density, the mean density in two phases region, and the
+        temperature, or None if the solver don't converge"""
+        input1, input2 = self._mode.split("-")
+        state = self._solve(
+            self._mode, array([self.kwargs[input1]], dtype=float),
+            array([self.kwargs[input2]], dtype=float),
+            array([self.kwargs["T0"] or float("nan")]),
+            array([self.kwargs["rho0"] or float("nan")]))
+        self.niter = int(state["niter"][0])
+        rho = float(state["rho"][0])
+        T = float(state["T"][0])
+        if state["two"][0]:
+            x = state["x"][0]
+            rho = 1/(x/state["rhov"][0]+(1-x)/state["rhol"][0])
+        if not (isfinite(T) and isfinite(rho)):
+            return None, None
+        return rho, T
+
+    def _batch(self, mode, a, b):
+        """Vectorized calculation of batch for Helmholtz equations"""
+        n = len(a)
+        nan = float("nan")
+        R = float(self.R)
+        Tmin = self._constants["Tmin"]
+        Tmax = self._constants["Tmax"]
+
+        state = self._solve(mode, a, b)
+        T = state["T"]
+        P = state["P"]
+        rho = state["rho"]
+        x = state["x"]
+        two = state["two"]
+        rhol = state["rhol"]
+        rhov = state["rhov"]
+
+        # Properties of phases
+        single = ~two
+        result = {}
+        for key in ("h", "s", "cp", "cv", "w", "alfap", "betap", "dpdrho",
+                    "drhodt"):
+            result[key] = zeros(n)+nan
+        if single.any():
+            prop = self._Helmholtz(rho[single], T[single])
+            P[single] = where(isfinite(P[single]), P[single], prop["P"])
+            for key in result:
+                result[key][single] = prop[key]
+        if two.any():
+            xm = x[two]
+            liquido = self._Helmholtz(rhol[two], T[two])
+            vapor = self._Helmholtz(rhov[two], T[two])
+            rho[two] = 1/(xm/rhov[two]+(1-xm)/rhol[two])
+            for key in ("h", "s"):
+                result[key][two] = xm*vapor[key]+(1-xm)*liquido[key]
+
+        result["T"] = T
+        result["P"] = P
+        result["rho"] = rho
+        result["v"] = 1/rho
+        result["x"] = x
+        for key in ("h", "s", "cp", "cv"):
+            result[key] *= 1000
+        result["u"] = result["h"]-P*result["v"]
+        result["a"] = result["u"]-T*result["s"]
+        result["g"] = result["h"]-T*result["s"]
+        result["cp_cv"] = result["cp"]/result["cv"]
+        result["Z"] = P*result["v"]/R/T
+        result["dpdrho_T"] = result.pop("dpdrho")
+        result["drhodT_P"] = result.pop("drhodt")
+
+        # Discard points out of range or without convergence, the solution
+        # must reproduce both inputs and the single phase points must be
+        # out of the two phases region
+        bad = ~((T >= Tmin) & (T <= Tmax) & (rho > 0))
+        if mode in ("P-h", "P-s"):
+            bad |= ~(abs(result[mode[-1]]-b) <= 1e-6*(abs(b)+1))
+        if mode != "T-rho" and single.any():
+            Pi = b[single] if mode == "T-P" else a[single]
+            bad[single] |= ~(abs(prop["P"]-Pi) <= 1e-6*Pi)
+            sub = (single & (T < self.Tc)).nonzero()[0]
+            if len(sub):
+                Pv, rl, rv = self._saturationGuess(T[sub])
+                r = rho[sub]
+                bad[sub] |= (r > rv*(1+1e-6)) & (r < rl*(1-1e-6))
+        for key in result:
+            result[key][bad] = nan
+        return result
+
+    def _setEquation(self):
+        """Define the reference state and the equation of state to use with
+        the eq kwarg, return the index of equation used"""
+        eq = self.kwargs["eq"]
+        self._ref(self.kwargs["ref"], self.kwargs["refvalues"])
+
+        if self.id:
+            self.componente = compuestos.getComponente(self.id)
+
+        # Opcion de aceptar el nombre interno de la ecuacion
+        if isinstance(eq, str) and eq in self.__class__.__dict__:
+            eq = self.eq.index(self.__class__.__dict__[eq])
+
+        if eq == "PR":
+            self._eq = self._PengRobinson
+            self._constants = self.eq[0]
+        elif eq == "Generalised":
+            self._eq = self._Helmholtz
+            self._Generalised()
+        elif eq == "GERG":
+            try:
+                self._constants = self.GERG
+            except:
+                self._constants = self.eq[0]
+            if self._constants["__type__"] == "Helmholtz":
+                self._eq = self._Helmholtz
+            else:
+                self._eq = self._MBWR
+        elif self.eq[eq]["__type__"] == "Helmholtz":
+            self._eq = self._Helmholtz
+            self._constants = self.eq[eq]
+        elif self.eq[eq]["__type__"] == "MBWR":
+            self._eq = self._MBWR
+            self._constants = self.eq[eq]
+        elif self.eq[eq]["__type__"] == "ECS":
+            self._eq = self._ECS
+            self._constants = self.eq[eq]
+        return eq
+
     def fsolve(self, function, phases=True, function2phase=None, **kwargs):
         """Iterate to calculate T and rho
         function: function to iterate
@@ -880,9 +1471,32 @@ class MEoS(Fluid_MEOS):
                 fase.__setattr__(key, txt)
 
     def fill(self, fase, estado):
-        """Fill phase properties"""
+        """Fill phase properties
+        With the lazy option the properties are calculated by groups only
+        when they are used, the transport properties and dielectric constant
+        aren't calculated never if aren't used"""
         fase._bool = True
         fase.M = unidades.Dimensionless(self.M)
+
+        groups = [("thermo", self._fillThermo),
+                  ("derivatives", self._fillDerivatives)]
+        if self.kwargs["recursion"]:
+            groups.append(("transport", self._fillTransport))
+            groups.append(("dielectric", self._fillDielectric))
+
+        if self.kwargs["lazy"]:
+            fase._setLazy(**{group: partial(func, fase, estado)
+                             for group, func in groups})
+        else:
+            fase._setLazy()
+            for group, func in groups:
+                func(fase, estado)
+
+        fase.fraccion = [1]
+        fase.fraccion_masica = [1]
+
+    def _fillThermo(self, fase, estado):
+        """Fill the thermodynamic properties of phase"""
         fase.v = unidades.SpecificVolume(estado["v"])
         fase.rho = unidades.Density(1/fase.v)
 
@@ -893,8 +1507,8 @@ class MEoS(Fluid_MEOS):
         fase.g = unidades.Enthalpy(fase.h-self.T*fase.s)
 
         fase.Z = unidades.Dimensionless(self.P*fase.v/self.T/self.R)
-        fase.fi = unidades.Dimensionless([estado["fugacity"]])
-        fase.f = unidades.Pressure([f*self.P for f in fase.fi])
+        fase.fi = [unidades.Dimensionless(estado["fugacity"])]
+        fase.f = [unidades.Pressure(f*self.P) for f in fase.fi]
         fase.cp = unidades.SpecificHeat(estado["cp"], "kJkgK")
         fase.cv = unidades.SpecificHeat(estado["cv"], "kJkgK")
         fase.cp_cv = unidades.Dimensionless(fase.cp/fase.cv)
@@ -913,6 +1527,8 @@ class MEoS(Fluid_MEOS):
         fase.alfap = unidades.InvTemperature(estado["alfap"])
         fase.betap = unidades.Density(estado["betap"])
 
+    def _fillDerivatives(self, fase, estado):
+        """Fill the derivatives of phase"""
         fase.joule = unidades.TemperaturePressure(self.derivative("T", "P", "h", fase))
         fase.Gruneisen = unidades.Dimensionless(fase.v/fase.cv*self.derivative("P", "T", "v", fase))
 
@@ -941,30 +1557,52 @@ class MEoS(Fluid_MEOS):
             fase.Z_rho = unidades.SpecificVolume((fase.Z-1)/fase.rho)
             fase.IntP = unidades.Pressure(self.T*self.derivative("P", "T", "rho", fase)-self.P)
             fase.hInput = unidades.Enthalpy(fase.v*self.derivative("h", "v", "P", fase))
-        if self.kwargs["recursion"]:
-            fase.mu = self._Viscosity(fase.rho, self.T, fase)
-            fase.k = self._ThCond(fase.rho, self.T, fase)
-            if fase.mu and fase.rho:
-                fase.nu = unidades.Diffusivity(fase.mu/fase.rho)
-            else:
-                fase.nu = None
-            if fase.k and fase.rho:
-                fase.alfa = unidades.Diffusivity(fase.k/1000/fase.rho/fase.cp)
-            else:
-                fase.alfa = None
-            if fase.mu and fase.k:
-                fase.Prandt = unidades.Dimensionless(fase.mu*fase.cp*1000/fase.k)
-            else:
-                fase.Prandt = None
-            fase.epsilon = unidades.Dimensionless(self._Dielectric(fase.rho, self.T))
-        fase.fraccion = [1]
-        fase.fraccion_masica = [1]
 
-    def _saturation(self, T=None):
-        """Saturation calculation for two phase search"""
+    def _fillTransport(self, fase, estado):
+        """Fill the transport properties of phase"""
+        fase.mu = self._Viscosity(fase.rho, self.T, fase)
+        fase.k = self._ThCond(fase.rho, self.T, fase)
+        if fase.mu and fase.rho:
+            fase.nu = unidades.Diffusivity(fase.mu/fase.rho)
+        else:
+            fase.nu = None
+        if fase.k and fase.rho:
+            fase.alfa = unidades.Diffusivity(fase.k/1000/fase.rho/fase.cp)
+        else:
+            fase.alfa = None
+        if fase.mu and fase.k:
+            fase.Prandt = unidades.Dimensionless(fase.mu*fase.cp*1000/fase.k)
+        else:
+            fase.Prandt = None
+
+    def _fillDielectric(self, fase, estado):
+        """Fill the dielectric constant of phase"""
+        fase.epsilon = unidades.Dimensionless(self._Dielectric(fase.rho, self.T))
+
+    def _saturation(self, T=None, exact=True):
+        """Saturation calculation for two phase search
+        exact: Solve the Maxwell criterion, else return the properties
+            interpolated in the saturation curve when available"""
         if not T:
             T = self.T
         T = float(T)
+
+        if self._eq == self._Helmholtz:
+            # The last saturation state is saved, the two phase functions of
+            # calculo call this method several times with the same T
+            memo = self.__dict__.get("_saturationMemo")
+            if memo and memo[0] is self._constants and memo[1] == T and \
+                    (memo[2] or not exact):
+                return memo[3]
+
+            rhoL, rhoG, Ps = self._saturationSpline(array([T]))
+            if exact and isfinite(Ps[0]):
+                rhoL, rhoG, Ps = self._Maxwell(array([T]), rhoL, rhoG)
+            if isfinite(Ps[0]):
+                sat = float(rhoL[0]), float(rhoG[0]), float(Ps[0])
+                self._saturationMemo = (self._constants, T, exact, sat)
+                return sat
+
         rhoLo = self._Liquid_Density(T)
         rhoGo = self._Vapor_Density(T)
 
@@ -991,6 +1629,346 @@ class MEoS(Fluid_MEOS):
             Ps = self.R*T*rhoL*rhoG/(rhoL-rhoG)*(liquido["fir"]-vapor["fir"]+log(deltaL/deltaG))
         return rhoL, rhoG, Ps
 
+    def _saturationKey(self):
+        """Return the name to identify the saturation curve of fluid and
+        equation, and a checksum of the equation parameters to check the
+        validity of saved curves"""
+        eq = self.kwargs["eq"]
+        if not isinstance(eq, str):
+            eq = self.eq.index(self._constants) \
+                if self._constants in self.eq else "custom"
+        key = "%s-%s" % (self.__class__.__name__, eq)
+        checksum = md5(repr(
+            (_saturationVersion, self._constants, float(self.Tc),
+             float(self.Pc), float(self.rhoc))).encode()).hexdigest()
+        return key, checksum
+
+    def _saturationCurve(self):
+        """Interpolant of saturation properties of fluid with the equation in
+        use, calculated only the first time it's needed. The reference state
+        don't change the saturation properties so it's shared for all them
+
+        The curve is saved in memory and in the dat/mEoS_sat folder, so it's
+        only calculated once
+
+        Return a dict with the spline representation of liquid and vapor
+        reduced density logarithms and reduced vapor pressure logarithm vs
+        u=(1-T/Tc)^⅓, and the inverse of vapor pressure, or None if the
+        curve isn't available"""
+        constants = self._constants
+        curve = _saturationCache.get(id(constants))
+        if curve is not None and curve[0] is constants:
+            return curve[1]
+
+        cache = getattr(self, "_saturationTerms", None)
+        if cache is not None and cache[0] is constants:
+            return cache[1]
+
+        key, checksum = self._saturationKey()
+        filename = os.path.join(_saturationDir, key+".pkl")
+        try:
+            with open(filename, "rb") as archivo:
+                data = pickle.load(archivo)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            data = None
+        if data is None or data.get("checksum") != checksum:
+            data = {"checksum": checksum,
+                    "curve": self._saturationBuild()}
+            try:
+                if not os.path.isdir(_saturationDir):
+                    os.mkdir(_saturationDir)
+                with open(filename, "wb") as archivo:
+                    pickle.dump(data, archivo)
+            except (IOError, OSError):
+                # Read only installation, the curve is only kept in memory
+                pass
+
+        # The equations built in runtime are cached only in the instance
+        eqs = list(self.eq)
+        if hasattr(self, "GERG"):
+            eqs.append(self.GERG)
+        if any(constants is eq for eq in eqs):
+            _saturationCache[id(constants)] = (constants, data["curve"])
+        else:
+            self._saturationTerms = (constants, data["curve"])
+        return data["curve"]
+
+    def _saturationBuild(self, n=150):
+        """Calculate the saturation curve with the Maxwell criterion in n
+        points equispaced in u=(1-T/Tc)^⅓, concentrated near the critical
+        point where the densities change faster, and n points equispaced in
+        temperature for the low temperature region"""
+        Tc = float(self.Tc)
+        rhoc = float(self.rhoc)
+        Tmin = max(self._constants["Tmin"], self.Tt)
+        umax = (1-Tmin/Tc)**(1./3)
+        u = concatenate((linspace(0, umax, n)[1:],
+                         (1-linspace(Tmin, Tc, n)[:-1]/Tc)**(1./3)))
+        u = unique(u)
+        u = u[concatenate(([True], u[1:]-u[:-1] > 0.3*umax/n))]
+        T = Tc*(1-u**3)
+        Pv, rl, rv = self._ancillaries(T)
+        rhol, rhov, Ps = self._Maxwell(T, rl, rv)
+
+        # Search again the failed points with the initial values from the
+        # solved neighbours
+        ok = isfinite(Ps)
+        if 1 < ok.sum() < len(T):
+            rl = interp(u[~ok], u[ok], rhol[ok])
+            rv = exp(interp(u[~ok], u[ok], log(rhov[ok])))
+            rhol[~ok], rhov[~ok], Ps[~ok] = self._Maxwell(T[~ok], rl, rv)
+            ok = isfinite(Ps)
+
+        # Near the critical point the method can converge to false solutions,
+        # so going from the lower temperature are discarded the points that
+        # break the monotony of the curve. The liquid density isn't checked,
+        # it can have a maximum, i.e. water at 4ºC
+        last = None
+        for i in range(len(T)-1, -1, -1):
+            if not ok[i]:
+                continue
+            if not 0 < Ps[i] < self.Pc or not rhov[i] < rhoc < rhol[i] or \
+                    last is not None and not (
+                        Ps[i] > Ps[last] and rhov[i] > rhov[last]):
+                ok[i] = False
+            else:
+                last = i
+        if ok.sum() < 4:
+            return None
+
+        # The critical point close the curve
+        u = concatenate(([0], u[ok]))
+        lnrhol = concatenate(([0], log(rhol[ok]/rhoc)))
+        lnrhov = concatenate(([0], log(rhov[ok]/rhoc)))
+        lnP = concatenate(([0], log(Ps[ok]/self.Pc)))
+        curve = {"umax": u[-1],
+                 "rhol": splrep(u, lnrhol, s=0),
+                 "rhov": splrep(u, lnrhov, s=0),
+                 "P": splrep(u, lnP, s=0),
+                 "T": splrep(lnP[::-1], u[::-1], s=0)}
+        return curve
+
+    def _saturationSpline(self, T):
+        """Saturation properties interpolated in saturation curve for an
+        array of temperatures, the points out of curve are returned as nan
+        Return the arrays of liquid and vapor density and vapor pressure"""
+        T = asarray(T, dtype=float)
+        nan = zeros(T.shape)+float("nan")
+        curve = self._saturationCurve()
+        if curve is None:
+            return nan, nan.copy(), nan.copy()
+        with errstate(invalid="ignore"):
+            u = (1-T/self.Tc)**(1./3)
+        valid = (u >= 0) & (u <= curve["umax"])
+        u = where(valid, u, 0)
+        rhol = where(valid, self.rhoc*exp(splev(u, curve["rhol"])), nan)
+        rhov = where(valid, self.rhoc*exp(splev(u, curve["rhov"])), nan)
+        Ps = where(valid, self.Pc*exp(splev(u, curve["P"])), nan)
+        return rhol, rhov, Ps
+
+    def _saturationSplineP(self, P):
+        """Saturation temperature interpolated in saturation curve for an
+        array of pressures, the points out of curve are returned as nan"""
+        P = asarray(P, dtype=float)
+        curve = self._saturationCurve()
+        if curve is None:
+            return zeros(P.shape)+float("nan")
+        with errstate(divide="ignore", invalid="ignore"):
+            lnP = log(P/self.Pc)
+        valid = (lnP >= curve["T"][0][0]) & (lnP <= 0)
+        u = splev(where(valid, lnP, 0), curve["T"])
+        return where(valid, self.Tc*(1-u**3), float("nan"))
+
+    def _saturationGuess(self, T):
+        """Saturation properties for an array of temperatures from the
+        saturation curve where it's available, else from the ancillary
+        equations, used as initial values and in phase detection
+        Return the arrays of vapor pressure, liquid and vapor density"""
+        T = asarray(T, dtype=float)
+        Pv, rhol, rhov = self._ancillaries(T)
+        if self._eq == self._Helmholtz:
+            l, v, Ps = self._saturationSpline(T)
+            ok = isfinite(Ps)
+            Pv = where(ok, Ps, Pv)
+            rhol = where(ok, l, rhol)
+            rhov = where(ok, v, rhov)
+        return Pv, rhol, rhov
+
+    def _ancillaries(self, T):
+        """Saturation properties from ancillary equations for an array of
+        temperatures, used as initial values in vectorized calculations
+        Return the arrays of vapor pressure, liquid and vapor density"""
+        T = asarray(T, dtype=float)
+        with errstate(invalid="ignore"):
+            if self._vapor_Pressure:
+                Pv = _ancillary(self._vapor_Pressure, T, self.Tc, 0.5)*self.Pc
+            else:
+                Pv = array([float(self._Vapor_Pressure(t)) for t in T])
+            if self._liquid_Density:
+                rhol = _ancillary(self._liquid_Density, T, self.Tc, 1./3) * \
+                    self.rhoc
+            else:
+                rhol = array([float(self._Liquid_Density(t)) for t in T])
+            if self._vapor_Density:
+                rhov = _ancillary(self._vapor_Density, T, self.Tc, 1./3) * \
+                    self.rhoc
+            else:
+                rhov = self._Vapor_Density_Chouaieb(T)
+        return Pv, rhol, rhov
+
+    def _rhoGuess(self, T, P):
+        """Initial value of density for arrays of T, P inputs, with the same
+        criteria used in calculo"""
+        rho = P/T/self.R
+        sub = T < 0.99*self.Tc
+        if sub.any():
+            Pv, rhol, rhov = self._ancillaries(T[sub])
+            rho[sub] = where(Pv < P[sub], rhol, rhov)
+        dense = ~sub & ((T > 2*self.Tc) | (P > 2*self.Pc))
+        rho[dense] = self._constants["rhomax"]*self.M
+        critic = ~sub & (T < self.Tc) & (P > 0.9*self.Pc) & (P < self.Pc)
+        rho[critic] = self.rhoc
+        return rho
+
+    def _rhoTP(self, T, P, rho=None, lo=0, hi=float("inf"), xtol=1e-12):
+        """Vectorized calculation of density for arrays of T, P inputs, using
+        the residual Helmholtz energy only
+        rho: Initial values of density, if not given it's estimated with the
+            ancillary equations
+        lo, hi: Bounds of density, used to select the root in the metastable
+            region
+        xtol: Relative tolerance of density
+        Return the density array and the iterations used in each point"""
+        T = asarray(T, dtype=float)
+        P = asarray(P, dtype=float)
+        if rho is None:
+            rho = self._rhoGuess(T, P)
+        Tc = float(self.Tc)
+        rhoc = float(self.rhoc)
+        R = float(self.R)
+        slope = zeros(T.shape)
+
+        def f(rho, mask):
+            t = T[mask]
+            delta = rho/rhoc
+            fir, firt, firtt, fird, firdd, firdt, firdtt, B, C = \
+                self._phir(Tc/t, delta)
+            dpdrho = R*t*(1+2*delta*fird+delta**2*firdd)
+            slope[mask] = dpdrho
+            return (1+delta*fird)*R*t*rho-P[mask], dpdrho
+
+        rho0 = asarray(rho, dtype=float)
+        rho, niter = _bracketedNewton(f, rho0, lo, hi, xtol)
+
+        # A root in the mechanically unstable region means a bad initial
+        # value, search again in the side of the initial value
+        unstable = slope <= 0
+        if unstable.any():
+            T, P = T[unstable], P[unstable]
+            slope = slope[unstable]
+            root = rho[unstable]
+            dense = rho0[unstable] > root
+            guess = where(dense, self._constants["rhomax"]*self.M, P/T/R)
+            rho[unstable], n = _bracketedNewton(
+                f, guess, where(dense, root, 0),
+                where(dense, float("inf"), root), xtol)
+            niter[unstable] += n
+        return rho, niter
+
+    def _Maxwell(self, T, rhol=None, rhov=None, tol=1e-12, maxiter=50):
+        """Vectorized saturation calculation for an array of temperatures
+        with the Newton method of Akasaka over the Maxwell criterion, using
+        the residual Helmholtz energy only
+
+        Akasaka, R. A Reliable and Useful Method to Determine the Saturation
+        State from Helmholtz Energy Equations of State. J. Thermal Sci. Tech.
+        3(3), 442-451 (2008), doi: 10.1299/jtst.3.442
+
+        Return the arrays of liquid and vapor density and vapor pressure,
+        the points without solution are returned as nan"""
+        T = asarray(T, dtype=float)
+        if rhol is None or rhov is None:
+            Pv, rhol, rhov = self._saturationGuess(T)
+        Tc = float(self.Tc)
+        rhoc = float(self.rhoc)
+        dl = array(rhol, dtype=float)/rhoc
+        dv = array(rhov, dtype=float)/rhoc
+        active = ones(T.shape, dtype=bool)
+        with errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for i in range(maxiter):
+                if not active.any():
+                    break
+                n = active.sum()
+                tau = Tc/T[active]
+                delta = concatenate((dl[active], dv[active]))
+                fir, firt, firtt, fird, firdd, firdt, firdtt, B, C = \
+                    self._phir(concatenate((tau, tau)), delta)
+                J = delta*(1+delta*fird)
+                K = delta*fird+fir+log(delta)
+                Jd = 1+2*delta*fird+delta**2*firdd
+                Kd = 2*fird+delta*firdd+1/delta
+                Jl, Jv = J[:n], J[n:]
+                Kl, Kv = K[:n], K[n:]
+                Jdl, Jdv = Jd[:n], Jd[n:]
+                Kdl, Kdv = Kd[:n], Kd[n:]
+                det = Jdv*Kdl-Jdl*Kdv
+                ddl = ((Kv-Kl)*Jdv-(Jv-Jl)*Kdv)/det
+                ddv = ((Kv-Kl)*Jdl-(Jv-Jl)*Kdl)/det
+                dl[active] += ddl
+                dv[active] += ddv
+                done = (abs(Kv-Kl)+abs(Jv-Jl) < tol) | ~isfinite(det)
+                active[active] = ~done
+
+            tau = Tc/T
+            fir, firt, firtt, fird, firdd, firdt, firdtt, B, C = \
+                self._phir(concatenate((tau, tau)), concatenate((dl, dv)))
+            n = len(T)
+            rhol = dl*rhoc
+            rhov = dv*rhoc
+            Ps = self.R*T*rhol*rhov/(rhol-rhov)*(fir[:n]-fir[n:]+log(dl/dv))
+
+        fail = active | ~(dl > dv) | ~(dv > 0)
+        rhol[fail] = float("nan")
+        rhov[fail] = float("nan")
+        Ps[fail] = float("nan")
+        return rhol, rhov, Ps
+
+    def _saturationP(self, P):
+        """Vectorized saturation calculation for an array of pressures,
+        iterating over temperature with the Clapeyron equation as derivative
+        Return the arrays of saturation temperature, liquid and vapor density,
+        the points without solution are returned as nan"""
+        P = asarray(P, dtype=float)
+        Tc = float(self.Tc)
+        rhoc = float(self.rhoc)
+
+        # Initial value from the acentric factor definition
+        with errstate(divide="ignore", invalid="ignore"):
+            Tr = 1/(1-3*log10(P/self.Pc)/7/(1+self.f_acent))
+        T = Tc*Tr
+        Ts = self._saturationSplineP(P)
+        T = where(isfinite(Ts), Ts, T)
+        lo = max(self._constants["Tmin"], self.Tt)
+        T = where(T < lo, lo, T)
+        T = where(T > 0.9999*Tc, 0.9999*Tc, T)
+
+        def f(T, mask):
+            rhol, rhov, Ps = self._Maxwell(T)
+            tau = Tc/T
+            fir, firt, firtt, fird, firdd, firdt, firdtt, B, C = \
+                self._phir(concatenate((tau, tau)),
+                           concatenate((rhol, rhov))/rhoc)
+            n = len(T)
+            dl = rhol/rhoc
+            dv = rhov/rhoc
+            Hvap = self.R*T*(tau*(firt[n:]-firt[:n])+dv*fird[n:]-dl*fird[:n])
+            dlnPdT = Hvap/T/Ps*(1/rhov-1/rhol)**-1
+            return log(Ps/P[mask]), dlnPdT
+
+        T, niter = _bracketedNewton(f, T, lo, Tc)
+        rhol, rhov, Ps = self._Maxwell(T)
+        return T, rhol, rhov
+
     def _Helmholtz(self, rho, T):
         """Implementación general de la ecuación de estado Setzmann-Wagner, ecuación de estado de multiparámetros basada en la energía libre de Helmholtz"""
         delta = rho/self.rhoc
@@ -1006,10 +1984,9 @@ class MEoS(Fluid_MEOS):
 
         propiedades["T"] = T
         propiedades["P"] = (1+delta*fird)*self.R*T*rho
-        if rho:
-            propiedades["v"] = 1./rho
-        else:
-            propiedades["v"] = float("inf")
+        with errstate(divide="ignore", invalid="ignore"):
+            propiedades["v"] = where(rho != 0, 1./asarray(rho, dtype=float),
+                                     float("inf"))
 
         propiedades["h"] = self.R.kJkgK*T*(1+tau*(fiot+firt)+delta*fird)
         propiedades["s"] = self.R.kJkgK*(tau*(fiot+firt)-fio-fir)
@@ -1026,11 +2003,12 @@ class MEoS(Fluid_MEOS):
         propiedades["dpdrho"] = self.R*T*(1+2*delta*fird+delta**2*firdd)
         propiedades["drhodt"] = -rho*(1+delta*fird-delta*tau*firdt) / \
             (T*(1+2*delta*fird+delta**2*firdd))
-        if rho:
-            propiedades["dhdrho"] = self.R*T/rho * \
-                (tau*delta*(fiodt+firdt)+delta*fird+delta**2*firdd)
-        else:
-            propiedades["dhdrho"] = 0
+        with errstate(divide="ignore", invalid="ignore"):
+            propiedades["dhdrho"] = where(rho != 0, self.R*T/rho * (
+                tau*delta*(fiodt+firdt)+delta*fird+delta**2*firdd), 0)
+        if not asarray(rho).ndim and not asarray(T).ndim:
+            propiedades["v"] = float(propiedades["v"])
+            propiedades["dhdrho"] = float(propiedades["dhdrho"])
 #        dbt=-phi11/rho/t
 #        propiedades["cps"] = propiedades["cv"]-self.R*(1+delta*fird-delta*tau*firdt)*T/rho*propiedades["drhodt"]
 #        propiedades["cps"] = self.R*(-tau**2*(fiott+firtt)+(1+delta*fird-delta*tau*firdt)/(1+2*delta*fird+delta**2*firdd)*
@@ -1483,11 +2461,14 @@ class MEoS(Fluid_MEOS):
         fiot=Fi0["ao_log"][1]/tau
         fiott=-Fi0["ao_log"][1]/tau**2
 
-        if delta:
-            fiod = 1/delta
-            fiodd = -1/delta**2
-        else:
-            fiod, fiodd = 0, 0
+        # Null density is allowed for ideal gas properties, the delta
+        # derivatives are then null
+        scalar = not asarray(tau).ndim and not asarray(delta).ndim
+        delta = asarray(delta, dtype=float)
+        zero = delta == 0
+        delta_ = where(zero, 1., delta)
+        fiod = where(zero, 0, 1/delta_)
+        fiodd = where(zero, 0, -1/delta_**2)
         fiodt = 0
 
         for n, t in zip(Fi0["ao_pow"], Fi0["pow"]):
@@ -1506,12 +2487,13 @@ class MEoS(Fluid_MEOS):
             fio += Fi0["tau*logtau"]*tau*log(tau)
             fiot += Fi0["tau*logtau"]*(log(tau)+1)
             fiot += Fi0["tau*logtau"]/tau
-        if "tau*logdelta" in Fi0 and delta:
-            fio += Fi0["tau*logdelta"]*tau*log(delta)
-            fiot += Fi0["tau*logdelta"]*log(delta)
-            fiod += Fi0["tau*logdelta"]*tau/delta
-            fiodd -= Fi0["tau*logdelta"]*tau/delta**2
-            fiodt += Fi0["tau*logdelta"]/delta
+        if "tau*logdelta" in Fi0:
+            c = where(zero, 0, Fi0["tau*logdelta"])
+            fio += c*tau*log(delta_)
+            fiot += c*log(delta_)
+            fiod += c*tau/delta_
+            fiodd -= c*tau/delta_**2
+            fiodt += c/delta_
 
         if "ao_exp2" in Fi0:
             for n, g, sum in zip(Fi0["ao_exp2"], Fi0["titao2"], Fi0["sum2"]):
@@ -1532,11 +2514,11 @@ class MEoS(Fluid_MEOS):
 
         R_ = cp.get("R", self._constants["R"])
         factor = R_/self._constants["R"]
-        if delta:
-            fio = Fi0["ao_log"][0]*log(delta)+factor*fio
-        else:
-            fio *= factor
-        return fio, factor*fiot, factor*fiott, fiod, fiodd, fiodt
+        fio = where(zero, 0, Fi0["ao_log"][0]*log(delta_))+factor*fio
+        prop = fio, factor*fiot, factor*fiott, fiod, fiodd, fiodt
+        if scalar:
+            prop = tuple(float(p) for p in prop)
+        return prop
 
     def _Cp0(self, T=False):
         Tc = self._constants.get("Tref", self.Tc)
@@ -1591,168 +2573,151 @@ class MEoS(Fluid_MEOS):
         return unidades.SpecificHeat(cpsum*self.M*1000)
 
     def _phir(self, tau, delta):
-        delta_0 = 1e-200
-        fir = fird = firdd = firt = firtt = firdt = firdtt = B = C = 0
-
-        if delta:
-            # Polinomial terms
-            nr1 = self._constants.get("nr1", [])
-            d1 = self._constants.get("d1", [])
-            t1 = self._constants.get("t1", [])
-            for n, d, t in zip(nr1, d1, t1):
-                fir += n*delta**d*tau**t
-                fird += n*d*delta**(d-1)*tau**t
-                firdd += n*d*(d-1)*delta**(d-2)*tau**t
-                firt += n*t*delta**d*tau**(t-1)
-                firtt += n*t*(t-1)*delta**d*tau**(t-2)
-                firdt += n*t*d*delta**(d-1)*tau**(t-1)
-                firdtt += n*t*d*(t-1)*delta**(d-1)*tau**(t-2)
-                B += n*d*delta_0**(d-1)*tau**t
-                C += n*d*(d-1)*delta_0**(d-2)*tau**t
-
-            # Exponential terms
-            nr2 = self._constants.get("nr2", [])
-            d2 = self._constants.get("d2", [])
-            g2 = self._constants.get("gamma2", [])
-            t2 = self._constants.get("t2", [])
-            c2 = self._constants.get("c2", [])
-            for n, d, g, t, c in zip(nr2, d2, g2, t2, c2):
-                fir += n*delta**d*tau**t*exp(-g*delta**c)
-                fird += n*exp(-g*delta**c)*delta**(d-1)*tau**t*(d-g*c*delta**c)
-                firdd += n*exp(-g*delta**c)*delta**(d-2)*tau**t * \
-                    ((d-g*c*delta**c)*(d-1-g*c*delta**c)-g**2*c**2*delta**c)
-                firt += n*t*delta**d*tau**(t-1)*exp(-g*delta**c)
-                firtt += n*t*(t-1)*delta**d*tau**(t-2)*exp(-g*delta**c)
-                firdt += n*t*delta**(d-1)*tau**(t-1)*(d-g*c*delta**c)*exp(-g*delta**c)
-                firdtt += n*t*(t-1)*delta**(d-1)*tau**(t-2)*(d-g*c*delta**c) * \
-                    exp(-g*delta**c)
-                B += n*exp(-g*delta_0**c)*delta_0**(d-1)*tau**t*(d-g*c*delta_0**c)
-                C += n*exp(-g*delta_0**c)*(delta_0**(d-2)*tau**t *
-                    ((d-g*c*delta_0**c)*(d-1-g*c*delta_0**c)-g**2*c**2*delta_0**c))
+        """Residual contribution to the free Helmholtz energy and its
+        derivatives
+
+        tau and delta can be scalars or arrays with any compatible shape, so
+        a full isoline can be evaluated in a single call. The coefficients of
+        the equation are packed in arrays only once for each fluid and
+        equation, see _phirCoefficients
+
+        Return a tuple with fir, firt, firtt, fird, firdd, firdt, firdtt, B, C
+        as floats for scalar input or as arrays with the broadcasted shape of
+        tau and delta
+
+        The non analytic terms are defined in the critical point too
+
+        >>> from lib.mEoS import H2O, CO2
+        >>> "%0.3f" % H2O(T=H2O.Tc, rho=H2O.rhoc).P.MPa
+        '22.064'
+        >>> "%0.4f" % CO2(T=CO2.Tc, rho=CO2.rhoc).P.MPa
+        '7.3773'
+        """
+        terms = self._termsPhir()
+
+        tau = asarray(tau, dtype=float)
+        delta = asarray(delta, dtype=float)
+        if tau.shape != delta.shape:
+            tau, delta = broadcast_arrays(tau, delta)
+
+        # Null density return null residual contribution, the density is
+        # changed to unity only to avoid singularities in evaluation
+        zero = delta == 0
+        if zero.any():
+            delta = where(zero, 1., delta)
+
+        # Add a trailing axis to evaluate all terms of an equation at once
+        tau_ = tau[..., newaxis]
+        delta_ = delta[..., newaxis]
+        logtau = log(tau_)
+        logdelta = log(delta_)
+
+        # fir, firt, firtt, fird, firdd, firdt, firdtt
+        fir = zeros(tau.shape+(7, ))
+        vir = zeros(tau.shape+(2, ))
+
+        with errstate(divide="ignore", invalid="ignore", over="ignore"):
+            # Polinomial and exponential terms
+            if "exp" in terms:
+                n, d, t, g, c, gc, factors, BC = terms["exp"]
+                deltac = exp(c*logdelta)
+                taut = exp(t*logtau)
+                f = n*taut*exp(d*logdelta-g*deltac)
+                fx = f*gc*deltac
+                prop = concatenate((f, fx, fx*gc*deltac), axis=-1).dot(factors)
+                fir += prop*exp(-logtau*_tauExp-logdelta*_deltaExp)
+                vir += taut.dot(BC)
 
             # Gaussian terms
-            nr3 = self._constants.get("nr3", [])
-            d3 = self._constants.get("d3", [])
-            t3 = self._constants.get("t3", [])
-            a3 = self._constants.get("alfa3", [])
-            e3 = self._constants.get("epsilon3", [])
-            b3 = self._constants.get("beta3", [])
-            g3 = self._constants.get("gamma3", [])
-            exp1 = self._constants.get("exp1", [2]*len(nr3))
-            exp2 = self._constants.get("exp2", [2]*len(nr3))
-            for n, d, t, a, e, b, g, ex1, ex2 in zip(nr3, d3, t3, a3, e3, b3, g3, exp1, exp2):
-                fir += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2)
-                fird += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2) * \
-                    (d/delta-ex1*a*(delta-e)**(ex1-1))
-                firdd += n*tau**t*exp(-a*(delta-e)**ex1-b *
-                    (tau-g)**ex2)*(-2*a*delta**d+4*a**2 *
-                    delta**d*(delta-e)**ex1-4*d*a*delta**(d-1) *
-                    (delta-e)+d*(d-1)*delta**(d-2))
-                firt += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2) * \
-                    (t/tau-2*b*(tau-g))
-                firtt += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2) * \
-                    ((t/tau-2*b*(tau-g))**ex2-t/tau**2-2*b)
-                firdt += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2) * \
-                    (t/tau-2*b*(tau-g))*(d/delta-2*a*(delta-e))
-                firdtt += n*delta**d*tau**t * \
-                    exp(-a*(delta-e)**ex1-b*(tau-g)**ex2) * \
-                    ((t/tau-2*b*(tau-g))**ex2-t/tau**2-2*b) * \
-                    (d/delta-2*a*(delta-e))
-                B += n*delta_0**d*tau**t * \
-                    exp(-a*(delta_0-e)**ex1-b*(tau-g)**ex2) * \
-                    (d/delta_0-2*a*(delta_0-e))
-                C += n*tau**t * \
-                    exp(-a*(delta_0-e)**ex1-b*(tau-g)**ex2) * \
-                    (-2*a*delta_0**d+4*a**2*delta_0**d *
-                    (delta_0-e)**ex1-4*d*a*delta_0**2*(delta_0-e) +
-                    d*2*delta_0)
+            if "gauss" in terms:
+                n, d, t, a, e, b, g, ex1, ex2, BC = terms["gauss"]
+                de = delta_-e
+                expt = exp(t*logtau-b*(tau_-g)**ex2)
+                f = n*exp(d*logdelta-a*de**ex1)*expt
+                fd = d/delta_-2*a*de
+                ft = t/tau_-2*b*(tau_-g)
+                ftt = ft**ex2-t/tau_**2-2*b
+                fir += stack((
+                    f, f*ft, f*ftt,
+                    f*(d/delta_-ex1*a*de**(ex1-1)),
+                    f*(-2*a+4*a**2*de**ex1-4*d*a*de/delta_+d*(d-1)/delta_**2),
+                    f*ft*fd, f*ftt*fd), axis=-1).sum(axis=-2)
+                vir += expt.dot(BC)
 
             # Non analitic terms
-            nr4 = self._constants.get("nr4", [])
-            a4 = self._constants.get("a4", [])
-            b = self._constants.get("b4", [])
-            A = self._constants.get("A", [])
-            Bi = self._constants.get("B", [])
-            Ci = self._constants.get("C", [])
-            D = self._constants.get("D", [])
-            bt = self._constants.get("beta4", [])
-            for i in range(len(nr4)):
-                Tita = (1-tau)+A[i]*((delta-1)**2)**(0.5/bt[i])
-                F = exp(-Ci[i]*(delta-1)**2-D[i]*(tau-1)**2)
-                Fd = -2*Ci[i]*F*(delta-1)
-                Fdd = 2*Ci[i]*F*(2*Ci[i]*(delta-1)**2-1)
-                Ft = -2*D[i]*F*(tau-1)
-                Ftt = 2*D[i]*F*(2*D[i]*(tau-1)**2-1)
-                Fdt = 4*Ci[i]*D[i]*F*(delta-1)*(tau-1)
-                Fdtt = 4*Ci[i]*D[i]*F*(delta-1)*(2*D[i]*(tau-1)**2-1)
-
-                Delta = Tita**2+Bi[i]*((delta-1)**2)**a4[i]
-                Deltad = (delta-1)*(A[i]*Tita*2/bt[i]*((delta-1)**2)**(0.5/bt[i]-1) \
-                    + 2*Bi[i]*a4[i]*((delta-1)**2)**(a4[i]-1))
-                if delta == 1:
-                    Deltadd = 0
-                    DeltaBd = 0
-                    DeltaBdd = 0
-                    DeltaBt = 0
-                    DeltaBtt = 0
-                    DeltaBdt = 0
-                    DeltaBdtt = 0
-                else:
-                    Deltadd = Deltad/(delta-1)+(delta-1)**2 * \
-                        (4*Bi[i]*a4[i]*(a4[i]-1)*((delta-1)**2)**(a4[i]-2) +
-                        2*A[i]**2/bt[i]**2*(((delta-1)**2)**(0.5/bt[i]-1))**2 +
-                        A[i]*Tita*4/bt[i]*(0.5/bt[i]-1)*((delta-1)**2)**(0.5/bt[i]-2))
-                    DeltaBd = b[i]*Delta**(b[i]-1)*Deltad
-                    DeltaBdd = b[i]*(Delta**(b[i]-1)*Deltadd+(b[i]-1)*Delta**(b[i]-2)*Deltad**2)
-                    DeltaBt = -2*Tita*b[i]*Delta**(b[i]-1)
-                    DeltaBtt = 2*b[i]*Delta**(b[i]-1)+4*Tita**2*b[i]*(b[i]-1)*Delta**(b[i]-2)
-                    DeltaBdt = -A[i]*b[i]*2/bt[i]*Delta**(b[i]-1)*(delta-1)*((delta-1)**2) ** \
-                        (0.5/bt[i]-1)-2*Tita*b[i]*(b[i]-1)*Delta**(b[i]-2)*Deltad
-                    DeltaBdtt = 2*b[i]*(b[i]-1)*Delta**(b[i]-2) * \
-                        (Deltad*(1+2*Tita**2*(b[i]-2)/Delta)+4*Tita*A[i] *
-                        (delta-1)/bt[i]*((delta-1)**2)**(0.5/bt[i]-1))
-
-                fir += nr4[i]*Delta**b[i]*delta*F
-                fird += nr4[i]*(Delta**b[i]*(F+delta*Fd)+DeltaBd*delta*F)
-                firdd += nr4[i]*(Delta**b[i]*(2*Fd+delta*Fdd)+2*DeltaBd *
-                    (F+delta*Fd)+DeltaBdd*delta*F)
-                firt += nr4[i]*delta*(DeltaBt*F+Delta**b[i]*Ft)
-                firtt += nr4[i]*delta*(DeltaBtt*F+2*DeltaBt*Ft+Delta**b[i]*Ftt)
-                firdt += nr4[i]*(Delta**b[i]*(Ft+delta*Fdt)+delta*DeltaBd*Ft +
-                    DeltaBt*(F+delta*Fd)+DeltaBdt*delta*F)
-                firdtt += nr4[i]*((DeltaBtt*F+2*DeltaBt*Ft+Delta**b[i]*Ftt) +
-                    delta*(DeltaBdtt*F+DeltaBtt*Fd+2*DeltaBdt*Ft+2*DeltaBt*Fdt +
-                    DeltaBt*Ftt+Delta**b[i]*Fdtt))
-
-                Tita_ = (1-tau)+A[i]*((delta_0-1)**2)**(0.5/bt[i])
-                Delta_ = Tita_**2+Bi[i]*((delta_0-1)**2)**a4[i]
-                Deltad_ = (delta_0-1)*(A[i]*Tita_*2/bt[i]*((delta_0-1)**2) **
-                    (0.5/bt[i]-1)+2*Bi[i]*a4[i]*((delta_0-1)**2)**(a4[i]-1))
-                Deltadd_ = Deltad_/(delta_0-1)+(delta_0-1)**2 * \
-                    (4*Bi[i]*a4[i]*(a4[i]-1)*((delta_0-1)**2)**(a4[i]-2)+2*A[i]**2 /
-                    bt[i]**2*(((delta_0-1)**2)**(0.5/bt[i]-1))**2+A[i]*Tita_ *
-                    4/bt[i]*(0.5/bt[i]-1)*((delta_0-1)**2)**(0.5/bt[i]-2))
-                DeltaBd_ = b[i]*Delta_**(b[i]-1)*Deltad_
-                DeltaBdd_ = b[i]*(Delta_**(b[i]-1)*Deltadd_ +
-                    (b[i]-1)*Delta_**(b[i]-2)*Deltad_**2)
-                F_ = exp(-Ci[i]*(delta_0-1)**2-D[i]*(tau-1)**2)
-                Fd_ = -2*Ci[i]*F_*(delta_0-1)
-                Fdd_ = 2*Ci[i]*F_*(2*Ci[i]*(delta_0-1)**2-1)
-
-                B += nr4[i]*(Delta_**b[i]*(F_+delta_0*Fd_) +
-                    DeltaBd_*delta_0*F_)
-                C += nr4[i]*(Delta_**b[i]*(2*Fd_+delta_0*Fdd_) +
-                    2*DeltaBd_*(F_+delta_0*Fd_) +
-                    DeltaBdd_*delta_0*F_)
+            if "nonanalytic" in terms:
+                n, A, Bi, Ci, D, b, eA, eB, kA, kB, kAA, kAt, kBB = \
+                    terms["nonanalytic"]
+                d1 = delta_-1
+                d2 = d1*d1
+                t1 = tau_-1
+                pA = d2**eA
+                pB = d2**eB
+                F = exp(-Ci*d2-D*t1*t1)
+                Fd = -2*Ci*F*d1
+                Fdd = 2*Ci*F*(2*Ci*d2-1)
+                Ft = -2*D*F*t1
+                Ftt = 2*D*F*(2*D*t1*t1-1)
+                Fdt = -2*Ci*d1*Ft
+                Fdtt = 2*Ci*d1*Ftt
+
+                Tita = A*pA*d2-t1
+                Delta = Tita*Tita+Bi*pB*d2
+                # Delta is null in the critical point, so Delta^b must be
+                # calculated directly, the derivatives there are masked below
+                Db1 = Delta**(b-1)
+                DeltaB = Delta**b
+                bDb1 = b*Db1
+                bbDb2 = (b-1)*bDb1/Delta
+                Deltad = d1*(kA*Tita*pA+kB*pB)
+                Deltadd = Deltad/d1+kBB*pB+kAA*pA*pA*d2+kAt*Tita*pA
+                DeltaBd = bDb1*Deltad
+                DeltaBdd = bDb1*Deltadd+bbDb2*Deltad*Deltad
+                DeltaBt = -2*Tita*bDb1
+                DeltaBtt = 2*bDb1+4*Tita*Tita*bbDb2
+                DeltaBdt = -kA*bDb1*d1*pA-2*Tita*bbDb2*Deltad
+                DeltaBdtt = 2*bbDb2*(Deltad*(1+2*Tita*Tita*(b-2)/Delta) +
+                                     2*kA*Tita*d1*pA)
+
+                # The derivatives of distance function are null in delta=1
+                one = d1 == 0
+                if one.any():
+                    Deltad = where(one, 0, Deltad)
+                    DeltaBd = where(one, 0, DeltaBd)
+                    DeltaBdd = where(one, 0, DeltaBdd)
+                    DeltaBt = where(one, 0, DeltaBt)
+                    DeltaBtt = where(one, 0, DeltaBtt)
+                    DeltaBdt = where(one, 0, DeltaBdt)
+                    DeltaBdtt = where(one, 0, DeltaBdtt)
+
+                fir += (n[:, newaxis]*stack((
+                    DeltaB*delta_*F,
+                    delta_*(DeltaBt*F+DeltaB*Ft),
+                    delta_*(DeltaBtt*F+2*DeltaBt*Ft+DeltaB*Ftt),
+                    DeltaB*(F+delta_*Fd)+DeltaBd*delta_*F,
+                    DeltaB*(2*Fd+delta_*Fdd)+2*DeltaBd*(F+delta_*Fd) +
+                    DeltaBdd*delta_*F,
+                    DeltaB*(Ft+delta_*Fdt)+delta_*DeltaBd*Ft +
+                    DeltaBt*(F+delta_*Fd)+DeltaBdt*delta_*F,
+                    (DeltaBtt*F+2*DeltaBt*Ft+DeltaB*Ftt)+delta_*(
+                        DeltaBdtt*F+DeltaBtt*Fd+2*DeltaBdt*Ft+2*DeltaBt*Fdt +
+                        DeltaBt*Ftt+DeltaB*Fdtt)), axis=-1)).sum(axis=-2)
+
+                # Virial coefficient, in the limit of zero density the
+                # distance to critical density is unity and the terms
+                # multiplied by delta are negligible
+                F_ = exp(-Ci-D*t1*t1)
+                Tita_ = A-t1
+                Delta_ = Tita_*Tita_+Bi
+                DeltaB_ = Delta_**b
+                DeltaBd_ = -b*DeltaB_/Delta_*(kA*Tita_+kB)
+                vir += (n[:, newaxis]*stack((
+                    DeltaB_*F_, 4*Ci*DeltaB_*F_+2*DeltaBd_*F_),
+                    axis=-1)).sum(axis=-2)
 
             # Hard sphere term
-            if self._constants.get("Fi", None):
-                f = self._constants["Fi"]
+            if "Fi" in terms:
+                f = terms["Fi"]
                 n = 0.1617
                 a = 0.689
                 g = 0.3674
@@ -1760,81 +2725,91 @@ class MEoS(Fluid_MEOS):
                 Xd = n/(a+(1-a)/tau**g)
                 Xt = n*delta*(1-a)*g/tau**(g+1)/(a+(1-a)/tau**g)**2
                 Xdt = n*(1-a)*g/tau**(g+1)/(a+(1-a)/tau**g)**2
-                Xtt = -n*delta*((1-a)*g/tau**(g+2)*((g+1)*(a+(1-a)/tau**g)-2*g*(1-a)/tau**g))/(a+(1-a)/tau**g)**3
-                Xdtt = -n*((1-a)*g/tau**(g+2)*((g+1)*(a+(1-a)/tau**g)-2*g*(1-a)/tau**g))/(a+(1-a)/tau**g)**3
+                Xtt = -n*delta*((1-a)*g/tau**(g+2)*((g+1)*(a+(1-a)/tau**g) -
+                      2*g*(1-a)/tau**g))/(a+(1-a)/tau**g)**3
+                Xdtt = -n*((1-a)*g/tau**(g+2)*((g+1)*(a+(1-a)/tau**g) -
+                       2*g*(1-a)/tau**g))/(a+(1-a)/tau**g)**3
 
                 ahdX = -(f**2-1)/(1-X)+(f**2+3*f+X*(f**2-3*f))/(1-X)**3
-                ahdXX = -(f**2-1)/(1-X)**2+(3*(f**2+3*f)+(f**2-3*f)*(1+2*X))/(1-X)**4
-                ahdXXX = -2*(f**2-1)/(1-X)**3+6*(2*(f**2+3*f)+(f**2-3*f)*(1+X))/(1-X)**5
-
-                fir += (f**2-1)*log(1-X)+((f**2+3*f)*X-3*f*X**2)/(1-X)**2
-                fird += ahdX*Xd
-                firdd += ahdXX*Xd**2
-                firt += ahdX*Xt
-                firtt += ahdXX*Xt**2+ahdX*Xtt
-                firdt += ahdXX*Xt*Xd+ahdX*Xdt
-                firdtt += ahdXXX*Xt**2*Xd+ahdXX*(Xtt*Xd+2*Xdt*Xt)*ahdX*Xdtt
-
-                X_virial = n*delta_0/(a+(1-a)/tau**g)
-                ahdX_virial = -(f**2-1)/(1-X_virial)+(f**2+3*f+X_virial*(f**2-3*f))/(1-X_virial)**3
-                ahdXX_virial = -(f**2-1)/(1-X_virial)**2+(3*(f**2+3*f)+(f**2-3*f)*(1+2*X_virial))/(1-X_virial)**4
-                B += ahdX_virial*Xd
-                C += ahdXX_virial*Xd**2
-
-            # Special form from Saul, A. and Wagner, W. Water 58 coefficient equation
-            if "nr5" in self._constants:
-                delta_0 = 1e-200
-                if delta < 0.2:
-                    factor = 1.6*delta**6*(1-1.2*delta**6)
-                else:
-                    factor = exp(0.4*delta**6)-exp(-2*delta**6)
-
-                nr5 = self._constants.get("nr5", [])
-                d5 = self._constants.get("d5", [])
-                t5 = self._constants.get("t5", [])
-                fr, frt, frtt, frdtt1, frdtt2 = 0, 0, 0, 0, 0
-                frd1, frd2 = 0, 0
-                frdd1, frdd2, frdd3 = 0, 0, 0
-                frdt1, frdt2, frdt3 = 0, 0, 0
-                Bsum1, Bsum2, Csum1, Csum2, Csum3 = 0, 0, 0, 0, 0
-                for n, d, t in zip(nr5, d5, t5):
-                    fr += n*delta**d*tau**t
-                    frd1 += n*delta**(d+5)*tau**t
-                    frd2 += n*d*delta**(d-1)*tau**t
-                    frdd1 += n*delta**(d+10)*tau**t
-                    frdd2 += n*(2*d+5)*delta**(d+4)*tau**t
-                    frdd3 += n*d*(d-1)*delta**(d-2)*tau**t
-                    frt += n*delta**d*t*tau**(t-1)
-                    frtt += n*delta**d*t*(t-1)*tau**(t-2)
-                    frdt1 += n*delta**(d+5)*t*tau**(t-1)
-                    frdt2 += n*d*delta**(d-1)*t*tau**(t-1)
-                    frdtt1 += n*delta**(d+5)*t*(t-1)*tau**(t-2)
-                    frdtt2 += n*d*delta**(d-1)*t*(t-1)*tau**(t-2)
-                    Bsum1 += n*delta_0**(d+5)*tau**t
-                    Bsum2 += n*d*delta_0**(d-1)*tau**t
-                    Csum1 += n*delta_0**(d+10)*tau**t
-                    Csum2 += n*(2*d+5)*delta_0**(d+4)*tau**t
-                    Csum3 += n*d*(d-1)*delta_0**(d-2)*tau**t
-
-                fir += factor*fr
-                fird += (-2.4*exp(-0.4*delta**6)+12*exp(-2*delta**6))*frd1 +\
-                    factor*frd2
-                firdd += (5.76*exp(-0.4*delta**6)-144*exp(-2*delta**6))*frdd1 +\
-                    (-2.4*exp(-0.4*delta**6)+12*exp(-2*delta**6))*frdd2 +\
-                    factor*frdd3
-                firt += factor*frt
-                firtt += factor*frtt
-                firdt += (-2.4*exp(-0.4*delta**6)+12*exp(-2*delta**6))*frdt1 +\
-                    factor*frdt2
-                firdtt += (-2.4*exp(-0.4*delta**6)+12*exp(-2*delta**6))*frdtt1 +\
-                    factor*frdtt2
-                B += (-2.4*exp(-0.4*delta_0**6)+12*exp(-2*delta_0**6))*Bsum1 +\
-                    (exp(0.4*delta_0**6)-exp(-2*delta_0**6))*Bsum2
-                C += (5.76*exp(-0.4*delta_0**6)-144*exp(-2*delta_0**6))*Csum1 +\
-                    (-2.4*exp(-0.4*delta_0**6)+12*exp(-2*delta_0**6))*Csum2 +\
-                    (exp(0.4*delta_0**6)-exp(-2*delta_0**6))*Csum3
-
-        return fir, firt, firtt, fird, firdd, firdt, firdtt, B, C
+                ahdXX = -(f**2-1)/(1-X)**2 + \
+                    (3*(f**2+3*f)+(f**2-3*f)*(1+2*X))/(1-X)**4
+                ahdXXX = -2*(f**2-1)/(1-X)**3 + \
+                    6*(2*(f**2+3*f)+(f**2-3*f)*(1+X))/(1-X)**5
+
+                fir += stack((
+                    (f**2-1)*log(1-X)+((f**2+3*f)*X-3*f*X**2)/(1-X)**2,
+                    ahdX*Xt,
+                    ahdXX*Xt**2+ahdX*Xtt,
+                    ahdX*Xd,
+                    ahdXX*Xd**2,
+                    ahdXX*Xt*Xd+ahdX*Xdt,
+                    ahdXXX*Xt**2*Xd+ahdXX*(Xtt*Xd+2*Xdt*Xt)*ahdX*Xdtt),
+                    axis=-1)
+
+                X_virial = n*_delta_0/(a+(1-a)/tau**g)
+                ahdX_virial = -(f**2-1)/(1-X_virial) + \
+                    (f**2+3*f+X_virial*(f**2-3*f))/(1-X_virial)**3
+                ahdXX_virial = -(f**2-1)/(1-X_virial)**2 + \
+                    (3*(f**2+3*f)+(f**2-3*f)*(1+2*X_virial))/(1-X_virial)**4
+                vir += stack((ahdX_virial*Xd, ahdXX_virial*Xd**2), axis=-1)
+
+            # Special form from Saul, A. and Wagner, W. Water 58 coefficient
+            # equation
+            if "saul" in terms:
+                n, d, t, BC = terms["saul"]
+                delta6 = delta**6
+                factor = where(delta < 0.2, 1.6*delta6*(1-1.2*delta6),
+                               exp(0.4*delta6)-exp(-2*delta6))
+                factord = -2.4*exp(-0.4*delta6)+12*exp(-2*delta6)
+                factordd = 5.76*exp(-0.4*delta6)-144*exp(-2*delta6)
+
+                taut = exp(t*logtau)
+                f = n*exp(d*logdelta)*taut
+                fd5 = f*delta_**5
+                fir += stack((
+                    factor*f.sum(axis=-1),
+                    factor*(f*t).sum(axis=-1)/tau,
+                    factor*(f*t*(t-1)).sum(axis=-1)/tau**2,
+                    factord*fd5.sum(axis=-1)+factor*(f*d).sum(axis=-1)/delta,
+                    factordd*(fd5*delta_**5).sum(axis=-1) +
+                    factord*(fd5*(2*d+5)).sum(axis=-1)/delta +
+                    factor*(f*d*(d-1)).sum(axis=-1)/delta**2,
+                    factord*(fd5*t).sum(axis=-1)/tau +
+                    factor*(f*d*t).sum(axis=-1)/delta/tau,
+                    factord*(fd5*t*(t-1)).sum(axis=-1)/tau**2 +
+                    factor*(f*d*t*(t-1)).sum(axis=-1)/delta/tau**2),
+                    axis=-1)
+                vir += taut.dot(BC)
+
+        if zero.any():
+            fir[zero] = 0
+            vir[zero] = 0
+        return tuple(moveaxis(fir, -1, 0))+tuple(moveaxis(vir, -1, 0)) \
+            if tau.ndim else tuple(fir.tolist()+vir.tolist())
+
+    def _termsPhir(self):
+        """Return the coefficient arrays of the residual Helmholtz energy
+        for the equation in use, with the module level cache for the
+        equations defined in the class and an instance cache for the
+        equations built in runtime like the generalised equation"""
+        constants = self._constants
+        terms = _phirCache.get(id(constants))
+        if terms is not None and terms[0] is constants:
+            return terms[1]
+
+        cache = getattr(self, "_phirTerms", None)
+        if cache is not None and cache[0] is constants:
+            return cache[1]
+
+        terms = _phirCoefficients(constants)
+        eqs = list(self.eq)
+        if hasattr(self, "GERG"):
+            eqs.append(self.GERG)
+        if any(constants is eq for eq in eqs):
+            _phirCache[id(constants)] = (constants, terms)
+        else:
+            self._phirTerms = (constants, terms)
+        return terms
 
 
     def derivative(self, z, x, y, fase):
@@ -1939,18 +2914,7 @@ class MEoS(Fluid_MEOS):
 
     def _Vapor_Pressure(self, T):
         if self._vapor_Pressure:
-            eq = self._vapor_Pressure["eq"]
-            Tita = 1-T/self.Tc
-            if eq in [2, 4, 6]:
-                Tita = Tita**0.5
-            suma = sum([n*Tita**x for n, x in zip(
-                self._vapor_Pressure["ao"], self._vapor_Pressure["exp"])])
-            if eq in [1, 2]:
-                Pr = suma+1
-            elif eq in [3, 4]:
-                Pr = exp(suma)
-            else:
-                Pr = exp(self.Tc/T*suma)
+            Pr = _ancillary(self._vapor_Pressure, T, self.Tc, 0.5)
             Pv = unidades.Pressure(Pr*self.Pc)
         else:
             Pv = self.componente.Pv(T)
@@ -1958,18 +2922,7 @@ class MEoS(Fluid_MEOS):
 
     def _Liquid_Density(self, T):
         if self._liquid_Density:
-            eq = self._liquid_Density["eq"]
-            Tita = 1-T/self.Tc
-            if eq in [2, 4, 6]:
-                Tita = Tita**(1./3)
-            suma = sum([n*Tita**x for n, x in zip(
-                self._liquid_Density["ao"], self._liquid_Density["exp"])])
-            if eq in [1, 2]:
-                Pr = suma+1
-            elif eq in [3, 4]:
-                Pr = exp(suma)
-            else:
-                Pr = exp(self.Tc/T*suma)
+            Pr = _ancillary(self._liquid_Density, T, self.Tc, 1./3)
             rho = unidades.Density(Pr*self.rhoc)
         else:
             rho = self.componente.RhoL_DIPPR(T)
@@ -1977,18 +2930,7 @@ class MEoS(Fluid_MEOS):
 
     def _Vapor_Density(self, T):
         if self._vapor_Density:
-            eq = self._vapor_Density["eq"]
-            Tita = 1-T/self.Tc
-            if eq in [2, 4, 6]:
-                Tita = Tita**(1./3)
-            suma = sum([n*Tita**x for n, x in zip(
-                self._vapor_Density["ao"], self._vapor_Density["exp"])])
-            if eq in [1, 2]:
-                Pr = suma+1
-            elif eq in [3, 4]:
-                Pr = exp(suma)
-            else:
-                Pr = exp(self.Tc/T*suma)
+            Pr = _ancillary(self._vapor_Density, T, self.Tc, 1./3)
             rho = unidades.Density(Pr*self.rhoc)
         else:
             rho = self._Vapor_Density_Chouaieb(T)
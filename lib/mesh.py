@@ -0,0 +1,493 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2016, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Rigorous equilibrium stage calculation of columns with the MESH equations
+#   -blockTridiagonal: Solve a block tridiagonal linear system
+#   -EoSKValues: Equilibrium ratios of stages with a equation of state
+#   -IdealEnthalpy: Molar enthalpy of phases as ideal mixtures
+#   -wangHenke: Estimation of column profile with the bubble point method
+#   -naphtaliSandholm: Simultaneous correction solution of a column
+#
+# The stages are numbered from top to bottom, the first stage is the
+# condenser and the last the reboiler. The variables of each stage are the
+# liquid and vapor molar flows of components leaving it and its temperature
+###############################################################################
+
+
+from numpy import (arange, array, clip, dot, errstate, exp, eye, isfinite,
+                   log, repeat, where, zeros)
+from numpy.linalg import LinAlgError, solve
+
+
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-9
+
+# Maximum change of stage temperatures in a Newton step, K
+MAX_STEP_T = 10.
+
+# Maximum number of halving of Newton step
+MAX_HALVING = 5
+
+# Maximum iterations of bubble point method for the initial profile
+WH_ITERATIONS = 100
+
+# Temperature increment for numerical derivatives, K
+DELTA_T = 1e-3
+
+# Relative increment of phase flows for numerical derivatives
+DELTA_X = 1e-6
+
+# Equations of state instances saved for reuse between iterations
+EOS_CACHE = 512
+
+
+def blockTridiagonal(A, B, C, F):
+    """Solve the block tridiagonal system with the block Thomas algorithm
+        A[j]·X[j-1] + B[j]·X[j] + C[j]·X[j+1] = F[j]
+
+    A, B, C: arrays with shape (N, n, n), the blocks of each row, A[0] and
+        C[N-1] are not used
+    F: array with shape (N, n), the right hand side
+    Return the solution X as array with shape (N, n)
+
+    >>> B = array([[[2.]], [[2.]], [[2.]]])
+    >>> A = C = -array([[[1.]], [[1.]], [[1.]]])
+    >>> X = blockTridiagonal(A, B, C, array([[1.], [0.], [1.]]))
+    >>> " ".join("%0.4f" % x for x in X[:, 0])
+    '1.0000 1.0000 1.0000'
+    """
+    N, n = F.shape
+    Cp = zeros((N, n, n))
+    Fp = zeros((N, n))
+    M = B[0]
+    for j in range(N):
+        if j:
+            M = B[j]-dot(A[j], Cp[j-1])
+            rhs = F[j]-dot(A[j], Fp[j-1])
+        else:
+            rhs = F[0]
+        if j < N-1:
+            sol = solve(M, array([*C[j].T, rhs]).T)
+            Cp[j] = sol[:, :n]
+            Fp[j] = sol[:, n]
+        else:
+            Fp[j] = solve(M, rhs)
+
+    X = zeros((N, n))
+    X[-1] = Fp[-1]
+    for j in range(N-2, -1, -1):
+        X[j] = Fp[j]-dot(Cp[j], X[j+1])
+    return X
+
+
+class EoSKValues(object):
+    """Equilibrium ratios of stages calculated with the fugacity coefficients
+    of a equation of state, the instances of equation at the temperature and
+    pressure of stages are saved to be reused between iterations
+
+        K: class of equation of state
+        mezcla: Mezcla instance with the components of column
+    """
+    def __init__(self, K, mezcla):
+        self.K = K
+        self.mezcla = mezcla
+        self._cache = {}
+
+        # Parameters of Wilson correlation
+        cmps = mezcla.componente
+        self.Tc = array([cmp.Tc for cmp in cmps], dtype=float)
+        self.Pc = array([cmp.Pc for cmp in cmps], dtype=float)
+        self.w = array([cmp.f_acent for cmp in cmps], dtype=float)
+
+    def _eos(self, T, P):
+        key = (T, P)
+        eq = self._cache.get(key)
+        if eq is None:
+            if len(self._cache) > EOS_CACHE:
+                self._cache.clear()
+            eq = self._cache[key] = self.K._new(T, P/101325., self.mezcla)
+        return eq
+
+    def lnphi(self, T, P, x, phase):
+        """Logarithm of fugacity coefficients of a phase in stages
+            T, P: arrays with the temperature, K, and pressure, Pa, of stages
+            x: array with the composition of phase in each stage, shape (N, C)
+            phase: 0 for vapor, 1 for liquid"""
+        lnphi = zeros(x.shape)
+        for j, (Tj, Pj) in enumerate(zip(T, P)):
+            lnphi[j] = self._eos(float(Tj), float(Pj))._lnphi(x[j], phase)
+        return lnphi
+
+    def lnK(self, T, P, x, y):
+        """Logarithm of equilibrium ratios of stages, with x and y the
+        composition of liquid and vapor phases"""
+        return self.lnphi(T, P, x, 1)-self.lnphi(T, P, y, 0)
+
+    def lnKwilson(self, T, P):
+        """Logarithm of equilibrium ratios of stages with the Wilson
+        correlation, independent of composition, used in the initial
+        estimation of profile"""
+        T = array(T, dtype=float)[:, None]
+        P = array(P, dtype=float)[:, None]
+        return log(self.Pc/P)+5.37*(1+self.w)*(1-self.Tc/T)
+
+
+class IdealEnthalpy(object):
+    """Molar enthalpy of phases as ideal mixtures, the ideal gas enthalpy
+    for vapor and the ideal gas enthalpy less the heat of vaporization of
+    DIPPR equation for liquid, the same reference of streams calculated with
+    equations of state. The parameters of components are saved as arrays to
+    calculate all stages at once
+
+        componente: list of components
+    """
+    def __init__(self, componente):
+        self.componente = componente
+        self.cp = array([cmp.cp for cmp in componente], dtype=float)
+        self.n = arange(1, 7)
+
+    def vapor(self, T):
+        """Ideal gas molar enthalpy of components, J/kmol, with T array of
+        temperatures and result array with shape (len(T), C)"""
+        T = array(T, dtype=float)[:, None, None]
+        H = (self.cp/self.n*T**self.n).sum(axis=-1)
+        Ho = (self.cp/self.n*298.15**self.n).sum(axis=-1)
+        return (H-Ho)*4184.
+
+    def liquid(self, T):
+        """Liquid molar enthalpy of components, J/kmol, with T array of
+        temperatures and result array with shape (len(T), C)"""
+        T = array(T, dtype=float)
+        Hv = zeros((len(T), len(self.componente)))
+        for i, cmp in enumerate(self.componente):
+            Tmin, Tmax = cmp.calor_vaporizacion[-2:]
+            Hv[:, i] = cmp.DIPPR(clip(T, Tmin, Tmax), cmp.calor_vaporizacion)
+        return self.vapor(T)-Hv
+
+
+def wangHenke(f, P, lnK, L, V, T, R, total=True, tol=1e-3,
+              maxiter=WH_ITERATIONS):
+    """Estimation of column profile with the bubble point method of Wang and
+    Henke, Hydrocarbon Processing 45(8) (1966) 155-163, with the total flows
+    of stages fixed and composition independent equilibrium ratios
+
+        f: array with the feed molar flow of components to each stage,
+            kmol/s, shape (N, C)
+        P: array with the pressure of stages, Pa
+        lnK: function lnK(T, P) returning the logarithm of equilibrium ratios
+            of stages, like the ideal solution of EoSKValues.lnKwilson
+        L, V: arrays with the liquid and vapor molar flows leaving each
+            stage, with total condenser V[0] must be zero
+        T: initial estimation of stage temperatures
+        R: reflux ratio
+        total: boolean for total condenser
+        tol: tolerance in the temperature change of stages, K
+
+    The material balances of each component with the stripping factors of
+    stages are a tridiagonal system, the new temperatures are the bubble
+    point of the normalized liquid compositions.
+
+    Return a tuple (l, v, T) with the molar flows of components and the
+    temperature of stages, with total condenser the vapor of first stage is
+    the incipient vapor with the distillate flow
+    """
+    f = array(f, dtype=float)
+    T = array(T, dtype=float)
+    N, C = f.shape
+    I = eye(C)
+    s = zeros(N)
+    if total:
+        s[0] = 1/R
+    A = zeros((N, C, C))
+    A[1:] = -I
+    Cj = zeros((N, C, C))
+    for it in range(maxiter):
+        lnk = lnK(T, P)
+        S = exp(lnk)*(V/L)[:, None]
+        B = (1+s+S.T).T[:, :, None]*I
+        Cj[:-1] = -S[1:, :, None]*I
+        l = blockTridiagonal(A, B, Cj, f)
+        x = l/l.sum(axis=1)[:, None]
+
+        # Bubble point temperature, a Newton step for each stage
+        Kx = x*exp(lnk)
+        y = Kx/Kx.sum(axis=1)[:, None]
+        dlnK = (lnK(T+DELTA_T, P)-lnk)/DELTA_T
+        dT = log(Kx.sum(axis=1))/(y*dlnK).sum(axis=1)
+        T = T-clip(dT, -MAX_STEP_T, MAX_STEP_T)
+        if abs(dT).max() < tol:
+            break
+
+    Kx = x*exp(lnK(T, P))
+    y = Kx/Kx.sum(axis=1)[:, None]
+    l = L[:, None]*x
+    v = V[:, None]*y
+    if total:
+        v[0] = y[0]*L[0]/R
+    return l, v, T
+
+
+def naphtaliSandholm(f, HF, P, kvalues, enthalpy, l, v, T, R, B, total=True,
+                     tol=TOLERANCE, maxiter=MAX_ITERATIONS):
+    """Solve the MESH equations of a column with the simultaneous correction
+    method of Naphtali and Sandholm, AIChE J. 17 (1971) 148-153
+
+        f: array with the feed molar flow of components to each stage,
+            kmol/s, shape (N, C)
+        HF: array with the enthalpy flow of feeds to each stage, W
+        P: array with the pressure of stages, Pa
+        kvalues: instance with the method lnphi(T, P, x, phase) returning
+            the logarithm of fugacity coefficients of a phase in stages, like
+            EoSKValues
+        enthalpy: instance with the methods liquid(T) and vapor(T)
+            returning the molar enthalpy of components in each phase
+        l, v, T: initial estimation of liquid and vapor molar flows of
+            components leaving each stage and its temperature, with total
+            condenser the vapor of first stage is only used as estimation of
+            the incipient vapor composition
+        R: reflux ratio
+        B: bottom product molar flow, kmol/s
+        total: boolean for total condenser, else partial condenser with
+            vapor distillate
+
+    The energy balance of condenser and reboiler are replaced by the reflux
+    ratio and bottom flow specifications. With total condenser the vapor
+    flow leaving the first stage is zero and its temperature is the bubble
+    point of the liquid, the distillate is a side draw of the liquid
+    leaving the first stage.
+
+    The jacobian has a block tridiagonal structure, each stage equations
+    only depend of the variables of that stage and the adjacent stages, so
+    the Newton step is solved by the block Thomas algorithm. The derivatives
+    of equilibrium ratios and enthalpies with temperature and composition
+    are calculated numerically.
+
+    Return a tuple (l, v, T, Q, info) with the solution, the heat duty of
+    condenser and reboiler, W, and a dict with the calculation statistics:
+        iterations: Number of iterations
+        converged: Boolean with the convergence state
+        error: Maximum scaled residual
+    """
+    l = array(l, dtype=float)
+    v = array(v, dtype=float)
+    T = array(T, dtype=float)
+    f = array(f, dtype=float)
+    HF = array(HF, dtype=float)
+    P = array(P, dtype=float)
+    N, C = l.shape
+    n = 2*C+1
+    I = eye(C)
+    info = {"iterations": 0, "converged": False, "error": None}
+
+    # Scale of equations, the material balances with the total feed and the
+    # energy balances with the vaporization heat of feed
+    Ftot = f.sum()
+    Tf = array([T[f.sum(axis=1).argmax()]])
+    hscale = Ftot*abs(enthalpy.vapor(Tf)-enthalpy.liquid(Tf)).max()
+
+    # Liquid side draw ratio, the distillate with total condenser, the vapor
+    # of estimation is only used as the composition of incipient vapor
+    s = zeros(N)
+    y0 = None
+    if total:
+        s[0] = 1/R
+        if v[0].sum():
+            y0 = v[0]/v[0].sum()
+        v[0] = 0
+
+    def properties(l, v, T, K=None):
+        L = l.sum(axis=1)
+        V = v.sum(axis=1)
+        x = l/L[:, None]
+        with errstate(invalid="ignore", divide="ignore"):
+            y = v/V[:, None]
+        if total:
+            # Incipient vapor of condenser for the equilibrium ratios
+            if K is not None:
+                y[0] = K[0]*x[0]/dot(K[0], x[0])
+            elif y0 is not None:
+                y[0] = y0
+            else:
+                y[0] = x[0]
+        lnphiL = kvalues.lnphi(T, P, x, 1)
+        lnphiV = kvalues.lnphi(T, P, y, 0)
+        hL = enthalpy.liquid(T)
+        hV = enthalpy.vapor(T)
+        return L, V, x, y, lnphiL, lnphiV, exp(lnphiL-lnphiV), hL, hV
+
+    def derivatives(T, L, V, x, y, lnphiL, lnphiV, hL, hV):
+        lnK = lnphiL-lnphiV
+        dlnK = (kvalues.lnphi(T+DELTA_T, P, x, 1) -
+                kvalues.lnphi(T+DELTA_T, P, y, 0)-lnK)/DELTA_T
+        dhL = (enthalpy.liquid(T+DELTA_T)-hL)/DELTA_T
+        dhV = (enthalpy.vapor(T+DELTA_T)-hV)/DELTA_T
+
+        # Derivatives with the flows of components in each phase, all the
+        # perturbed compositions of stages are evaluated in a single call
+        Tk = repeat(T, C)
+        Pk = repeat(P, C)
+        xk = ((x[:, None, :]+DELTA_X*I)/(1+DELTA_X)).reshape(N*C, C)
+        lnphi = kvalues.lnphi(Tk, Pk, xk, 1).reshape(N, C, C)
+        dlnKl = (lnphi.transpose(0, 2, 1)-lnphiL[:, :, None]) / \
+            (DELTA_X*L)[:, None, None]
+
+        # The incipient vapor of total condenser isn't a variable
+        first = 1 if total else 0
+        dlnKv = zeros((N, C, C))
+        yk = ((y[first:, None, :]+DELTA_X*I)/(1+DELTA_X)).reshape(-1, C)
+        lnphi = kvalues.lnphi(Tk[C*first:], Pk[C*first:], yk, 0)
+        dlnKv[first:] = (lnphiV[first:, :, None] -
+                         lnphi.reshape(-1, C, C).transpose(0, 2, 1)) / \
+            (DELTA_X*V[first:])[:, None, None]
+        return dlnK, dlnKl, dlnKv, dhL, dhV
+
+    def residual(l, v, L, V, x, K, hL, hV):
+        HL = (l*hL).sum(axis=1)
+        HV = (v*hV).sum(axis=1)
+        lin = zeros((N, C))
+        lin[1:] = l[:-1]
+        vin = zeros((N, C))
+        vin[:-1] = v[1:]
+        HLin = zeros(N)
+        HLin[1:] = HL[:-1]
+        HVin = zeros(N)
+        HVin[:-1] = HV[1:]
+
+        M = (1+s[:, None])*l+v-lin-vin-f
+        E = K*V[:, None]*x-v
+        H = (1+s)*HL+HV-HLin-HVin-HF
+
+        # Heat duty of condenser and reboiler from its energy balances
+        Q = (H[0], H[-1])
+        if total:
+            E[0] = v[0]
+            H[0] = dot(K[0], x[0])-1
+        else:
+            H[0] = (L[0]-R*V[0])/Ftot
+        H[-1] = (L[-1]-B)/Ftot
+        H[1:-1] /= hscale
+        return array([*(M.T/Ftot), *(E.T/Ftot), H]).T, Q
+
+    def jacobian(l, v, L, V, x, K, hL, hV, dlnK, dlnKl, dlnKv, dhL, dhV):
+        A = zeros((N, n, n))
+        Bj = zeros((N, n, n))
+        Cj = zeros((N, n, n))
+        cl = slice(0, C)
+        cv = slice(C, 2*C)
+        Kx = K*x
+
+        # Material balances
+        Bj[:, cl, cl] = (1+s)[:, None, None]*I
+        Bj[:, cl, cv] = I
+        A[1:, cl, cl] = -I
+        Cj[:-1, cl, cv] = -I
+
+        # Equilibrium relations
+        Bj[:, cv, cl] = (V/L)[:, None, None] * (
+            K[:, :, None]*I-Kx[:, :, None])
+        Bj[:, cv, cv] = Kx[:, :, None]-I
+        Bj[:, cv, -1] = Kx*dlnK*V[:, None]
+        Bj[:, cv, cl] += (Kx*V[:, None])[:, :, None]*dlnKl
+        Bj[:, cv, cv] += (Kx*V[:, None])[:, :, None]*dlnKv
+
+        # Energy balances
+        Bj[:, -1, cl] = (1+s)[:, None]*hL
+        Bj[:, -1, cv] = hV
+        Bj[:, -1, -1] = (1+s)*(l*dhL).sum(axis=1)+(v*dhV).sum(axis=1)
+        A[1:, -1, cl] = -hL[:-1]
+        A[1:, -1, -1] = -(l*dhL).sum(axis=1)[:-1]
+        Cj[:-1, -1, cv] = -hV[1:]
+        Cj[:-1, -1, -1] = -(v*dhV).sum(axis=1)[1:]
+        for M in (A, Bj, Cj):
+            M[:, :2*C] /= Ftot
+            M[1:-1, -1] /= hscale
+            M[[0, -1], -1] = 0
+
+        # Specifications
+        if total:
+            Bj[0, cv] = 0
+            Bj[0, cv, cv] = I/Ftot
+            Bj[0, -1, cl] = (K[0]-dot(K[0], x[0]))/L[0]+dot(Kx[0], dlnKl[0])
+            Bj[0, -1, -1] = dot(Kx[0], dlnK[0])
+        else:
+            Bj[0, -1, cl] = 1/Ftot
+            Bj[0, -1, cv] = -R/Ftot
+        Bj[-1, -1, cl] = 1/Ftot
+        return A, Bj, Cj
+
+    def step(l, v, T, X, t):
+        """New variables with a fraction t of the Newton step, the flows are
+        kept positive with a exponential change"""
+        T = T+t*X[:, -1]
+        dl = t*X[:, :C]
+        dv = t*X[:, C:2*C]
+        with errstate(divide="ignore", invalid="ignore", over="ignore"):
+            l = where(l+dl > 0, l+dl, l*exp(dl/l))
+            v = where(v+dv > 0, v+dv, v*exp(dv/v))
+        l = where(l > 0, l, 0)
+        v = where(v > 0, v, 0)
+        if total:
+            v[0] = 0
+        return l, v, T
+
+    prop = properties(l, v, T)
+    F, Q = residual(l, v, *prop[:3], *prop[6:])
+    for it in range(maxiter):
+        info["error"] = abs(F).max()
+        if info["error"] < tol:
+            info["converged"] = True
+            break
+        info["iterations"] += 1
+
+        L, V, x, y, lnphiL, lnphiV, K, hL, hV = prop
+        dlnK, dlnKl, dlnKv, dhL, dhV = derivatives(
+            T, L, V, x, y, lnphiL, lnphiV, hL, hV)
+        A, Bj, Cj = jacobian(
+            l, v, L, V, x, K, hL, hV, dlnK, dlnKl, dlnKv, dhL, dhV)
+        X = blockTridiagonal(A, Bj, Cj, -F)
+        if not isfinite(X).all():
+            break
+
+        # Damped step, the temperature change is limited and the step is
+        # halved while the residual don't decrease. The trial states with
+        # undefined properties are rejected, if none of them is valid the
+        # iteration stop without convergence
+        t = min(1, MAX_STEP_T/abs(X[:, -1]).max())
+        accepted = None
+        for i in range(MAX_HALVING):
+            lt, vt, Tt = step(l, v, T, X, t)
+            try:
+                if not (Tt > 0).all():
+                    raise ValueError("Negative temperature in trial state")
+                propt = properties(lt, vt, Tt, K)
+                Ft, Qt = residual(lt, vt, *propt[:3], *propt[6:])
+            except (ValueError, ArithmeticError, LinAlgError):
+                Ft = None
+            if Ft is not None and isfinite(Ft).all():
+                accepted = lt, vt, Tt, propt, Ft, Qt
+                if abs(Ft).max() < info["error"]:
+                    break
+            t /= 2
+        if accepted is None:
+            break
+        l, v, T, prop, F, Q = accepted
+
+    return l, v, T, Q, info
@@ -32,9 +32,10 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>."""
 ###############################################################################
 
 
+from numpy import array, dot, errstate, newaxis, outer, where
 from scipy import roots, log, sqrt, log10, exp, sin, zeros
 
-from lib.compuestos import Componente
+from lib.compuestos import getComponente
 from lib.physics import R_atml, R
 from lib import unidades, config
 from lib.elemental import Elemental
@@ -197,7 +198,7 @@ class Mezcla(config.Entity):
                 self.ids = eval(txt)
             else:
                 self.ids = txt
-        self.componente = [Componente(int(i)) for i in self.ids]
+        self.componente = [getComponente(int(i)) for i in self.ids]
         fraccionMolar = self.kwargs.get("fraccionMolar", None)
         fraccionMasica = self.kwargs.get("fraccionMasica", None)
         caudalMasico = self.kwargs.get("caudalMasico", None)
@@ -479,61 +480,45 @@ class Mezcla(config.Entity):
         return unidades.Temperature(Tc), unidades.Pressure(Pc, "atm"), unidades.SpecificVolume(VcCorr/self.M, "lg")
 
     # Mixing Rules
+    def _Mix(self, parameters, factor):
+        """Quadratic mixing rule for the a parameter and linear for the
+        others, in matrix form, factor is the matrix with the correction
+        to the geometric mean of each pair of components"""
+        x = array(self.fraccion, dtype=float)
+        aij = outer(parameters[0], parameters[0])
+        if (aij < 0).any():
+            # Negative a parameters give a complex geometric mean
+            aij = aij.astype(complex)
+        a = dot(x, dot(sqrt(aij)*factor, x))
+        b = [dot(x, array(bi, dtype=float)) for bi in parameters[1:]]
+        return tuple([a]+b)
+
     def Mix_van_der_Waals(self, parameters, kij):
         """Miwing rules of van der Waals"""
-        ai = parameters[0]
-        bi = parameters[1:]
-        b = [0]*len(bi)
-        a = 0
-        for i in range(len(self.componente)):
-            for j in range(len(bi)):
-                b[j] += self.fraccion[i]*bi[j][i]
-            for j in range(len(self.componente)):
-                a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j])
-        return tuple([a]+b)
+        kij = array(kij, dtype=float)
+        return self._Mix(parameters, 1-kij)
 
     def Mix_Stryjek_Vera(self, parameters, kij):
         """Mixing rules of Stryjek and Vera (1986)"""
-        ai = parameters[0]
-        bi = parameters[1:]
-        b = [0]*len(bi)
-        a = 0
-        for i in range(len(self.componente)):
-            for j in range(len(bi)):
-                b[j] += self.fraccion[i]*bi[j][i]
-            for j in range(len(self.componente)):
-                if kij[i][j] == 0 and kij[j][i] == 0:
-                    k = 0.
-                else:
-                    k = kij[i][j]*kij[j][i]/(self.fraccion[i]*kij[i][j]+self.fraccion[j]*kij[j][i])
-                a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-k)
-        return tuple([a]+b)
+        kij = array(kij, dtype=float)
+        x = array(self.fraccion, dtype=float)
+        null = (kij == 0) & (kij.T == 0)
+        with errstate(divide="ignore", invalid="ignore"):
+            k = kij*kij.T/(x[:, newaxis]*kij+x[newaxis, :]*kij.T)
+        return self._Mix(parameters, 1-where(null, 0., k))
 
     def Mix_Panagiotopoulos(self, parameters, kij):
         """Mixing Rules of Panagiotopoulos (1985)"""
-        ai = parameters[0]
-        bi = parameters[1:]
-        b = [0]*len(bi)
-        a = 0
-        for i in range(len(self.componente)):
-            for j in range(len(bi)):
-                b[j] += self.fraccion[i]*bi[j][i]
-            for j in range(len(self.componente)):
-                a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j]+(kij[i][j]-kij[j][i])*self.fraccion[i])
-        return tuple([a]+b)
+        kij = array(kij, dtype=float)
+        x = array(self.fraccion, dtype=float)
+        return self._Mix(parameters, 1-kij+(kij-kij.T)*x[:, newaxis])
 
     def Mix_Melhem(self, parameters, kij):
         """Mixing Rules of Melhem (1991)"""
-        ai = parameters[0]
-        bi = parameters[1:]
-        b = [0]*len(bi)
-        a = 0
-        for i in range(len(self.componente)):
-            for j in range(len(bi)):
-                b[j] += self.fraccion[i]*bi[j][i]
-            for j in range(len(self.componente)):
-                a += self.fraccion[i]*self.fraccion[j]*(ai[i]*ai[j])**0.5*(1-kij[i][j]+(kij[i][j]-kij[j][i])*self.fraccion[i]/(self.fraccion[i]+self.fraccion[j]))
-        return tuple([a]+b)
+        kij = array(kij, dtype=float)
+        x = array(self.fraccion, dtype=float)
+        return self._Mix(parameters, 1-kij+(kij-kij.T)*x[:, newaxis]/(
+            x[:, newaxis]+x[newaxis, :]))
 
     def Lee_Kesler_Entalpia(self, T, P):
         """Método de cálculo de la entalpía haciendo uso de las propiedades críticas, método de Lee-Kesler
@@ -947,7 +932,7 @@ class Mezcla(config.Entity):
 
     def Tension_inferfacial_water(self, T):
         """Método de cálculo de la tensión interfacial entre agua e hidrocarburos, API procedure 10B1.3, pag 1007"""
-        agua = Componente(62)
+        agua = getComponente(62)
         sigma_w=agua.Tension_parametrica(T).dyncm
         sigma_h=self.Tension_superficial(T).dyncm
         return unidades.Tension(sigma_h+sigma_w-1.1*sqrt(sigma_h*sigma_w), "dyncm")
@@ -1205,7 +1190,7 @@ class Mezcla(config.Entity):
         if mezcla:
             self._bool = True
             self.ids = mezcla["ids"]
-            self.componente = [Componente(int(i)) for i in self.ids]
+            self.componente = [getComponente(int(i)) for i in self.ids]
             self.fraccion = [unidades.Dimensionless(x) for x in mezcla["fraction"]]
             self.fraccion_masica = [unidades.Dimensionless(x) for x in mezcla["massFraction"]]
             self.caudalunitariomasico = [unidades.MassFlow(x) for x in mezcla["massUnitFlow"]]
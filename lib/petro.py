@@ -30,7 +30,7 @@ from numpy import array
 
 from . import unidades
 from .physics import R_atml, R_Btu
-from .compuestos import Componente, newComponente
+from .compuestos import Componente, getComponente, newComponente
 from .config import conf_dir
 
 
@@ -2869,9 +2869,9 @@ class Natural_Gas(object):
 
     def Critical_Whitson_Brule(self):
         """Whitson, C. H., and M. R. Brule. Phase Behavior. Richardson, TX: Society of Petroleum Engineers, 2000."""
-        CO2=Componente(49)
-        H2S=Componente(50)
-        N2=Componente(46)
+        CO2=getComponente(49)
+        H2S=getComponente(50)
+        N2=getComponente(46)
         g=(28.96*self.SG-(N2.M*self.N2+CO2.M*self.CO2+H2S.M*self.H2S))/28.96/(1-self.N2-self.CO2-self.H2S)
         tpcHC=168.+325.*g-12.5*g**2
         ppcHC=677+15.*g-37.5*g**2
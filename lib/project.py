@@ -22,41 +22,157 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Module for project definition (pdf of equipment, configuration and many more)
 ###############################################################################
 
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+import logging
 import os
 from configparser import ConfigParser
+from time import time
 
-# from pygraph.classes.graph import graph
-# from pygraph.algorithms.cycles import find_cycle
-# try:
-   # from pygraph.readwrite.dot import write
-# except:
-   # from pygraph.readwrite.markup import write
+from numpy import array, concatenate
 
+from lib import config
 from lib.config import conf_dir
 from lib.corriente import Corriente
+from lib.flowsheet import (levels, reachable, stronglyConnected, tearEdges,
+                           topologicalOrder, Wegstein)
 from equipment import equipments
 from equipment.flux import Mixer
 
 
+# Pool of process to calculate equipments in parallel, created when needed
+_executor = {}
+
+
+def _getExecutor(workers):
+    """Return the pool of process with the workers count"""
+    if workers not in _executor:
+        for pool in _executor.values():
+            pool.shutdown(wait=False)
+        _executor.clear()
+        _executor[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _executor[workers]
+
+
+def _streamKwargs(stream):
+    """Return the input kwargs of a stream, or a list of them, to ship to a
+    worker process. The full state of streams isn't serializable with all the
+    thermodynamic backends, so the streams are recalculated from its inputs"""
+    if isinstance(stream, list):
+        return [_streamKwargs(s) for s in stream]
+    return {key: value for key, value in stream.kwargs.items()
+            if key not in stream.kwargs_forbidden}
+
+
+def _buildStream(kwargs):
+    """Rebuild a stream, or a list of them, from its input kwargs"""
+    if isinstance(kwargs, list):
+        return [_buildStream(kw) for kw in kwargs]
+    return Corriente(**kwargs)
+
+
+def _calculateEquipment(index, kwargs, inputs, configuration):
+    """Calculate an equipment in a worker process
+    index: index of equipment class in equipments list
+    kwargs: dict with the kwargs of equipment others than the input streams
+    inputs: dict with the input kwargs of input streams
+    configuration: dict with the options of project configuration
+
+    Return the serialization of equipment, as in writeToJSON, and the input
+    kwargs of its output streams"""
+    Config = ConfigParser()
+    Config.read_dict(configuration)
+    config.setMainWindowConfig(Config)
+
+    kwargs.update({key: _buildStream(value) for key, value in inputs.items()})
+    equip = equipments[index](**kwargs)
+    result = {}
+    equip.writeToJSON(result)
+    salida = []
+    if equip.status:
+        salida = [_streamKwargs(stream) for stream in equip.salida]
+    return result, salida
+
+
+class _LazyObjects(MutableMapping):
+    """Mapping with the items or streams of a project read from file, each
+    object is built from its serialization only the first time it's
+    requested, so a project is opened without build all its entities. The
+    objects added or changed later are kept as in a dict
+
+    source: mapping with the serialization of objects, the project file
+    build: function build(key, data) to create the object from its
+        serialization
+    keys: dict with the key in source of each object, if the key type in
+        project is different"""
+
+    def __init__(self, source, build, keys=None):
+        if keys is None:
+            keys = {key: key for key in source}
+        self._source = source
+        self._build = build
+        self._pending = keys
+        self._objects = dict.fromkeys(keys)
+
+    def serialization(self, key):
+        """Return the serialization of object key if it isn't built yet, or
+        None"""
+        if key in self._pending:
+            return self._source[self._pending[key]]
+
+    def __getitem__(self, key):
+        if key in self._pending:
+            data = self._source[self._pending.pop(key)]
+            self._objects[key] = self._build(key, data)
+        return self._objects[key]
+
+    def __setitem__(self, key, value):
+        self._pending.pop(key, None)
+        self._objects[key] = value
+
+    def __delitem__(self, key):
+        self._pending.pop(key, None)
+        del self._objects[key]
+
+    def __contains__(self, key):
+        return key in self._objects
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def __len__(self):
+        return len(self._objects)
+
+
 class Project(object):
     MAGIC_NUMBER = 0x3051E
     FILE_VERSION = 10
 
-    def __init__(self, items={}, streams={}, config=None):
+    # Convergence parameters of recycle loops
+    MAX_ITERATIONS = 50
+    TOLERANCE = 1e-6
+
+    # Number of process to calculate the independent equipments in parallel,
+    # 1 to calculate all in the main process
+    WORKERS = 1
+
+    def __init__(self, items=None, streams=None, config=None):
         """
         items: diccionario con los equipos
         stream: diccionario con las corrientes
         """
+        if items is None:
+            items = {}
+        if streams is None:
+            streams = {}
         self.items = items
         self.out = {}
         if not config:
             config = ConfigParser()
             config.read(conf_dir+"pychemqtrc")
         self.config = config
-        self.streams = streams
-        # self.graph = self.calGraph()
-
-        self.downToStream = {}
+        self.setStreams(streams)
+        self.statistics = {}
 #        import gv
 #        for item in items:
 #           print gv.tailof(item)
@@ -71,13 +187,40 @@ class Project(object):
     def streamCount(self):
         return len(self.streams)
 
-    # def calGraph(self):
-        # grafo = graph()
-        # for item in self.items:
-            # grafo.add_node(item, attrs=[("splines",  "")])
-        # for key, stream in self.streams.items():
-            # grafo.add_edge((stream[0], stream[1]), attrs=[("splines",  "")])
-        # return grafo
+    def _indexStreams(self):
+        """Build the adjacency maps of project, with the id of streams
+        downstream and upstream of each item:
+            downToEquip: streams with the item as origin
+            upToEquip: streams with the item as destination"""
+        self.downToEquip = {item: [] for item in self.items}
+        self.upToEquip = {item: [] for item in self.items}
+        for key in self.streams:
+            # The streams not loaded from file are indexed with its
+            # serialization
+            data = None
+            if isinstance(self.streams, _LazyObjects):
+                data = self.streams.serialization(key)
+            if data is None:
+                up, down = self.streams[key][0:2]
+            else:
+                up, down = data["up"], data["down"]
+            self._indexStream(key, up, down)
+
+    def _indexStream(self, id, up, down):
+        """Add the stream id to the adjacency maps"""
+        self.downToEquip.setdefault(up, []).append(id)
+        self.upToEquip.setdefault(down, []).append(id)
+
+    def calGraph(self):
+        """Return the directed graph of project as a dict with the list of
+        downstream items of each item"""
+        grafo = {}
+        items = list(self.items)+list(self.downToEquip)+list(self.upToEquip)
+        for item in items:
+            if item not in grafo:
+                grafo[item] = [self.streams[key][1]
+                               for key in self.downToEquip.get(item, [])]
+        return grafo
 
     def getObject(self, id):
         if id[0] in ["e", "i", "o"]:
@@ -86,13 +229,17 @@ class Project(object):
             return self.getStream(int(id[1:]))
 
     def setPFD(self, streams):
-        self.streams = streams
+        self.setStreams(streams)
 
     def setItems(self, items):
         self.items = items
+        for item in items:
+            self.downToEquip.setdefault(item, [])
+            self.upToEquip.setdefault(item, [])
 
     def setStreams(self, streams):
         self.streams = streams
+        self._indexStreams()
 
     def setConfig(self, config):
         self.config = config
@@ -100,7 +247,8 @@ class Project(object):
     def addItem(self, id, obj):
         if id not in self.items:
             self.items[id] = obj
-            # self.graph.add_node(id)
+            self.downToEquip.setdefault(id, [])
+            self.upToEquip.setdefault(id, [])
 
     def setItem(self, id, obj):
         self.items["e%i" % id] = obj
@@ -127,9 +275,9 @@ class Project(object):
             obj = self.items[up]
 
         stream = (up, down, ind_up, ind_down, obj)
-        if id not in list(self.streams.keys()):
+        if id not in self.streams:
             self.streams[id] = stream
-            # self.graph.add_edge((up, down))
+            self._indexStream(id, up, down)
 
         if down[0] == "e":
             eq = self.items[down]
@@ -150,49 +298,335 @@ class Project(object):
     def getDownToStream(self, id):
         up, down, ind_up, ind_down, obj = self.streams[id]
         if down[0] == "e":
-            return self.getItem(int(down[1]))
+            return self.items[down]
         else:
             return obj
 
     def getDownToEquip(self, str):
-        lista = []
-        for key, value in self.streams.items():
-            if value[0] == str:
-                lista.append((key, value))
-        return lista
+        return [(key, self.streams[key])
+                for key in self.downToEquip.get(str, [])]
+
+    def getUpToEquip(self, str):
+        return [(key, self.streams[key])
+                for key in self.upToEquip.get(str, [])]
 
     def run(self, name):
-        """Ejecuta el projecto de forma recursiva hasta que encuentra un equipo no resuelto"""
-        tipo = name[0]
-        ind = int(name[1])
-
-        if tipo == "i":
-            obj = self.getInput(ind)
-            if obj.status:
-                key, (up, down, ind_up, ind_down, oldobj) = self.getDownToEquip(name)[0]
-                self.setStream(key, obj)
-                self.run("s%i" % key)
-
-        elif tipo == "e":
-            obj = self.getItem(ind)
-            if obj.status:
-                for key, (up, down, ind_up, ind_down, oldobj) in self.getDownToEquip(name):
-                    self.setStream(key, obj.salida[ind_up])
-                    self.run("s%i" % key)
-
-        elif tipo == "s":
-            up, down, ind_up, ind_down, stream = self.streams[ind]
-            if stream.status:
-                if down[0] == "e":
-                    equip = self.items[down]
-                    if isinstance(equip, Mixer):
-                        kwargs = {"entrada": stream, "id_entrada": ind_down}
-                    else:
-                        kwargs = {equip.kwargsInput[ind_down]: stream}
-                    equip(**kwargs)
-                    self.run(down)
-                elif down[0] == "o":
-                    self.setOutput(int(down[1]), stream)
+        """Solve the project after a change in the item or stream name with a
+        sequential-modular strategy:
+            -The items downstream of the change are calculated in topological
+            order of its strongly connected components, so each item is
+            calculated only once by pass
+            -The recycle loops are broken with tear streams and converged
+            with Wegstein acceleration
+
+        Return a dict with the solution statistics, saved too in the
+        statistics attribute
+
+        >>> import json
+        >>> project = Project()
+        >>> with open(os.environ["pychemqt"]+"Samples/pump.pcq") as file:
+        ...     project.readFromJSON(json.load(file))
+        >>> project.run("s1")["order"]
+        ['e1', 'o1']
+        >>> entrada = project.getStream(1)
+        >>> project.setStream(1, entrada.clone(P=2*entrada.P))
+        >>> project.statistics["calculations"]
+        1
+        >>> project.getOutput(1) is project.getStream(2)
+        True
+        """
+        inicio = time()
+        grafo = self.calGraph()
+        if name[0] == "s":
+            start = self.streams[int(name[1:])][1]
+        else:
+            start = name
+        affected = reachable(grafo, [start])
+        nodes = [node for node in grafo if node in affected]
+
+        self.statistics = {
+            "start": name,
+            "order": [],
+            "calculations": 0,
+            "skipped": 0,
+            "parallel": 0,
+            "recycles": [],
+            "converged": True}
+        position = {node: i for i, node in enumerate(nodes)}
+        components = stronglyConnected(grafo, nodes)
+        for level in levels(grafo, components):
+            single = []
+            for component in sorted(level, key=lambda c: position[c[0]]):
+                node = component[0]
+                if len(component) == 1 and node not in grafo[node]:
+                    single.append(node)
+                else:
+                    self.solveRecycle(grafo, component, start)
+            self.calculateItems(single)
+            self.statistics["order"] += single
+        self.statistics["time"] = time()-inicio
+
+        logging.info("Solve project from %s: %i calculations, %i skipped, "
+                     "%i recycles, %0.3f s" % (
+                         name, self.statistics["calculations"],
+                         self.statistics["skipped"],
+                         len(self.statistics["recycles"]),
+                         self.statistics["time"]))
+        return self.statistics
+
+    def solveRecycle(self, grafo, nodes, start=None):
+        """Converge a recycle loop, the strongly connected component with
+        nodes, iterating over the values of its tear streams"""
+        # The tear streams are chosen searching from the item where the
+        # change enter in the loop, else from the item fed from outside
+        if start not in nodes:
+            start = None
+            for node in nodes:
+                for key in self.upToEquip.get(node, []):
+                    if self.streams[key][0] not in nodes:
+                        start = node
+                        break
+                if start is not None:
+                    break
+        edges = tearEdges(grafo, nodes, start)
+        tears = [key for up, down in dict.fromkeys(edges)
+                 for key in self.downToEquip[up]
+                 if self.streams[key][1] == down]
+        order = topologicalOrder(grafo, nodes, edges)
+
+        accel = Wegstein()
+        x = self._tearValues(tears)
+        error = None
+        converged = False
+        for iteration in range(1, self.MAX_ITERATIONS+1):
+            for node in order:
+                self.calculateItem(node)
+            gx = self._tearValues(tears)
+            if gx is None:
+                # Some item of loop can't be calculated
+                break
+
+            if x is not None and x.shape == gx.shape:
+                scale = self._tearScale(tears, gx)
+                error = float(Wegstein.error(x, gx, scale))
+                if error < self.TOLERANCE:
+                    converged = True
+                    break
+                x = accel(x, gx)
+            else:
+                x = accel(gx, gx)
+            self._setTearValues(tears, x, gx)
+
+        self.statistics["order"] += order
+        self.statistics["recycles"].append({
+            "items": order,
+            "tears": tears,
+            "iterations": iteration,
+            "error": error,
+            "converged": converged})
+        if not converged:
+            self.statistics["converged"] = False
+            logging.warning("Recycle loop with tear streams %s not converged "
+                            "in %i iterations" % (tears, iteration))
+
+    def _tearValues(self, tears):
+        """Return the iteration variables of tear streams, temperature,
+        pressure and mass flow of components, or None if some stream is
+        undefined"""
+        values = []
+        for key in tears:
+            stream = self.streams[key][4]
+            if not stream.status:
+                return None
+            values.append([stream.T, stream.P])
+            values.append(stream.caudalunitariomasico)
+        return concatenate(values).astype(float)
+
+    def _tearScale(self, tears, values):
+        """Return the reference values to check the convergence, the flow of
+        components is referred to the total flow of stream"""
+        scale = []
+        i = 0
+        for key in tears:
+            n = len(self.streams[key][4].caudalunitariomasico)
+            flow = abs(values[i+2:i+2+n]).sum()
+            scale += [values[i], values[i+1]] + [flow]*n
+            i += 2+n
+        return array(scale)
+
+    def _setTearValues(self, tears, x, gx):
+        """Define the tear streams with the new iteration variables"""
+        i = 0
+        for key in tears:
+            stream = self.streams[key][4]
+            n = len(stream.caudalunitariomasico)
+            if (x[i:i+2+n] != gx[i:i+2+n]).any():
+                caudal = [max(w, 0) for w in x[i+2:i+2+n]]
+                stream = stream.clone(
+                    T=x[i], P=x[i+1], x=None, caudalUnitarioMasico=caudal,
+                    caudalUnitarioMolar=[], caudalMasico=0, caudalMolar=0,
+                    caudalVolumetrico=0, fraccionMolar=[], fraccionMasica=[])
+                self.streams[key] = self.streams[key][0:4]+(stream, )
+            i += 2+n
+
+    def calculateItems(self, names):
+        """Calculate a group of independent items, the equipments with changed
+        inputs are calculated in parallel in a pool of process if it's
+        enabled and there are several of them
+
+        >>> from equipment.flux import Divider
+        >>> agua = Corriente(T=300, P=101325, caudalMasico=1, ids=[62],
+        ...                  fraccionMolar=[1])
+        >>> project = Project()
+        >>> project.WORKERS = 2
+        >>> project.addItem("i1", agua)
+        >>> project.addItem("e1", Divider(salidas=2, split=[0.3, 0.7]))
+        >>> project.addItem("e2", Divider(salidas=1, deltaP=1000))
+        >>> project.addItem("e3", Divider(salidas=1, deltaP=5000))
+        >>> project.addItem("o1", Corriente())
+        >>> project.addItem("o2", Corriente())
+        >>> project.addStream(1, "i1", "e1")
+        >>> project.addStream(2, "e1", "e2", ind_up=0)
+        >>> project.addStream(3, "e1", "e3", ind_up=1)
+        >>> project.addStream(4, "e2", "o1")
+        >>> project.addStream(5, "e3", "o2")
+        >>> statistics = project.run("i1")
+        >>> statistics["calculations"], statistics["parallel"]
+        (2, 2)
+        >>> for i in (1, 2):
+        ...     out = project.getOutput(i)
+        ...     print("%0.1f %0.0f" % (out.caudalmasico, out.P))
+        0.3 100325
+        0.7 96325
+        >>> project.items["e2"].kwargs["entrada"] is project.getStream(2)
+        True
+        """
+        pending = []
+        for name in names:
+            if name[0] == "e" and self._inputKwargs(name):
+                pending.append(name)
+        if self.WORKERS < 2 or len(pending) < 2:
+            pending = []
+        for name in names:
+            if name not in pending:
+                self.calculateItem(name)
+
+        # The equipment and input streams are shipped to the worker process
+        # with its input kwargs and the current configuration, the results
+        # are merged back in the project instances, keeping the input
+        # streams of project
+        Config = config.getMainWindowConfig()
+        configuration = {section: dict(Config.items(section, raw=True))
+                         for section in Config.sections()}
+        futures = {}
+        for name in pending:
+            item = self.items[name]
+            kwargs = {key: value for key, value in item.kwargs.items()
+                      if key not in item.kwargs_forbidden}
+            inputs = {key: _streamKwargs(value) for key, value in
+                      self._inputKwargs(name).items()}
+            try:
+                futures[name] = _getExecutor(self.WORKERS).submit(
+                    _calculateEquipment, equipments.index(item.__class__),
+                    kwargs, inputs, configuration)
+            except Exception as error:
+                logging.warning("Parallel calculation of %s failed: %s" % (
+                    name, error))
+
+        for name in pending:
+            item = self.items[name]
+            try:
+                data, salida = futures[name].result()
+            except Exception as error:
+                if name in futures:
+                    logging.warning("Parallel calculation of %s failed: %s" % (
+                        name, error))
+                self.calculateItem(name)
+                continue
+
+            item.readFromJSON(data)
+            item.cleanOldValues(**self._inputKwargs(name))
+            item.salida = [_buildStream(kwargs) for kwargs in salida]
+            item._fingerprint = item.fingerprint()
+            self.statistics["calculations"] += 1
+            self.statistics["parallel"] += 1
+            self._updateOutputs(name)
+
+    def calculateItem(self, name):
+        """Calculate the item name with its input streams and define its
+        output streams, without propagate the change downstream
+
+        The projects loaded from file have only the equipments in items, the
+        input and output nodes are then defined by its streams"""
+        item = self.items.get(name)
+        if name[0] == "i":
+            if item is not None and item.status:
+                for key, stream in self.getDownToEquip(name):
+                    self._updateStream(key, item)
+
+        elif name[0] == "o":
+            for key, (up, down, ind_up, ind_down, obj) in \
+                    self.getUpToEquip(name):
+                self.items[name] = obj
+
+        elif name[0] == "e":
+            kwargs = self._inputKwargs(name)
+            if kwargs:
+                fingerprint = item._fingerprint
+                item(**kwargs)
+                if item._fingerprint == fingerprint:
+                    self.statistics["skipped"] += 1
+                else:
+                    self.statistics["calculations"] += 1
+            else:
+                self.statistics["skipped"] += 1
+            self._updateOutputs(name)
+
+    def _updateOutputs(self, name):
+        """Define the output streams of equipment name with its results"""
+        item = self.items[name]
+        if item.status:
+            for key, stream in self.getDownToEquip(name):
+                ind_up = stream[2]
+                if ind_up < len(item.salida):
+                    self._updateStream(key, item.salida[ind_up])
+
+    def _updateStream(self, id, obj):
+        """Define the stream id in the solution of project, the old instance
+        is kept if the new one has the same state, so the change isn't
+        propagated to the downstream items"""
+        up, down, ind_up, ind_down, old = self.streams[id]
+        if old is obj:
+            return
+        if old.status and obj.status and \
+                old.fingerprint() == obj.fingerprint():
+            return
+        self.streams[id] = (up, down, ind_up, ind_down, obj)
+
+    def _inputKwargs(self, name):
+        """Return the kwargs to define the input streams of equipment name
+        changed from its last calculation"""
+        equip = self.items[name]
+        kwargs = {}
+        if isinstance(equip, Mixer):
+            entrada = equip.kwargs["entrada"][:]
+            changed = False
+            for key, (up, down, ind_up, ind_down, obj) in \
+                    self.getUpToEquip(name):
+                while len(entrada) <= ind_down:
+                    entrada.append(Corriente())
+                if entrada[ind_down] is not obj:
+                    entrada[ind_down] = obj
+                    changed = True
+            if changed:
+                kwargs["entrada"] = entrada
+        else:
+            for key, (up, down, ind_up, ind_down, obj) in \
+                    self.getUpToEquip(name):
+                kw = equip.kwargsInput[ind_down]
+                if equip.kwargs[kw] is not obj:
+                    kwargs[kw] = obj
+        return kwargs
 
     def writeToJSON(self, data):
         """Write the project to a dictionary to save to file in json format"""
@@ -228,8 +662,23 @@ class Project(object):
         data["stream"] = streams
 
     def readFromJSON(self, data, huella=True):
-        """Read project from stream
-        huella: boolean to save project file to pychemqt_temporal"""
+        """Read project from stream, the equipments and streams are built
+        only when are requested
+        huella: boolean to save project file to pychemqt_temporal
+
+        >>> import json
+        >>> project = Project()
+        >>> with open(os.environ["pychemqt"]+"Samples/flujo.pcq") as file:
+        ...     project.readFromJSON(json.load(file))
+        >>> len(project.items), len(project.streams)
+        (3, 5)
+        >>> project.items.serialization("e1") is None
+        False
+        >>> project.items["e1"].kwargs["entrada"] is project.getStream(1)
+        True
+        >>> project.items.serialization("e1") is None
+        True
+        """
         # read configuration
         config = ConfigParser()
         for section, options in data["config"].items():
@@ -242,49 +691,63 @@ class Project(object):
             os.rename(conf_dir+"pychemqtrc_temporal", conf_dir+"pychemqtrc_temporal_bak")
         config.write(open(conf_dir+"pychemqtrc_temporal", "w"))
 
-        # read equipments
-        items = {}
-        for id, equip in data["equipment"].items():
-            if id[0] == "e":
-                index = equip["id"]
-                eq = equipments[index]()
-                eq.readFromJSON(equip)
-            else:
-                eq = None
-            items[id] = eq
-        self.setItems(items)
+        # The equipments and streams are read when are requested, an
+        # equipment is connected in that moment with its streams as read
+        # from file, even if they are changed later in project
+        read = {}
 
-        # read streams
-        streams = {}
-        for id, stream in data["stream"].items():
-            id = int(id)
-            up = stream["up"]
-            down = stream["down"]
-            ind_up = stream["ind_up"]
-            ind_down = stream["ind_down"]
-            obj = Corriente()
-            obj.readFromJSON(stream)
-            streams[id] = (up, down, ind_up, ind_down, obj)
+        def item(id, equip):
+            if id[0] != "e":
+                return None
+            eq = equipments[equip["id"]]()
+            eq.readFromJSON(equip)
             if huella:
-                if down[0] == "e":
-                    equip = self.items[down]
-                    if isinstance(equip, Mixer):
-                        kwargs = {"entrada": obj, "id_entrada": ind_down}
-                        equip.cleanOldValues(**kwargs)
-                    else:
-                        kwargs = {equip.kwargsInput[ind_down]: obj}
-                        equip.kwargs.update(kwargs)
-                if up[0] == "e":
-                    equip = self.items[up]
-                    # Equipment with variable output streams must be corrected
-                    while len(equip.salida) <= ind_up:
-                        equip.salida.append(None)
-                    equip.salida[ind_up] = obj
-        self.setStreams(streams)
+                self._connect(id, eq, read)
+            return eq
+
+        def stream(id, data):
+            obj = Corriente()
+            obj.readFromJSON(data)
+            read[id] = (data["up"], data["down"], data["ind_up"],
+                        data["ind_down"], obj)
+            return read[id]
+
+        keys = {int(id): id for id in data["stream"]}
+        self.setItems(_LazyObjects(data["equipment"], item))
+        self.setStreams(_LazyObjects(data["stream"], stream, keys))
 
         if not huella:
+            # The project is read with its configuration, so all objects
+            # are built now
+            for id in self.items:
+                self.items[id]
+            for id in self.streams:
+                self.streams[id]
             os.rename(conf_dir+"pychemqtrc_temporal_bak", conf_dir+"pychemqtrc_temporal")
 
+    def _connect(self, id, equip, read):
+        """Define the input and output streams of equipment id read from
+        file, read is the dict with the streams as read from file"""
+        def stream(key):
+            if key not in read:
+                self.streams[key]
+            return read[key]
+
+        for key in self.upToEquip.get(id, []):
+            up, down, ind_up, ind_down, obj = stream(key)
+            if isinstance(equip, Mixer):
+                kwargs = {"entrada": obj, "id_entrada": ind_down}
+                equip.cleanOldValues(**kwargs)
+            else:
+                kwargs = {equip.kwargsInput[ind_down]: obj}
+                equip.kwargs.update(kwargs)
+        for key in self.downToEquip.get(id, []):
+            up, down, ind_up, ind_down, obj = stream(key)
+            # Equipment with variable output streams must be corrected
+            while len(equip.salida) <= ind_up:
+                equip.salida.append(None)
+            equip.salida[ind_up] = obj
+
     # def printer(self):
         # # Draw as PNG
         # dot = write(self.graph)
@@ -292,17 +755,21 @@ class Project(object):
         # gv.layout(gvv, 'dot')
         # gv.render(gvv, 'png', 'project.png')
 
-    # def cycle(self):
-        # cicle = find_cycle(self.graph)
-        # if cicle:
-            # return cicle
-        # else:
-            # return None
-
-    # def hasCycle(self):
-        # """Detect cycle in project"""
-        # cicle = self.cycle()
-        # return bool(cicle)
+    def cycle(self):
+        """Return the list of recycle loops of project, each one as the list
+        of its items"""
+        grafo = self.calGraph()
+        cicle = []
+        for component in stronglyConnected(grafo):
+            node = component[0]
+            if len(component) > 1 or node in grafo[node]:
+                cicle.append(component)
+        return cicle
+
+    def hasCycle(self):
+        """Detect cycle in project"""
+        cicle = self.cycle()
+        return bool(cicle)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,351 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+'''Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2016, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
+
+
+###############################################################################
+# Compact binary project file, alternative to the json .pcq format
+#   -dump: Save the project json serialization to a compact file
+#   -load: Read a project file in any format
+#   -isCompact: Check if a file is in compact format
+#   -toPcq: Convert a compact project file to json
+#   -fromPcq: Convert a json project file to compact format
+#   -ProjectFile: Lazy read access to a compact project file
+#
+# The file has the layout:
+#   -Header: magic, version, flags and position of the index
+#   -Blocks of data, compressed with zlib if it's enabled in flags
+#   -Index: json with the position of every block
+#
+# The numeric values of stream serializations are saved in a columnar
+# table, a column for each property path and type with the rows defined and
+# its values as numpy array. The remaining of each stream, text, list and
+# empty dicts, and the equipment serializations are saved as json blocks
+# indexed by id, so they can be read on demand without parse the whole file
+###############################################################################
+
+
+from collections.abc import Mapping
+import json
+import struct
+import zlib
+
+from numpy import array, frombuffer
+
+
+MAGIC = b"PCZ\x00"
+VERSION = 1
+COMPRESS = 1
+_header = struct.Struct("<4sHHQQ")
+
+# Type of numeric values saved in columns, with its numpy dtype
+_dtype = {"f": "<f8", "i": "<i8", "b": "|b1"}
+_kind = {float: "f", int: "i", bool: "b"}
+_type = {"f": float, "i": int, "b": bool}
+
+
+def _flatten(data, path=()):
+    """Split a json serialization in its numeric values, as a list of
+    (path, value), and the remaining dict without them"""
+    values = []
+    rest = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            val, rst = _flatten(value, path+(str(key), ))
+            values += val
+            if rst:
+                rest[key] = rst
+        elif type(value) in _kind or isinstance(value, float):
+            values.append((path+(str(key), ), value))
+        else:
+            rest[key] = value
+    return values, rest
+
+
+def _unflatten(rest, values):
+    """Rebuild the json serialization from the split values"""
+    parents = {(): rest}
+    for path, value in values:
+        data = parents.get(path[:-1])
+        if data is None:
+            data = rest
+            for key in path[:-1]:
+                data = data.setdefault(key, {})
+            parents[path[:-1]] = data
+        data[path[-1]] = value
+    return rest
+
+
+class _Writer(object):
+    """Buffer of blocks of file, return the position of each one"""
+
+    def __init__(self, compress):
+        self.compress = compress
+        self.blocks = []
+        self.pos = _header.size
+
+    def add(self, data):
+        if self.compress:
+            data = zlib.compress(data)
+        self.blocks.append(data)
+        block = (self.pos, len(data))
+        self.pos += len(data)
+        return block
+
+    def addJSON(self, data):
+        return self.add(json.dumps(data, separators=(",", ":")).encode())
+
+
+def dump(data, fname, compress=True):
+    """Save the project serialization in compact format
+    data: dict with the project serialization as in Project.writeToJSON,
+        with the PFD and other windows configuration
+    fname: path of file
+    compress: boolean to compress the blocks of data"""
+    writer = _Writer(compress)
+    index = {}
+    index["header"] = writer.addJSON(
+        {key: value for key, value in data.items()
+         if key not in ("stream", "equipment")})
+
+    index["equipment"] = {}
+    for id, equip in data.get("equipment", {}).items():
+        index["equipment"][str(id)] = writer.addJSON(equip)
+
+    # Streams numeric values in columns
+    columns = {}
+    index["stream"] = {}
+    for row, (id, stream) in enumerate(data.get("stream", {}).items()):
+        values, rest = _flatten(stream)
+        for path, value in values:
+            kind = _kind.get(type(value), "f")
+            column = columns.setdefault((path, kind), ([], []))
+            column[0].append(row)
+            column[1].append(value)
+        index["stream"][str(id)] = (row, writer.addJSON(rest))
+
+    index["columns"] = []
+    for (path, kind), (rows, values) in columns.items():
+        index["columns"].append((
+            path, kind,
+            writer.add(array(rows, dtype="<i4").tobytes()),
+            writer.add(array(values, dtype=_dtype[kind]).tobytes())))
+
+    flags = COMPRESS if compress else 0
+    indexblock = json.dumps(index, separators=(",", ":")).encode()
+    if compress:
+        indexblock = zlib.compress(indexblock)
+    with open(fname, "wb") as file:
+        file.write(_header.pack(
+            MAGIC, VERSION, flags, writer.pos, len(indexblock)))
+        for block in writer.blocks:
+            file.write(block)
+        file.write(indexblock)
+
+
+class _Objects(Mapping):
+    """Mapping of id with the serialization of equipments or streams of
+    project file, read from file when are requested"""
+
+    def __init__(self, file, kind):
+        self.file = file
+        self.kind = kind
+
+    def __getitem__(self, id):
+        return self.file.getObject(self.kind, id)
+
+    def __iter__(self):
+        return iter(self.file.index[self.kind])
+
+    def __len__(self):
+        return len(self.file.index[self.kind])
+
+
+class ProjectFile(Mapping):
+    """Read access to a project file in compact format, it can be used as
+    the dict of project serialization with the json format, the equipment
+    and stream serializations are read only when are requested
+
+    The columnar table of streams values is read in the first stream
+    request, and the serializations are returned as new dict so they can be
+    modified without change the file values"""
+
+    def __init__(self, fname):
+        self.fname = fname
+        with open(fname, "rb") as file:
+            magic, version, flags, pos, length = _header.unpack(
+                file.read(_header.size))
+            if magic != MAGIC:
+                raise IOError("%s isn't a compact project file" % fname)
+            if version > VERSION:
+                raise IOError("Unsupported project file version %i" % version)
+            self.compress = bool(flags & COMPRESS)
+            file.seek(pos)
+            self.index = json.loads(self._decode(file.read(length)))
+        self.header = self._readJSON(self.index["header"])
+        self._columns = None
+
+    def _decode(self, data):
+        if self.compress:
+            data = zlib.decompress(data)
+        return data
+
+    def _read(self, block, file=None):
+        """Read a block of file, given by position and length"""
+        pos, length = block
+        if file is None:
+            with open(self.fname, "rb") as file:
+                file.seek(pos)
+                return self._decode(file.read(length))
+        file.seek(pos)
+        return self._decode(file.read(length))
+
+    def _readJSON(self, block, file=None):
+        return json.loads(self._read(block, file).decode())
+
+    def _readColumns(self):
+        """Read the columnar table of stream numeric values, as a list of
+        (path, type, rows, values), with rows and values as numpy arrays"""
+        columns = []
+        with open(self.fname, "rb") as file:
+            for path, kind, rowblock, valueblock in self.index["columns"]:
+                rows = frombuffer(self._read(rowblock, file), dtype="<i4")
+                values = frombuffer(
+                    self._read(valueblock, file), dtype=_dtype[kind])
+                columns.append((tuple(path), _type[kind], rows, values))
+        return columns
+
+    def getObject(self, kind, id):
+        """Return the serialization of object id, kind is stream or
+        equipment"""
+        id = str(id)
+        if kind == "equipment":
+            return self._readJSON(self.index["equipment"][id])
+
+        row, block = self.index["stream"][id]
+        if self._columns is None:
+            self._columns = self._readColumns()
+
+        # The rows of each column are sorted, so the value of stream is
+        # located with a binary search
+        values = []
+        for path, tipo, rows, value in self._columns:
+            i = rows.searchsorted(row)
+            if i < len(rows) and rows[i] == row:
+                values.append((path, tipo(value[i])))
+        return _unflatten(self._readJSON(block), values)
+
+    def __getitem__(self, key):
+        if key in ("stream", "equipment"):
+            return _Objects(self, key)
+        return self.header[key]
+
+    def __iter__(self):
+        yield from self.header
+        yield "equipment"
+        yield "stream"
+
+    def __len__(self):
+        return len(self.header)+2
+
+    def toDict(self):
+        """Return the full project serialization as dict"""
+        data = dict(self.header)
+        data["equipment"] = {id: self.getObject("equipment", id)
+                             for id in self.index["equipment"]}
+
+        # Group the values of columns by stream in a single pass
+        if self._columns is None:
+            self._columns = self._readColumns()
+        values = {}
+        for path, tipo, rows, value in self._columns:
+            for row, val in zip(rows.tolist(), value.tolist()):
+                values.setdefault(row, []).append((path, tipo(val)))
+        data["stream"] = {}
+        with open(self.fname, "rb") as file:
+            for id, (row, block) in self.index["stream"].items():
+                data["stream"][id] = _unflatten(
+                    self._readJSON(block, file), values.get(row, []))
+        return data
+
+
+def isCompact(fname):
+    """Check if fname is a project file in compact format"""
+    with open(fname, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def load(fname):
+    """Read the project file fname, in json or compact format, the compact
+    format return a ProjectFile instance with lazy loading of objects
+
+    Round trip of a sample project between the json and compact formats
+
+    >>> import os, shutil, tempfile
+    >>> pcq = os.path.join(os.environ["pychemqt"], "Samples", "flujo.pcq")
+    >>> data = load(pcq)
+    >>> folder = tempfile.mkdtemp()
+    >>> pcz = os.path.join(folder, "flujo.pcz")
+    >>> fromPcq(pcq, pcz)
+    >>> print(isCompact(pcz), isCompact(pcq))
+    True False
+    >>> project = load(pcz)
+    >>> print(len(project["equipment"]), len(project["stream"]))
+    3 5
+    >>> print(project["stream"]["1"] == data["stream"]["1"])
+    True
+    >>> print(project.toDict() == data)
+    True
+    >>> toPcq(pcz, os.path.join(folder, "flujo.pcq"))
+    >>> print(load(os.path.join(folder, "flujo.pcq")) == data)
+    True
+    >>> dump(data, pcz, compress=False)
+    >>> print(load(pcz).toDict() == data)
+    True
+    >>> shutil.rmtree(folder)
+    """
+    if isCompact(fname):
+        return ProjectFile(fname)
+    with open(fname, "r") as file:
+        return json.load(file)
+
+
+def toPcq(fname, pcq):
+    """Convert the compact project file fname to json format in pcq"""
+    data = ProjectFile(fname).toDict()
+    with open(pcq, "w") as file:
+        json.dump(data, file, indent=4)
+
+
+def fromPcq(pcq, fname, compress=True):
+    """Convert the json project file pcq to compact format in fname"""
+    with open(pcq, "r") as file:
+        data = json.load(file)
+    dump(data, fname, compress)
+
+
+if __name__ == "__main__":
+    import sys
+
+    # Convert project files between formats, by the extension of input file
+    for fname in sys.argv[1:]:
+        name, ext = fname.rsplit(".", 1)
+        if ext == "pcz":
+            toPcq(fname, name+".pcq")
+        else:
+            fromPcq(fname, name+".pcz")
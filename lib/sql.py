@@ -27,11 +27,18 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 #   -deleteElement: Delete Element with indice from custom Database
 #   -getElement: Get element from database
 #   -copyElement: Create a copy of element of indice in custom Database
+#   -getConnection: Shared read only connection to database
+#   -databaseName: Name of database with the element of indice
+#   -getElements: Get columns of several elements as arrays in a single query
 ###############################################################################
 
 
 import os
 import sqlite3
+import threading
+from urllib.request import pathname2url
+
+from numpy import array, nan
 
 
 databank_name = os.environ["pychemqt"] + 'dat'+os.sep+'databank.db'
@@ -49,6 +56,61 @@ except sqlite3.OperationalError:
     N_comp_Custom = 0
 
 
+# Read only connections to databases, opened only once in each thread of
+# process, sqlite connections can't be shared between threads
+_connections = threading.local()
+
+# Counter of changes in custom database, used to invalidate the saved
+# components
+revision = 0
+
+# Groups of columns of compuestos table to query together with getElements
+columnGroups = {
+    "name": ("formula", "nombre", "peso_molecular"),
+    "critical": ("peso_molecular", "tc", "pc", "vc", "factor_acentrico"),
+    "cp_ideal": ("Cp_ideal_A", "Cp_ideal_B", "Cp_ideal_C", "Cp_ideal_D",
+                 "Cp_ideal_E", "Cp_ideal_F"),
+    "antoine": ("antoine_A", "antoine_B", "antoine_C"),
+    "henry": ("henry_A", "henry_B", "henry_C", "henry_D"),
+    "visco": ("visco_A", "visco_B"),
+    "tension": ("tension_A", "tension_B")}
+for prop in ("rhoS", "rhoL", "Pv", "Hv", "CpS", "CpL", "CpG", "muL", "muG",
+             "ThcondL", "ThcondG", "tension"):
+    columnGroups[prop+"_DIPPR"] = tuple(
+        "%s_DIPPR_%s" % (prop, c)
+        for c in ("EQ", "A", "B", "C", "D", "E", "tmin", "tmax"))
+
+# Declared type of columns in compuestos table, filled in the first query
+_columnTypes = {}
+
+
+def getConnection(name):
+    """Return the read only connection to database, shared for all the
+    queries of the thread"""
+    connections = getattr(_connections, "cache", None)
+    if connections is None:
+        connections = _connections.cache = {}
+    key = (name, os.getpid())
+    if key not in connections:
+        uri = "file:%s?mode=ro" % pathname2url(name)
+        connections[key] = sqlite3.connect(uri, uri=True)
+    return connections[key]
+
+
+def databaseName(indice):
+    """Return the name of database with the element of indice"""
+    if indice > 1000:
+        return databank_Custom_name
+    else:
+        return databank_name
+
+
+def _customChanged():
+    """Register a change in custom database"""
+    global revision
+    revision += 1
+
+
 def createDatabase(name):
     """Create empty database"""
     conn = sqlite3.connect(name)
@@ -347,6 +409,8 @@ def inserElementsFromArray(name, lista):
         curs.execute(query+str(tuple(vals)))
     conn.commit()
     conn.close()
+    if name == databank_Custom_name:
+        _customChanged()
 
 
 def updateElement(elemento, indice):
@@ -409,6 +473,7 @@ def updateElement(elemento, indice):
                          % (variable, valor, indice))
     conn.commit()
     conn.close()
+    _customChanged()
 
 
 def deleteElement(indice):
@@ -418,22 +483,83 @@ def deleteElement(indice):
     curs.execute("DELETE FROM compuestos WHERE id=%i" % indice)
     conn.commit()
     conn.close()
+    _customChanged()
 
 
 def getElement(indice):
     """Get element from database
     indice: index in databank of element"""
-    if indice > 1000:
-        db_Custom = sqlite3.connect(databank_Custom_name).cursor()
-        db_Custom.execute("select * from compuestos where id==%i" % indice)
-        componente = db_Custom.fetchone()
-    else:
-        db = sqlite3.connect(databank_name).cursor()
-        db.execute("select * from compuestos where id==%i" % indice)
-        componente = db.fetchone()
+    conn = getConnection(databaseName(indice))
+    cursor = conn.execute("select * from compuestos where id==?", (indice, ))
+    componente = cursor.fetchone()
+    cursor.close()
     return componente
 
 
+def _getColumnTypes():
+    """Return a dict with the declared type of columns of compuestos table"""
+    if not _columnTypes:
+        conn = getConnection(databank_name)
+        for row in conn.execute("PRAGMA table_info(compuestos)"):
+            _columnTypes[row[1]] = row[2].upper()
+    return _columnTypes
+
+
+def getElements(indices, columns=None, groups=()):
+    """Get several elements from database, with only one query for each
+    database involved
+    indices: list with index in databank of elements
+    columns: list with name of columns to get, all columns if it's not
+        defined nor groups
+    groups: list with names of group of columns in columnGroups to get
+
+    Return a dict with column name as key and a numpy array with the values
+    of the elements in the order of indices, text columns as object arrays
+    and numeric columns as float arrays with nan for undefined values"""
+    types = _getColumnTypes()
+    if columns is None and not groups:
+        columns = list(types.keys())
+    else:
+        columns = list(columns or [])
+        for group in groups:
+            columns.extend(columnGroups[group])
+        columns = list(dict.fromkeys(columns))
+    for column in columns:
+        if column not in types:
+            raise ValueError("Unknown column %s in databank" % column)
+
+    indices = [int(i) for i in indices]
+    bydatabase = {}
+    for indice in indices:
+        bydatabase.setdefault(databaseName(indice), []).append(indice)
+
+    query = "SELECT id, %s FROM compuestos WHERE id IN (%s)"
+    rows = {}
+    for name, ids in bydatabase.items():
+        ids = list(set(ids))
+        conn = getConnection(name)
+        cursor = conn.execute(
+            query % (", ".join(columns), ", ".join("?"*len(ids))), ids)
+        for row in cursor:
+            rows[row[0]] = row[1:]
+        cursor.close()
+
+    for indice in indices:
+        if indice not in rows:
+            raise KeyError("Element %i not found in databank" % indice)
+
+    data = {}
+    for i, column in enumerate(columns):
+        values = [rows[indice][i] for indice in indices]
+        if types[column] == "TEXT":
+            data[column] = array(values, dtype=object)
+        else:
+            data[column] = array(
+                [nan if v is None or v == "" else v for v in values],
+                dtype=float)
+    return data
+
+
 def copyElement(indice):
     """Create a copy of element of indice in custom Database"""
     elemento = getElement(indice)
@@ -444,6 +570,7 @@ def copyElement(indice):
                  str((1001+N_comp_Custom, ) + vals))
     conn.commit()
     conn.close()
+    _customChanged()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,311 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+
+"""Pychemqt, Chemical Engineering Process simulator
+Copyright (C) 2016, Juan José Gómez Romera <jjgomera@gmail.com>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>."""
+
+
+###############################################################################
+# Light thermodynamic state of a stream, for the trial evaluations of
+# equipment calculations
+#   -StreamState: Immutable state with lazy calculated properties
+#
+# The state is defined by temperature, pressure and the molar flow of
+# components, the phase split and the properties are calculated only in
+# its first use. A full Corriente instance, with transport properties and
+# the text report, is only needed for the final output streams
+###############################################################################
+
+
+from numpy import array
+
+from lib import unidades
+from lib.compuestos import getComponente
+from lib.mezcla import Mezcla
+from lib.physics import R
+
+
+def _cached(method):
+    """Decorator to define a property calculated only in its first use, the
+    value is saved in the _cache dict of state"""
+    name = method.__name__
+
+    def get(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = method(self)
+            return value
+    get.__doc__ = method.__doc__
+    return property(get)
+
+
+class StreamState(object):
+    """Immutable thermodynamic state of a stream, cheap to create and without
+    any of the user interface functionality of Corriente
+
+    Parameters:
+        T: temperature, K
+        P: pressure, Pa
+        ids: list with index of components
+        caudalunitariomolar: array with molar flows of components, kmol/s
+        K: equation of state class for phase equilibrium
+        H: equation of state class for enthalpy, default K
+        fluid: function returning the thermodynamic backend instance for a
+            state, fluid(state), used for the backends others than cubic
+            equations of state like meos or iapws
+        mezcla: optional Mezcla instance with the same composition, to avoid
+            its recalculation
+
+    The temperature, pressure and flows are saved as float and numpy arrays,
+    the enthalpy h and entropy s are specific values, J/kg and J/kgK, as in
+    the thermodynamic backends, not the total values of Corriente
+
+    >>> from lib.EoS.cubic import PR
+    >>> state = StreamState(300, 101325, [2, 3], [0.5, 0.5], K=PR)
+    >>> "%0.4f %0.4f" % (state.caudalmasico, state.fraccion[0])
+    '23.0565 0.5000'
+    >>> state.x
+    1.0
+    >>> "%0.4f" % state.clone(T=150).x
+    '0.5088'
+    >>> state.clone(T=100).x
+    0.0
+
+    The entropy isn't calculated with cubic equations of state
+    >>> state.s
+    nan
+    """
+    __slots__ = ("T", "P", "ids", "caudalunitariomolar", "K", "H", "fluid",
+                 "_cache")
+
+    def __init__(self, T, P, ids, caudalunitariomolar, K=None, H=None,
+                 fluid=None, mezcla=None):
+        if K is None and fluid is None:
+            raise ValueError("StreamState need a thermodynamic backend")
+        setattr_ = object.__setattr__
+        setattr_(self, "T", float(T))
+        setattr_(self, "P", float(P))
+        setattr_(self, "ids", list(ids))
+        setattr_(self, "caudalunitariomolar",
+                 array(caudalunitariomolar, dtype=float))
+        setattr_(self, "K", K)
+        setattr_(self, "H", H if H is not None else K)
+        setattr_(self, "fluid", fluid)
+        setattr_(self, "_cache", {})
+        if mezcla is not None:
+            self._cache["mezcla"] = mezcla
+
+    def __setattr__(self, key, value):
+        raise AttributeError("StreamState is immutable, use clone method")
+
+    def __repr__(self):
+        return "StreamState at %0.2fK and %0.2fatm" % (
+            self.T, self.P/101325.)
+
+    def clone(self, T=None, P=None, caudalunitariomolar=None):
+        """Return a new state changing any of temperature, pressure or molar
+        flows of components, with the same thermodynamic backend"""
+        if T is None:
+            T = self.T
+        if P is None:
+            P = self.P
+        if caudalunitariomolar is None:
+            caudalunitariomolar = self.caudalunitariomolar
+            mezcla = self._cache.get("mezcla")
+        else:
+            mezcla = None
+        return StreamState(T, P, self.ids, caudalunitariomolar, self.K,
+                           self.H, self.fluid, mezcla)
+
+    @property
+    def kwargs(self):
+        """Dict with the parameters to create the Corriente instance with
+        the state"""
+        return {"T": self.T, "P": self.P, "ids": self.ids,
+                "caudalUnitarioMolar": list(self.caudalunitariomolar)}
+
+    # Composition
+    @_cached
+    def componente(self):
+        return [getComponente(int(i)) for i in self.ids]
+
+    @_cached
+    def caudalmolar(self):
+        """Molar flow, kmol/s"""
+        return self.caudalunitariomolar.sum()
+
+    @_cached
+    def fraccion(self):
+        """Array with molar fractions"""
+        return self.caudalunitariomolar/self.caudalmolar
+
+    @_cached
+    def caudalunitariomasico(self):
+        """Array with mass flows of components, kg/s"""
+        M = array([cmp.M for cmp in self.componente], dtype=float)
+        return self.caudalunitariomolar*M
+
+    @_cached
+    def caudalmasico(self):
+        """Mass flow, kg/s"""
+        return self.caudalunitariomasico.sum()
+
+    @_cached
+    def fraccion_masica(self):
+        """Array with mass fractions"""
+        return self.caudalunitariomasico/self.caudalmasico
+
+    @_cached
+    def M(self):
+        """Molecular weight, g/mol"""
+        return self.caudalmasico/self.caudalmolar
+
+    @_cached
+    def mezcla(self):
+        """Mixture definition used as input of equations of state"""
+        return Mezcla(2, ids=self.ids,
+                      caudalUnitarioMolar=list(self.caudalunitariomolar))
+
+    # Thermodynamic backend
+    @_cached
+    def eos(self):
+        """Instance of thermodynamic backend at the state, the equation of
+        state for phase equilibrium or the fluid instance"""
+        if self.fluid is not None:
+            return self.fluid(self)
+        return self.K(self.T, self.P/101325., self.mezcla)
+
+    @_cached
+    def x(self):
+        """Vapor fraction"""
+        return float(self.eos.x)
+
+    @_cached
+    def xi(self):
+        """Array with the molar fractions of liquid phase"""
+        if self.fluid is not None:
+            return self.fraccion
+        return array(self.eos.xi, dtype=float)
+
+    @_cached
+    def yi(self):
+        """Array with the molar fractions of vapor phase"""
+        if self.fluid is not None:
+            return self.fraccion
+        return array(self.eos.yi, dtype=float)
+
+    @_cached
+    def Ki(self):
+        """Array with the equilibrium ratios, only for equations of state"""
+        return array(self.eos.Ki, dtype=float)
+
+    def _Dew_T(self):
+        return self.eos._Dew_T()
+
+    def _Bubble_T(self):
+        return self.eos._Bubble_T()
+
+    @_cached
+    def _phases(self):
+        """Calculate the phases of stream with the enthalpy and heat capacity
+        as in Corriente, return a tuple (Liquido, Gas, H_exc)"""
+        eos = self.eos
+        T = unidades.Temperature(self.T)
+        x = self.x
+        mezcla = self.mezcla
+        if 0. < x < 1.:
+            Liquido = Mezcla(tipo=5, ids=self.ids, fraccionMolar=eos.xi,
+                             caudalMolar=mezcla.caudalmolar*(1-x))
+            Gas = Mezcla(tipo=5, ids=self.ids, fraccionMolar=eos.yi,
+                         caudalMolar=mezcla.caudalmolar*x)
+        elif x <= 0:
+            Liquido = mezcla
+            Gas = Mezcla()
+        else:
+            Liquido = Mezcla()
+            Gas = mezcla
+        Gas.Z = unidades.Dimensionless(float(eos.Z[0]))
+        Liquido.Z = unidades.Dimensionless(float(eos.Z[1]))
+
+        if self.H is self.K:
+            eosH = eos
+        else:
+            eosH = self.H(T, self.P/101325., mezcla)
+        H_exc = eosH.H_exc
+
+        Liquido.h = unidades.Power(0)
+        Gas.h = unidades.Power(0)
+        if x < 1:
+            # There is liquid phase
+            Hl = (Liquido.Entalpia_ideal(T).Jg-Liquido.Hv_DIPPR(T).Jg) * \
+                Liquido.caudalmasico.gh
+            Liquido.h = unidades.Power(
+                Hl-R*T/mezcla.M*H_exc[1]*(1-x)*Liquido.caudalmasico.gh, "Jh")
+            Liquido.cp = Liquido.Cp_Liquido(T)
+        if x > 0:
+            # There is gas phase
+            Hg = Gas.Entalpia_ideal(T).Jg*Gas.caudalmasico.gh
+            Gas.h = unidades.Power(
+                Hg-R*T/mezcla.M*H_exc[0]*x*Gas.caudalmasico.gh, "Jh")
+            Gas.cp = Gas.Cp_Gas(T, self.P/101325.)
+        return Liquido, Gas, H_exc
+
+    @property
+    def Liquido(self):
+        """Liquid phase"""
+        if self.fluid is not None:
+            return self.eos.Liquido
+        return self._phases[0]
+
+    @property
+    def Gas(self):
+        """Vapor phase"""
+        if self.fluid is not None:
+            return self.eos.Gas
+        return self._phases[1]
+
+    @property
+    def H_exc(self):
+        return self._phases[2]
+
+    @_cached
+    def h(self):
+        """Specific enthalpy, J/kg"""
+        if self.fluid is not None:
+            return float(self.eos.h)
+        return (self.Liquido.h+self.Gas.h)/self.caudalmasico
+
+    @_cached
+    def s(self):
+        """Specific entropy, J/kgK, nan with cubic equations of state as the
+        entropy isn't calculated with them"""
+        if self.fluid is not None:
+            return float(self.eos.s)
+        return float("nan")
+
+    @_cached
+    def cp(self):
+        """Specific heat capacity at constant pressure, J/kgK, for cubic
+        equations of state the mass weighted mean of phases"""
+        if self.fluid is not None:
+            return float(self.eos.cp)
+        cp = 0
+        if self.x < 1:
+            cp += self.Liquido.cp*self.Liquido.caudalmasico
+        if self.x > 0:
+            cp += self.Gas.cp*self.Gas.caudalmasico
+        return cp/self.caudalmasico
@@ -134,68 +134,104 @@ class Fluid(object):
             self.caudalunitariomolar = [unidades.MolarFlow(x) for x in fluid["molarUnitFlow"]]
 
 
+class _LazyProperty(object):
+    """Phase property calculated in the first access, together with the rest
+    of properties of its group. The value is saved in the instance, so later
+    accesses don't use the descriptor. Without calculation function defined
+    return None like a null property"""
+    def __init__(self, group):
+        self.group = group
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return None
+        loader = instance.__dict__.get("_lazy", {}).pop(self.group, None)
+        if loader is not None:
+            loader()
+        return instance.__dict__.get(self.name)
+
+
 class Fluid_MEOS(Fluid):
-    """Extended custom object for meos"""
-    v = None
-    rho = None
-
-    h = None
-    s = None
-    u = None
-    a = None
-    g = None
-
-    cp = None
-    cv = None
-    cp_cv = None
-    w = None
-    Z = None
-    fi = None
-    f = None
-
-    rhoM = None
-    hM = None
-    sM = None
-    uM = None
-    aM = None
-    gM = None
-    cvM = None
-    cpM = None
-
-    mu = None
-    k = None
-    nu = None
-    Prandt = None
-    epsilon = None
-    alfa = None
+    """Extended custom object for meos
+
+    The properties are defined by groups, which can be calculated when used
+    the first time, see _setLazy"""
+    v = _LazyProperty("thermo")
+    rho = _LazyProperty("thermo")
+
+    h = _LazyProperty("thermo")
+    s = _LazyProperty("thermo")
+    u = _LazyProperty("thermo")
+    a = _LazyProperty("thermo")
+    g = _LazyProperty("thermo")
+
+    cp = _LazyProperty("thermo")
+    cv = _LazyProperty("thermo")
+    cp_cv = _LazyProperty("thermo")
+    w = _LazyProperty("thermo")
+    Z = _LazyProperty("thermo")
+    fi = _LazyProperty("thermo")
+    f = _LazyProperty("thermo")
+
+    rhoM = _LazyProperty("thermo")
+    hM = _LazyProperty("thermo")
+    sM = _LazyProperty("thermo")
+    uM = _LazyProperty("thermo")
+    aM = _LazyProperty("thermo")
+    gM = _LazyProperty("thermo")
+    cvM = _LazyProperty("thermo")
+    cpM = _LazyProperty("thermo")
+
+    mu = _LazyProperty("transport")
+    k = _LazyProperty("transport")
+    nu = _LazyProperty("transport")
+    Prandt = _LazyProperty("transport")
+    epsilon = _LazyProperty("dielectric")
+    alfa = _LazyProperty("transport")
     n = None
 
-    alfap = None
-    betap = None
-    joule = None
-    Gruneisen = None
-    alfav = None
-    kappa = None
-    betas = None
-    gamma = None
-    Kt = None
-    kt = None
-    Ks = None
-    ks = None
-    dpdT_rho = None
-    dpdrho_T = None
-    drhodT_P = None
-    drhodP_T = None
-    dhdT_rho = None
-    dhdT_P = None
-    dhdrho_T = None
-    dhdrho_P = None
-    dhdP_T = None
-    dhdP_rho = None
-
-    Z_rho = None
-    IntP = None
-    hInput = None
+    alfap = _LazyProperty("thermo")
+    betap = _LazyProperty("thermo")
+    joule = _LazyProperty("derivatives")
+    Gruneisen = _LazyProperty("derivatives")
+    alfav = _LazyProperty("derivatives")
+    kappa = _LazyProperty("derivatives")
+    betas = _LazyProperty("derivatives")
+    gamma = _LazyProperty("derivatives")
+    Kt = _LazyProperty("derivatives")
+    kt = _LazyProperty("derivatives")
+    Ks = _LazyProperty("derivatives")
+    ks = _LazyProperty("derivatives")
+    dpdT_rho = _LazyProperty("derivatives")
+    dpdrho_T = _LazyProperty("derivatives")
+    drhodT_P = _LazyProperty("derivatives")
+    drhodP_T = _LazyProperty("derivatives")
+    dhdT_rho = _LazyProperty("derivatives")
+    dhdT_P = _LazyProperty("derivatives")
+    dhdrho_T = _LazyProperty("derivatives")
+    dhdrho_P = _LazyProperty("derivatives")
+    dhdP_T = _LazyProperty("derivatives")
+    dhdP_rho = _LazyProperty("derivatives")
+    deltat = _LazyProperty("derivatives")
+
+    Z_rho = _LazyProperty("derivatives")
+    IntP = _LazyProperty("derivatives")
+    hInput = _LazyProperty("derivatives")
+
+    def _setLazy(self, **groups):
+        """Define the functions to calculate each group of properties, they
+        are called in the first access to any property of group. The values
+        of a previous state are deleted
+        groups: dict with the group name as key and the function without
+        arguments as value"""
+        for key, value in Fluid_MEOS.__dict__.items():
+            if isinstance(value, _LazyProperty):
+                self.__dict__.pop(key, None)
+        self._lazy = groups
 
     def writeStatetoJSON(self, state, fase):
         Fluid.writeStatetoJSON(self, state, fase)
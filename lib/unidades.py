@@ -20,14 +20,13 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 
 import os
 import json
-from configparser import ConfigParser
 
 from PyQt5.QtWidgets import QApplication
 from PyQt5 import QtCore
 import scipy.constants as k
 
-from lib.config import conf_dir, getMainWindowConfig
-from lib.utilities import representacion
+from lib.config import conf_dir, Preferences, getMainWindowConfig
+from lib.utilities import formatter
 from lib.firstrun import getrates
 
 # Defining conversion factor not available in scipy
@@ -57,6 +56,27 @@ k.TonfUS = k.g * k.tonUS
 k.statV = 300
 
 
+# Functions to format the values of each magnitud with the numeric format
+# defined in preferences, cleared when the preferences are changed
+_formatters = {}
+
+
+def getFormatter(magnitud):
+    """Return the function to format numbers of magnitud with the numeric
+    format defined in preferences"""
+    try:
+        return _formatters[magnitud]
+    except KeyError:
+        kwargs = eval(Preferences.get("NumericFormat", magnitud))
+        func = _formatters[magnitud] = formatter(**kwargs)
+        return func
+
+
+def clearFormatCache():
+    """Delete the saved numeric formats, used when preferences change"""
+    _formatters.clear()
+
+
 def C2K(C):
     """Convert Celcius to Kelvin"""
     return C + 273.15
@@ -97,6 +117,24 @@ def K2Re(K):
     return (K - 273.15) / 1.25
 
 
+class _Unit(object):
+    """Attribute with the value of a magnitud in a unit, calculated in the
+    access with the _toUnit method of the class"""
+    __slots__ = ("unit", )
+
+    def __init__(self, unit):
+        self.unit = unit
+
+    def __get__(self, instance, cls):
+        if instance is None:
+            return self
+        try:
+            return cls._toUnit(float(instance), self.unit)
+        except KeyError:
+            raise AttributeError("'%s' object has no attribute '%s'" % (
+                cls.__name__, self.unit))
+
+
 class unidad(float):
     """
     Generic class to model units
@@ -119,28 +157,29 @@ class unidad(float):
     _magnitudes = []
     __units_set__ = []
 
+    __slots__ = ("magnitud", "code", "_data")
+
     def __init__(self, data, unit="", magnitud=""):
-        """Non proportional magnitudes (Temperature, Pressure)
-        must rewrite this method"""
+        """The value in base unit is calculated in __new__, the value in the
+        other units are calculated only when they are used, see _Unit.
+        Non proportional magnitudes (Temperature, Pressure) must rewrite the
+        conversion methods _getBaseValue and _toUnit"""
         if not magnitud:
             magnitud = self.__class__.__name__
         self.magnitud = magnitud
 
         if data is None:
-            self._data = 0
             self.code = "n/a"
         else:
-            self._data = float(data)
             self.code = ""
+        self._data = float(self)
 
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
-        elif not unit:
-            unit = self.__units__[0]
-        self._data = self._getBaseValue(data, unit, magnitud)
-        for key in self.__class__.rates:
-            self.__setattr__(key, self._data / self.__class__.rates[key])
+    def __init_subclass__(cls, **kwargs):
+        """Define the attributes with the value in each unit of class"""
+        super().__init_subclass__(**kwargs)
+        for unit in list(cls.rates)+cls.__units__:
+            if not hasattr(cls, unit):
+                setattr(cls, unit, _Unit(unit))
 
     def __new__(cls, data, unit="", magnitud=""):
         if not magnitud:
@@ -205,17 +244,31 @@ class unidad(float):
         else:
             return [(cls.__name__, cls.__title__)]
 
+    @classmethod
+    def _toUnit(cls, data, unit):
+        """Convert a value in base unit to unit, inverse of _getBaseValue"""
+        return data/cls.rates[unit]
+
     def format(self, unit="", magnitud=""):
         """Using config file return the unit value in desired numeric format"""
         if not magnitud:
             magnitud = self.__class__.__name__
         if not unit:
             unit = self.func(magnitud)
-        Preferences = ConfigParser()
-        Preferences.read(conf_dir+"pychemqtrc")
-        kwargs = eval(Preferences.get("NumericFormat", magnitud))
         value = self.__getattribute__(unit)
-        return representacion(value, **kwargs)
+        return getFormatter(magnitud)(value)
+
+    @classmethod
+    def format_many(cls, values, unit="", magnitud=""):
+        """Return the list of string representation of values, in base unit,
+        converted to unit and with the numeric format of preferences, like
+        format for each value without creating the instances"""
+        if not magnitud:
+            magnitud = cls.__name__
+        if not unit:
+            unit = cls.func(magnitud)
+        func = getFormatter(magnitud)
+        return [func(cls._toUnit(value, unit)) for value in values]
 
     def get_str(self, conf=None):
         """Return a string representation of class"""
@@ -239,6 +292,8 @@ with support for class unidad operations: txt, config. func."""
     __text__ = []
     _magnitudes = []
 
+    __slots__ = ("txt", "code", "_data")
+
     def __init__(self, data, txt=""):
 
         self.txt = txt
@@ -269,10 +324,14 @@ with support for class unidad operations: txt, config. func."""
 
     def format(self, unit):
         """Using config file return the unit value in desired numeric format"""
-        Preferences = ConfigParser()
-        Preferences.read(conf_dir+"pychemqtrc")
-        kwargs = eval(Preferences.get("NumericFormat", "Dimensionless"))
-        return representacion(self, **kwargs)
+        return getFormatter("Dimensionless")(self)
+
+    @classmethod
+    def format_many(cls, values, unit="", magnitud=""):
+        """Return the list of string representation of values with the
+        numeric format of preferences"""
+        func = getFormatter("Dimensionless")
+        return [func(value) for value in values]
 
     @property
     def str(self):
@@ -296,6 +355,7 @@ class Temperature(unidad):
     >>> print T.K, T.C, T.F
     298.15 25.0 77.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Temperature")
     __text__ = ['K', 'ºC', 'ºR', 'ºF', 'ºRe']
     __units__ = ['K', 'C', 'R', 'F', 'Re']
@@ -303,43 +363,6 @@ class Temperature(unidad):
     __units_set__ = {"altsi": "C", "si": "K", "metric": "C", "cgs": "C",
                      "english": "F"}
 
-    def __init__(self, data, unit="K", magnitud=""):
-
-        if not magnitud:
-            magnitud = self.__class__.__name__
-        self.magnitud = magnitud
-
-        if data is None:
-            data = 0
-            self.code = "n/a"
-        else:
-            data = float(data)
-            self.code = ""
-
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
-
-        if unit == "K":
-            self._data = data
-        elif unit == "C":
-            self._data = C2K(data)
-        elif unit == "F":
-            self._data = F2K(data)
-        elif unit == "R":
-            self._data = R2K(data)
-        elif unit == "Re":
-            self._data = Re2K(data)
-        else:
-            raise ValueError(
-                QApplication.translate("pychemqt", "Wrong input code"))
-
-        self.K = self._data
-        self.C = K2C(self._data)
-        self.F = K2F(self._data)
-        self.R = K2R(self._data)
-        self.Re = K2Re(self._data)
-
     @classmethod
     def _getBaseValue(cls, data, unit, magnitud):
         if data is None:
@@ -367,6 +390,18 @@ class Temperature(unidad):
 
         return data
 
+    @classmethod
+    def _toUnit(cls, data, unit):
+        if unit == "C":
+            return K2C(data)
+        elif unit == "F":
+            return K2F(data)
+        elif unit == "R":
+            return K2R(data)
+        elif unit == "Re":
+            return K2Re(data)
+        return data
+
 
 class DeltaT(unidad):
     """Class that models a delta temperature measure
@@ -382,6 +417,7 @@ class DeltaT(unidad):
     >>> print T.K, T.F
     25.0 45.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Temperature increase")
     rates = {"K": 1.,
              "C": 1.,
@@ -409,6 +445,7 @@ class Angle(unidad):
     >>> print angle.rad
     0.436332312999
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Angle")
     rates = {"rad": 1.,
              "deg": 2*k.pi/360,
@@ -446,6 +483,7 @@ class Length(unidad):
     >>> print L.m, L.inch, L.ft
     0.3048 12.0 1.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Length")
     rates = {"m": 1.,
              "cm": k.centi,
@@ -511,6 +549,7 @@ class Area(unidad):
     >>> print S.m2, S.inch2
     0.09290304 144.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Area")
     rates = {"m2": 1.,
              "cm2": k.centi**2,
@@ -552,6 +591,7 @@ class Volume(unidad):
     >>> print V.l, V.ft3, V.galUS
     158.987294928 5.61458333333 42.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Volume")
     rates = {"m3": 1.,
              "cc": k.centi**3,
@@ -612,6 +652,7 @@ class Time(unidad):
     >>> print t.min, t.h
     1440.0 24.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Time")
     rates = {"s": 1.,
              "min": k.minute,
@@ -645,6 +686,7 @@ class Frequency(unidad):
     >>> print t.rpm
     9.54929658551
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Frequency")
     rates = {"rpm": 1.,
              "rph": 1./60,
@@ -685,6 +727,7 @@ class Speed(unidad):
     >>> print V.mmin, V.kmh, V.fts
     60.0 3.6 3.28083989501
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Speed")
     rates = {"ms": 1.,
              "cms": k.centi,
@@ -727,6 +770,7 @@ class Acceleration(unidad):
     >>> print g.fts2
     32.1850393701
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Acceleration")
     rates = {"ms2": 1.,
              "cms2": k.centi,
@@ -767,6 +811,7 @@ class Mass(unidad):
     >>> print M.kg, M.g, M.oz
     0.45359237 453.59237 16.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Mass")
     rates = {"kg": 1.,
              "g": 1./k.kilo,
@@ -810,6 +855,7 @@ class Mol(unidad):
     >>> print M.mol, M.lbmol
     1000.0 2.20462262185
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Mol")
     rates = {"kmol": 1.,
              "mol": 1./k.kilo,
@@ -844,6 +890,7 @@ class SpecificVolume(unidad):
     >>> print  R.m3kg, R.ft3lb
     0.05 0.800923168698
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Specific Volume")
     rates = {"m3kg": 1.,
              "lg": 1.,
@@ -899,6 +946,7 @@ class SpecificVolume_square(unidad):
     >>> print  R.m3kg, R.ft3lb
     5e-05 0.0128295584431
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Third virial coefficient")
     rates = {"m3kg": 1.,
              "lg": 1.,
@@ -948,6 +996,7 @@ class MolarVolume(unidad):
     >>> print  R.m3kmol, R.ft3lbmol
     0.05 0.800923168698
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Molar Volume")
     rates = {"m3kmol": 1.,
              "lmol": 1.,
@@ -991,6 +1040,7 @@ class Density(unidad):
     >>> print R.kgm3, R.lbft3
     1000.0 62.4279605761
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Density")
     rates = {"kgm3": 1.,
              "gl": 1.,
@@ -1046,6 +1096,7 @@ class MolarDensity(unidad):
     >>> print R.molcc, R.lbmolft3
     1.0 0.0624279605761
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Molar Density")
     rates = {"kmolm3": 1.,
              "moll": 1.,
@@ -1081,6 +1132,7 @@ class Force(unidad):
     >>> print F.N, F.kgf, F.dyn
     0.138254954376 0.0140980818502 13825.4954376
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Force")
     rates = {"N": 1.,
              "kN": k.kilo,
@@ -1134,6 +1186,7 @@ class Pressure(unidad):
     >>> print P.bar, P.atm, P.psi, P.kgcm2g
     1.01325 1.0 14.6959487755 0.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Pressure")
     rates = {"Pa": 1.,
              "MPa": k.mega,
@@ -1169,38 +1222,6 @@ class Pressure(unidad):
     __units_set__ = {"altsi": "bar", "si": "Pa", "metric": "Pa",
                      "cgs": "dyncm2", "english": "psi"}
 
-    def __init__(self, data, unit="Pa", magnitud=""):
-
-        if data is None:
-            data = 0
-            self.code = "n/a"
-        else:
-            self.code = ""
-
-        if not magnitud:
-            magnitud = self.__class__.__name__
-        self.magnitud = magnitud
-
-        if unit == "conf":
-            Config = getMainWindowConfig()
-            unit = self.__units__[Config.getint('Units', magnitud)]
-
-        if unit == "barg":
-            self._data = data*k.bar+k.atm
-        elif unit == "psig":
-            self._data = data*k.psi+k.atm
-        elif unit == "kgcm2g":
-            self._data = data*k.g/k.centi**2+k.atm
-        else:
-            self._data = data * self.__class__.rates[unit]
-
-        for key in self.__class__.rates:
-            self.__setattr__(key, self._data/self.__class__.rates[key])
-
-        self.barg = (self.Pa-k.atm)/k.bar
-        self.psig = (self.Pa-k.atm)/k.psi
-        self.kgcm2g = (self.Pa-k.atm)*k.centi**2/k.g
-
     @classmethod
     def _getBaseValue(cls, data, unit, magnitud):
         if data is None:
@@ -1228,6 +1249,16 @@ class Pressure(unidad):
 
         return data
 
+    @classmethod
+    def _toUnit(cls, data, unit):
+        if unit == "barg":
+            return (data-k.atm)/k.bar
+        elif unit == "psig":
+            return (data-k.atm)/k.psi
+        elif unit == "kgcm2g":
+            return (data-k.atm)*k.centi**2/k.g
+        return data/cls.rates[unit]
+
 
 class DeltaP(unidad):
     """Class that models a delta pressure measure
@@ -1263,6 +1294,7 @@ class DeltaP(unidad):
     >>> print P.bar, P.atm, P.psi, P.kgcm2g
     1.01325 1.0 14.6959487755 0.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Pressure increase")
     rates = {"Pa": 1.,
              "MPa": k.mega,
@@ -1333,6 +1365,7 @@ class Energy(unidad):
     >>> print E.J, E.Btu, E.Wh
     4184.0 3.96566683139 1.16222222222
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Energy")
     rates = {"J": 1.,
              "kJ": k.kilo,
@@ -1391,6 +1424,7 @@ class Enthalpy(unidad):
     >>> print H.kJkg, H.kcalkg
     -11.63 -2.77963671128
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Enthalpy")
     rates = {"Jkg": 1.,
              "kJkg": k.kilo,
@@ -1431,6 +1465,7 @@ class MolarEnthalpy(unidad):
     >>> print H.kJkmol, H.kcalkmol
     -11.63 -2.77963671128
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Molar Enthalpy")
     rates = {"Jkmol": 1.,
              "kJkmol": k.kilo,
@@ -1474,6 +1509,7 @@ class Entropy(unidad):
     >>> print S.kJK, S.kcalK
     56.9730160415 13.616877639
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Entropy")
     rates = {"JK": 1.,
              "kJK": k.kilo,
@@ -1513,6 +1549,7 @@ class SpecificHeat(unidad):
     >>> print C.kJkgK, C.kcalkgK
     4.1868 1.00066921606
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Specific Heat")
     rates = {"JkgK": 1.,
              "kJkgK": k.kilo,
@@ -1553,6 +1590,7 @@ class MolarSpecificHeat(unidad):
     >>> print C.kJkmolK, C.kcalkmolK
     4.1868 1.00066921606
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Molar Specific Heat")
     rates = {"JkmolK": 1.,
              "kJkmolK": k.kilo,
@@ -1596,6 +1634,7 @@ class Power(unidad):
     >>> print W.kW, W.hp, W.kcalh
     0.00146535535086 0.00196507389461 1.26082200361
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Power")
     rates = {"W": 1.,
              "kW": k.kilo,
@@ -1662,6 +1701,7 @@ class MassFlow(unidad):
     >>> print G.kgh, G.lbh, G.gmin
     3.6 7.93664143866 60.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Mass Flow")
     rates = {"kgs": 1.,
              "kgmin": 1./k.minute,
@@ -1711,6 +1751,7 @@ class MolarFlow(unidad):
     >>> print G.kmolh, G.lbmolh, G.molmin
     3.6 7.93664143866 60.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Molar Flow")
     rates = {"kmols": 1.,
              "kmolmin": 1./k.minute,
@@ -1762,6 +1803,7 @@ class VolFlow(unidad):
     >>> print V.m3h, V.ft3min, V.ccs
     0.06 0.0353146667215 16.6666666667
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Volumetric Flow")
     rates = {"m3s": 1.,
              "m3min": 1./k.minute,
@@ -1829,6 +1871,7 @@ class Diffusivity(unidad):
     >>> print k.m2s, k.ft2s
     0.0005 0.00538195520835
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Diffusivity")
     rates = {"m2s": 1.,
              "cm2s": k.centi**2,
@@ -1871,6 +1914,7 @@ class HeatFlux(unidad):
     >>> print H.Wm2, H.kcalhm2
     3.15459074506 2.71427501965
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Heat Flux")
     rates = {"Wm2": 1.,
              "kWm2": k.kilo,
@@ -1906,6 +1950,7 @@ class ThermalConductivity(unidad):
     >>> print k.WmK, k.BtuhftF, k.kcalhmK
     50.0 28.8894658271 43.0210325048
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Thermal Conductivity")
     rates = {"WmK": 1.,
              "mWmK": 1./k.kilo,
@@ -1948,6 +1993,7 @@ class UA(unidad):
     >>> print h.WK, h.kcalhK
     5.67826334111 4.88569503537
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "UA")
     rates = {"WK": 1.,
              "kWK": k.kilo,
@@ -1989,6 +2035,7 @@ class HeatTransfCoef(unidad):
     >>> print h.Wm2K, h.kcalhm2K
     5.67826334111 4.88569503537
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Heat Transfer Coefficient")
     rates = {"Wm2K": 1.,
              "kWm2K": k.kilo,
@@ -2034,6 +2081,7 @@ class Fouling(unidad):
     >>> print h.m2KW, h.hm2Kkcal
     0.176110183682 0.204679169035
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Fouling Factor")
     rates = {"m2KW": 1.,
              "m2KkW": 1./k.kilo,
@@ -2069,6 +2117,7 @@ class Tension(unidad):
     >>> print s.Nm, s.dyncm
     14.5939029372 14593.9029372
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Surface Tension")
     rates = {"Nm": 1.,
              "mNm": k.milli,
@@ -2100,6 +2149,7 @@ class Viscosity(unidad):
     >>> print m.cP, m.Pas, m.lbfth
     100.0 0.1 241.90883105
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Viscosity")
     rates = {"Pas": 1.,
              "mPas": k.milli,
@@ -2133,6 +2183,7 @@ class SolubilityParameter(unidad):
     >>> print S.Jm3, S.calcc
     193.025764622 0.0943668467764
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Solubility Parameter")
     rates = {"Jm3": 1.,
              "calcc": (k.calorie*k.mega)**0.5,
@@ -2159,6 +2210,7 @@ class PotencialElectric(unidad):
     >>> print e.Vm
     90000.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Electric Potencial")
     rates = {"Vm": 1.,
              "kVm": k.kilo,
@@ -2185,6 +2237,7 @@ class DipoleMoment(unidad):
     >>> print dp.Cm, dp.Debye
     3.33564095198e-30 1.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Dipole Moment")
     rates = {"Cm": 1.,
              "Debye": k.debye}
@@ -2205,6 +2258,7 @@ class CakeResistance(unidad):
     >>> print dp.mkg
     0.67196897514
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Cake Resistance")
     rates = {"mkg": 1.,
              "cmg": k.centi/k.kilo,
@@ -2225,6 +2279,7 @@ class PackingDP(unidad):
     >>> print dp.mmH2Om
     83.3333333333
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Packing Pressure drop")
     rates = {"mmH2Om": 1.,
              "inH2Oft": k.inch/k.milli/k.foot}
@@ -2247,6 +2302,7 @@ class V2V(unidad):
     >>> print V.m3m3
     0.178107606679
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Gas-Oil ratio")
     rates = {"m3m3": 1.,
              "ft3ft3": 1.,
@@ -2272,6 +2328,7 @@ class InvTemperature(unidad):
     >>> print T.K, T.F
     25.0 13.8888888889
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Temperature inverse")
     rates = {"K": 1.,
              "C": 1.,
@@ -2318,6 +2375,7 @@ class InvPressure(unidad):
     >>> print P.bar, P.atm, P.psi, P.kgcm2g
     1.01325 1.0 14.6959487755 0.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Pressure inverse")
     rates = {"Pa": 1.,
              "MPa": 1./k.mega,
@@ -2370,6 +2428,7 @@ class EnthalpyPressure(unidad):
     >>> print H.JkgPa, H.kJkgMPa
     5.0 5000.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Enthalpy per pressure")
     rates = {"JkgPa": 1.,
              "kJkgkPa": 1.,
@@ -2394,6 +2453,7 @@ class EnthalpyDensity(unidad):
     >>> print H.JkgPa, H.kJkgMPa
     5.0 5000.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Enthalpy per density")
     rates = {"Jkgkgm3": 1.,
              "kJkgkgm3": k.kilo,
@@ -2416,6 +2476,7 @@ class TemperaturePressure(unidad):
     >>> print H.KPa, H.KkPa
     1.0 1000.0
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Temperature per pressure")
     rates = {"KPa": 1.,
              "KkPa": k.milli,
@@ -2444,6 +2505,7 @@ class PressureTemperature(unidad):
     >>> print H.kPaK, H.atmK
     1.0 0.00986923266716
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Pressure per Temperature")
     rates = {"PaK": 1.,
              "kPaK": k.kilo,
@@ -2470,6 +2532,7 @@ class PressureDensity(unidad):
     >>> print H.kPakgm3, H.atmkgm3
     1.0 0.00986923266716
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Pressure per density")
     rates = {"Pakgm3": 1.,
              "kPakgm3": k.kilo,
@@ -2499,6 +2562,7 @@ class DensityPressure(unidad):
     >>> print H.kgm3Pa, H.kgm3atm
     0.0116164084484 1177.03258603
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Density per pressure")
     rates = {"kgm3Pa": 1.,
              "kgm3kPa": k.milli,
@@ -2527,6 +2591,7 @@ class DensityTemperature(unidad):
     >>> print H.kgm3K, H.lbft3F
     1000.0 34.6822003201
     """
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Density per temperature")
     rates = {"kgm3K": 1.,
              "gccK": 1./k.liter,
@@ -2559,6 +2624,7 @@ class Currency(unidad):
         rates = json.load(archivo)
     archivo.close
     fecha = rates.pop("date")
+    __slots__ = ()
     __title__ = QApplication.translate("pychemqt", "Currency")
     __text__ = ['$', '€', '£', '¥', '¥', 'руб', 'A$', 'R$', 'C$', 'Fr.',
                 'kr', 'HK$', '₨', '₩', '₨', 'RM', 'NZ$', 'S$', 'NT$',
@@ -2700,10 +2766,30 @@ units_set = {
     'si': [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 11, 0, 0, 0, 0, 0, 0, 2, 2, 2, 2, 2, 0, 3, 0, 0, 0, 2, 2, 2, 0, 0, 0, 0, 0, 0, 0, 8, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
     'metric': [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3, 0, 0, 0, 2, 2, 1, 0, 0, 0, 0, 0, 0, 0, 7, 7, 0, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, 2, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0]}
 
+
+def benchmark(number=100000):
+    """Print the time of creation of instances and unit conversion, in µs
+    per operation"""
+    from timeit import timeit
+    namespace = {"Pressure": Pressure, "Temperature": Temperature,
+                 "Enthalpy": Enthalpy, "Dimensionless": Dimensionless}
+    test = (("Enthalpy(1.5e5)", "Enthalpy(1.5e5)"),
+            ("Enthalpy(150, 'kJkg')", "Enthalpy(150, 'kJkg')"),
+            ("Pressure(1.5e5)", "Pressure(1.5e5)"),
+            ("Temperature(25, 'C')", "Temperature(25, 'C')"),
+            ("Dimensionless(0.5)", "Dimensionless(0.5)"),
+            ("Pressure(1.5e5).bar", "Pressure(1.5e5).bar"))
+    for title, stmt in test:
+        t = timeit(stmt, number=number, globals=namespace)
+        print("%-25s %8.3f µs" % (title, t/number*1e6))
+
+
 if __name__ == "__main__":
 #    import doctest
 #    doctest.testmod()
 
+    benchmark()
+
     P=Pressure(5, "MPa")
     print(P)
 
@@ -22,6 +22,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.'''
 # Module with utilities:
 #   - format2txt: Function to convert dict format config in a string value
 #   - representacion: Function for string representation of float values
+#   - formatter: Function to build a precompiled representacion function
 #   - colors: Function to generate colors
 #   - exportTable; Save data to a file
 ###############################################################################
@@ -68,6 +69,17 @@ def representacion(float, format=0, total=0, decimales=4, exp=False, tol=5,
     if type(float) is str:
         return float
 
+    if -10**tol > float or (-10**-tol < float < 10**-tol and float != 0) or float > 10**tol:
+        format = 2
+    if float == 0:
+        decimales = 1
+
+    string = _formatString(format, total, decimales, signo, thousand)
+    return string.format(float)
+
+
+def _formatString(format, total, decimales, signo, thousand):
+    """Return the format string used in representacion"""
     if signo:
         start = "{:+"
     else:
@@ -78,19 +90,35 @@ def representacion(float, format=0, total=0, decimales=4, exp=False, tol=5,
     else:
         coma = "."
 
-    if -10**tol > float or (-10**-tol < float < 10**-tol and float != 0) or float > 10**tol:
-        format = 2
-    if float == 0:
-        decimales = 1
-
     if format == 1:
         string = start+"{}{:d}g".format(coma, decimales)+"}"
     elif format == 2:
         string = start+"{:d}{}{:d}e".format(total, coma, decimales)+"}"
     else:
         string = start+"{:d}{}{:d}f".format(total, coma, decimales)+"}"
-
-    return string.format(float)
+    return string
+
+
+def formatter(format=0, total=0, decimales=4, exp=False, tol=5, signo=False,
+              thousand=False):
+    """Return a function with the same result as representacion with the
+    given options, with the format strings built only once, useful to
+    format many values"""
+    normal = _formatString(format, total, decimales, signo, thousand).format
+    engineering = _formatString(2, total, decimales, signo, thousand).format
+    zero = _formatString(format, total, 1, signo, thousand).format
+    upper = 10**tol
+    lower = 10**-tol
+
+    def func(value):
+        if type(value) is str:
+            return value
+        if value == 0:
+            return zero(value)
+        if -upper > value or -lower < value < lower or value > upper:
+            return engineering(value)
+        return normal(value)
+    return func
 
 
 def colors(number, mix="", scale=False):
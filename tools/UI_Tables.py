@@ -77,7 +77,7 @@ from scipy.optimize import fsolve
 from matplotlib.font_manager import FontProperties
 
 from lib import meos, mEoS, unidades, plot, config
-from lib.utilities import representacion, exportTable
+from lib.utilities import representacion, formatter, exportTable
 from UI.widgets import (Entrada_con_unidades, createAction, LineStyleCombo,
                         MarkerCombo, ColorSelector, InputFond, Status, Tabla)
 from UI.delegate import CheckEditor
@@ -2484,6 +2484,7 @@ class TablaMEoS(Tabla):
 
     def setStr(self):
         """Add data as string to cell table"""
+        formatters = [formatter(**kwargs) for kwargs in self.format]
         for fila, array in enumerate(self.data):
             if fila >= self.rowCount():
                 self.addRow()
@@ -2491,7 +2492,7 @@ class TablaMEoS(Tabla):
                 if isinstance(data, QtCore.QString):
                     txt = data
                 else:
-                    txt = representacion(data, **self.format[columna])
+                    txt = formatters[columna](data)
                 self.setValue(fila, columna, txt)
 
     def setRow(self, row, data):